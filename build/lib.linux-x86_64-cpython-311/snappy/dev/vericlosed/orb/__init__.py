@@ -0,0 +1 @@
+# Directory to find orb binary
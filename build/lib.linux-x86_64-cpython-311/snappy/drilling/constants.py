@@ -0,0 +1,10 @@
+graph_trace_max_steps = 300
+trace_max_steps = 300
+
+start_point_bias = 1.2498653253
+piece_midpoint_bias = 1.818449629072142
+
+point_perturbation_direction = [ 0.8466, 0.3176, 0.4268 ]
+
+
+enumeration_start_point_bias = 0.6180339887
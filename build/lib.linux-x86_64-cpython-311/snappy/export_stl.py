@@ -0,0 +1,410 @@
+from builtins import range
+import math
+import os
+import struct
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+def facet_stl(triangle):
+    vertex1, vertex2, vertex3 = triangle
+    a = (vertex3[0]-vertex1[0], vertex3[1]-vertex1[1], vertex3[2]-vertex1[2])
+    b = (vertex2[0]-vertex1[0], vertex2[1]-vertex1[1], vertex2[2]-vertex1[2])
+    normal = (a[1]*b[2] - a[2]*b[1], a[2]*b[0] - a[0]*b[2], a[0]*b[1] - a[1]*b[0])
+    return ''.join([
+        '  facet normal %f %f %f\n' % tuple(normal),
+        '    outer loop\n',
+        '      vertex %f %f %f\n' % tuple(vertex1),
+        '      vertex %f %f %f\n' % tuple(vertex2),
+        '      vertex %f %f %f\n' % tuple(vertex3),
+        '    endloop\n',
+        '  endfacet\n'
+        ])
+
+def subdivide_triangles(triangles, num_subdivisions):
+    if num_subdivisions == 0:
+        for triangle in triangles:
+            yield triangle
+    elif num_subdivisions == 1:
+        # A small function for getting the midpoint of two points.
+        midpoint = lambda P, Q: ((P[0] + Q[0]) / 2, (P[1] + Q[1]) / 2, (P[2] + Q[2]) / 2)
+        for (x, y, z) in triangles:
+            yield (x, midpoint(x, y), midpoint(x, z))
+            yield (midpoint(y, x), y, midpoint(y, z))
+            yield (midpoint(z, x), midpoint(z, y), z)
+            yield (midpoint(x, y), midpoint(y, z), midpoint(z, x))
+    else:
+        for triangle in subdivide_triangles(subdivide_triangles(triangles, 1), num_subdivisions - 1):
+            yield triangle
+    return
+
+def projection(triangle, cutoff_radius):
+    ''' Return the projection of a point in the Klein model to the Poincare model. '''
+    x, y, z = triangle
+    scale = min(1 / (1 + math.sqrt(max(0, 1 - (x**2 + y**2 + z**2)))), cutoff_radius)
+    return (scale*x, scale*y, scale*z)
+
+
+def klein_stl(face_dicts):
+    ''' Yield triangles describing these faces. '''
+    for face in face_dicts:
+        vertices = face['vertices']
+        for i in range(len(vertices)-2):
+            yield (vertices[0], vertices[i+1], vertices[i+2])
+    return
+
+def klein_cutout_stl(face_dicts, shrink_factor=0.9):
+    ''' Yield triangles describing these faces after removing a fraction of the interior.
+    
+    The fraction removed is given by shrink_factor. '''
+    for face in face_dicts:
+        vertices = face['vertices']
+        center = [sum(vertex[i] for vertex in vertices) / len(vertices) for i in range(3)]
+        new_vertices = [[vertex[i] + (center[i] - vertex[i]) / 3 for i in range(3)] for vertex in vertices]
+        new_inside_points = [[point[i] * shrink_factor for i in range(3)] for point in new_vertices]
+        for i in range(len(new_vertices)):
+            yield (new_vertices[i], new_inside_points[(i+1) % len(new_vertices)], new_inside_points[i])
+            yield (new_vertices[i], new_vertices[(i+1) % len(new_vertices)], new_inside_points[(i+1) % len(new_vertices)])
+            yield (vertices[i], new_vertices[(i+1) % len(vertices)], new_vertices[i])
+            yield (vertices[i], vertices[(i+1) % len(vertices)], new_vertices[(i+1) % len(vertices)])
+            # We have to go in the opposite direction this time as the normal should point in towards O.
+            yield tuple(tuple(shrink_factor * coord for coord in point) for point in (vertices[i], new_vertices[i], new_vertices[(i+1) % len(vertices)]))
+            yield tuple(tuple(shrink_factor * coord for coord in point) for point in (vertices[i], new_vertices[(i+1) % len(vertices)], vertices[(i+1) % len(vertices)]))
+    return
+
+def poincare_stl(face_dicts, num_subdivisions=5, cutoff_radius=0.9):
+    ''' Yield the output of klein_stl(face_dicts, ...) after applying projection to every vertex produced. '''
+    for triangle in subdivide_triangles(klein_stl(face_dicts), num_subdivisions):
+        yield (projection(triangle[0], cutoff_radius), projection(triangle[1], cutoff_radius), projection(triangle[2], cutoff_radius))
+    return
+
+def poincare_cutout_stl(face_dicts, num_subdivisions=3, shrink_factor=0.9, cutoff_radius=0.9):
+    ''' Yield the output of klein_cutout_stl(face_dicts, ...) after applying projection to every vertex produced. '''
+    for triangle in subdivide_triangles(klein_cutout_stl(face_dicts, shrink_factor), num_subdivisions):
+        yield (projection(triangle[0], cutoff_radius), projection(triangle[1], cutoff_radius), projection(triangle[2], cutoff_radius))
+    return
+
+def stl(face_dicts, model='klein', cutout=False, num_subdivisions=3, shrink_factor=0.9, cutoff_radius=0.9):
+    """
+    Yield the lines of an stl file corresponding to the solid given by face_dicts that is suitable for 3d printing.
+    
+    Arguments can be given to modify the model produced:
+        model='klein' - (alt. 'poincare') the model of HH^3 to use.
+        cutout=False - remove the interior of each face
+        shrink_factor=0.9 - the fraction to cut out of each face
+            cuttoff_radius=0.9 - maximum rescaling for projection into Poincare model
+        num_subdivision=3 - number of times to subdivide for the Poincare model
+    For printing domains in the Poincare model, cutoff_radius is critical for avoiding infinitely
+    thin cusps, which cannot be printed.
+    """
+    _check_arguments(model, shrink_factor)
+
+    if numpy is None:
+        for line in _python_stl(face_dicts, model, cutout, num_subdivisions, shrink_factor,
+                                cutoff_radius):
+            yield line
+        return
+
+    yield 'solid\n'
+    # Each batch of facets is formatted at once.
+    for triangles in triangle_batches(face_dicts, model, cutout, num_subdivisions, shrink_factor,
+                                      cutoff_radius, batch_size=4096):
+        yield ascii_stl_batch(triangles)
+    yield 'endsolid\n'
+    return
+
+def _python_stl(face_dicts, model='klein', cutout=False, num_subdivisions=3, shrink_factor=0.9,
+                cutoff_radius=0.9):
+    ''' The output of stl without using NumPy. '''
+    if model == 'klein' and cutout:
+        output = klein_cutout_stl(face_dicts, shrink_factor=shrink_factor)
+    elif model == 'klein' and not cutout:
+        output = klein_stl(face_dicts)
+    elif model == 'poincare' and cutout:
+        output = poincare_cutout_stl(face_dicts, num_subdivisions=num_subdivisions, shrink_factor=shrink_factor, cutoff_radius=cutoff_radius)
+    else:
+        output = poincare_stl(face_dicts, num_subdivisions=num_subdivisions, cutoff_radius=cutoff_radius)
+
+    yield 'solid\n'
+    for triangle in output:
+        yield facet_stl(triangle)
+    yield 'endsolid\n'
+    return
+
+
+# Faster export using NumPy (if available).
+#
+# The triangles of the Klein model (there are only a few per face of the
+# domain) are still computed by the generators above. They are then
+# subdivided and projected as arrays of shape (n, 3, 3) (triangle, vertex,
+# coordinate) in batches of bounded size so that the millions of facets of
+# a finely subdivided domain never have to be held in memory at once.
+
+def subdivide_triangle_array(triangles, num_subdivisions):
+    ''' Vectorized version of subdivide_triangles operating on an array of shape (n, 3, 3).
+
+    The triangles are returned in the same order as by subdivide_triangles. '''
+    for i in range(num_subdivisions):
+        x, y, z = triangles[:,0], triangles[:,1], triangles[:,2]
+        xy, xz, yz = (x + y) / 2, (x + z) / 2, (y + z) / 2
+        triangles = numpy.stack(
+            [ numpy.stack([ x, xy, xz], axis=1),
+              numpy.stack([xy,  y, yz], axis=1),
+              numpy.stack([xz, yz,  z], axis=1),
+              numpy.stack([xy, yz, xz], axis=1) ], axis=1).reshape(-1, 3, 3)
+    return triangles
+
+def projection_array(points, cutoff_radius):
+    ''' Vectorized version of projection for an array of points (the last axis holding the coordinates). '''
+    norm_squared = numpy.sum(points * points, axis=-1, keepdims=True)
+    scale = numpy.minimum(
+        1 / (1 + numpy.sqrt(numpy.maximum(0, 1 - norm_squared))), cutoff_radius)
+    return scale * points
+
+def normal_array(triangles):
+    ''' The normals of the triangles as computed by facet_stl. '''
+    return numpy.cross(triangles[:,2] - triangles[:,0],
+                       triangles[:,1] - triangles[:,0])
+
+def klein_triangles(face_dicts, cutout=False, shrink_factor=0.9):
+    ''' List the (unsubdivided) triangles of the Klein model. '''
+    if cutout:
+        return list(klein_cutout_stl(face_dicts, shrink_factor=shrink_factor))
+    return list(klein_stl(face_dicts))
+
+def _check_arguments(model, shrink_factor):
+    if shrink_factor < 0 or shrink_factor > 1:
+        raise ValueError('shrink_factor must be between 0 and 1.')
+    if model not in ['klein', 'poincare']:
+        raise ValueError('Unknown model. Known models: \'klein\' and \'poincare\'.')
+
+def num_triangles(face_dicts, model='klein', cutout=False, num_subdivisions=3):
+    ''' The number of facets stl(face_dicts, ...) produces. '''
+    if cutout:
+        n = sum(6 * len(face['vertices']) for face in face_dicts)
+    else:
+        n = sum(len(face['vertices']) - 2 for face in face_dicts)
+    if model == 'poincare':
+        n *= 4 ** num_subdivisions
+    return n
+
+def triangle_batches(face_dicts, model='klein', cutout=False, num_subdivisions=3, shrink_factor=0.9,
+                     cutoff_radius=0.9, batch_size=65536):
+    ''' Yield the triangles of stl(face_dicts, ...) as arrays of shape (n, 3, 3) with n at most
+    batch_size (unless a single triangle subdivides into more facets).
+
+    This requires NumPy. '''
+    if numpy is None:
+        raise ImportError('Exporting meshes in batches requires NumPy.')
+    _check_arguments(model, shrink_factor)
+
+    triangles = numpy.array(klein_triangles(face_dicts, cutout, shrink_factor), dtype=float).reshape(-1, 3, 3)
+    if model == 'klein':
+        for start in range(0, len(triangles), batch_size):
+            yield triangles[start:start + batch_size]
+        return
+
+    step = max(1, batch_size // 4 ** num_subdivisions)
+    for start in range(0, len(triangles), step):
+        subdivided = subdivide_triangle_array(triangles[start:start + step], num_subdivisions)
+        yield projection_array(subdivided, cutoff_radius)
+    return
+
+_facet_template = ''.join([
+    '  facet normal %f %f %f\n',
+    '    outer loop\n',
+    '      vertex %f %f %f\n',
+    '      vertex %f %f %f\n',
+    '      vertex %f %f %f\n',
+    '    endloop\n',
+    '  endfacet\n'])
+
+def ascii_stl_batch(triangles):
+    ''' The facets of an ascii stl file for an array of triangles as a single string. '''
+    data = numpy.concatenate(
+        [normal_array(triangles), triangles.reshape(-1, 9)], axis=1)
+    return (_facet_template * len(triangles)) % tuple(data.ravel().tolist())
+
+_binary_stl_dtype = [('normal', '<f4', (3,)),
+                     ('vertices', '<f4', (3, 3)),
+                     ('attribute', '<u2')]
+
+def binary_stl(face_dicts, model='klein', cutout=False, num_subdivisions=3, shrink_factor=0.9,
+               cutoff_radius=0.9, batch_size=65536):
+    """
+    Yield the chunks (bytes) of a binary stl file corresponding to the solid given by
+    face_dicts. The arguments are as for stl.
+
+    A binary stl file is about a fifth of the size of an ascii stl file and much faster to
+    write and read. This requires NumPy.
+    """
+    _check_arguments(model, shrink_factor)
+
+    header = b'binary STL exported by SnapPy'
+    yield header.ljust(80, b' ')
+    yield struct.pack('<I', num_triangles(face_dicts, model, cutout, num_subdivisions))
+    for triangles in triangle_batches(face_dicts, model, cutout, num_subdivisions, shrink_factor,
+                                      cutoff_radius, batch_size):
+        records = numpy.zeros(len(triangles), dtype=_binary_stl_dtype)
+        records['normal'] = normal_array(triangles)
+        records['vertices'] = triangles
+        yield records.tobytes()
+    return
+
+def indexed_mesh(face_dicts, model='klein', cutout=False, num_subdivisions=3, shrink_factor=0.9,
+                 cutoff_radius=0.9, decimals=9):
+    """
+    Return the solid given by face_dicts (the arguments are as for stl) as a pair of arrays:
+    the vertices (shape (m, 3)) and, for each triangle, the indices of its vertices (shape
+    (n, 3)). Vertices agreeing after rounding to the given number of decimals are shared
+    between triangles.
+
+    This requires NumPy.
+    """
+    triangles = numpy.concatenate(
+        list(triangle_batches(face_dicts, model, cutout, num_subdivisions, shrink_factor,
+                              cutoff_radius)) + [numpy.zeros((0, 3, 3))])
+    points = numpy.round(triangles.reshape(-1, 3), decimals)
+    # Avoid having both 0.0 and -0.0.
+    points += 0.0
+    vertices, indices = numpy.unique(points, axis=0, return_inverse=True)
+    return vertices, indices.reshape(-1, 3)
+
+def ply(vertices, indices):
+    ''' Yield the chunks (bytes) of a binary ply file for the given indexed mesh. '''
+    yield ''.join([
+        'ply\n',
+        'format binary_little_endian 1.0\n',
+        'comment exported by SnapPy\n',
+        'element vertex %d\n' % len(vertices),
+        'property float x\n',
+        'property float y\n',
+        'property float z\n',
+        'element face %d\n' % len(indices),
+        'property list uchar int vertex_indices\n',
+        'end_header\n']).encode('ascii')
+    yield numpy.asarray(vertices, dtype='<f4').tobytes()
+    faces = numpy.zeros(len(indices), dtype=[('n', 'u1'), ('indices', '<i4', (3,))])
+    faces['n'] = 3
+    faces['indices'] = indices
+    yield faces.tobytes()
+    return
+
+def obj(vertices, indices):
+    ''' Yield the lines of a Wavefront obj file for the given indexed mesh. '''
+    yield '# exported by SnapPy\n'
+    for vertex in vertices.tolist():
+        yield 'v %f %f %f\n' % tuple(vertex)
+    for face in (indices + 1).tolist():
+        yield 'f %d %d %d\n' % tuple(face)
+    return
+
+mesh_formats = ['stl', 'binary_stl', 'ply', 'obj']
+
+def export_mesh(filename, face_dicts, file_format=None, model='klein', cutout=False, num_subdivisions=3,
+                shrink_factor=0.9, cutoff_radius=0.9, callback=None):
+    """
+    Write the solid given by face_dicts to a file. The file_format is one of
+
+        'stl' - ascii stl (the output of stl),
+        'binary_stl' - binary stl (the output of binary_stl),
+        'ply' - binary ply with shared vertices (see indexed_mesh),
+        'obj' - Wavefront obj with shared vertices (see indexed_mesh),
+
+    and defaults to 'ply' or 'obj' if filename has that extension and 'stl' otherwise. The
+    remaining arguments are as for stl. The output is written as it is produced and the
+    callback (if not None) is called for every chunk written.
+
+    Except for 'stl', this requires NumPy.
+
+    With NumPy, the ascii stl is the same as without and the other formats
+    can be read back (see read_binary_stl, read_ply and read_obj)::
+
+        >>> import os, tempfile
+        >>> from snappy import Manifold
+        >>> faces = Manifold('m004').dirichlet_domain().face_list()
+        >>> for model, cutout in [('klein', False), ('poincare', True)]:
+        ...     args = (faces, model, cutout, 2)
+        ...     print(''.join(stl(*args)) == ''.join(_python_stl(*args)))
+        True
+        True
+        >>> tmp_dir = tempfile.TemporaryDirectory()
+        >>> filename = os.path.join(tmp_dir.name, 'm004.stl')
+        >>> options = {'model': 'poincare', 'num_subdivisions': 2}
+        >>> export_mesh(filename, faces, file_format='binary_stl', **options)
+        >>> triangles = numpy.concatenate(list(triangle_batches(faces, **options)))
+        >>> read = read_binary_stl(filename)
+        >>> read.shape == triangles.shape, bool(numpy.allclose(read, triangles, atol=1e-6))
+        (True, True)
+        >>> vertices, indices = indexed_mesh(faces, **options)
+        >>> for file_format, reader in [('ply', read_ply), ('obj', read_obj)]:
+        ...     filename = os.path.join(tmp_dir.name, 'm004.' + file_format)
+        ...     export_mesh(filename, faces, **options)
+        ...     read_vertices, read_indices = reader(filename)
+        ...     print(bool(numpy.allclose(read_vertices, vertices, atol=1e-6)),
+        ...           bool(numpy.all(read_indices == indices)))
+        True True
+        True True
+        >>> tmp_dir.cleanup()
+    """
+    if file_format is None:
+        extension = os.path.splitext(filename)[1].lower()
+        file_format = extension[1:] if extension in ['.ply', '.obj'] else 'stl'
+    if file_format not in mesh_formats:
+        raise ValueError('Unknown file format. Known formats: %s.' % ', '.join(mesh_formats))
+
+    args = (face_dicts, model, cutout, num_subdivisions, shrink_factor, cutoff_radius)
+    if file_format == 'stl':
+        output, mode = stl(*args), 'w'
+    elif file_format == 'binary_stl':
+        output, mode = binary_stl(*args), 'wb'
+    elif file_format == 'ply':
+        output, mode = ply(*indexed_mesh(*args)), 'wb'
+    else:
+        output, mode = obj(*indexed_mesh(*args)), 'w'
+
+    with open(filename, mode) as output_file:
+        for chunk in output:
+            if callback is not None:
+                callback()
+            output_file.write(chunk)
+
+# Reading the files back (used for testing).
+
+def read_binary_stl(filename):
+    ''' The triangles of a binary stl file as array of shape (n, 3, 3). '''
+    with open(filename, 'rb') as input_file:
+        data = input_file.read()
+    n, = struct.unpack('<I', data[80:84])
+    records = numpy.frombuffer(data, dtype=_binary_stl_dtype, count=n, offset=84)
+    return records['vertices'].astype(float)
+
+def read_ply(filename):
+    ''' The vertices and indices of a binary ply file as written by ply. '''
+    with open(filename, 'rb') as input_file:
+        data = input_file.read()
+    end = data.index(b'end_header\n') + len(b'end_header\n')
+    counts = {}
+    for line in data[:end].decode('ascii').splitlines():
+        words = line.split()
+        if words[0] == 'element':
+            counts[words[1]] = int(words[2])
+    vertices = numpy.frombuffer(data, dtype='<f4', count=3 * counts['vertex'], offset=end)
+    faces = numpy.frombuffer(data, dtype=[('n', 'u1'), ('indices', '<i4', (3,))],
+                             count=counts['face'], offset=end + vertices.nbytes)
+    return vertices.reshape(-1, 3).astype(float), faces['indices'].astype(int)
+
+def read_obj(filename):
+    ''' The vertices and indices of a Wavefront obj file as written by obj. '''
+    vertices, indices = [], []
+    with open(filename) as input_file:
+        for line in input_file:
+            words = line.split()
+            if words and words[0] == 'v':
+                vertices.append([float(word) for word in words[1:]])
+            elif words and words[0] == 'f':
+                indices.append([int(word) - 1 for word in words[1:]])
+    return (numpy.array(vertices, dtype=float).reshape(-1, 3),
+            numpy.array(indices, dtype=int).reshape(-1, 3))
@@ -0,0 +1,82 @@
+"""
+Helpers to defer importing the parts of SnapPy that are not needed by
+every user of "import snappy" (e.g., verify, snap, ptolemy or the
+manifold tables) until they are used.
+
+A LazyModule stands in for a module in the namespace of another module::
+
+    >>> json = LazyModule('json')
+    >>> json
+    <lazily imported module 'json'>
+    >>> json.dumps([1, 2])
+    '[1, 2]'
+
+A LazyMethod is a method of a class whose function lives in a module
+imported on first use::
+
+    >>> class A(object):
+    ...     dumps = LazyMethod('json', 'dumps')
+    >>> A.dumps([3])
+    '[3]'
+"""
+
+import importlib
+import types
+
+__all__ = ['LazyModule', 'LazyMethod']
+
+class LazyModule(object):
+    """
+    Imports the module with the given (absolute) name when one of its
+    attributes is accessed for the first time. If loader is given, it is
+    called (without arguments) instead of importing the module and must
+    return the module.
+    """
+
+    def __init__(self, name, loader = None):
+        self._lazy_name = name
+        self._lazy_loader = loader
+        self._lazy_module = None
+
+    def _load(self):
+        if self._lazy_module is None:
+            if self._lazy_loader is None:
+                self._lazy_module = importlib.import_module(self._lazy_name)
+            else:
+                self._lazy_module = self._lazy_loader()
+        return self._lazy_module
+
+    def __getattr__(self, attr):
+        if attr.startswith('_lazy_'):
+            raise AttributeError(attr)
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        return '<lazily imported module %r>' % self._lazy_name
+
+class LazyMethod(object):
+    """
+    A descriptor to be used as a method of a class. The function
+    implementing the method is the attribute with the given name of the
+    module with the given (absolute) name and looked up on first use.
+
+    Accessing the method through the class gives the function itself (so
+    that, e.g., its docstring is shown by help).
+    """
+
+    def __init__(self, module_name, function_name):
+        self.module_name = module_name
+        self.function_name = function_name
+        self.function = None
+
+    def _load(self):
+        if self.function is None:
+            module = importlib.import_module(self.module_name)
+            self.function = getattr(module, self.function_name)
+        return self.function
+
+    def __get__(self, instance, owner = None):
+        function = self._load()
+        if instance is None:
+            return function
+        return types.MethodType(function, instance)
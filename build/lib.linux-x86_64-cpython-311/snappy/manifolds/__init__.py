@@ -0,0 +1,3 @@
+#dummy "package" used to set paths for ../SnapPea.py
+
+pass
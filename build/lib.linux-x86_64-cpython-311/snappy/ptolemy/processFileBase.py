@@ -0,0 +1,519 @@
+import re
+import mmap
+import bisect
+import functools
+
+from . import utilities
+
+"""
+Basic functions to read a ptolemy solutions file.
+"""
+
+# Matches the markers of the sections described in find_section.
+_section_marker_regex = (
+    r"==(?P<new_name>[A-Za-z0-9_=]+?)=(?P<new_kind>BEGINS?|ENDS?)=="
+    r"|"
+    r"(?P<old_name>[A-Za-z0-9_=]+?)=(?P<old_kind>BEGINS|ENDS)=HERE")
+
+class SectionIndex():
+    """
+    Scans a ptolemy solutions file once and records the offsets of all
+    sections (see find_section). The text of a section is only extracted
+    (and decoded if the file was given as bytes) when requested.
+
+    The text can be a str, bytes or an mmap, see from_file, so that large
+    files do not need to be held in memory as a whole. from_file should be
+    used as context manager so that the file is closed again.
+
+    A SectionIndex can be used instead of the text in find_section,
+    find_unique_section, get_py_eval, ... and the parse functions in
+    processFileDispatch. find_section_indices returns a SectionIndex for
+    each section with the given name, so that the sections nested in it
+    can be extracted one at a time as well. text_thunk gives a function
+    to extract the text of a section later (e.g., to parse the
+    polynomials of a component only when needed) without keeping the text
+    in memory.
+
+    >>> t = (
+    ... "FOO=BEGINS=HERE\\nold\\nFOO=ENDS=HERE\\n"
+    ... "==FOO=BEGINS==\\n"
+    ... "==BAR=BEGIN==\\nbar 1\\n==BAR=END==\\n"
+    ... "==BAR=BEGINS==\\nbar 2\\n==BAR=ENDS==\\n"
+    ... "==FOO=ENDS==\\n")
+    >>> index = SectionIndex(t)
+    >>> index.find_section("BAR")
+    ['bar 1', 'bar 2']
+    >>> index.find_section("FOO")[0]
+    'old'
+    >>> find_section(index, "BAR") == find_section(t, "BAR")
+    True
+    >>> "==BAR=BEGINS==" in index
+    True
+    >>> foo = find_section_indices(index, "FOO")[1]
+    >>> foo.find_section("BAR")
+    ['bar 1', 'bar 2']
+    >>> "FOO=BEGINS=HERE" in foo
+    False
+    >>> [ piece.strip() for piece in foo.iter_split('bar') ]
+    ['==BAR=BEGIN==', '1\\n==BAR=END==\\n==BAR=BEGINS==', '2\\n==BAR=ENDS==']
+    >>> bar = find_section_indices(foo, "BAR")[1]
+    >>> bar.text_thunk()()
+    '\\nbar 2\\n'
+
+    As when applying find_section to the text of a section, a begin marker
+    without matching end marker before the section does not hide the
+    sections nested in it:
+
+    >>> u = ("==BAR=BEGINS==\\n==BAR=END=\\n"
+    ...      "==FOO=BEGINS==\\n==BAR=BEGINS==\\nbar\\n==BAR=ENDS==\\n==FOO=ENDS==")
+    >>> find_section_indices(u, "FOO")[0].find_section("BAR")
+    ['bar']
+    >>> find_section(u, "FOO")[0]
+    '==BAR=BEGINS==\\nbar\\n==BAR=ENDS=='
+    >>> find_section(find_section(u, "FOO")[0], "BAR")
+    ['bar']
+
+    The function returned by text_thunk reads the file again if the index
+    was created with from_file:
+
+    >>> import tempfile, os
+    >>> with tempfile.TemporaryDirectory() as d:
+    ...     filename = os.path.join(d, 'foo.txt')
+    ...     with open(filename, 'w') as f:
+    ...         _ = f.write(t)
+    ...     with SectionIndex.from_file(filename) as index:
+    ...         thunk = find_section_indices(index, "BAR")[1].text_thunk()
+    ...     thunk()
+    '\\nbar 2\\n'
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self._is_bytes = not isinstance(text, str)
+        # Set by from_file
+        self.filename = None
+        # The region of the text this index is for
+        self._start = 0
+        self._end = len(text)
+
+        regex = _section_marker_regex
+        if self._is_bytes:
+            regex = regex.encode('ascii')
+
+        # For each style (old and new), maps a name to the lists of
+        # pairs (start, end) of offsets of the begin and end markers.
+        self._begin_markers = ({}, {})
+        self._end_markers = ({}, {})
+
+        # Offsets where markers start (in increasing order)
+        self._marker_starts = []
+
+        for m in re.finditer(regex, text):
+            self._marker_starts.append(m.start())
+            if m.group('new_name') is not None:
+                style = 1
+                name, kind = m.group('new_name', 'new_kind')
+            else:
+                style = 0
+                name, kind = m.group('old_name', 'old_kind')
+
+            if self._is_bytes:
+                name, kind = name.decode('ascii'), kind.decode('ascii')
+
+            if kind.startswith('BEGIN'):
+                markers = self._begin_markers[style]
+            else:
+                markers = self._end_markers[style]
+            markers.setdefault(name, []).append((m.start(), m.end()))
+
+    @staticmethod
+    def from_file(filename):
+        """
+        Creates the index for the file with the given name by
+        memory-mapping the file. Use as context manager::
+
+            with SectionIndex.from_file(filename) as text:
+                ...
+        """
+
+        with open(filename, 'rb') as f:
+            if f.seek(0, 2) == 0:
+                # mmap does not support empty files
+                index = SectionIndex(b'')
+            else:
+                index = SectionIndex(
+                    mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ))
+        index.filename = filename
+        return index
+
+    def close(self):
+        """
+        Closes the memory-mapped file (if from_file was used).
+        """
+        if isinstance(self.text, mmap.mmap):
+            self.text.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def section_offsets(self, name):
+        """
+        List of pairs (start, end) of offsets of all sections with the
+        given name.
+        """
+        # Like the non-greedy regular expressions applied to the text of
+        # this section, a section ends at the first end marker after the
+        # begin marker and begin markers within a section are ignored.
+        result = []
+        for begin_markers, end_markers in zip(self._begin_markers,
+                                              self._end_markers):
+            begins = begin_markers.get(name, [])
+            ends = end_markers.get(name, [])
+            pos = self._start
+            while True:
+                i = bisect.bisect_left(begins, (pos, pos))
+                if i == len(begins) or begins[i][1] > self._end:
+                    break
+                start = begins[i][1]
+                j = bisect.bisect_left(ends, (start, start))
+                if j == len(ends) or ends[j][1] > self._end:
+                    break
+                result.append((start, ends[j][0]))
+                pos = ends[j][1]
+        return result
+
+    def section_index(self, start, end):
+        """
+        A SectionIndex for the section between the given offsets (sharing
+        the text with this one). It only knows the sections nested in it.
+        """
+        result = SectionIndex.__new__(SectionIndex)
+        result.text = self.text
+        result._is_bytes = self._is_bytes
+        result.filename = self.filename
+        result._start = start
+        result._end = end
+        result._marker_starts = self._marker_starts
+        result._begin_markers = self._begin_markers
+        result._end_markers = self._end_markers
+        return result
+
+    def head(self):
+        """
+        The text from the beginning of the section to the first nested
+        section, e.g., to extract the parameters with
+        extract_parameters_and_body_from_section.
+        """
+        i = bisect.bisect_left(self._marker_starts, self._start)
+        end = self._end
+        if i < len(self._marker_starts):
+            end = min(end, self._marker_starts[i])
+        text = self.text[self._start:end]
+        if self._is_bytes:
+            text = text.decode('ascii')
+        # Keep the newline ending the last parameter.
+        return text.lstrip()
+
+    def iter_split(self, separator):
+        """
+        Splits the text of the section at the given separator and yields
+        the (decoded but not stripped) pieces one at a time.
+        """
+        for start, end in self.iter_split_offsets(separator):
+            yield self.text_between(start, end)
+
+    def iter_split_offsets(self, separator):
+        """
+        Like iter_split but yields the pairs (start, end) of offsets of
+        the pieces.
+        """
+        if self._is_bytes:
+            separator = separator.encode('ascii')
+        start = self._start
+        while True:
+            end = self.text.find(separator, start, self._end)
+            if end == -1:
+                end = self._end
+            yield start, end
+            if end == self._end:
+                return
+            start = end + len(separator)
+
+    def text_between(self, start, end):
+        """
+        The (decoded but not stripped) text between the given offsets.
+        """
+        return _decode(self.text[start:end])
+
+    def text_thunk(self, start = None, end = None):
+        """
+        Returns a function returning the (decoded but not stripped) text
+        between the given offsets, defaulting to the whole section.
+
+        If the index was created by from_file, the function reads the
+        text from the file again rather than keeping a reference to the
+        memory-mapped file (which is closed when leaving the with
+        statement).
+        """
+        if start is None:
+            start = self._start
+        if end is None:
+            end = self._end
+        if self.filename is not None:
+            return functools.partial(_read_file, self.filename, start, end)
+        return functools.partial(_slice, self.text, start, end)
+
+    def iter_sections(self, name):
+        """
+        Like find_section but returns an iterator so that only the text
+        of one section is in memory at a time.
+        """
+        for start, end in self.section_offsets(name):
+            yield self.section_text(start, end)
+
+    def find_section(self, name):
+        return list(self.iter_sections(name))
+
+    def section_text(self, start, end):
+        return self.text_between(start, end).strip()
+
+    def __contains__(self, s):
+        if self._is_bytes:
+            s = s.encode('ascii')
+        return self.text.find(s, self._start, self._end) != -1
+
+def _decode(text):
+    if isinstance(text, str):
+        return text
+    return text.decode('ascii')
+
+def _slice(text, start, end):
+    return _decode(text[start:end])
+
+def _read_file(filename, start, end):
+    with open(filename, 'rb') as f:
+        f.seek(start)
+        return _decode(f.read(end - start))
+
+def find_section(text, name):
+
+    """
+    Finds all sections of the form
+    
+    NAME=BEGINS=HERE
+    stuff
+    stuff
+    stuff
+    NAME=ENDS=HERE
+    
+    or 
+
+    ==NAME=BEGINS==
+    stuff
+    stuff
+    stuff
+    ==NAME=ENDS==
+
+    in text where NAME has to be replaced by name.
+
+    >>> t = (
+    ... "abc abc\\n"
+    ... "==FOO=BEGINS==\\n"
+    ... "bar bar\\n"
+    ... "==FOO=ENDS==\\n")
+    >>> find_section(t, "FOO")
+    ['bar bar']
+
+    text can also be a SectionIndex.
+    """
+
+    if isinstance(text, SectionIndex):
+        return text.find_section(name)
+
+    old_style_regex = (name + "=BEGINS=HERE" +
+                       "(.*?)" +
+                       name + "=ENDS=HERE")
+    new_style_regex = ("==" + name + "=BEGINS?==" +
+                       "(.*?)" +
+                       "==" + name + "=ENDS?==")
+    regexs = [ old_style_regex, new_style_regex ]
+
+    if not isinstance(text, str):
+        text = text.decode('ascii')
+
+    return [ s.strip()
+             for regex in regexs
+             for s in re.findall(regex, text, re.DOTALL) ]
+
+def iter_section(text, name):
+    """
+    Like find_section but returns an iterator. If text is a SectionIndex,
+    only the text of one section is in memory at a time.
+    """
+
+    if isinstance(text, SectionIndex):
+        return text.iter_sections(name)
+    return iter(find_section(text, name))
+
+def find_section_indices(text, name):
+    """
+    Like find_section but returns a SectionIndex for each section instead
+    of its text (so that the text is not decoded at once).
+    """
+
+    if not isinstance(text, SectionIndex):
+        text = SectionIndex(text)
+    return [ text.section_index(start, end)
+             for start, end in text.section_offsets(name) ]
+
+def _unique_section(sections, name):
+    if len(sections) > 1:
+        raise Exception("Section %s more than once in file" % name)
+    if not sections:
+        raise Exception("No section %s in file" % name)
+    return sections[0]
+
+def find_unique_section_index(text, name):
+    """
+    Like find_unique_section but returns a SectionIndex, see
+    find_section_indices.
+    """
+
+    return _unique_section(find_section_indices(text, name), name)
+
+def find_unique_section(text, name):
+
+    """
+    Like find_section but ensures that there is only a single
+    such section. Exceptions in all other cases.
+
+    >>> t = "abc abc\\n==FOO=BEGINS==\\nbar bar\\n==FOO=ENDS==\\n"
+    >>> find_unique_section(t, "FOO")
+    'bar bar'
+    """
+
+    return _unique_section(find_section(text, name), name)
+
+def extract_parameters_and_body_from_section(section_text):
+    """
+    Turns patterns of the form "==KEY:VALUE" at the beginning lines
+    into a dictionary and returns the remaining text.
+
+    >>> t = "==A:1\\n==B:2\\nBody\\nBody"
+    >>> extract_parameters_and_body_from_section(t)[0]['A']
+    '1'
+    """
+
+
+    params = {}
+
+    while True:
+        m = re.match("==(.*):(.*)\n", section_text)
+        if not m:
+            return params, section_text
+
+        k, v = m.groups()
+        params[k] = v
+        section_text = section_text.split('\n',1)[1]
+
+def remove_outer_square_brackets(text):
+    """
+    Checks that test is of the form "[...]" and returns result between
+    brackets.
+
+    >>> remove_outer_square_brackets("[a*b*c]")
+    'a*b*c'
+    >>> remove_outer_square_brackets("[[a,b]")
+    '[a,b'
+    """
+
+    if text[0] != '[' or text[-1] != ']':
+        raise ValueError("Error while parsing: outer square brackets missing")
+
+    return text[1:-1]
+
+def remove_optional_outer_square_brackets(text):
+
+    if text[0] == '[':
+        return remove_outer_square_brackets(text)
+
+    return text
+
+def parse_int_or_empty(s):
+
+    """
+    >>> parse_int_or_empty('3')
+    3
+    >>> parse_int_or_empty('') is None
+    True
+    """
+
+
+    if s:
+        return int(s)
+    return None
+
+def get_py_eval(text):
+
+    """
+    From a ptolemy solutions file, extract the PY=EVAL=SECTION
+    """
+
+    return eval(
+        utilities.join_long_lines(
+            find_unique_section(text, "PY=EVAL=SECTION")))
+
+def get_manifold_thunk(text):
+
+    """
+    From a ptolemy solutions file, extract the manifold.
+    Returned as thunk that evaluates to a snappy manifold.
+    """
+
+    # Extract the section now so that the thunk does not hold on to the
+    # text (which might be a memory-mapped file closed later).
+    sections = find_section(text, "TRIANGULATION")
+
+    def get_manifold():
+        triangulation_text = utilities.join_long_lines(
+            _unique_section(sections, "TRIANGULATION"))
+
+        if triangulation_text[:15] == '% Triangulation':
+
+            from snappy import Manifold
+
+            return Manifold(triangulation_text)
+
+        if ('<?xml' in triangulation_text and
+            '<reginadata' in triangulation_text and
+            '<packet' in triangulation_text):
+
+            from reginaWrapper import NTriangulationForPtolemy
+
+            return NTriangulationForPtolemy.from_xml(triangulation_text)
+
+        raise Exception("Triangulation format not supported: %s..." %
+                        triangulation_text[:20])
+
+    return get_manifold
+
+def get_manifold(text):
+
+    """
+    From a ptolemy solutions file, extract the manifold.
+    Returned as snappy Manifold.
+    """
+
+    return get_manifold_thunk(text)()
+
+def get_manifold_from_file(filename):
+
+    """
+    As get_manifold but takes filename. Returns a byte sequence.
+    """
+
+    with SectionIndex.from_file(filename) as text:
+        return get_manifold(text)
@@ -0,0 +1,81 @@
+"""
+Sparse linear algebra over the rationals used when computing obstruction
+classes and fixing the decoration of Ptolemy varieties.
+
+The sparse integer matrices for the chain complexes of a triangulation
+are SparseIntegerMatrix from sparse_smith_form.py.
+"""
+
+from fractions import Fraction
+
+__all__ = ['EchelonBasis']
+
+class EchelonBasis(object):
+    """
+    Rows (given as dictionaries mapping column to entry) in echelon form,
+    i.e., with distinct leading columns. Used to incrementally test
+    whether rows are linearly independent (over the rationals, the
+    computation is exact).
+
+    An EchelonBasis is immutable, adding a row returns a new one.
+
+    >>> b = EchelonBasis()
+    >>> r = b.reduce({0 : 2, 1 : 1})
+    >>> b = b.with_reduced_row(r)
+    >>> r = b.reduce({0 : 4, 1 : 1})
+    >>> r
+    {1: Fraction(-1, 1)}
+    >>> b = b.with_reduced_row(r)
+    >>> b.reduce({0 : 1, 1 : 7})
+    {}
+    >>> b.determinant_abs()
+    Fraction(2, 1)
+    """
+
+    def __init__(self, pivot_rows = None):
+        # Maps leading column to row
+        self._pivot_rows = pivot_rows or { }
+
+    def __len__(self):
+        return len(self._pivot_rows)
+
+    def reduce(self, row):
+        """
+        Reduces the given row by the rows of the basis. The result is empty
+        if and only if the row is in the span of the basis.
+        """
+
+        row = dict(row)
+        while row:
+            col = min(row)
+            pivot_row = self._pivot_rows.get(col)
+            if pivot_row is None:
+                return row
+            factor = Fraction(row[col]) / pivot_row[col]
+            for j, e in pivot_row.items():
+                value = row.get(j, 0) - factor * e
+                if value == 0:
+                    row.pop(j, None)
+                else:
+                    row[j] = value
+        return row
+
+    def with_reduced_row(self, reduced_row):
+        """
+        Returns a new basis with the given non-empty result of reduce added.
+        """
+
+        pivot_rows = dict(self._pivot_rows)
+        pivot_rows[min(reduced_row)] = reduced_row
+        return EchelonBasis(pivot_rows)
+
+    def determinant_abs(self):
+        """
+        If the basis consists of n rows of length n, the absolute value of
+        the determinant of the matrix formed by the rows that were added.
+        """
+
+        result = Fraction(1)
+        for col, row in self._pivot_rows.items():
+            result *= row[col]
+        return abs(result)
@@ -0,0 +1,229 @@
+"""
+Statistics of cohomology fractal values computed on the CPU.
+
+The cohomology fractal shown by M.inside_view(cohomology_class = ...)
+colors each ray from the camera by the sum of the weights of the faces it
+crosses before reaching a given distance. Here, we shoot rays in evenly
+distributed directions from the basepoint the inside view starts at,
+collect these values with the CpuRaytracer (all rays of a manifold are
+traced together with NumPy) and report their distribution::
+
+    >>> from snappy import Manifold
+    >>> s = cohomology_fractal_statistics(Manifold("m003"), num_rays = 500,
+    ...                                   distances = [2.0, 4.0])
+    >>> [ r['num_rays'] for r in s ]
+    [500, 500]
+    >>> sorted(s[0])
+    ['distance', 'histogram', 'kurtosis', 'max', 'mean', 'min', 'num_incomplete', 'num_rays', 'skewness', 'variance']
+    >>> s[0]['variance'] < s[1]['variance']
+    True
+
+Several manifolds are processed in parallel by
+cohomology_fractal_statistics_for_manifolds.
+
+This module requires NumPy.
+"""
+
+from .cpu_raytracer import (CpuRaytracer, view_uniform_bindings,
+                            raytracing_data_for_manifold)
+from .cohomology_fractal import rational_cohomology_basis
+
+import numpy
+
+import math
+import multiprocessing
+
+__all__ = ['sphere_directions',
+           'cohomology_fractal_values',
+           'statistics_of_values',
+           'cohomology_fractal_statistics',
+           'cohomology_fractal_statistics_for_manifolds']
+
+def sphere_directions(num_rays):
+    """
+    Returns an array of num_rays unit vectors in R^3 evenly distributed
+    on the sphere (using a Fibonacci lattice).
+
+    >>> d = sphere_directions(1000)
+    >>> d.shape
+    (1000, 3)
+    >>> bool(numpy.allclose(numpy.sum(d * d, axis = 1), 1.0))
+    True
+    >>> bool(numpy.all(numpy.abs(numpy.mean(d, axis = 0)) < 1e-3))
+    True
+    """
+
+    golden_angle = math.pi * (3.0 - math.sqrt(5.0))
+
+    i = numpy.arange(num_rays)
+    z = 1.0 - (2.0 * i + 1.0) / num_rays
+    r = numpy.sqrt(1.0 - z * z)
+    phi = golden_angle * i
+    return numpy.stack([ r * numpy.cos(phi), r * numpy.sin(phi), z ],
+                       axis = 1)
+
+def cohomology_fractal_values(manifold, cohomology_class = 0,
+                              distance = 6.5, num_rays = 10000,
+                              max_steps = 1000, view_state = None,
+                              raytracing_data = None):
+    """
+    Traces num_rays rays in the directions given by sphere_directions
+    and returns for each ray the value of the cohomology fractal at the
+    given distance (that is the sum of the weights of the faces crossed
+    by the ray until then, see valueForRayHit in the shader) and whether
+    the ray reached that distance (within max_steps tetrahedra).
+
+    cohomology_class is interpreted as for M.inside_view and view_state
+    (a triple (boost, tet_num, weight)) defaults to the initial view of
+    the inside view. If given, raytracing_data (as computed by
+    raytracing_data_for_manifold) is used instead of the manifold and
+    cohomology class.
+    """
+
+    for values, reached in _iter_cohomology_fractal_values(
+            manifold, cohomology_class, [ distance ], num_rays, max_steps,
+            view_state, raytracing_data):
+        return values, reached
+
+def _iter_cohomology_fractal_values(manifold, cohomology_class, distances,
+                                    num_rays, max_steps, view_state,
+                                    raytracing_data):
+    """
+    Like cohomology_fractal_values but yields the result for each of the
+    given increasing distances, continuing the rays from where they
+    stopped for the previous distance.
+
+    This gives the same values as tracing the rays from the start::
+
+        >>> from snappy import Manifold
+        >>> M = Manifold("m003")
+        >>> (v2, r2), (v4, r4) = _iter_cohomology_fractal_values(
+        ...     M, 0, [2.0, 4.0], 500, 1000, None, None)
+        >>> v, r = cohomology_fractal_values(M, distance = 4.0, num_rays = 500)
+        >>> bool(numpy.all(r == r4)), bool(numpy.all(v == v4))
+        (True, True)
+        >>> bool(numpy.all(r2 >= r4))
+        True
+    """
+
+    if raytracing_data is None:
+        raytracing_data, has_weights = raytracing_data_for_manifold(
+            manifold, cohomology_class)
+
+    bindings = view_uniform_bindings(
+        raytracing_data, view_state = view_state, has_weights = True,
+        maxDist = distances[0], maxSteps = max_steps)
+    raytracer = CpuRaytracer(
+        bindings, raytracing_data.get_compile_time_constants())
+
+    for distance, (weights, dists, object_types) in zip(
+            distances,
+            raytracer.trace_directions_to_distances(
+                sphere_directions(num_rays), distances)):
+        yield weights, dists > distance
+
+def statistics_of_values(values, bins = 50, value_range = None):
+    """
+    The number of values, their minimum, maximum, mean, variance, skewness
+    and (excess) kurtosis and a histogram (a pair of the counts and the
+    bin edges, see numpy.histogram) as dictionary.
+
+    >>> s = statistics_of_values(numpy.array([1.0, 2.0, 2.0, 3.0]), bins = 3)
+    >>> s['mean'], s['variance'], s['skewness'], s['kurtosis']
+    (2.0, 0.5, 0.0, -1.0)
+    >>> s['histogram'][0]
+    [1, 2, 1]
+    """
+
+    n = len(values)
+    result = { 'num_rays' : n }
+    if n == 0:
+        return result
+
+    mean = float(numpy.mean(values))
+    centered = values - mean
+    variance = float(numpy.mean(centered ** 2))
+    if variance > 0.0:
+        skewness = float(numpy.mean(centered ** 3)) / variance ** 1.5
+        kurtosis = float(numpy.mean(centered ** 4)) / variance ** 2 - 3.0
+    else:
+        skewness = 0.0
+        kurtosis = 0.0
+
+    counts, edges = numpy.histogram(values, bins = bins, range = value_range)
+
+    result.update({
+        'min' : float(numpy.min(values)),
+        'max' : float(numpy.max(values)),
+        'mean' : mean,
+        'variance' : variance,
+        'skewness' : skewness,
+        'kurtosis' : kurtosis,
+        'histogram' : (counts.tolist(), edges.tolist()) })
+
+    return result
+
+def cohomology_fractal_statistics(manifold, cohomology_class = 0,
+                                  distances = [ 6.5 ], num_rays = 10000,
+                                  max_steps = 1000, view_state = None,
+                                  bins = 50, value_range = None):
+    """
+    For each of the given distances (in increasing order), computes the
+    statistics (see statistics_of_values) of the cohomology fractal values
+    (see cohomology_fractal_values) of the rays that reached the distance.
+    The number of rays that did not reach the distance is reported as
+    num_incomplete.
+
+    The rays are traced only once: for each distance, they are continued
+    from where they stopped for the previous distance. Thus, max_steps
+    limits the number of tetrahedra traversed between two distances.
+    """
+
+    result = []
+    if not distances:
+        return result
+
+    distances = sorted(distances)
+    for distance, (values, reached) in zip(
+            distances,
+            _iter_cohomology_fractal_values(
+                manifold, cohomology_class, distances, num_rays, max_steps,
+                view_state, raytracing_data = None)):
+        statistics = statistics_of_values(
+            values[reached], bins = bins, value_range = value_range)
+        statistics['distance'] = distance
+        statistics['num_rays'] = len(values)
+        statistics['num_incomplete'] = int(numpy.sum(~reached))
+        result.append(statistics)
+
+    return result
+
+def cohomology_fractal_statistics_for_manifolds(manifolds,
+                                                cohomology_class = 0,
+                                                num_processes = None,
+                                                **kwargs):
+    """
+    Calls cohomology_fractal_statistics for each of the given manifolds
+    (further keyword arguments are passed on) using num_processes
+    processes (None meaning one per CPU). Returns a list with the result
+    for each manifold, or None if the manifold has no such cohomology
+    class.
+    """
+
+    args = [ (manifold, cohomology_class, kwargs) for manifold in manifolds ]
+
+    if num_processes == 1 or len(args) < 2:
+        return [ _statistics_for_manifold(arg) for arg in args ]
+
+    with multiprocessing.Pool(num_processes) as pool:
+        return pool.map(_statistics_for_manifold, args)
+
+def _statistics_for_manifold(args):
+    manifold, cohomology_class, kwargs = args
+    if isinstance(cohomology_class, int):
+        # The index of a basis vector of the second rational cohomology
+        num_classes = len(rational_cohomology_basis(manifold))
+        if not -num_classes <= cohomology_class < num_classes:
+            return None
+    return cohomology_fractal_statistics(
+        manifold, cohomology_class, **kwargs)
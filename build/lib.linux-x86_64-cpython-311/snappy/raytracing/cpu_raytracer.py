@@ -0,0 +1,1282 @@
+"""
+A CPU implementation of the raytracing done by shaders/fragment.glsl.
+
+The inside view is normally rendered by RaytracingView which needs an
+OpenGL context. This module renders the same images without OpenGL using
+NumPy: all rays of an image are marched together through the tetrahedra
+(using the face planes and O(1,3) face-pairing matrices), so it can be used
+on headless machines, e.g., to produce thumbnails or cohomology fractal
+images for an entire census::
+
+    >>> from snappy import Manifold
+    >>> image, timings = render_manifold(Manifold("m004"), width = 64, height = 48)
+    >>> image.shape
+    (48, 64, 3)
+    >>> sorted(timings)
+    ['prepare', 'rays', 'render', 'shade', 'trace']
+
+A CpuRaytracer consumes the same uniform bindings as the shader. These
+are the bindings from IdealRaytracingData or FiniteRaytracingData
+together with the view parameters (such as currentBoost or fov) that
+RaytracingView adds, see view_uniform_bindings.
+
+The following features of the shader are mirrored: faces, weights and
+elevations, edge fans and tubes about edges, horospheres (including the
+peripheral curves), inspheres, Margulis tubes, the vertex spheres of
+finite triangulations, the three perspective types, subpixel sampling,
+the lighting model and the color gradient. Not supported are geodesic
+tubes and multi-screenshots. When a ray starts inside a cusp neighborhood,
+the shader applies a parabolic (or loxodromic) transformation to bring
+the exit point close to the tetrahedron; here the exit point is only moved
+into the right tetrahedron by graph tracing which is slower but gives the
+same image.
+
+This module requires NumPy.
+"""
+
+import numpy
+
+import math
+import multiprocessing
+import png
+import time
+
+__all__ = ['CpuRaytracer', 'view_uniform_bindings', 'render_manifold',
+           'raytracing_data_for_manifold', 'write_png']
+
+# Same constants as in fragment.glsl
+
+_object_type_nothing             = 0
+_object_type_face                = 1
+_object_type_edge_cylinder_enter = 2
+_object_type_edge_cylinder_exit  = 3
+_object_type_horosphere          = 4
+_object_type_edge_fan            = 5
+_object_type_insphere            = 6
+_object_type_vertex_sphere       = 7
+_object_type_margulis_tube       = 8
+_object_type_elevation_enter     = 9
+_object_type_elevation_exit      = 10
+
+_colored_object_types = [
+    _object_type_vertex_sphere,
+    _object_type_insphere,
+    _object_type_horosphere,
+    _object_type_edge_cylinder_enter,
+    _object_type_edge_cylinder_exit,
+    _object_type_margulis_tube,
+    _object_type_edge_fan,
+    _object_type_elevation_enter,
+    _object_type_elevation_exit ]
+
+_perspective_type_material   = 0
+_perspective_type_ideal      = 1
+_perspective_type_hyperideal = 2
+
+_unreachable_dist_param = 1000.0
+
+_light_source_position = numpy.array([1.0, 0.0, 0.7, 0.0])
+
+_peripheral_curve_thickness = 0.015
+_longitude_color = numpy.array([1.0, 1.0, 1.0])
+_meridian_color  = numpy.array([0.5, 0.5, 0.5])
+
+_edge_to_vertices = [ (0, 1), (0, 2), (1, 2), (0, 3), (1, 3), (2, 3) ]
+
+# The defaults RaytracingView uses for the uniforms that are not coming
+# from the raytracing data (RaytracingView itself cannot be imported
+# without OpenGL).
+
+_constant_uniform_bindings = {
+    'gradientThreshholds' : ('float[]', [0.0, 0.25, 0.45, 0.75, 1.0]),
+    'gradientColours' : ('vec3[]', [[1.0, 1.0, 1.0],
+                                    [0.86, 0.92, 0.78],
+                                    [0.25, 0.70, 0.83],
+                                    [0.10, 0.13, 0.49],
+                                    [0.0, 0.0, 0.0]]),
+}
+
+def _default_ui_uniform_dict(has_weights):
+    return {
+        'maxSteps' : ['int', 99 if has_weights else 20],
+        'maxDist' : ['float', 6.5 if has_weights else 17.0],
+        'subpixelCount': ['int', 1],
+        'fov': ['float', 90],
+        'edgeThickness' : ['float', 0.0000001],
+
+        'contrast' : ['float', 0.1 if has_weights else 0.5],
+        'noGradient' : ['bool', False],
+
+        'lightBias' : ['float', 2.0],
+        'lightFalloff' : ['float', 1.65],
+        'brightness' : ['float', 1.9],
+
+        'showElevation' : ['bool', False],
+        'desaturate_edges' : ['bool', False]
+        }
+
+def view_uniform_bindings(raytracing_data, view_state = None,
+                          has_weights = False, view = None,
+                          edge_tube_radius = None, vertex_radius = None,
+                          perspective_type = 0, **ui_uniforms):
+    """
+    Returns the uniform bindings RaytracingView.get_uniform_bindings would
+    give for the given raytracing data (from IdealRaytracingData or
+    FiniteRaytracingData) using the same defaults. view_state is a triple
+    (boost, tet_num, weight) as returned by initial_view_state (which is
+    used if None). Other uniforms (e.g., fov = 60 or maxSteps = 40) can be
+    given as keyword arguments.
+    """
+
+    if view_state is None:
+        view_state = raytracing_data.initial_view_state()
+    boost, tet_num, current_weight = view_state
+
+    is_finite = (
+        raytracing_data.get_compile_time_constants().get(
+            b'##finiteTrig##') == 1)
+
+    if edge_tube_radius is None:
+        edge_tube_radius = 0.0 if has_weights else (
+            0.025 if is_finite else 0.04)
+    if vertex_radius is None:
+        vertex_radius = 0.0 if has_weights else 0.25
+    if view is None:
+        view = 0 if has_weights else 1
+
+    result = dict(_constant_uniform_bindings)
+    result.update(raytracing_data.get_uniform_bindings())
+    result.update({
+        'currentWeight' : ('float', current_weight),
+        'currentBoost' : ('mat4', boost),
+        'currentTetIndex' : ('int', tet_num),
+        'viewMode' : ('int', view),
+        'edgeTubeRadiusParam' :
+            ('float', math.cosh(edge_tube_radius) ** 2 / 2.0),
+        'vertexSphereRadiusParam' :
+            ('float', math.cosh(vertex_radius)),
+        'perspectiveType' : ('int', int(perspective_type))})
+    for key, value in _default_ui_uniform_dict(has_weights).items():
+        result[key] = tuple(value)
+    for key, value in ui_uniforms.items():
+        result[key] = (result[key][0], value)
+
+    return result
+
+def _to_array(value, shape):
+    """
+    Converts a (nested) list of SnapPy numbers, vectors or matrices to
+    a NumPy array of floats with the given shape of each element.
+    """
+
+    def convert(v, shape):
+        if not shape:
+            return float(v)
+        return [ convert(v[i], shape[1:]) for i in range(shape[0]) ]
+
+    return numpy.array(
+        [ convert(v, shape) for v in value ], dtype = float).reshape(
+            (len(value),) + shape)
+
+def _matrices_to_array(value, n):
+    """
+    Converts matrices to an array of matrices as they are seen by the
+    shader. Since they are uploaded without transposing, the shader
+    sees the transpose of the matrix on the python side, so that
+    v * m in the shader is the same as m * v in python.
+    """
+    return numpy.swapaxes(_to_array(value, (n, n)), -1, -2)
+
+def _apply(vectors, matrices):
+    """
+    Computes the row vectors times the matrices (same as vec4 * mat4 in
+    the shader). matrices can be a single matrix or one for each vector.
+    """
+    if matrices.ndim == 2:
+        return vectors.dot(matrices)
+    return numpy.einsum('ni,nij->nj', vectors, matrices)
+
+def _r13_dot(u, v):
+    """
+    Lorentz dot product with signature -+++ of the last axis.
+    """
+    return -u[..., 0] * v[..., 0] + numpy.sum(u[..., 1:] * v[..., 1:], axis = -1)
+
+def _r13_normalise(v):
+    return v / numpy.sqrt(numpy.abs(_r13_dot(v, v)))[..., None]
+
+def _make_unit_tangent_vector(dir, point):
+    return _r13_normalise(dir + _r13_dot(dir, point)[..., None] * point)
+
+def _real_roots_of_quadratic(a, b, c, min_val):
+    """
+    Vectorized version of realRootsOfQuadratic.
+    """
+    with numpy.errstate(divide = 'ignore', invalid = 'ignore'):
+        d = b * b - 4 * a * c
+        offset = numpy.sign(a) * numpy.sqrt(numpy.maximum(d, 0.0))
+        x = (-b - offset) / (2 * a)
+        y = (-b + offset) / (2 * a)
+    no_root = (d < 0) | (y < min_val) | numpy.isnan(y)
+    x = numpy.where(no_root | (x < min_val) | numpy.isnan(x),
+                    _unreachable_dist_param, x)
+    y = numpy.where(no_root, _unreachable_dist_param, y)
+    return x, y
+
+def _dist_params_for_sphere_intersection(points, dirs, centers, radius_param):
+    start_dot = _r13_dot(centers, points)
+    dir_dot   = _r13_dot(centers, dirs)
+    return _real_roots_of_quadratic(
+        dir_dot * dir_dot + radius_param,
+        2.0 * dir_dot * start_dot,
+        start_dot * start_dot - radius_param,
+        0.0)
+
+def _dist_params_for_tube_intersection(points, dirs, ends0, ends1,
+                                       radius_param, min_dist_param):
+    start0_dot = _r13_dot(ends0, points)
+    dir0_dot   = _r13_dot(ends0, dirs)
+    start1_dot = _r13_dot(ends1, points)
+    dir1_dot   = _r13_dot(ends1, dirs)
+    end_dot    = _r13_dot(ends0, ends1)
+    return _real_roots_of_quadratic(
+        dir0_dot * dir1_dot - end_dot * radius_param,
+        start0_dot * dir1_dot + start1_dot * dir0_dot,
+        start0_dot * start1_dot + end_dot * radius_param,
+        min_dist_param)
+
+def _normal_for_sphere(points, centers):
+    return _make_unit_tangent_vector(centers - points, points)
+
+def _normal_for_tube(points, ends0, ends1):
+    t = (ends0 * _r13_dot(points, ends1)[:, None] +
+         ends1 * _r13_dot(points, ends0)[:, None])
+    return - _make_unit_tangent_vector(t, points)
+
+def _hsv2rgb(c):
+    k = numpy.array([1.0, 2.0 / 3.0, 1.0 / 3.0])
+    x = c[:, 0:1] + k
+    p = numpy.abs((x - numpy.floor(x)) * 6.0 - 3.0)
+    return c[:, 2:3] * (1.0 + (numpy.clip(p - 1.0, 0.0, 1.0) - 1.0) * c[:, 1:2])
+
+def _hyperboloid_to_upper_halfspace(h):
+    klein = h[:, 1:] / h[:, 0:1]
+    poincare = klein / (
+        1.0 + numpy.sqrt(numpy.maximum(
+            1.0 - numpy.sum(klein * klein, axis = 1), 0.0)))[:, None]
+    denom_helper = poincare.copy()
+    denom_helper[:, 0] -= 1.0
+    denom = numpy.sum(denom_helper * denom_helper, axis = 1)
+    return numpy.concatenate(
+        [ 2.0 * poincare[:, 1:],
+          (1.0 - numpy.sum(poincare * poincare, axis = 1))[:, None] ],
+        axis = 1) / denom[:, None]
+
+class _RayHits(object):
+    """
+    The state of a batch of rays (the arrays correspond to the fields of
+    RayHit in the shader).
+    """
+
+    def __init__(self, points, dirs, tet_nums, weights, light_sources):
+        n = len(points)
+        self.points = points
+        self.dirs = dirs
+        self.tet_nums = tet_nums
+        self.light_sources = light_sources
+        self.dists = numpy.zeros(n)
+        self.weights = weights
+        self.dists_when_leaving_cusp = numpy.zeros(n)
+        self.object_types = numpy.full(n, _object_type_nothing, dtype = int)
+        self.object_indices = numpy.full(n, -1, dtype = int)
+
+class CpuRaytracer(object):
+    """
+    Renders the image the shader would render for the given uniform
+    bindings (see view_uniform_bindings) and compile time constants
+    (from get_compile_time_constants of the raytracing data).
+
+    The time spent in the different stages is accumulated in the
+    dictionary timings.
+    """
+
+    def __init__(self, uniform_bindings, compile_time_constants = None):
+        start = time.perf_counter()
+
+        self.timings = {}
+
+        self.is_non_geometric = uniform_bindings.get(
+            'isNonGeometric', ('bool', False))[1]
+        if self.is_non_geometric:
+            self.timings['prepare'] = time.perf_counter() - start
+            return
+
+        def value(name, default = None):
+            if name in uniform_bindings:
+                return uniform_bindings[name][1]
+            if default is None:
+                raise KeyError("Missing uniform %s" % name)
+            return default
+
+        constants = compile_time_constants or {}
+
+        self.is_finite = 'TetrahedraEdges.R13EdgeEnds' in uniform_bindings
+
+        self.other_tet_nums = numpy.array(
+            value('TetrahedraCombinatorics.otherTetNums'), dtype = int)
+        self.other_face_nums = numpy.array(
+            value('TetrahedraCombinatorics.otherFaceNums'), dtype = int)
+        self.num_tets = len(self.other_tet_nums) // 4
+        self.tsfms = _matrices_to_array(
+            value('TetrahedraBasics.SO13tsfms'), 4)
+        self.planes = _to_array(value('TetrahedraBasics.planes'), (4,))
+        self.R13_vertices = _to_array(
+            value('TetrahedraBasics.R13Vertices'), (4,))
+        self.face_weights = _to_array(value('weights'), ())
+
+        self.face_color_indices = numpy.array(
+            value('Colors.face_color_indices'), dtype = int)
+        self.edge_color_indices = numpy.array(
+            value('Colors.edge_color_indices'), dtype = int)
+        self.vertex_color_indices = numpy.array(
+            value('Colors.vertex_color_indices'), dtype = int)
+
+        self.num_cusps = constants.get(
+            b'##num_cusps##', int(self.vertex_color_indices.max()) + 1)
+        self.num_edges = constants.get(
+            b'##num_edges##', int(self.edge_color_indices.max()) + 1)
+
+        if self.is_finite:
+            ends = _to_array(value('TetrahedraEdges.R13EdgeEnds'), (4,))
+            self.edge_ends = ends.reshape(self.num_tets, 6, 2, 4)
+        else:
+            vertices = self.R13_vertices.reshape(self.num_tets, 4, 4)
+            self.edge_ends = numpy.stack(
+                [ numpy.stack([ vertices[:, i], vertices[:, j] ], axis = 1)
+                  for i, j in _edge_to_vertices ], axis = 1)
+
+            self.horosphere_scales = _to_array(
+                value('horosphereScales'), ())
+            self.insphere_radius_params = _to_array(
+                value('insphereRadiusParams'), ())
+            self.margulis_tube_tails = _to_array(
+                value('MargulisTubes.margulisTubeTails'), (4,))
+            self.margulis_tube_heads = _to_array(
+                value('MargulisTubes.margulisTubeHeads'), (4,))
+            self.margulis_tube_radius_params = _to_array(
+                value('margulisTubeRadiusParams'), ())
+            self.tet_to_cusp_matrices = _matrices_to_array(
+                value('TetCuspMatrices.tetToCuspMatrices'), 4)
+            self.mat_logs = _matrices_to_array(value('matLogs'), 2)
+            self.log_adjustments = _to_array(value('logAdjustments'), (2,))
+
+        self.current_boost = _matrices_to_array([value('currentBoost')], 4)[0]
+        self.current_tet_index = int(value('currentTetIndex'))
+        self.current_weight = float(value('currentWeight'))
+
+        self.max_steps = int(value('maxSteps'))
+        self.max_dist = float(value('maxDist'))
+        self.subpixel_count = int(value('subpixelCount'))
+        self.fov = float(value('fov'))
+        self.edge_thickness = float(value('edgeThickness'))
+        self.contrast = float(value('contrast'))
+        self.no_gradient = bool(value('noGradient', False))
+        self.light_bias = float(value('lightBias'))
+        self.light_falloff = float(value('lightFalloff'))
+        self.brightness = float(value('brightness'))
+        self.show_elevation = bool(value('showElevation', False))
+        self.desaturate_edges = bool(value('desaturate_edges', False))
+        self.view_mode = int(value('viewMode'))
+        self.perspective_type = int(value('perspectiveType', 0))
+        self.edge_tube_radius_param = float(value('edgeTubeRadiusParam'))
+        self.vertex_sphere_radius_param = float(
+            value('vertexSphereRadiusParam', 1.0))
+        self.gradient_threshholds = _to_array(
+            value('gradientThreshholds'), ())
+        self.gradient_colours = _to_array(value('gradientColours'), (3,))
+
+        self.timings['prepare'] = time.perf_counter() - start
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state['timings'] = {}
+        return state
+
+    def _add_time(self, stage, start):
+        self.timings[stage] = (
+            self.timings.get(stage, 0.0) + time.perf_counter() - start)
+
+    ##########################################################################
+    # Rendering
+
+    def render(self, width, height, num_processes = 1, tile_size = 64):
+        """
+        Renders an image and returns it as array of shape (height, width, 3)
+        with RGB values between 0 and 1 (the first row being the top of the
+        image).
+
+        The image is split into tiles of tile_size rows which are rendered
+        by num_processes processes (None meaning one process per CPU).
+        """
+
+        start = time.perf_counter()
+
+        if self.is_non_geometric:
+            self._add_time('render', start)
+            return numpy.zeros((height, width, 3))
+
+        tiles = [ (row, min(row + tile_size, height))
+                  for row in range(0, height, tile_size) ]
+
+        if num_processes == 1 or len(tiles) == 1:
+            results = [ self._render_tile(width, height, tile)
+                        for tile in tiles ]
+        else:
+            with multiprocessing.Pool(
+                    num_processes,
+                    initializer = _initialize_worker,
+                    initargs = (self,)) as pool:
+                results = pool.starmap(
+                    _render_tile_in_worker,
+                    [ (width, height, tile) for tile in tiles ])
+
+        image = numpy.concatenate([ tile_image for tile_image, t in results ])
+
+        # Time spent in the stages summed over all processes
+        for tile_image, tile_timings in results:
+            if tile_timings is not self.timings:
+                for stage, t in tile_timings.items():
+                    self.timings[stage] = self.timings.get(stage, 0.0) + t
+
+        self._add_time('render', start)
+
+        return image
+
+    def _render_tile(self, width, height, tile):
+        """
+        Renders the rows tile[0]...tile[1]-1 (counted from the top).
+        Returns the image and the timings.
+        """
+
+        start = time.perf_counter()
+
+        row_start, row_end = tile
+        rows = numpy.arange(row_start, row_end)
+        cols = numpy.arange(width)
+
+        # gl_FragCoord of pixel centers, y counted from the bottom
+        frag_x, frag_y = numpy.meshgrid(cols + 0.5, height - rows - 0.5)
+        xy = numpy.stack([ frag_x.ravel() - 0.5 * width,
+                           frag_y.ravel() - 0.5 * height ], axis = 1) / width
+
+        n = self.subpixel_count
+        scale = math.tan(math.radians(self.fov * 0.5))
+        offsets = [ (numpy.array([ 1.0 + 2 * i, 1.0 + 2 * j ]) / (2 * n) - 0.5)
+                    / width
+                    for i in range(n)
+                    for j in range(n) ]
+        # Subpixel coordinates for all pixels, subpixel by subpixel.
+        scaled_xy = numpy.concatenate(
+            [ scale * (xy + offset) for offset in offsets ])
+
+        self._add_time('rays', start)
+
+        num_pixels = len(xy)
+        colors, values, is_valued = self._compute_colors_and_values(scaled_xy)
+
+        start = time.perf_counter()
+
+        colors = colors.reshape(n * n, num_pixels, 3)
+        values = values.reshape(n * n, num_pixels)
+        is_valued = is_valued.reshape(n * n, num_pixels)
+
+        total_color = numpy.sum(colors, axis = 0)
+        num_valued = numpy.sum(is_valued, axis = 0)
+        total_value = numpy.sum(numpy.where(is_valued, values, 0.0), axis = 0)
+
+        has_value = num_valued > 0
+        value = total_value[has_value] / num_valued[has_value]
+        total_color[has_value] += (
+            num_valued[has_value][:, None] * self._color_for_value(value))
+
+        image = (total_color / (n * n)).reshape(row_end - row_start, width, 3)
+
+        self._add_time('shade', start)
+
+        return image, self.timings
+
+    def _compute_colors_and_values(self, scaled_xy):
+        """
+        For each ray given by the (scaled) screen coordinates, computes
+        the color if the ray hit is colored and the value if it is
+        valued (see isColored in the shader).
+        """
+
+        n = len(scaled_xy)
+        colors = numpy.zeros((n, 3))
+        values = numpy.zeros(n)
+        is_valued = numpy.zeros(n, dtype = bool)
+
+        inside = numpy.ones(n, dtype = bool)
+        if self.perspective_type == _perspective_type_hyperideal:
+            inside = numpy.sum(scaled_xy * scaled_xy, axis = 1) < 0.25
+            colors[~inside] = 1.0
+
+        start = time.perf_counter()
+        ray_hits = self._compute_ray_hits(scaled_xy[inside])
+        self._add_time('trace', start)
+
+        start = time.perf_counter()
+
+        object_types = ray_hits.object_types
+        is_colored = numpy.isin(object_types, _colored_object_types)
+        is_hit = object_types != _object_type_nothing
+
+        hit_colors = numpy.zeros((len(object_types), 3))
+        hit_colors[is_colored] = self._color_for_ray_hits(ray_hits, is_colored)
+        colors[inside] = hit_colors
+
+        hit_values = numpy.zeros(len(object_types))
+        valued = is_hit & ~is_colored
+        hit_values[valued] = self._value_for_ray_hits(ray_hits, valued)
+        values[inside] = hit_values
+        is_valued[inside] = valued
+
+        self._add_time('shade', start)
+
+        return colors, values, is_valued
+
+    ##########################################################################
+    # Computing ray hits
+
+    def _eye_rays(self, xy):
+        n = len(xy)
+        zeros = numpy.zeros(n)
+        ones = numpy.ones(n)
+        if self.perspective_type == _perspective_type_material:
+            points = numpy.tile([1.0, 0.0, 0.0, 0.0], (n, 1))
+            dirs = _r13_normalise(numpy.stack(
+                [ zeros, 2.0 * xy[:, 0], 2.0 * xy[:, 1], -ones ], axis = 1))
+        elif self.perspective_type == _perspective_type_ideal:
+            r2 = 0.5 * numpy.sum(xy * xy, axis = 1)
+            points = numpy.stack(
+                [ r2 + 1.0, xy[:, 0], xy[:, 1], r2 ], axis = 1)
+            dirs = numpy.stack(
+                [ r2, xy[:, 0], xy[:, 1], r2 - 1.0 ], axis = 1)
+        else:
+            points = _r13_normalise(numpy.stack(
+                [ ones, 2.0 * xy[:, 0], 2.0 * xy[:, 1], zeros ], axis = 1))
+            dirs = numpy.tile([0.0, 0.0, 0.0, -1.0], (n, 1))
+        return points, dirs
+
+    def _compute_ray_hits(self, xy):
+        """
+        Vectorized version of computeRayHit.
+        """
+
+        points, dirs = self._eye_rays(xy)
+        return self._trace_rays(points, dirs)
+
+    def trace_directions(self, dirs):
+        """
+        Traces rays starting at the camera (i.e., the origin moved by
+        currentBoost) in the given directions (an array of unit vectors in
+        R^3 in the coordinates of the camera) until they hit an object,
+        exceed maxDist or maxSteps.
+
+        Returns the arrays of the final weights (see valueForRayHit), the
+        distances traveled and the types of the objects hit (an object of
+        type face means that the ray stopped because it exceeded maxDist
+        or maxSteps).
+        """
+
+        start = time.perf_counter()
+
+        n = len(dirs)
+        points = numpy.tile([1.0, 0.0, 0.0, 0.0], (n, 1))
+        dirs = numpy.concatenate([ numpy.zeros((n, 1)), dirs ], axis = 1)
+        ray_hits = self._trace_rays(points, dirs, perspective_type =
+                                    _perspective_type_material)
+
+        self._add_time('trace', start)
+
+        return ray_hits.weights, ray_hits.dists, ray_hits.object_types
+
+    def trace_directions_to_distances(self, dirs, distances):
+        """
+        Like trace_directions but for each of the given increasing
+        distances (instead of maxDist). Yields the arrays for each distance
+        (before tracing to the next one). The rays that stopped at a face
+        because they exceeded the previous distance are continued from
+        there, so maxSteps limits the number of tetrahedra traversed
+        between two distances.
+        """
+
+        n = len(dirs)
+        points = numpy.tile([1.0, 0.0, 0.0, 0.0], (n, 1))
+        dirs = numpy.concatenate([ numpy.zeros((n, 1)), dirs ], axis = 1)
+        ray_hits = None
+        max_dist = self.max_dist
+
+        try:
+            for distance in distances:
+                start = time.perf_counter()
+
+                previous_distance = self.max_dist
+                self.max_dist = distance
+                if ray_hits is None:
+                    ray_hits = self._trace_rays(
+                        points, dirs,
+                        perspective_type = _perspective_type_material)
+                else:
+                    indices = numpy.flatnonzero(
+                        (ray_hits.object_types == _object_type_face) &
+                        (ray_hits.dists > previous_distance) &
+                        (ray_hits.dists <= distance))
+                    self._ray_trace(
+                        ray_hits, self._cross_faces(ray_hits, indices))
+
+                self._add_time('trace', start)
+
+                yield (ray_hits.weights.copy(), ray_hits.dists.copy(),
+                       ray_hits.object_types.copy())
+        finally:
+            self.max_dist = max_dist
+
+    def _trace_rays(self, points, dirs, perspective_type = None):
+        """
+        Traces the rays given in the coordinates of the camera.
+        """
+
+        if perspective_type is None:
+            perspective_type = self.perspective_type
+
+        n = len(points)
+        ray_hits = _RayHits(
+            _apply(points, self.current_boost),
+            _apply(dirs, self.current_boost),
+            numpy.full(n, self.current_tet_index, dtype = int),
+            numpy.full(n, self.current_weight),
+            numpy.tile(
+                _r13_normalise(_apply(_light_source_position,
+                                      self.current_boost)),
+                (n, 1)))
+
+        if perspective_type != _perspective_type_material:
+            self._graph_trace(ray_hits, numpy.arange(n))
+
+        hit_peripheral = self._leave_vertex_neighborhood(ray_hits)
+
+        self._ray_trace(ray_hits, numpy.flatnonzero(~hit_peripheral))
+
+        return ray_hits
+
+    def _graph_trace(self, ray_hits, indices):
+        """
+        Vectorized version of graph_trace for the given rays.
+        """
+
+        entry_faces = numpy.full(len(indices), -1)
+        for i in range(self.max_steps):
+            if len(indices) == 0:
+                break
+            tet_nums = ray_hits.tet_nums[indices]
+            face_indices = 4 * tet_nums[:, None] + numpy.arange(4)
+            amounts = _r13_dot(ray_hits.points[indices][:, None, :],
+                               self.planes[face_indices])
+            amounts[numpy.arange(4) == entry_faces[:, None]] = 0.0
+            faces = numpy.argmax(amounts, axis = 1)
+            moving = amounts[numpy.arange(len(indices)), faces] > 0.0000001
+
+            indices = indices[moving]
+            index = 4 * tet_nums[moving] + faces[moving]
+            entry_faces = self.other_face_nums[index]
+            tsfms = self.tsfms[index]
+            ray_hits.tet_nums[indices] = self.other_tet_nums[index]
+            ray_hits.weights[indices] += self.face_weights[index]
+            ray_hits.points[indices] = _apply(ray_hits.points[indices], tsfms)
+            ray_hits.dirs[indices] = _apply(ray_hits.dirs[indices], tsfms)
+            ray_hits.light_sources[indices] = _apply(
+                ray_hits.light_sources[indices], tsfms)
+
+    def _leave_vertex_neighborhood(self, ray_hits):
+        """
+        Vectorized version of leaveVertexNeighborhood (without the
+        parabolic transformation, see module documentation). Returns
+        which rays hit a peripheral curve.
+        """
+
+        n = len(ray_hits.points)
+        hit_peripheral = numpy.zeros(n, dtype = bool)
+        if self.is_finite and self.vertex_sphere_radius_param <= 1.0001:
+            return hit_peripheral
+
+        points = ray_hits.points
+        dirs = ray_hits.dirs
+        smallest_p = numpy.full(n, _unreachable_dist_param)
+
+        for vertex in range(4):
+            index = 4 * ray_hits.tet_nums + vertex
+            if self.is_finite:
+                params = _dist_params_for_sphere_intersection(
+                    points, dirs, self.R13_vertices[index],
+                    self.vertex_sphere_radius_param)
+                candidates = [ (params, numpy.ones(n, dtype = bool),
+                                _object_type_vertex_sphere) ]
+            else:
+                scales = self.horosphere_scales[index]
+                is_horosphere = scales != 0.0
+                is_tube = (~is_horosphere) & (
+                    self.margulis_tube_radius_params[index] > 0.50001)
+                candidates = [
+                    (_dist_params_for_sphere_intersection(
+                        points, dirs,
+                        scales[:, None] * self.R13_vertices[index], 1.0),
+                     is_horosphere, _object_type_horosphere),
+                    (_dist_params_for_tube_intersection(
+                        points, dirs,
+                        self.margulis_tube_tails[index],
+                        self.margulis_tube_heads[index],
+                        self.margulis_tube_radius_params[index], 0.0),
+                     is_tube, _object_type_margulis_tube) ]
+
+            for (x, y), mask, object_type in candidates:
+                update = (mask & (x == _unreachable_dist_param) &
+                          (y < smallest_p))
+                smallest_p[update] = y[update]
+                ray_hits.object_types[update] = object_type
+                ray_hits.object_indices[update] = vertex
+
+        inside = numpy.flatnonzero(smallest_p < _unreachable_dist_param)
+        if len(inside) == 0:
+            return hit_peripheral
+
+        p = smallest_p[inside]
+        if self.is_finite:
+            ray_hits.dists[inside] += numpy.arctanh(p)
+        else:
+            ray_hits.dists[inside] += numpy.where(
+                p < 1.0, numpy.arctanh(numpy.minimum(p, 0.9999999)), 20.0)
+        ray_hits.dists_when_leaving_cusp[inside] = ray_hits.dists[inside]
+        self._advance_rays(ray_hits, inside, p)
+
+        if not self.is_finite:
+            coords = self._ml_coordinates(ray_hits, inside)
+            coords = coords - numpy.floor(coords)
+            t = _peripheral_curve_thickness
+            on_curve = numpy.any((coords < t) | (coords > 1.0 - t), axis = 1)
+            hit_peripheral[inside[on_curve]] = True
+            inside = inside[~on_curve]
+
+        self._graph_trace(ray_hits, inside)
+
+        return hit_peripheral
+
+    def _advance_rays(self, ray_hits, indices, p):
+        points = _r13_normalise(
+            ray_hits.points[indices] + p[:, None] * ray_hits.dirs[indices])
+        ray_hits.points[indices] = points
+        ray_hits.dirs[indices] = _make_unit_tangent_vector(
+            ray_hits.dirs[indices], points)
+
+    def _ray_trace(self, ray_hits, indices):
+        """
+        Vectorized version of ray_trace for the given rays.
+        """
+
+        for i in range(self.max_steps):
+            if len(indices) == 0:
+                break
+
+            self._ray_trace_through_hyperboloid_tet(ray_hits, indices)
+
+            continuing = (
+                (ray_hits.object_types[indices] == _object_type_face) &
+                (ray_hits.dists[indices] <= self.max_dist))
+            indices = self._cross_faces(ray_hits, indices[continuing])
+
+    def _cross_faces(self, ray_hits, indices):
+        """
+        Moves the given rays (which stopped at a face) into the neighboring
+        tetrahedron. Returns the rays which continue (i.e., did not hit an
+        elevation).
+        """
+
+        index = 4 * ray_hits.tet_nums[indices] + (
+            ray_hits.object_indices[indices])
+
+        old_weights = ray_hits.weights[indices]
+        new_weights = old_weights + self.face_weights[index]
+
+        if self.show_elevation:
+            eps = 1e-4
+            o = old_weights - eps
+            n = new_weights - eps
+            is_elevation = o * n < 0.0
+            ray_hits.object_types[indices[is_elevation]] = numpy.where(
+                n[is_elevation] < 0.0,
+                _object_type_elevation_enter,
+                _object_type_elevation_exit)
+            indices = indices[~is_elevation]
+            index = index[~is_elevation]
+            new_weights = new_weights[~is_elevation]
+
+        tsfms = self.tsfms[index]
+        ray_hits.weights[indices] = new_weights
+        ray_hits.object_indices[indices] = self.other_face_nums[index]
+        ray_hits.light_sources[indices] = _apply(
+            ray_hits.light_sources[indices], tsfms)
+        ray_hits.points[indices] = _apply(ray_hits.points[indices], tsfms)
+        ray_hits.dirs[indices] = _r13_normalise(
+            _apply(ray_hits.dirs[indices], tsfms))
+        ray_hits.tet_nums[indices] = self.other_tet_nums[index]
+
+        return indices
+
+    def _ray_trace_through_hyperboloid_tet(self, ray_hits, indices):
+        """
+        Vectorized version of ray_trace_through_hyperboloid_tet for the
+        given rays.
+        """
+
+        n = len(indices)
+        rows = numpy.arange(n)
+        points = ray_hits.points[indices]
+        dirs = ray_hits.dirs[indices]
+        tet_nums = ray_hits.tet_nums[indices]
+        entry_types = ray_hits.object_types[indices]
+        entry_indices = ray_hits.object_indices[indices]
+
+        # Faces
+        face_indices = 4 * tet_nums[:, None] + numpy.arange(4)
+        planes = self.planes[face_indices]
+        dir_dots = _r13_dot(dirs[:, None, :], planes)
+        with numpy.errstate(divide = 'ignore', invalid = 'ignore'):
+            ps = -_r13_dot(points[:, None, :], planes) / dir_dots
+        is_entry_face = (
+            (entry_types == _object_type_face)[:, None] &
+            (entry_indices[:, None] == numpy.arange(4)))
+        ps = numpy.where((dir_dots > 0.0) & ~is_entry_face, ps, 100000000.0)
+
+        faces = numpy.argmin(ps, axis = 1)
+        smallest_p = ps[rows, faces]
+        object_types = numpy.full(n, _object_type_face)
+        object_indices = faces
+
+        # A ray that cannot leave the tetrahedron through any face
+        # (this only happens through numerical problems) stops.
+        stuck = smallest_p == 100000000.0
+        object_types[stuck] = _object_type_nothing
+        smallest_p[stuck] = 0.0
+
+        def update(params, object_type, object_index):
+            closer = params < smallest_p
+            smallest_p[closer] = params[closer]
+            object_types[closer] = object_type
+            object_indices[closer] = (
+                object_index if numpy.isscalar(object_index)
+                else object_index[closer])
+
+        if self.is_finite:
+            if self.vertex_sphere_radius_param > 1.0001:
+                for vertex in range(4):
+                    x, y = _dist_params_for_sphere_intersection(
+                        points, dirs,
+                        self.R13_vertices[4 * tet_nums + vertex],
+                        self.vertex_sphere_radius_param)
+                    update(x, _object_type_vertex_sphere, vertex)
+        else:
+            r = self.insphere_radius_params[tet_nums]
+            x, y = _dist_params_for_sphere_intersection(
+                points, dirs, numpy.array([1.0, 0.0, 0.0, 0.0]), r)
+            update(numpy.where(r > 1.0001, x, _unreachable_dist_param),
+                   _object_type_insphere, 0)
+
+            for vertex in range(4):
+                index = 4 * tet_nums + vertex
+                scales = self.horosphere_scales[index]
+                x, y = _dist_params_for_sphere_intersection(
+                    points, dirs,
+                    scales[:, None] * self.R13_vertices[index], 1.0)
+                update(numpy.where(scales != 0.0, x, _unreachable_dist_param),
+                       _object_type_horosphere, vertex)
+
+                radius_params = self.margulis_tube_radius_params[index]
+                x, y = _dist_params_for_tube_intersection(
+                    points, dirs,
+                    self.margulis_tube_tails[index],
+                    self.margulis_tube_heads[index],
+                    radius_params, 0.0)
+                update(numpy.where(radius_params > 0.50001,
+                                   x, _unreachable_dist_param),
+                       _object_type_margulis_tube, vertex)
+
+        if self.edge_tube_radius_param > 0.500001:
+            if self.is_finite:
+                back_dist_params = 0.0
+            else:
+                back_dist_params = numpy.tanh(
+                    ray_hits.dists_when_leaving_cusp[indices] -
+                    ray_hits.dists[indices])
+            edge_ends = self.edge_ends[tet_nums]
+            for edge in range(6):
+                x, y = _dist_params_for_tube_intersection(
+                    points, dirs,
+                    edge_ends[:, edge, 0], edge_ends[:, edge, 1],
+                    self.edge_tube_radius_param,
+                    back_dist_params)
+                enter = x < smallest_p
+                update(numpy.where(enter, x, _unreachable_dist_param),
+                       _object_type_edge_cylinder_enter, edge)
+                update(numpy.where(enter, _unreachable_dist_param, y),
+                       _object_type_edge_cylinder_exit, edge)
+
+        with numpy.errstate(invalid = 'ignore'):
+            ray_hits.dists[indices] += numpy.arctanh(smallest_p)
+        ray_hits.object_types[indices] = object_types
+        ray_hits.object_indices[indices] = object_indices
+        self._advance_rays(ray_hits, indices, smallest_p)
+
+        if self.edge_thickness > 0.00001:
+            on_face = numpy.flatnonzero(object_types == _object_type_face)
+            bdry_params = self._triangle_bdry_params(
+                ray_hits.points[indices[on_face]],
+                tet_nums[on_face], object_indices[on_face])
+            ray_hits.object_types[
+                indices[on_face[bdry_params < self.edge_thickness]]] = (
+                    _object_type_edge_fan)
+
+    def _triangle_bdry_params(self, points, tet_nums, exit_faces):
+        """
+        Vectorized version of triangleBdryParam.
+        """
+
+        exit_dual_points = self.planes[4 * tet_nums + exit_faces]
+        result = numpy.full(len(points), 100000000.0)
+        for face in range(4):
+            dual_points = self.planes[4 * tet_nums + face]
+            dot1 = -_r13_dot(points, exit_dual_points)
+            perps = _r13_normalise(
+                dual_points -
+                _r13_dot(exit_dual_points, dual_points)[:, None] *
+                exit_dual_points)
+            dot2 = -_r13_dot(points, perps)
+            params = numpy.where(exit_faces != face,
+                                 dot1 * dot1 + dot2 * dot2, 100000000.0)
+            result = numpy.minimum(result, params)
+        return result
+
+    ##########################################################################
+    # Shading
+
+    def _ml_coordinates(self, ray_hits, indices):
+        """
+        Vectorized version of MLCoordinatesForRayHit.
+        """
+
+        index = 4 * ray_hits.tet_nums[indices] + ray_hits.object_indices[indices]
+        z = _hyperboloid_to_upper_halfspace(
+            _apply(ray_hits.points[indices],
+                   self.tet_to_cusp_matrices[index]))[:, :2]
+        is_tube = ray_hits.object_types[indices] == _object_type_margulis_tube
+        if numpy.any(is_tube):
+            w = z[is_tube]
+            z[is_tube] = numpy.stack(
+                [ numpy.log(numpy.hypot(w[:, 0], w[:, 1])),
+                  numpy.arctan2(w[:, 1], w[:, 0]) ],
+                axis = 1) + self.log_adjustments[index[is_tube]]
+        return _apply(z, self.mat_logs[index])
+
+    def _material_params(self, ray_hits, indices):
+        """
+        Vectorized version of material_params. Returns ambient, diffuse
+        and specular color.
+        """
+
+        n = len(indices)
+        object_types = ray_hits.object_types[indices]
+        tet_nums = ray_hits.tet_nums[indices]
+        object_indices = ray_hits.object_indices[indices]
+
+        diffuse = numpy.tile([0.2, 0.6, 0.3], (n, 1))
+        specular = numpy.tile([0.5, 0.5, 0.5], (n, 1))
+        # Whether the ambient color is the diffuse color rather than half
+        # of it.
+        full_ambient = numpy.zeros(n, dtype = bool)
+
+        def hsv(h, s, v):
+            return _hsv2rgb(numpy.stack(
+                [ h, numpy.full(len(h), s), numpy.full(len(h), v) ], axis = 1))
+
+        vertex_index = 4 * tet_nums + object_indices
+
+        if self.is_finite:
+            m = object_types == _object_type_vertex_sphere
+            diffuse[m] = hsv(
+                self.vertex_color_indices[vertex_index[m]] / self.num_cusps,
+                0.25, 1.0)
+        else:
+            m = ((object_types == _object_type_horosphere) |
+                 (object_types == _object_type_margulis_tube))
+            diffuse[m] = hsv(
+                self.vertex_color_indices[vertex_index[m]] / self.num_cusps,
+                0.25, 1.0)
+            if numpy.any(m):
+                coords = self._ml_coordinates(ray_hits, indices[m])
+                coords = coords - numpy.floor(coords)
+                t = _peripheral_curve_thickness
+                sub = numpy.flatnonzero(m)
+                on_longitude = sub[(coords[:, 0] < t) | (coords[:, 0] > 1.0 - t)]
+                diffuse[on_longitude] = _longitude_color
+                full_ambient[on_longitude] = True
+                on_meridian = sub[(coords[:, 1] < t) | (coords[:, 1] > 1.0 - t)]
+                diffuse[on_meridian] = _meridian_color
+                full_ambient[on_meridian] = True
+
+            m = object_types == _object_type_insphere
+            diffuse[m] = 0.5 * hsv(tet_nums[m] / self.num_tets, 0.5, 1.0)
+
+        m = object_types == _object_type_edge_fan
+        diffuse[m] = hsv(
+            self.face_color_indices[vertex_index[m]] / (2 * self.num_tets),
+            0.75, 0.5)
+
+        edge_index = 6 * tet_nums + object_indices
+
+        m = object_types == _object_type_edge_cylinder_enter
+        diffuse[m] = hsv(
+            self.edge_color_indices[edge_index[m]] / self.num_edges,
+            0.24 if self.desaturate_edges else 1.0, 1.0)
+
+        m = object_types == _object_type_edge_cylinder_exit
+        diffuse[m] = 0.3 * hsv(
+            self.edge_color_indices[edge_index[m]] / self.num_tets, 1.0, 1.0)
+
+        diffuse[object_types == _object_type_elevation_enter] = [0.3, 0.7, 0.3]
+        diffuse[object_types == _object_type_elevation_exit] = [0.7, 0.3, 0.3]
+
+        ambient = numpy.where(full_ambient[:, None], diffuse, 0.5 * diffuse)
+
+        return ambient, diffuse, specular
+
+    def _normals(self, ray_hits, indices):
+        """
+        Vectorized version of normalForRayHit.
+        """
+
+        n = len(indices)
+        points = ray_hits.points[indices]
+        object_types = ray_hits.object_types[indices]
+        tet_nums = ray_hits.tet_nums[indices]
+        object_indices = ray_hits.object_indices[indices]
+        vertex_index = 4 * tet_nums + object_indices
+
+        normals = numpy.tile([0.0, 1.0, 0.0, 0.0], (n, 1))
+
+        if self.is_finite:
+            m = object_types == _object_type_vertex_sphere
+            normals[m] = _normal_for_sphere(
+                points[m], self.R13_vertices[vertex_index[m]])
+        else:
+            m = object_types == _object_type_insphere
+            normals[m] = _normal_for_sphere(
+                points[m], numpy.array([1.0, 0.0, 0.0, 0.0]))
+
+            m = object_types == _object_type_horosphere
+            normals[m] = (
+                self.horosphere_scales[vertex_index[m]][:, None] *
+                self.R13_vertices[vertex_index[m]] - points[m])
+
+            m = object_types == _object_type_margulis_tube
+            normals[m] = _normal_for_tube(
+                points[m],
+                self.margulis_tube_tails[vertex_index[m]],
+                self.margulis_tube_heads[vertex_index[m]])
+
+        m = numpy.isin(object_types, [ _object_type_edge_fan,
+                                       _object_type_elevation_enter,
+                                       _object_type_elevation_exit ])
+        normals[m] = self.planes[vertex_index[m]]
+
+        for object_type, sign in [ (_object_type_edge_cylinder_enter, +1),
+                                   (_object_type_edge_cylinder_exit, -1) ]:
+            m = object_types == object_type
+            ends = self.edge_ends[tet_nums[m], object_indices[m]]
+            normals[m] = sign * _normal_for_tube(
+                points[m], ends[:, 0], ends[:, 1])
+
+        return normals
+
+    def _color_for_ray_hits(self, ray_hits, mask):
+        """
+        Vectorized version of colorForRayHit.
+        """
+
+        indices = numpy.flatnonzero(mask)
+        ambient, diffuse, specular = self._material_params(ray_hits, indices)
+        normals = self._normals(ray_hits, indices)
+        points = ray_hits.points[indices]
+
+        light_positions = _r13_normalise(ray_hits.light_sources[indices])
+
+        light_dist_origin = math.acosh(
+            -_r13_dot(_r13_normalise(_light_source_position),
+                      numpy.array([1.0, 0.0, 0.0, 0.0])))
+
+        unsafe_dists = numpy.arccosh(numpy.maximum(
+            -_r13_dot(points, light_positions), 1.0))
+
+        dists = ray_hits.dists[indices]
+        dists = numpy.clip(unsafe_dists,
+                           dists - light_dist_origin,
+                           dists + light_dist_origin)
+
+        light_dirs_at_hit = _make_unit_tangent_vector(-light_positions, points)
+
+        normal_light = numpy.clip(
+            _r13_dot(normals, light_dirs_at_hit), 0.0, 1.0)
+
+        half_angles = _r13_normalise(light_dirs_at_hit + ray_hits.dirs[indices])
+
+        blinn_terms = numpy.where(
+            normal_light > 0.0,
+            numpy.clip(_r13_dot(half_angles, normals), 0.0, 1.0) ** 20.0,
+            0.0)
+
+        return (
+            self.brightness * (
+                ambient
+                + diffuse * normal_light[:, None]
+                + specular * blinn_terms[:, None])
+            / (((dists + self.light_bias) / self.light_bias)
+               ** self.light_falloff)[:, None])
+
+    def _value_for_ray_hits(self, ray_hits, mask):
+        """
+        Vectorized version of valueForRayHit.
+        """
+        if self.view_mode == 0:
+            return ray_hits.weights[mask]
+        if self.view_mode == 1:
+            return 0.5 * ray_hits.dists[mask]
+        return ray_hits.tet_nums[mask].astype(float)
+
+    def _color_for_value(self, values):
+        """
+        Vectorized version of colorForValue.
+        """
+
+        if self.no_gradient:
+            return numpy.stack(3 * [ values ], axis = 1)
+
+        values = self.contrast * values
+        values = 0.5 + 0.5 * values / (numpy.abs(values) + 1.0)
+
+        threshholds = self.gradient_threshholds
+        colours = self.gradient_colours
+        bands = numpy.searchsorted(threshholds[1:4], values, side = 'right') + 1
+        t = ((values - threshholds[bands - 1]) /
+             (threshholds[bands] - threshholds[bands - 1]))
+        return (colours[bands - 1] +
+                t[:, None] * (colours[bands] - colours[bands - 1]))
+
+# Used when rendering tiles in several processes.
+_worker_raytracer = None
+
+def _initialize_worker(raytracer):
+    global _worker_raytracer
+    _worker_raytracer = raytracer
+
+def _render_tile_in_worker(width, height, tile):
+    _worker_raytracer.timings = {}
+    return _worker_raytracer._render_tile(width, height, tile)
+
+def write_png(filename, image):
+    """
+    Writes an array of shape (height, width, 3) with RGB values between
+    0 and 1 as 8-bit PNG file.
+    """
+
+    pixels = numpy.clip(numpy.round(255.0 * image), 0, 255).astype(numpy.uint8)
+    height, width, depth = pixels.shape
+
+    writer = png.Writer(width, height, greyscale = False, bitdepth = 8)
+    with open(filename, 'wb') as f:
+        writer.write(f, pixels.reshape(height, 3 * width))
+
+def render_manifold(manifold, filename = None, width = 320, height = 240,
+                    cohomology_class = None, trig_type = 'ideal',
+                    view_state = None, num_processes = 1, tile_size = 64,
+                    **ui_uniforms):
+    """
+    Renders the inside view of a manifold the way M.inside_view()
+    initially shows it (with the same defaults) and optionally writes it
+    to a PNG file. cohomology_class is interpreted as for inside_view
+    (giving a cohomology fractal). Further uniforms (e.g., fov or
+    maxSteps) can be given as keyword arguments.
+
+    Returns the image (see CpuRaytracer.render) and the time in seconds
+    spent in the different stages.
+    """
+
+    start = time.perf_counter()
+
+    raytracing_data, has_weights = raytracing_data_for_manifold(
+        manifold, cohomology_class, trig_type)
+
+    if view_state is None:
+        view_state = raytracing_data.initial_view_state()
+    bindings = view_uniform_bindings(
+        raytracing_data, view_state = view_state,
+        has_weights = has_weights, **ui_uniforms)
+
+    raytracing_data_time = time.perf_counter() - start
+
+    raytracer = CpuRaytracer(
+        bindings, raytracing_data.get_compile_time_constants())
+    raytracer.timings['prepare'] += raytracing_data_time
+
+    image = raytracer.render(width, height,
+                             num_processes = num_processes,
+                             tile_size = tile_size)
+
+    if filename:
+        start = time.perf_counter()
+        write_png(filename, image)
+        raytracer.timings['write'] = time.perf_counter() - start
+
+    return image, raytracer.timings
+
+def raytracing_data_for_manifold(manifold, cohomology_class = None,
+                                 trig_type = 'ideal'):
+    """
+    Computes the raytracing data the inside view initially uses for the
+    given manifold and cohomology class (interpreted as for inside_view).
+    Returns the raytracing data and whether it has weights.
+    """
+
+    from .cohomology_fractal import compute_weights_basis_class
+    from .ideal_raytracing_data import IdealRaytracingData
+    from .finite_raytracing_data import FiniteRaytracingData
+
+    weights, cohomology_basis, cohomology_class = (
+        compute_weights_basis_class(manifold, cohomology_class))
+    if cohomology_basis:
+        weights = [ 0.0 for c in cohomology_basis[0] ]
+        for f, basis in zip(cohomology_class, cohomology_basis):
+            for i, b in enumerate(basis):
+                weights[i] += f * b
+
+    has_weights = bool(weights)
+
+    if trig_type == 'finite':
+        raytracing_data = FiniteRaytracingData.from_triangulation(
+            manifold, weights = weights)
+    else:
+        raytracing_data = IdealRaytracingData.from_manifold(
+            manifold,
+            areas = manifold.num_cusps() * [ 0.0 if has_weights else 1.0 ],
+            insphere_scale = 0.0 if has_weights else 0.05,
+            weights = weights)
+
+    return raytracing_data, has_weights
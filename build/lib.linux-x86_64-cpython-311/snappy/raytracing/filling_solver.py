@@ -0,0 +1,329 @@
+"""
+Solving the gluing equations for the Dehn-fillings chosen with the
+sliders of the inside and finite viewer without doing it on the Tk event
+loop for every slider event.
+"""
+
+import threading
+import time
+
+__all__ = ['FillingSolver', 'kernel_lock']
+
+# The SnapPea kernel keeps the state of a long computation (used for
+# cancelling and calling UI_callback) in global variables. The worker of
+# a FillingSolver only calls the kernel while holding this lock and the
+# viewers only call the kernel for the result while holding it, so
+# their calls never overlap.
+kernel_lock = threading.Lock()
+
+class FillingSolver(object):
+    """
+    Computes the hyperbolic structure for the most recently requested
+    Dehn-fillings in a worker thread and copies the resulting shapes to
+    the manifold shown by the view.
+
+    The worker solves on its own copy of the manifold so that each
+    solution starts from the shapes of the previous one, which is what
+    makes dragging a filling slider converge in a few Newton steps. A
+    request that is still waiting when the next one arrives is dropped and
+    a result that was superseded while being computed is discarded.
+
+    The result is published on the Tk event loop (polled with after while
+    a request is outstanding): the shapes and fillings are set on the
+    manifold of the view, the solution is polished there (which takes a
+    single Newton step since it starts at the solution) and the given
+    callback is invoked to recompute the raytracing data and redraw.
+
+    The kernel calls of the worker and of publishing a result are
+    serialized with kernel_lock: a result is only published when the
+    worker is not solving. UI_callback is only called for computations
+    on the main thread, so the worker never runs the Tk event loop. Note
+    that SnapPea_interrupt (e.g., from the SnapPy terminal) cancels a
+    solution running in the worker as well.
+
+    For every published result, the time spent waiting in the queue,
+    solving, applying the shapes and in the callback is recorded in
+    events, see latency_summary.
+
+    stop has to be called when the view is closed so that the worker
+    thread terminates (and releases its copy of the manifold).
+
+    All the widget needs is after (we use a fake one here)::
+
+        >>> from snappy import Manifold
+        >>> class Widget(object):
+        ...     def __init__(self):
+        ...         self.pending = []
+        ...     def after(self, ms, callback):
+        ...         self.pending.append(callback)
+        ...     def run(self):
+        ...         while self.pending:
+        ...             time.sleep(0.01)
+        ...             self.pending.pop(0)()
+        >>> M = Manifold("m004")
+        >>> widget = Widget()
+        >>> def solved():
+        ...     print(M.cusp_info(0).filling, M.solution_type())
+        >>> solver = FillingSolver(widget, M, solved)
+        >>> solver.request([(5, 1)])
+        >>> solver.request([(6, 1)])
+        >>> widget.run()
+        (6.0, 1.0) all tetrahedra positively oriented
+        >>> solver.num_superseded, len(solver.events)
+        (1, 1)
+
+    A result is not published while kernel_lock is held::
+
+        >>> kernel_lock.acquire()
+        True
+        >>> solver.request([(7, 1)])
+        >>> time.sleep(0.1)
+        >>> widget.pending.pop(0)()
+        >>> M.cusp_info(0).filling, len(widget.pending)
+        ((6.0, 1.0), 1)
+        >>> kernel_lock.release()
+        >>> widget.run()
+        (7.0, 1.0) all tetrahedra positively oriented
+
+    After stop, the worker terminates and requests are ignored::
+
+        >>> solver.stop()
+        >>> solver._thread.join(10)
+        >>> solver._thread.is_alive(), solver._worker_manifold
+        (False, None)
+        >>> solver.request([(8, 1)])
+        >>> widget.pending
+        []
+    """
+
+    def __init__(self, widget, manifold, publish_callback,
+                 poll_interval = 15, max_num_events = 1000):
+        self.widget = widget
+        self.manifold = manifold
+        self.publish_callback = publish_callback
+        self.poll_interval = poll_interval
+        self.max_num_events = max_num_events
+
+        self.events = []
+        self.num_superseded = 0
+
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stopped = False
+        # Request waiting for the worker.
+        self._pending_request = None
+        # Result waiting to be published.
+        self._result = None
+        self._latest_request_id = 0
+        # Request the worker is solving.
+        self._solving_request = None
+        self._polling = False
+        # The worker copies the manifold of the view (on the Tk thread)
+        # when this is set.
+        self._needs_copy = True
+        self._worker_manifold = None
+
+    def request(self, fillings, force_recompute = False):
+        """
+        Asks for the hyperbolic structure with the given Dehn-fillings
+        (given as for Manifold.dehn_fill). If force_recompute is set, the
+        solution starts from scratch (as for
+        Manifold.init_hyperbolic_structure) instead of from the previous
+        shapes.
+        """
+
+        if self._stopped:
+            return
+
+        request = _Request(
+            fillings = [ tuple(f) for f in fillings ],
+            force_recompute = force_recompute)
+
+        with self._condition:
+            self._latest_request_id += 1
+            request.id = self._latest_request_id
+            if self._needs_copy:
+                request.manifold = self.manifold.copy()
+                self._needs_copy = False
+            if self._pending_request:
+                self.num_superseded += 1
+                # Keep the copy of a dropped request.
+                if request.manifold is None:
+                    request.manifold = self._pending_request.manifold
+            self._pending_request = request
+            self._condition.notify()
+
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target = self._run, name = 'FillingSolver')
+            self._thread.daemon = True
+            self._thread.start()
+
+        self._schedule_poll()
+
+    def reset(self):
+        """
+        To be called when the manifold of the view was changed by other
+        means than this solver. The next request starts from its shapes.
+        """
+        with self._condition:
+            self._needs_copy = True
+
+    def stop(self):
+        """
+        Terminates the worker thread (after the current solution) and
+        drops all requests and results. To be called when the view is
+        closed.
+        """
+        with self._condition:
+            self._stopped = True
+            self._pending_request = None
+            self._result = None
+            self._condition.notify()
+
+    def latency_summary(self):
+        """
+        Returns the mean and maximum of the times (in ms) recorded for the
+        published results, as well as the number of results and of dropped
+        requests.
+
+        - queue: from the slider event until the worker started solving,
+        - solve: time spent in the SnapPea kernel in the worker,
+        - apply: setting the shapes on the manifold of the view,
+        - render: the callback (recomputing raytracing data and redraw),
+        - total: from the slider event until the callback returned.
+        """
+
+        result = { 'num_events' : len(self.events),
+                   'num_superseded' : self.num_superseded }
+        for key in _latency_keys:
+            times = [ 1000.0 * event[key] for event in self.events ]
+            if times:
+                result[key] = { 'mean' : sum(times) / len(times),
+                                'max' : max(times) }
+        return result
+
+    def _schedule_poll(self):
+        if not self._polling:
+            self._polling = True
+            self.widget.after(self.poll_interval, self._poll)
+
+    def _poll(self):
+        self._polling = False
+
+        if self._stopped:
+            return
+
+        # Do not call the kernel while the worker is solving.
+        if not kernel_lock.acquire(False):
+            self._schedule_poll()
+            return
+
+        try:
+            with self._condition:
+                result = self._result
+                self._result = None
+                if result and result.request.id != self._latest_request_id:
+                    # A newer request came in after it was solved.
+                    self.num_superseded += 1
+                    result = None
+                outstanding = (self._pending_request is not None or
+                               self._solving_request is not None)
+
+            if result:
+                if isinstance(result.error, Exception):
+                    # The manifold of the view is unchanged, start from it
+                    # for the next request.
+                    self.reset()
+                    raise result.error
+                self._publish(result)
+        finally:
+            kernel_lock.release()
+
+        if outstanding:
+            self._schedule_poll()
+
+    def _publish(self, result):
+        request = result.request
+
+        start = time.time()
+        self.manifold.set_tetrahedra_shapes(
+            filled_shapes = result.shapes)
+        # Starting from the shapes computed by the worker, this converges
+        # immediately and sets the solution type.
+        self.manifold.dehn_fill(request.fillings)
+        applied = time.time()
+
+        self.publish_callback()
+        rendered = time.time()
+
+        self.events.append(
+            { 'request_id' : request.id,
+              'fillings' : request.fillings,
+              'solution_type' : result.solution_type,
+              'queue' : result.start_time - request.time,
+              'solve' : result.end_time - result.start_time,
+              'apply' : applied - start,
+              'render' : rendered - applied,
+              'total' : rendered - request.time })
+        if len(self.events) > self.max_num_events:
+            del self.events[0]
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._pending_request is None and not self._stopped:
+                    self._condition.wait()
+                if self._stopped:
+                    self._worker_manifold = None
+                    return
+                request = self._pending_request
+                self._pending_request = None
+                self._solving_request = request
+
+            if request.manifold is not None:
+                self._worker_manifold = request.manifold
+
+            result = _Result(request)
+            with kernel_lock:
+                result.start_time = time.time()
+                try:
+                    M = self._worker_manifold
+                    M.dehn_fill(request.fillings)
+                    if request.force_recompute:
+                        M.init_hyperbolic_structure(force_recompute = True)
+                    result.shapes = M.tetrahedra_shapes('rect')
+                    result.solution_type = M.solution_type()
+                except Exception as e:
+                    result.error = e
+                result.end_time = time.time()
+
+            with self._condition:
+                self._solving_request = None
+                if request.id == self._latest_request_id:
+                    if self._result:
+                        # Not published yet.
+                        self.num_superseded += 1
+                    self._result = result
+                else:
+                    self.num_superseded += 1
+
+_latency_keys = [ 'queue', 'solve', 'apply', 'render', 'total' ]
+
+class _Request(object):
+    def __init__(self, fillings, force_recompute):
+        self.id = None
+        self.fillings = fillings
+        self.force_recompute = force_recompute
+        self.time = time.time()
+        # A fresh copy of the manifold of the view to solve on.
+        self.manifold = None
+
+class _Result(object):
+    def __init__(self, request):
+        self.request = request
+        self.shapes = None
+        self.solution_type = None
+        self.error = None
+        self.start_time = None
+        self.end_time = None
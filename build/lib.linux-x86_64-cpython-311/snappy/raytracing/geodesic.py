@@ -0,0 +1,662 @@
+from .upper_halfspace_utilities import *
+from .tet_and_matrix_set import TetAndMatrixSet
+
+from ..upper_halfspace.ideal_point import ideal_point_to_r13
+
+from ..matrix import matrix
+
+import bisect
+import heapq
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+class GeodesicForParabolicElementError(ValueError):
+    def __init__(self, trace):
+        self.trace = trace
+
+    def __str__(self):
+        return ('The given word corresponds to a parabolic element and '
+                'thus does not correspond to a closed geodesic. '
+                'Trace: %r.' % self.trace)
+
+class FindingTetrahedronGeodesicError(RuntimeError):
+    def __init__(self, max_steps):
+        self.max_steps = max_steps
+
+    def __str__(self):
+        return ('There was an error when trying to find a tetrahedron '
+                'intersecting the geodesic '
+                '(after %d steps).' % self.max_steps)
+
+class PendingPiece:
+    """
+    Stores index of tetrahedron and matrix and the distance d of the image
+    of the tetrahedron under the matrix to the hyperbolic line from 0
+    to infinity.
+
+    Operator < overloaded to sort by distance.
+    """
+
+    def __init__(self, d, tet_and_matrix):
+        self.d = d
+        self.tet_and_matrix = tet_and_matrix
+
+    def __lt__(self, other):
+        return self.d < other.d
+
+class GeodesicInfo:
+    def __init__(self, manifold, word):
+        """
+        Given a manifold and a word in the unsimplified fundamental group,
+        stores baisc information necessary to compute how the corresponding
+        closed geodesic or tube about it intersects the tetrahedra.
+
+        Note that most data (such as vertices of tetrahedra) are stored
+        using coordinates such that the geodesic is going from infty to 0 in
+        upper half space.
+
+        This does not apply to data prefixed with "original", those are
+        stored using the same coordinates that the SnapPea kernel is using
+        when developing the fundamental domain.
+        """
+
+        # SnapPy manifold
+        self.manifold = manifold
+        # Word
+        self.word = word
+
+        # Unsimplified fundamental group
+        self.group = self.manifold.fundamental_group(
+            simplify_presentation = False)
+
+        # Matrix corresponding to work - in the same coordinates the
+        # SnapPea kernel chose when developing the tetrahedra
+        self.original_matrix = self.group.SL2C(word)
+
+        # Trace of that matrix
+        trace = self.original_matrix[0,0] + self.original_matrix[1,1]
+        if abs(trace - 2.0) < 1e-6 or abs(trace + 2.0) < 1e-6:
+            raise GeodesicForParabolicElementError(trace)
+
+        # Num tetrahedra
+        self.num_tetrahedra = self.manifold.num_tetrahedra()
+
+        # Shapes of tetrahedra
+        self.shapes = self.manifold.tetrahedra_shapes('rect')
+
+        # How IdealRayTracingData places the vertices of each tetrahedron
+        # in H^3.
+        # Note that to keep away from cyclic dependencies, we just
+        # recompute them here instead of using them from IdealRayTracingData.
+        self.tet_to_shader_vertices = [
+            _shader_vertices(z) for z in self.shapes ]
+
+        # For each tetrahedron, information which tetrahedra are neighboring,
+        # which face-pairings correspond to which generator in above group
+        # presentation and where the vertices of the tetrahedra are.
+        self.manifold._choose_generators(
+            compute_corners = True,
+            centroid_at_origin = False)
+        self.generators_info = self.manifold._choose_generators_info()
+
+        # End points of geodesic fixed by matrix - in the same
+        # coordinates the SnapPea kernel chose when developing the
+        # tetrahedra
+        self.original_fixed_points = fixed_points_of_psl2c_matrix(
+            self.original_matrix)
+
+        # Matrix to translate objects from the coordinates the SnapPea
+        # kernel chose to coordinates where the geodesic endpoints are at
+        # infty and zero.
+        self.normalizing_matrix = (
+            psl2c_matrix_taking_two_points_to_infty_and_zero(
+                *self.original_fixed_points))
+
+        # Inverse of that matrix
+        self.normalizing_matrix_inverse = (
+            adjoint_matrix2(self.normalizing_matrix))
+
+        # Matrices corresponding to the generators in the coordinates
+        # where the geodesic endpoints are at infty and zero - and their
+        # inverses
+        generator_matrices = [
+            self.normalize_matrix(self.group.SL2C(g))
+            for g in self.group.generators() ]
+        generator_matrix_inverses = [
+            self.normalize_matrix(self.group.SL2C(g.upper()))
+            for g in self.group.generators() ]
+
+        # We store the matrices and their inverses such that we can
+        # accesses them with self.generator_matrices_and_inverses[g]
+        # where g is 1 for the first generator, ... and -1 for the
+        # inverse of the first generator, ...
+        self.generator_matrices_and_inverses = (
+            [ None ] + generator_matrices + generator_matrix_inverses[::-1])
+
+        # For each tetrahedron (in the fundamental domain), the
+        # position of its four vertices in the coordinates where the
+        # geodesic endpoints are at infty and zero.
+        self.tet_to_vertices = [
+            [ sl2c_action_on_boundary(self.normalizing_matrix, corner)
+              for corner in tet_generators_info['corners'] ]
+            for tet_generators_info in self.generators_info ]
+
+        m = self.normalize_matrix(self.original_matrix)
+
+        # The matrix fixing the geodesic in the coordinates where the
+        # endpoints are at infty and zero is of the form
+        # [ self.eigenvalue0,                0 ]
+        # [                0, self.eigenvalue1 ]
+        self.eigenvalue0 = m[0,0]
+        self.eigenvalue1 = m[1,1]
+
+        self.complex_length = (self.eigenvalue0 ** 2).log()
+        if self.complex_length.real() < 0:
+            self.complex_length = -self.complex_length
+
+        self.RF = trace.real().parent()
+
+        # Type for complex numbers
+        CF = trace.parent()
+        # The endpoints of the geodesic. Using large number for infty.
+        self.fixed_points = [ CF(1.0e64), CF(0.0) ]
+
+        # Half of the length of the closed geodesic in the manifold.
+        # Sign compatible with how the matrix acts - that is, if positive,
+        # applying the matrix to the geodesic from 0 to infty moves the
+        # geodesic up.
+        self.signed_half_length = abs(self.eigenvalue0).log()
+
+        self.initial_tet_face_and_matrix = (
+            self.find_tet_face_and_matrix_intersecting_geodesic())
+
+        # Store index of a tetrahedron and matrix such that the image
+        # of the tetrahedron under that matrix intersects the geodesic.
+        tet, face, matrix = self.initial_tet_face_and_matrix
+        self.pending_pieces = [ PendingPiece(0, (tet, matrix)) ]
+        self.visited = TetAndMatrixSet()
+        # Pairs (d, (tet, R13 endpoints)) sorted by the distance d of the
+        # translate of the tetrahedron to the geodesic, covering the tube
+        # of the largest radius requested so far.
+        self.tube_pieces = [ ]
+        # The d's of self.tube_pieces, for bisecting.
+        self.tube_piece_distances = [ ]
+
+        if numpy:
+            # Same as self.tet_to_vertices for batched computations.
+            self.tet_to_vertices_array = numpy.array(
+                [ [ complex(v) for v in vertices ]
+                  for vertices in self.tet_to_vertices ])
+
+        self.geodesic_pieces = None
+
+    def normalize_matrix(self, m):
+        """
+        Convert a matrix acting on coordinates chosing by the SnapPea kernel
+        to a matrix acting on coordinates where the geodesic goes from
+        infty to 0.
+        """
+        return self.normalizing_matrix * m * self.normalizing_matrix_inverse
+
+    def canonical_matrix(self, m):
+        """
+        When tracing a geodesic or developing the tube about a geodesic,
+        we want to work in the quotient space (t^Z) \\ H^3 where t is the
+        matrix corresponding to the closed geodesic (in coordinates where
+        the geodesic goes from 0 to infty).
+
+        In particular, we want to regard two matrices m and m' as the same
+        if m' = t^i m for some i as the image of a point or simplex under m
+        and m', respectively, are the same in (t^Z) \\ H^3.
+
+        Given a matrix m, this method picks a canonical representative
+        among { ... t^-2 * m, t^-1 * m, m, t * m, t^2 * M ... }.
+        """
+
+        # Consider a matrix in the holonomy. The image of the geodesic is
+        # either the geodesic or disjoint from the geodesic - and hence
+        # not mapping 0 or infty to either 0 or infty. Thus, we can assume
+        # that m[0,0] is never 0.
+
+        # Note that the real part of the log of top left entry of
+        # t^i * m is
+        # real(log(m[0,0] * self.eigenvalue0 ^ i)) =
+        # log(abs(m[0,0])) + i * self.signed_half_length
+        #
+        # Thus, there is always a unique i such that this value is
+        # in the interval [-self.signed_half_length, self.signed_half_length).
+
+        # We will now compute this i.
+
+        p = abs(m[0,0]).log()
+
+        # Unique i
+        steps = -(p / self.signed_half_length).round()
+        if steps == 0:
+            return m
+
+        # t^i
+        translation = matrix([[self.eigenvalue0 ** steps, 0],
+                              [0, self.eigenvalue1 ** steps]])
+        return translation * m
+
+    def images_of_vertices_of_tetrahedron(self, tet, m):
+        return [ sl2c_action_on_boundary(m, v)
+                 for v in self.tet_to_vertices[tet] ]
+
+    def find_tet_face_and_matrix_intersecting_geodesic(self):
+        """
+        Find a pair (tet, matrix) such that the image of the
+        tetrahedron with index tet (in the fundamental domain) under
+        that matrix intersects the geodesic (in coordinates where the
+        geodesic goes from 0 to infty).
+        """
+
+        # We start with (tetrahedron, matrix) = (0, Identity) and iterate
+        # the following procedure:
+        #
+        # Compute the distance to the geodesic for each face of the
+        # tetrahedron except the one we entered through. Traverse the face
+        # with the least distance.
+        #
+        tet = 0
+        last_f = -1
+        m = self.group.SL2C('') # Start with identity matrix
+
+        _max_steps = 300
+
+        for step in range(_max_steps):
+            # Vertices of the image of the tetrahedron under matrix.
+            vertices = self.images_of_vertices_of_tetrahedron(tet, m)
+
+            best_f = None
+            best_d = 1e64
+            for f in range(4):
+                if f != last_f:
+                    face_vertices = vertices[f+1:] + vertices[:f]
+
+                    d = dist_triangle_and_std_geodesic(face_vertices)
+
+                    if d < 1e-9:
+                        return tet, f, self.canonical_matrix(m)
+                    if d < best_d:
+                        best_f = f
+                        best_d = d
+
+            # Now traverse face best_f.
+            tet_generators_info = self.generators_info[tet]
+
+            # Find which generator corresponds to traversing that
+            # face
+            g = tet_generators_info['generators'][best_f]
+            if g != 0:
+                m = m * self.generator_matrices_and_inverses[g]
+
+            # Find neighboring tetrahedron
+            tet = tet_generators_info['neighbors'][best_f]
+
+            # Record through which face of the neighboring tet it was
+            # entered
+            last_f = tet_generators_info['gluings'][best_f][best_f]
+
+        # Geodesic is too far away from fundamental domain or
+        # the algorithm failed for some other reason. Give up.
+        raise FindingTetrahedronGeodesicError(_max_steps)
+
+    def cache_pieces_for_tube(self, radius):
+        """
+        Find all pieces forming the tube of radius about the closed geodesic.
+
+        The input is an instance of GeodesicInfo and the radius. The output
+        is a list of pairs (tet, matrix) encodes the translate of the tetrahedron
+        with index tet in the fundamental domain by matrix (in coordinates where
+        the geodesic goes from 0 to infty).
+
+        In other words, we take a piece of the tube in H^3 covering the tube
+        about the closed geodesic in the manifold once and return all translates
+        of tetrahedra intersecting the tube.
+
+        The pieces are cached, so only pieces for the part of the tube
+        outside the largest radius requested so far are computed.
+        """
+
+        # PendingPiece's (essentially (tet, matrix) pairs) for which we
+        # still need to check whether they intersect the geodesic
+
+        r = float(radius)
+
+        new_pieces = [ ]
+
+        while self.pending_pieces and self.pending_pieces[0].d < r:
+            # Pick all PendingPiece's within radius that were not visited
+            # already and process them as a batch.
+            candidates = [ ]
+            while self.pending_pieces and self.pending_pieces[0].d < r:
+                candidates.append(
+                    heapq.heappop(self.pending_pieces).tet_and_matrix)
+            tets_and_matrices = [
+                tet_and_matrix
+                for tet_and_matrix, is_new in zip(
+                        candidates, self.visited.add_many(candidates))
+                if is_new ]
+
+            for (tet, m), face_dists in zip(
+                    tets_and_matrices,
+                    self.distances_of_faces_to_geodesic(tets_and_matrices)):
+
+                tet_generators_info = self.generators_info[tet]
+
+                # Compute the vertices of the translate of the tetrahedron
+                vertices = self.images_of_vertices_of_tetrahedron(tet, m)
+
+                # The distance of the translate of the tetrahedron to the
+                # geodesic (which is 0 if the geodesic intersects a face).
+                # Unlike the distance of the face through which we entered
+                # the tetrahedron, this does not depend on the order in
+                # which the pieces were found, so the pieces of a tube of
+                # smaller radius are exactly those with smaller d.
+                new_pieces.append(
+                    (min(face_dists),
+                     (tet, self.transfer_endpoints(tet, vertices))))
+
+                # For each face
+                for f in range(4):
+                    # Traverse the face
+                    new_tet = tet_generators_info['neighbors'][f]
+                    g = tet_generators_info['generators'][f]
+                    if g != 0:
+                        # Use self.canonical_matrix to
+                        # cover tube about closed geodesic in
+                        # manifold only once
+                        new_m = self.canonical_matrix(
+                            m * self.generator_matrices_and_inverses[g])
+                    else:
+                        new_m = m
+
+                    # Add as pending tet
+                    heapq.heappush(
+                        self.pending_pieces,
+                        PendingPiece(face_dists[f], (new_tet, new_m)))
+
+        if new_pieces:
+            self.tube_pieces = sorted(self.tube_pieces + new_pieces,
+                                      key = lambda piece: piece[0])
+            self.tube_piece_distances = [ d for d, piece in self.tube_pieces ]
+
+    def distances_of_faces_to_geodesic(self, tets_and_matrices):
+        """
+        Given a list of pairs (tet, matrix), returns for each of them the
+        distances of the four faces of the image of the tetrahedron under
+        the matrix to the geodesic (from 0 to infty) as floats.
+
+        The distances are only used to decide which tetrahedra intersect a
+        tube, so they are computed with doubles and, if NumPy is available,
+        for all faces at once.
+        """
+
+        if not tets_and_matrices:
+            return [ ]
+
+        if numpy is None:
+            result = [ ]
+            for tet, m in tets_and_matrices:
+                vertices = self.images_of_vertices_of_tetrahedron(tet, m)
+                result.append(
+                    [ float(dist_triangle_and_std_geodesic(
+                        vertices[f+1:] + vertices[:f]))
+                      for f in range(4) ])
+            return result
+
+        tets = numpy.array([ tet for tet, m in tets_and_matrices ])
+        # Matrices as n x 2 x 2 array
+        matrices = numpy.array(
+            [ [ [ complex(m[i,j]) for j in range(2) ] for i in range(2) ]
+              for tet, m in tets_and_matrices ])
+
+        # Images of the vertices of the tetrahedra as n x 4 array, see
+        # sl2c_action_on_boundary.
+        vertices = self.tet_to_vertices_array[tets]
+        num = matrices[:, 0, 0, None] * vertices + matrices[:, 0, 1, None]
+        denom = matrices[:, 1, 0, None] * vertices + matrices[:, 1, 1, None]
+        is_infinite = numpy.abs(denom) < 1e-30
+        vertices = numpy.where(
+            is_infinite,
+            1.0e64,
+            num / numpy.where(is_infinite, 1.0, denom))
+
+        # The vertices of face f are vertices[f+1:] + vertices[:f].
+        faces = vertices[:, _face_vertex_indices]
+
+        return _dists_triangles_and_std_geodesic(
+            faces.reshape(-1, 3)).reshape(-1, 4).tolist()
+
+    def transfer_endpoints(self, tet, vertices):
+
+        # Imagine the transformation taking the first triple of vertices
+        # the second triple of vertices. Use this transform to translate
+        # the endpoints 0 and infty of the geodesic. Convert to R13.
+        return [
+            ideal_point_to_r13(
+                transfer_fourth_point(
+                    (vertices[0],
+                     vertices[1],
+                     vertices[2],
+                     fixed_point),
+                    self.tet_to_shader_vertices[tet][:3]),
+                self.RF)
+            for fixed_point in self.fixed_points ]
+
+    def compute_tets_and_R13_endpoints_for_tube(self, radius):
+        """
+        Find all geodesic segments necessary to draw a tube about a closed
+        geodesic in a manifold.
+
+        The output is a list of pairs (tet, (head, tail)) where tet is an
+        index to a tetrahedron of head and tail are points in R^{1,3}
+        using the same coordinates that IdealRaytracingData uses for its
+        tetrahedra.
+
+        >>> from snappy import Manifold
+        >>> M = Manifold("m004")
+        >>> g = GeodesicInfo(M, "a")
+        >>> t = g.compute_tets_and_R13_endpoints_for_tube(0.1)
+        >>> t # doctest: +NUMERIC6
+        [(0, [(1.00000000000000, 0.459458976327569, 0.858506950258797, -0.227735077292371), (1.00000000000000, -0.459458976327569, -0.858506950258797, -0.227735077292371)]), (1, [(1.00000000000000, -0.858506950258796, -0.227735077292370, -0.459458976327570), (1.00000000000000, 0.858506950258796, -0.227735077292371, 0.459458976327570)])]
+        >>> len(g.compute_tets_and_R13_endpoints_for_tube(0.5))
+        8
+        >>> t == g.compute_tets_and_R13_endpoints_for_tube(0.4)
+        True
+
+        >>> M = Manifold("o9_00000")
+        >>> [ len(GeodesicInfo(M, l).compute_tets_and_R13_endpoints_for_tube(0.01))
+        ...   for l in "abcd" ]
+        [3, 2, 11, 3]
+        
+        >>> [ len(GeodesicInfo(M, l).compute_tets_and_R13_endpoints_for_tube(0.4))
+        ...   for l in "abcd" ]
+        [5, 10, 25, 5]
+
+        """
+
+        self.cache_pieces_for_tube(radius)
+
+        n = bisect.bisect_right(self.tube_piece_distances, float(radius))
+
+        return [ tets_and_R13_endpoints
+                 for d, tets_and_R13_endpoints in self.tube_pieces[:n] ]
+
+    def __eq__(self, other):
+        if not self.has_same_complex_length(other):
+            return False
+
+        tet, (endpoint0, endpoint1) = (
+            self.compute_tets_and_R13_endpoints_for_geodesic()[0])
+        for other_tet, other_endpoints in (
+                other.compute_tets_and_R13_endpoints_for_geodesic()):
+            if tet == other_tet:
+                for other_endpoint in other_endpoints:
+                    if _are_points_equal(endpoint0, other_endpoint, 1e-5):
+                        return True
+        return False
+
+    def compute_tets_and_R13_endpoints_for_geodesic(self):
+        if self.geodesic_pieces is None:
+            self.geodesic_pieces = (
+                self.compute_tets_and_R13_endpoints_for_tube(1e-3))
+        return self.geodesic_pieces
+
+    def has_same_complex_length(self, other):
+        diff = self.complex_length - other.complex_length
+        if abs(diff.real()) > 1e-5:
+            return False
+
+        return abs(diff.exp() - 1) < 1e-5
+
+def _are_points_equal(a, b, epsilon):
+    return all(abs(x-y) < epsilon for x, y in zip(a,b))
+
+def group_tets_and_R13_heads_and_tails_by_tet(
+                                num_tetrahedra, tets_and_heads_and_tails):
+    """
+    Given the output of compute_tets_and_R13_endpoints_for_tube, returns
+    a list containing for each tetrahedron the list of pairs (head, tail)
+    for that tetrahedron.
+
+    These lists (for several geodesics) can be packed with
+    pack_tets_and_R13_heads_and_tails_for_shader so that the lists only
+    have to be recomputed for the geodesics that changed.
+
+    >>> group_tets_and_R13_heads_and_tails_by_tet(
+    ...     3, [(2, ('h0', 't0')), (0, ('h1', 't1')), (2, ('h2', 't2'))])
+    [[('h1', 't1')], [], [('h0', 't0'), ('h2', 't2')]]
+    """
+
+    tet_to_heads_and_tails = [
+        [] for tet in range(num_tetrahedra) ]
+
+    for tet, head_and_tail in tets_and_heads_and_tails:
+        tet_to_heads_and_tails[tet].append(head_and_tail)
+
+    return tet_to_heads_and_tails
+
+def pack_tets_and_R13_heads_and_tails_for_shader(
+                                num_tetrahedra, tet_to_heads_and_tails_list):
+    """
+    Given a list of outputs of group_tets_and_R13_heads_and_tails_by_tet,
+    packs the data into a format that can be consumed by the glsl shader.
+
+    That is, the result is (heads, tails, indices, entries) where heads and
+    tails are a list of 4-vectors. For tetrahedron i, we need to draw a
+    geodesic from each heads[j] to tails[j] for each
+    j = indices[i], ..., indices[i+1]-1. entries[j] is the index into
+    tet_to_heads_and_tails_list the pair heads[j], tails[j] came from.
+
+    >>> pack_tets_and_R13_heads_and_tails_for_shader(
+    ...     2, [ [[('h0', 't0')], [('h1', 't1')]], [[], [('h2', 't2')]] ])
+    (['h0', 'h1', 'h2'], ['t0', 't1', 't2'], [0, 1, 3], [0, 0, 1])
+    """
+
+    heads = []
+    tails = []
+    indices = [ ]
+    entries = [ ]
+
+    for tet in range(num_tetrahedra):
+        indices.append(len(heads))
+        for entry, tet_to_heads_and_tails in enumerate(
+                                        tet_to_heads_and_tails_list):
+            for head, tail in tet_to_heads_and_tails[tet]:
+                heads.append(head)
+                tails.append(tail)
+                entries.append(entry)
+
+    indices.append(len(heads))
+
+    return heads, tails, indices, entries
+
+def _shader_vertices(z):
+    """
+    Matches how IdealRayTracingData places the vertices of a tetrahedron in H^3.
+    """
+    w = z.sqrt() + (z - 1).sqrt()
+    return [ w, 1/w, -1/w, -w ]
+
+
+
+# For the faces f = 0, ..., 3 of a tetrahedron, the indices of
+# vertices[f+1:] + vertices[:f].
+_face_vertex_indices = [ [ (f + i) % 4 for i in range(1, 4) ]
+                         for f in range(4) ]
+
+def _dists_triangles_and_std_geodesic(verts):
+    """
+    Vectorized version of dist_triangle_and_std_geodesic taking an n x 3
+    NumPy array of complex numbers and returning an array of n floats.
+    """
+
+    with numpy.errstate(divide = 'ignore', invalid = 'ignore',
+                        over = 'ignore'):
+
+        v0, v1, v2 = verts[:, 0], verts[:, 1], verts[:, 2]
+
+        ##################
+        # Case 1, see _dist_triangle_and_std_geodesic_interior_hit
+
+        # Side lengths (opposite to vertex i) and weights for the
+        # circumcenter, see _weight_for_circumcenter
+        side_lengths = [ numpy.abs(v2 - v1),
+                         numpy.abs(v0 - v2),
+                         numpy.abs(v1 - v0) ]
+        weights = [ ]
+        for i in range(3):
+            c, a, b = [ side_lengths[(i + j) % 3] for j in range(3) ]
+            weights.append(c * (c ** 2 - a ** 2 - b ** 2) / (2 * a * b))
+        t = weights[0] + weights[1] + weights[2]
+        O = (weights[0] * v0 + weights[1] * v1 + weights[2] * v2) / t
+
+        R = numpy.abs(v0 - O)
+        D = numpy.abs(O)
+        c_sqr = D ** 2 - R ** 2
+        c = numpy.sqrt(c_sqr)
+        a = c_sqr / D
+        h = (a / D) * O
+        sidedness = [
+            ((h - verts[:, i]) / (verts[:, (i + 1) % 3] - verts[:, i])).imag > 0
+            for i in range(3) ]
+        b = c * R / D
+
+        is_interior_hit = (
+            (numpy.abs(t) >= 1.0e-8) &
+            (R <= D) &
+            (sidedness[0] == sidedness[1]) &
+            (sidedness[1] == sidedness[2]) &
+            (b > 0))
+        interior_dist = numpy.arccosh(1 + 2 * (a / b) ** 2) / 2
+
+        ##################
+        # Case 2, cross ratios of the tetrahedra spanned by the geodesic
+        # and an edge of the triangle, see cross_ratio
+
+        inf = 1.0e64
+        zs = numpy.stack(
+            [ (verts[:, (i + 1) % 3] * (inf - verts[:, i])) /
+              (inf * (verts[:, (i + 1) % 3] - verts[:, i]))
+              for i in range(3) ])
+        intersects = (
+            numpy.all(zs.imag >  1.0e-9, axis = 0) |
+            numpy.all(zs.imag < -1.0e-9, axis = 0))
+
+        ########
+        # Case 3, see dist_of_opposite_edges_from_cross_ratio
+
+        w = numpy.sqrt(zs) + numpy.sqrt(zs - 1)
+        edge_dist = numpy.min(2 * numpy.abs(numpy.log(numpy.abs(w))),
+                              axis = 0)
+
+    return numpy.where(
+        is_interior_hit,
+        interior_dist,
+        numpy.where(intersects, 0.0, edge_dist))
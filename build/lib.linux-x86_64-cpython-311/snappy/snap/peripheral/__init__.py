@@ -0,0 +1 @@
+from .peripheral import peripheral_cohomology_basis
@@ -0,0 +1,2 @@
+from .mcomplex import *
+from .files import *
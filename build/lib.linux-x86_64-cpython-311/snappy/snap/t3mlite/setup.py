@@ -0,0 +1,13 @@
+from distutils.core import setup
+
+setup (
+    name = "t3m",
+    version = "",
+    description = "Tinker toys for topologists",
+    author = "Marc Culler and Nathan Dunfield",
+    author_email = "culler@math.uic.edu, dunfield@caltech.edu",
+    url = "http://www.math.uic.edu/~t3m",
+    packages = ['t3m'],
+    package_dir = {'t3m':''}
+)
+
@@ -0,0 +1,383 @@
+"""
+Elementary divisors of sparse integer matrices.
+
+The presentation matrices of the first homology of a triangulation (and
+even more so of its covers) have hundreds of generators but only a few
+non-zero entries per relation, most of them units. Converting them to a
+dense matrix and calling PARI's matsnf is wasteful. Instead, we eliminate
+unit entries (choosing the pivots so that little fill-in occurs) and only
+do the general elimination on the small matrix that remains: with
+division with remainder if it is very small and with PARI's matsnf
+otherwise.
+
+No change of basis matrices are recorded, so the only results are the
+elementary divisors.
+
+The SparseIntegerMatrix used here is also used for the chain complexes of
+the ptolemy module.
+"""
+
+from .pari import pari
+from math import gcd
+import heapq
+
+__all__ = ['elementary_divisors', 'SparseIntegerMatrix']
+
+# Remaining matrices with more non-zero entries (after eliminating the
+# units) are passed to PARI. We do not implement a modular elimination in
+# python for these: the matrices left after eliminating the units are
+# small and PARI's matsnf (implemented in C with its own strategies to
+# avoid coefficient growth) handles them faster than python could.
+_max_entries_for_python_elimination = 200
+
+def elementary_divisors(entries, num_rows, num_cols, torsion_only = False):
+    """
+    Given the non-zero entries of an integer matrix as a dictionary mapping
+    (row, column) to the value, returns the elementary divisors of the
+    abelian group presented by the matrix (the rows being the relations and
+    the columns the generators). The divisors are given in the same format
+    as AbelianGroup.elementary_divisors, i.e., the non-trivial torsion
+    coefficients in increasing order (forming a divisibility chain)
+    followed by a 0 for each free summand. If torsion_only is True, only
+    the torsion coefficients are returned.
+
+    >>> elementary_divisors({(0, 0): 2, (0, 1): 4, (1, 0): 6, (1, 1): 8}, 2, 2)
+    [2, 4]
+    >>> elementary_divisors({(0, 0): 1, (0, 1): 3, (0, 2): 2,
+    ...                      (1, 0): 2, (1, 2): 6}, 2, 3)
+    [2, 0]
+    >>> elementary_divisors({(0, 1): 5}, 3, 3)
+    [5, 0, 0]
+    >>> elementary_divisors({(0, 1): 5}, 3, 3, torsion_only = True)
+    [5]
+    >>> elementary_divisors({}, 0, 2)
+    [0, 0]
+    """
+
+    for (i, j), value in entries.items():
+        if not (0 <= i < num_rows and 0 <= j < num_cols):
+            raise IndexError("Entry (%d, %d) out of bounds" % (i, j))
+
+    matrix = SparseIntegerMatrix(entries, num_rows, num_cols)
+    num_units = matrix.eliminate_units()
+
+    # Generators not occuring in any relation are free.
+    num_free = num_cols - num_units - len(matrix.non_zero_columns())
+
+    if matrix.num_non_zero_entries() > _max_entries_for_python_elimination:
+        divisors = matrix.pari_elementary_divisors()
+    else:
+        divisors = matrix.python_elementary_divisors()
+
+    torsion = sorted(d for d in divisors if d > 1)
+    if torsion_only:
+        return torsion
+
+    num_free += len([ d for d in divisors if d == 0 ])
+    return torsion + num_free * [ 0 ]
+
+class SparseIntegerMatrix(object):
+    """
+    A matrix with integer (or rational) entries given by the non-zero
+    entries as dictionary mapping (row, column) to the value. It is stored
+    as rows (dictionaries mapping column to non-zero value) together with
+    the support of each column.
+
+    >>> m = SparseIntegerMatrix.from_dense([[1, 0, 2], [0, 0, -1]])
+    >>> n = SparseIntegerMatrix.from_dense([[1, 1], [5, 0], [0, 3]])
+    >>> (m * n).to_dense()
+    [[1, 7], [0, -3]]
+    >>> m.transpose().to_dense()
+    [[1, 0], [0, 0], [2, -1]]
+    >>> m.num_non_zero_entries()
+    3
+    >>> m * [1, 1, 1]
+    [3, -1]
+    >>> m.max_abs_of_col(2), m.max_abs_of_row(1), m.max_abs_of_col(1)
+    (2, 1, 0)
+    >>> (m * SparseIntegerMatrix.from_dense([[0], [1], [0]])).is_zero()
+    True
+    >>> m == SparseIntegerMatrix({(0, 0): 1, (0, 2): 2, (1, 2): -1}, 2, 3)
+    True
+
+    The methods used by elementary_divisors (eliminate_units, ...) modify
+    the matrix and remove the rows and columns they eliminate.
+    """
+
+    def __init__(self, entries, num_rows, num_cols):
+        self._num_rows = num_rows
+        self._num_cols = num_cols
+        self.rows = { }
+        self.col_support = { }
+        for (i, j), value in entries.items():
+            if value != 0:
+                self.rows.setdefault(i, { })[j] = value
+                self.col_support.setdefault(j, set()).add(i)
+
+    @staticmethod
+    def from_dense(m, num_cols = None):
+        """
+        Converts a list of lists. The number of columns needs to be given
+        if the matrix has no rows.
+        """
+
+        if num_cols is None:
+            num_cols = len(m[0]) if m else 0
+        return SparseIntegerMatrix(
+            { (i, j) : e for i, row in enumerate(m) for j, e in enumerate(row) },
+            len(m), num_cols)
+
+    def to_dense(self):
+        result = [ ]
+        for i in range(self._num_rows):
+            dense_row = self._num_cols * [ 0 ]
+            for j, e in self.row(i).items():
+                dense_row[j] = e
+            result.append(dense_row)
+        return result
+
+    def num_rows(self):
+        return self._num_rows
+
+    def num_cols(self):
+        return self._num_cols
+
+    def row(self, i):
+        """
+        The i-th row as dictionary. Do not modify.
+        """
+        return self.rows.get(i, { })
+
+    def entries(self):
+        """
+        The non-zero entries as dictionary mapping (row, column) to value.
+        """
+        return { (i, j) : e
+                 for i, row in self.rows.items() for j, e in row.items() }
+
+    def transpose(self):
+        return SparseIntegerMatrix(
+            { (j, i) : e for (i, j), e in self.entries().items() },
+            self._num_cols, self._num_rows)
+
+    def is_zero(self):
+        return not any(self.rows.values())
+
+    def max_abs_of_col(self, col):
+        return max([ abs(self.rows[i][col])
+                     for i in self.col_support.get(col, ()) ] + [ 0 ])
+
+    def max_abs_of_row(self, row):
+        return max([ abs(e) for e in self.row(row).values() ] + [ 0 ])
+
+    def __eq__(self, other):
+        return (self._num_rows == other._num_rows and
+                self._num_cols == other._num_cols and
+                self.entries() == other.entries())
+
+    def __mul__(self, other):
+        """
+        Multiplication with another SparseIntegerMatrix or a vector given
+        as list.
+        """
+
+        if isinstance(other, SparseIntegerMatrix):
+            assert self._num_cols == other._num_rows
+
+            entries = { }
+            for i, row in self.rows.items():
+                for k, e in row.items():
+                    for j, f in other.row(k).items():
+                        entries[(i, j)] = entries.get((i, j), 0) + e * f
+            return SparseIntegerMatrix(
+                entries, self._num_rows, other._num_cols)
+
+        assert self._num_cols == len(other)
+        return [ sum([ e * other[j] for j, e in self.row(i).items() ])
+                 for i in range(self._num_rows) ]
+
+    def non_zero_columns(self):
+        return [ j for j, support in self.col_support.items() if support ]
+
+    def num_non_zero_entries(self):
+        return sum(len(row) for row in self.rows.values())
+
+    def python_elementary_divisors(self):
+        """
+        Elementary divisors (including 1's and 0's) of the matrix formed by
+        the non-zero columns.
+        """
+        num_cols = len(self.non_zero_columns())
+        diagonal = self.eliminate_remaining()
+        return (_invariant_factors(diagonal) +
+                (num_cols - len(diagonal)) * [ 0 ])
+
+    def pari_elementary_divisors(self):
+        """
+        Same as python_elementary_divisors but using PARI.
+        """
+        cols = self.non_zero_columns()
+        rows = [ row for row in self.rows.values() if row ]
+        m, n = len(rows), len(cols)
+        if m == 0:
+            return n * [ 0 ]
+
+        result = [ int(x) for x in
+                   pari.matrix(m, n, [ row.get(j, 0)
+                                       for row in rows
+                                       for j in cols ]).matsnf() ]
+
+        # PARI views the input to matsnf as square, see smith_form.
+        if m < n:
+            result = result + (n - m) * [ 0 ]
+        if m > n:
+            for i in range(m - n):
+                result.remove(0)
+        return result
+
+    def _set(self, i, j, value):
+        row = self.rows[i]
+        if value == 0:
+            if j in row:
+                del row[j]
+                self.col_support[j].discard(i)
+        else:
+            if j not in row:
+                self.col_support.setdefault(j, set()).add(i)
+            row[j] = value
+
+    def _add_multiple_of_row(self, target, source, factor):
+        """
+        Adds factor times row source to row target.
+        """
+        target_row = self.rows[target]
+        for j, value in self.rows[source].items():
+            self._set(target, j, target_row.get(j, 0) + factor * value)
+
+    def _remove_row_and_column(self, i, j):
+        for l in self.rows.pop(i):
+            self.col_support[l].discard(i)
+        # The column has no other non-zero entries at this point.
+        del self.col_support[j]
+
+    def _eliminate_column(self, i, j):
+        """
+        Assuming the entry at (i, j) divides all entries in column j, clear
+        the other entries of column j using row i.
+        """
+        pivot = self.rows[i][j]
+        for k in list(self.col_support[j]):
+            if k != i:
+                self._add_multiple_of_row(k, i, -(self.rows[k][j] // pivot))
+
+    def eliminate_units(self):
+        """
+        Eliminates all generators which occur with coefficient +/-1 in a
+        relation. Rows with few entries are processed first. Returns the
+        number of eliminated generators.
+        """
+
+        num_eliminated = 0
+
+        heap = [ (len(row), i) for i, row in self.rows.items() ]
+        heapq.heapify(heap)
+
+        while heap:
+            length, i = heapq.heappop(heap)
+            row = self.rows.get(i)
+            if row is None:
+                continue
+            if length != len(row):
+                # Row changed since pushed
+                heapq.heappush(heap, (len(row), i))
+                continue
+            if not row:
+                del self.rows[i]
+                continue
+
+            # Among the unit entries, pick the one in the sparsest column
+            # to minimize fill-in.
+            units = [ j for j, value in row.items() if value in (1, -1) ]
+            if not units:
+                continue
+            j = min(units, key = lambda j: len(self.col_support[j]))
+
+            modified_rows = [ k for k in self.col_support[j] if k != i ]
+            self._eliminate_column(i, j)
+            self._remove_row_and_column(i, j)
+            num_eliminated += 1
+
+            for k in modified_rows:
+                heapq.heappush(heap, (len(self.rows[k]), k))
+
+        return num_eliminated
+
+    def eliminate_remaining(self):
+        """
+        Eliminates the remaining entries using division with remainder,
+        returning the diagonal entries (not necessarily forming a
+        divisibility chain).
+        """
+
+        diagonal = [ ]
+
+        while True:
+            # Drop zero rows
+            for i in [ i for i, row in self.rows.items() if not row ]:
+                del self.rows[i]
+            if not self.rows:
+                return diagonal
+
+            # Pick the entry with the smallest absolute value as pivot
+            i, j = min(
+                ((i, j) for i, row in self.rows.items() for j in row),
+                key = lambda ij: (abs(self.rows[ij[0]][ij[1]]),
+                                  len(self.rows[ij[0]])))
+
+            while True:
+                pivot = self.rows[i][j]
+
+                # Reduce column j
+                smaller = None
+                for k in list(self.col_support[j]):
+                    if k != i:
+                        self._add_multiple_of_row(
+                            k, i, -(self.rows[k][j] // pivot))
+                        if j in self.rows[k]:
+                            smaller = (k, j)
+                if smaller:
+                    i, j = smaller
+                    continue
+
+                # Column j is now only non-zero in row i, so column
+                # operations involving column j only change row i.
+                row = self.rows[i]
+                for l in list(row):
+                    if l != j:
+                        self._set(i, l, row[l] % pivot)
+                        if l in row:
+                            smaller = (i, l)
+                if smaller:
+                    i, j = smaller
+                    continue
+
+                diagonal.append(abs(pivot))
+                self._remove_row_and_column(i, j)
+                break
+
+def _invariant_factors(diagonal):
+    """
+    Given the diagonal entries of a diagonal matrix, returns the elementary
+    divisors in increasing order.
+
+    >>> _invariant_factors([6, 4, 1])
+    [1, 2, 12]
+    """
+
+    factors = sorted(diagonal)
+    for i in range(len(factors)):
+        for j in range(i + 1, len(factors)):
+            a, b = factors[i], factors[j]
+            g = gcd(a, b)
+            factors[i], factors[j] = g, a * b // g
+    return factors
@@ -0,0 +1,394 @@
+"""
+Triangle and line meshes for the scenes shown by the HoroballViewer and
+the PolyhedronViewer.
+
+The functions here compute the vertex and index arrays for all horoballs
+of a cusp (including their translates by the cusp stabilizer), the edges
+of the Ford domain and canonical triangulation and the faces of a
+Dirichlet domain with NumPy. They do not need OpenGL: CyOpenGL draws a
+Mesh with a single call and the same meshes can be written to a file::
+
+    >>> from snappy import Manifold
+    >>> C = Manifold('m004').cusp_neighborhood()
+    >>> meridian, longitude = C.translations()
+    >>> mesh = horoball_mesh(C.horoball_array(0.01), meridian, longitude,
+    ...                      right = 2.0, top = 2.0)
+    >>> mesh.primitive, mesh.vertices.shape[1], mesh.indices.shape[1]
+    ('triangles', 3, 3)
+    >>> len(mesh.indices) > 0, mesh.vertices.dtype
+    (True, dtype('float32'))
+    >>> mesh.export('horoballs.ply')    #doctest: +SKIP
+
+For drawing, the horoballs are not merged into one mesh. Instead, the
+translates of the horoballs of the same radius share the vertices of
+one sphere (see horoball_instances and horosphere_mesh).
+
+This module requires NumPy.
+"""
+
+from .export_stl import subdivide_triangle_array, projection_array, ply, obj
+
+from colorsys import hls_to_rgb
+import os
+
+import numpy
+
+__all__ = ['Mesh',
+           'merge_meshes',
+           'sphere_mesh',
+           'horosphere_level_of_detail',
+           'horoball_translates',
+           'horoball_instances',
+           'horoball_keys',
+           'horosphere_mesh',
+           'horoball_mesh',
+           'segment_mesh',
+           'klein_face_mesh',
+           'poincare_face_mesh']
+
+class Mesh(object):
+    """
+    Vertices (with optional normals and RGBA colors, one per vertex) and
+    the triangles or line segments between them given as rows of indices
+    into the vertices. The primitive is 'triangles' or 'lines'. The
+    vertices are stored as float32 (as OpenGL and the ply format use).
+    """
+
+    def __init__(self, vertices, indices, normals = None, colors = None,
+                 primitive = 'triangles'):
+        self.vertices = numpy.asarray(
+            vertices, dtype = numpy.float32).reshape(-1, 3)
+        self.primitive = primitive
+        n = 3 if primitive == 'triangles' else 2
+        self.indices = numpy.asarray(indices, dtype = numpy.int64).reshape(-1, n)
+        self.normals = normals
+        self.colors = colors
+
+    def __repr__(self):
+        return 'Mesh with %d vertices and %d %s' % (
+            len(self.vertices), len(self.indices), self.primitive)
+
+    def buffers(self):
+        """
+        The vertices, normals, colors (as float32) and indices (as uint32)
+        as bytes suitable for glVertexPointer, glNormalPointer,
+        glColorPointer and glDrawElements. Normals and colors are None if
+        not given.
+        """
+        def as_bytes(array, dtype):
+            if array is None:
+                return None
+            return numpy.ascontiguousarray(array, dtype = dtype).tobytes()
+
+        return (as_bytes(self.vertices, numpy.float32),
+                as_bytes(self.normals, numpy.float32),
+                as_bytes(self.colors, numpy.float32),
+                as_bytes(self.indices, numpy.uint32))
+
+    def export(self, filename):
+        """
+        Writes the triangles to a ply or obj file (depending on the
+        extension of the filename).
+        """
+        if self.primitive != 'triangles':
+            raise ValueError('Only triangle meshes can be exported.')
+        extension = os.path.splitext(filename)[1].lower()
+        if extension == '.ply':
+            output, mode = ply(self.vertices, self.indices), 'wb'
+        elif extension == '.obj':
+            output, mode = obj(self.vertices, self.indices), 'w'
+        else:
+            raise ValueError('Unknown file extension. Known extensions: '
+                             '.ply, .obj.')
+        with open(filename, mode) as output_file:
+            for chunk in output:
+                output_file.write(chunk)
+
+def merge_meshes(meshes, primitive = 'triangles'):
+    """
+    Combines several meshes with the same primitive into one.
+
+    >>> a = Mesh([[0,0,0],[1,0,0],[0,1,0]], [[0,1,2]])
+    >>> m = merge_meshes([a, a])
+    >>> m
+    Mesh with 6 vertices and 2 triangles
+    >>> m.indices.tolist()
+    [[0, 1, 2], [3, 4, 5]]
+    """
+    meshes = [ mesh for mesh in meshes if len(mesh.indices) ]
+    if not meshes:
+        return Mesh(numpy.zeros((0, 3)), [], primitive = primitive)
+
+    offsets = numpy.cumsum([0] + [ len(mesh.vertices) for mesh in meshes ])
+    indices = numpy.concatenate(
+        [ mesh.indices + offset for mesh, offset in zip(meshes, offsets) ])
+
+    def concatenate(arrays):
+        if any(array is None for array in arrays):
+            return None
+        return numpy.concatenate(arrays)
+
+    return Mesh(numpy.concatenate([ mesh.vertices for mesh in meshes ]),
+                indices,
+                normals = concatenate([ mesh.normals for mesh in meshes ]),
+                colors = concatenate([ mesh.colors for mesh in meshes ]),
+                primitive = meshes[0].primitive)
+
+_sphere_meshes = {}
+
+def sphere_mesh(stacks, slices):
+    """
+    The unit sphere with the given number of stacks and slices, the
+    vertices being ordered as by the Horosphere class of CyOpenGL. The
+    result is cached.
+
+    >>> s = sphere_mesh(4, 20)
+    >>> s
+    Mesh with 62 vertices and 120 triangles
+    >>> bool(numpy.allclose(numpy.sum(s.vertices ** 2, axis = 1), 1.0))
+    True
+    """
+    key = (stacks, slices)
+    mesh = _sphere_meshes.get(key)
+    if mesh is not None:
+        return mesh
+
+    a, b = stacks, slices
+    phi = (numpy.pi / a) * numpy.arange(1, a)
+    theta = (2 * numpy.pi / b) * numpy.arange(b)
+    r, z = numpy.sin(phi)[:,None], numpy.cos(phi)[:,None]
+    vertices = numpy.concatenate(
+        [ numpy.stack([ r * numpy.cos(theta),
+                        r * numpy.sin(theta),
+                        z * numpy.ones(b) ], axis = -1).reshape(-1, 3),
+          [ (0, 0, 1), (0, 0, -1) ] ])
+
+    north = a * b - b
+    south = north + 1
+    i = numpy.arange(b)
+    j = (i + 1) % b
+    shift = north - b
+    caps = [ numpy.stack([ numpy.full(b, north), i, j ], axis = 1),
+             numpy.stack([ numpy.full(b, south), shift + j, shift + i ],
+                         axis = 1) ]
+    annulus = numpy.concatenate(
+        [ numpy.stack([ i, i + b, j + b ], axis = 1),
+          numpy.stack([ j, i, j + b ], axis = 1) ], axis = 1).reshape(-1, 3)
+    bands = (annulus[None,:,:] +
+             b * numpy.arange(a - 2)[:,None,None]).reshape(-1, 3)
+
+    mesh = Mesh(vertices, numpy.concatenate(caps + [ bands ]))
+    mesh.normals = mesh.vertices
+    _sphere_meshes[key] = mesh
+    return mesh
+
+def horosphere_level_of_detail(radius):
+    """
+    The number of stacks and slices used for a horosphere with the given
+    radius (as for the Horosphere class of CyOpenGL).
+    """
+    return 2 * max(2, int(8 * radius)), max(20, int(60 * radius))
+
+def _horoball_fields(horoballs):
+    """
+    Centers (complex), radii and cusp indices as arrays, given the
+    result of CuspNeighborhood.horoball_array or horoballs.
+    """
+    if isinstance(horoballs, numpy.ndarray):
+        return (horoballs['center_re'] + 1j * horoballs['center_im'],
+                horoballs['radius'],
+                horoballs['index'])
+    return (numpy.array([ D['center'] for D in horoballs ], dtype = complex),
+            numpy.array([ D['radius'] for D in horoballs ], dtype = float),
+            numpy.array([ D['index'] for D in horoballs ], dtype = int))
+
+def horoball_translates(centers, meridian, longitude, right, top):
+    """
+    For the given horoball centers (a complex array), returns a pair of
+    arrays: the indices of the horoballs and the translated centers of
+    the translates by the cusp stabilizer that the HoroballGroup of
+    CyOpenGL draws into the rectangle with the given right top corner.
+
+    >>> i, c = horoball_translates(numpy.array([0.0j]), 1.0j, 1.0, 0.5, 0.5)
+    >>> len(i)
+    9
+    """
+    centers = numpy.asarray(centers, dtype = complex)
+    meridian, longitude = complex(meridian), complex(longitude)
+    vx, vy = meridian.real, meridian.imag
+    ux = longitude.real
+    if len(centers) == 0:
+        return numpy.zeros(0, dtype = int), numpy.zeros(0, dtype = complex)
+
+    x, y = centers.real, centers.imag
+    N_min = -numpy.ceil((top + y) / vy)
+    N_max = numpy.ceil((top - y) / vy)
+    n = numpy.arange(N_min.min(), N_max.max() + 1)
+    n_ok = (N_min[:,None] <= n) & (n <= N_max[:,None])
+
+    xn = x[:,None] + n * vx
+    M_min = -numpy.ceil((right + xn) / ux)
+    M_max = numpy.ceil((right - xn) / ux)
+    m = numpy.arange(M_min[n_ok].min(), M_max[n_ok].max() + 1)
+    ok = (n_ok[:,:,None] &
+          (M_min[:,:,None] <= m) & (m <= M_max[:,:,None]))
+
+    ball, n_index, m_index = numpy.nonzero(ok)
+    translated = (centers[ball] + n[n_index] * meridian +
+                  m[m_index] * longitude)
+    return ball, translated
+
+def horoball_instances(horoballs, meridian, longitude, right, top):
+    """
+    The horoballs (given as returned by CuspNeighborhood.horoball_array or
+    horoballs) and all their translates by the cusp stabilizer drawn into
+    the rectangle with the given right top corner (see
+    horoball_translates) grouped by radius and cusp index. Returns a list
+    of triples (radius, cusp index, centers) where the centers are a
+    float32 array with a row (x, y, radius) for each translate.
+
+    >>> balls = [ {'center' : 0.0j, 'radius' : 0.5, 'index' : 0},
+    ...           {'center' : 0.5j, 'radius' : 0.5, 'index' : 0},
+    ...           {'center' : 0.5, 'radius' : 0.25, 'index' : 0} ]
+    >>> [ (radius, index, centers.shape) for radius, index, centers
+    ...   in horoball_instances(balls, 1.0j, 1.0, 0.5, 0.5) ]
+    [(0.25, 0, (6, 3)), (0.5, 0, (15, 3))]
+    """
+    centers, radii, indices = _horoball_fields(horoballs)
+    ball, translated = horoball_translates(
+        centers, meridian, longitude, right, top)
+    radii = _rounded_radii(radii)
+
+    result = []
+    keys = numpy.stack([ radii[ball], indices[ball] ], axis = 1)
+    for radius, index in sorted(set(map(tuple, keys.tolist()))):
+        selected = (radii[ball] == radius) & (indices[ball] == index)
+        result.append(
+            (radius, int(index),
+             numpy.stack([ translated[selected].real,
+                           translated[selected].imag,
+                           numpy.full(numpy.count_nonzero(selected), radius) ],
+                         axis = 1).astype(numpy.float32)))
+    return result
+
+def horoball_keys(horoballs):
+    """
+    The pairs (radius, cusp index) of all groups that horoball_instances
+    can return for the given horoballs (for any rectangle), e.g., to
+    build the shared spheres before drawing.
+
+    >>> balls = [ {'center' : 0.0j, 'radius' : 0.5, 'index' : 0},
+    ...           {'center' : 0.5j, 'radius' : 0.5, 'index' : 0},
+    ...           {'center' : 0.5, 'radius' : 0.25, 'index' : 1} ]
+    >>> horoball_keys(balls)
+    [(0.25, 1), (0.5, 0)]
+    """
+    centers, radii, indices = _horoball_fields(horoballs)
+    return sorted(set(zip(_rounded_radii(radii).tolist(), indices.tolist())))
+
+def _rounded_radii(radii):
+    # As the Horosphere objects of CyOpenGL
+    return numpy.round(radii, 10)
+
+def horosphere_mesh(radius):
+    """
+    The sphere of the given radius about the origin with the number of
+    triangles given by horosphere_level_of_detail. The normals are shared
+    with the unit sphere (see sphere_mesh).
+    """
+    sphere = sphere_mesh(*horosphere_level_of_detail(radius))
+    return Mesh(radius * sphere.vertices, sphere.indices,
+                normals = sphere.normals)
+
+def horoball_mesh(horoballs, meridian, longitude, right, top):
+    """
+    All spheres given by horoball_instances merged into one mesh (e.g.,
+    to export it).
+    """
+    meshes = []
+    for radius, index, centers in horoball_instances(
+            horoballs, meridian, longitude, right, top):
+        sphere = horosphere_mesh(radius)
+        k = len(sphere.vertices)
+        p = len(centers)
+        vertices = centers[:,None,:] + sphere.vertices[None,:,:]
+        triangles = (sphere.indices[None,:,:] +
+                     k * numpy.arange(p)[:,None,None])
+        meshes.append(
+            Mesh(vertices.reshape(-1, 3), triangles.reshape(-1, 3),
+                 normals = numpy.tile(sphere.normals, (p, 1))))
+
+    return merge_meshes(meshes)
+
+def segment_mesh(segments, meridian, longitude, shifts):
+    """
+    Line segments in the xy-plane (given as pairs of complex endpoints)
+    translated by each shift (M, L), that is by M meridians and L
+    longitudes.
+
+    >>> segment_mesh([(0.0, 1.0)], 1.0j, 1.0, [(0, 0), (1, 2)]).vertices.tolist()
+    [[0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [2.0, 1.0, 0.0], [3.0, 1.0, 0.0]]
+    """
+    endpoints = numpy.array(segments, dtype = complex).reshape(-1, 2)
+    shifts = numpy.array(shifts, dtype = float).reshape(-1, 2)
+    disp = shifts[:,0] * complex(meridian) + shifts[:,1] * complex(longitude)
+    points = (disp[:,None,None] + endpoints[None,:,:]).reshape(-1)
+    vertices = numpy.stack(
+        [ points.real, points.imag, numpy.zeros(len(points)) ], axis = 1)
+    return Mesh(vertices, numpy.arange(len(points)).reshape(-1, 2),
+                primitive = 'lines')
+
+def _face_color(face):
+    return hls_to_rgb(face['hue'], 0.5, 1.0) + (1.0,)
+
+def klein_face_mesh(face_dicts):
+    """
+    The faces of a Dirichlet domain (given as by
+    DirichletDomain.face_list) in the Klein model triangulated by coning
+    from the first vertex of each face. Each face has the color used by
+    the PolyhedronViewer and the normal points away from the origin.
+    """
+    meshes = []
+    for face in face_dicts:
+        vertices = numpy.array(face['vertices'], dtype = float)
+        n = len(vertices)
+        closest = numpy.array(face['closest'], dtype = float)
+        normal = closest / numpy.linalg.norm(closest)
+        i = numpy.arange(1, n - 1)
+        meshes.append(
+            Mesh(vertices,
+                 numpy.stack([ numpy.zeros(n - 2, dtype = int), i, i + 1 ],
+                             axis = 1),
+                 normals = numpy.tile(normal, (n, 1)),
+                 colors = numpy.tile(_face_color(face), (n, 1))))
+    return merge_meshes(meshes)
+
+def poincare_face_mesh(face_dicts, subdivision_depth = 4):
+    """
+    The faces of a Dirichlet domain (given as by
+    DirichletDomain.face_list) in the Poincare model. Each face is coned
+    from its barycenter, the triangles are subdivided subdivision_depth
+    times in the Klein model and their vertices projected to the Poincare
+    model. The normals are those of the sphere containing the face (as
+    for the PoincarePolygon class of CyOpenGL).
+    """
+    meshes = []
+    for face in face_dicts:
+        vertices = numpy.array(face['vertices'], dtype = float)
+        centroid = numpy.mean(vertices, axis = 0)
+        triangles = numpy.stack(
+            [ numpy.tile(centroid, (len(vertices), 1)),
+              numpy.roll(vertices, 1, axis = 0),
+              vertices ], axis = 1)
+        triangles = subdivide_triangle_array(triangles, subdivision_depth)
+        points = projection_array(triangles.reshape(-1, 3), 1.0)
+
+        closest = numpy.array(face['closest'], dtype = float)
+        center = closest / face['distance'] ** 2
+        normals = center - points
+        normals /= numpy.linalg.norm(normals, axis = 1)[:,None]
+        meshes.append(
+            Mesh(points, numpy.arange(len(points)).reshape(-1, 3),
+                 normals = normals,
+                 colors = numpy.tile(_face_color(face), (len(points), 1))))
+    return merge_meshes(meshes)
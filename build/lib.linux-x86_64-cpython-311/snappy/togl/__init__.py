@@ -0,0 +1,3 @@
+# Dummy module to help CyOpenGL find togl
+
+pass
@@ -0,0 +1,17 @@
+from .interval_newton_shapes_engine import *
+from .krawczyk_shapes_engine import *
+
+from .cuspCrossSection import *
+
+from .verifyHyperbolicity import *
+from .verifyCanonical import *
+from .cuspTranslations import *
+from .cusp_shapes import *
+from .volume import *
+from .complex_volume import *
+from .interval_tree import *
+from .maximal_cusp_area_matrix import *
+
+# Choice of algorithm for finding intervals
+CertifiedShapesEngine = KrawczykShapesEngine
+#CertifiedShapesEngine = IntervalNewtonShapesEngine
@@ -0,0 +1,9 @@
+"""
+Classes and functions for the upper half space model **H**\\ :sup:`3` of hyperbolic space
+using interval arithmetics.
+
+"""
+
+from .ideal_point import *
+from .finite_point import *
+from .extended_matrix import *
@@ -0,0 +1,2 @@
+version = '3.0.4a5'
+release_date = 'TBA'
@@ -0,0 +1,47 @@
+/* Generated by Cython 0.29.37 */
+
+#ifndef __PYX_HAVE__SnapPyHP
+#define __PYX_HAVE__SnapPyHP
+
+#include "Python.h"
+
+#ifndef __PYX_HAVE_API__SnapPyHP
+
+#ifndef __PYX_EXTERN_C
+  #ifdef __cplusplus
+    #define __PYX_EXTERN_C extern "C"
+  #else
+    #define __PYX_EXTERN_C extern
+  #endif
+#endif
+
+#ifndef DL_IMPORT
+  #define DL_IMPORT(_T) _T
+#endif
+
+__PYX_EXTERN_C PyObject *UCS2_hack(char *, Py_ssize_t, char *);
+__PYX_EXTERN_C void uFatalError(const char*, const char*);
+__PYX_EXTERN_C void uLongComputationBegins(const char*, Boolean);
+__PYX_EXTERN_C FuncResult uLongComputationContinues(void);
+__PYX_EXTERN_C void uLongComputationEnds(void);
+__PYX_EXTERN_C void uAcknowledge(const char*);
+__PYX_EXTERN_C void uAbortMemoryFull(void);
+__PYX_EXTERN_C int uQuery(const char*, const int, const char* *, const int);
+
+__PYX_EXTERN_C int SnapPy_test_flag;
+__PYX_EXTERN_C Boolean gLongComputationInProgress;
+__PYX_EXTERN_C Boolean gLongComputationCancelled;
+__PYX_EXTERN_C PyObject *gLongComputationTicker;
+
+#endif /* !__PYX_HAVE_API__SnapPyHP */
+
+/* WARNING: the interface of the module init function changed in CPython 3.5. */
+/* It now returns a PyModuleDef instance instead of a PyModule instance. */
+
+#if PY_MAJOR_VERSION < 3
+PyMODINIT_FUNC initSnapPyHP(void);
+#else
+PyMODINIT_FUNC PyInit_SnapPyHP(void);
+#endif
+
+#endif /* !__PYX_HAVE__SnapPyHP */
@@ -14,7 +14,8 @@ cdef class AbelianGroup(object):
     5
 
     Alternatively, instantiate an abelian group as AbelianGroup(P) where P is a
-    presentation matrix given as a list of lists of integers.
+    presentation matrix given as a list of lists of integers or as a
+    PresentationMatrix.
     Snappy stores an abelian group as a list of elementary divisors:
 
     >>> B = AbelianGroup([[1,3,2],[2,0,6]])
@@ -39,7 +40,9 @@ cdef class AbelianGroup(object):
     cdef public coefficients
 
     def __init__(self, presentation=None, elementary_divisors=[]):
-        if presentation is not None:
+        if isinstance(presentation, PresentationMatrix):
+            self.divisors = presentation.elementary_divisors()
+        elif presentation is not None:
             self.divisors = smith_form(presentation)
         else:
             try:
@@ -245,6 +248,28 @@ cdef class PresentationMatrix(object):
                     self._set(kl, temp - m*a_il )
             self.dead_columns.add(j)
 
+    def elementary_divisors(self, torsion_only=False):
+        """
+        The elementary divisors of the presented group (as returned by
+        AbelianGroup.elementary_divisors), computed with sparse elimination
+        (see sparse_smith_form.py). Dead columns are ignored. If
+        torsion_only is True, only the torsion coefficients are returned.
+
+        >>> P = PresentationMatrix(3, 4)
+        >>> P[0,0], P[0,1], P[1,1], P[2,2] = 1, 3, 4, 6
+        >>> P.elementary_divisors()
+        [2, 12, 0]
+        >>> P.elementary_divisors(torsion_only=True)
+        [2, 12]
+        """
+        columns = [j for j in xrange(self.cols) if j not in self.dead_columns]
+        column_index = dict((j, n) for n, j in enumerate(columns))
+        entries = dict(((i, column_index[j]), value)
+                       for (i, j), value in self._entries.items()
+                       if j in column_index)
+        return sparse_elementary_divisors(entries, self.rows, len(columns),
+                                          torsion_only=torsion_only)
+
     def simplified_matrix(self):
         """
         Return the simplified presentation as a matrix.
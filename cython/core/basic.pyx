@@ -12,6 +12,9 @@ import atexit
 import math
 import string
 import time
+import bisect
+import threading
+import importlib
 python_major_version = sys.version_info[0]
 
 # Sage interaction
@@ -34,43 +37,61 @@ except ImportError:
 
 from .matrix import matrix, vector, SimpleMatrix
 from . import number
+from .word_evaluator import WordEvaluator
+from .sparse_smith_form import elementary_divisors as sparse_elementary_divisors
 
 ## SnapPy components
 import spherogram
 from .manifolds import __path__ as manifold_paths
-from . import database
-from . import twister
-from . import snap
-from . import verify
-from .verify import complex_volume as verify_complex_volume
 from . import decorated_isosig
-from .ptolemy import manifoldMethods as ptolemyManifoldMethods
-from .export_stl import stl
+from .export_stl import stl, export_mesh
 from .exceptions import SnapPeaFatalError
-try:
-    from plink import LinkEditor, LinkManager
-except ImportError:
-    LinkEditor, LinkManager = None, None
-try:
-    from .gui import ViewerWindow
-except ImportError:
-    ViewerWindow = None
-try:
-    from .polyviewer import PolyhedronViewer
-except ImportError:
-    PolyhedronViewer = None
-try:
-    from .horoviewer import HoroballViewer
-except ImportError:
-    HoroballViewer = None
-try:
-    from .browser import Browser
-except ImportError:
-    Browser = None
-try:
-    from .filedialog import asksaveasfile
-except ImportError:
-    asksaveasfile = None
+from .lazy_import import LazyModule
+
+# These are imported when first used, keeping "import snappy" fast.
+def _load_database():
+    # The manifold tables are loaded by the snappy package.
+    import snappy
+    return snappy._database()
+
+database = LazyModule('snappy.database', _load_database)
+twister = LazyModule('snappy.twister')
+snap = LazyModule('snappy.snap')
+verify = LazyModule('snappy.verify')
+ptolemyManifoldMethods = LazyModule('snappy.ptolemy.manifoldMethods')
+
+# The GUI (which needs Tk, plink, pypng and CyOpenGL) is also imported
+# when first used. The SnapPy app replaces some of these by subclasses
+# by setting the attributes of this module.
+LinkEditor, LinkManager = None, None
+ViewerWindow, PolyhedronViewer, HoroballViewer = None, None, None
+Browser, asksaveasfile = None, None
+
+_gui_object_modules = {
+    'LinkEditor' : 'plink',
+    'LinkManager' : 'plink',
+    'ViewerWindow' : '.gui',
+    'PolyhedronViewer' : '.polyviewer',
+    'HoroballViewer' : '.horoviewer',
+    'Browser' : '.browser',
+    'asksaveasfile' : '.filedialog' }
+
+def gui_object(name):
+    """
+    Return the attribute of this module with the given name, importing
+    it first from the module listed in _gui_object_modules if it is not
+    set yet. Returns None if the module cannot be imported because,
+    e.g., Tk or CyOpenGL is missing.
+    """
+    obj = globals()[name]
+    if obj is None:
+        try:
+            module = importlib.import_module(
+                _gui_object_modules[name], 'snappy')
+        except ImportError:
+            return None
+        obj = globals()[name] = getattr(module, name)
+    return obj
 
 # This is part of the UCS2 hack.
 cdef public UCS2_hack (char *string, Py_ssize_t length, char *errors) :   
@@ -201,7 +222,7 @@ cdef public c_FuncResult uLongComputationContinues() except *:
     cdef now
     if gLongComputationCancelled:
         return func_cancelled
-    elif UI_callback is not None:
+    elif UI_callback is not None and _on_main_thread():
         now = time.time()
         if now - gLongComputationTicker > 0.2:
             UI_callback()
@@ -214,9 +235,14 @@ cdef public void uLongComputationEnds() except*:
     gLongComputationInProgress = False
     if gLongComputationCancelled:
         gLongComputationCancelled = False
-        if UI_callback is not None:
+        if UI_callback is not None and _on_main_thread():
             UI_callback(interrupted=True)
 
+def _on_main_thread():
+    # UI_callback runs the Tk event loop which must not happen from,
+    # e.g., the worker thread of a raytracing.filling_solver.FillingSolver.
+    return threading.current_thread() is threading.main_thread()
+
 
 show_uAcknowledge = False
 
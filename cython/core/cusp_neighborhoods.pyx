@@ -1,10 +1,23 @@
 # Cusp Neighborhoods
 
+# The margin the kernel subtracts from the cutoff height in
+# get_cusp_neighborhood_horoballs.
+_horoball_cutoff_height_epsilon = 1e-6
+
+# When the cutoff is lowered below the one of the cached horoballs, the
+# kernel is asked for the horoballs down to this fraction of the cached
+# cutoff (if that is lower than the requested cutoff) so that lowering
+# the cutoff in small steps does not call the kernel for every step.
+_horoball_cutoff_factor = 0.7
+
 cdef class CCuspNeighborhood(object):
     cdef c_CuspNeighborhoods *c_cusp_neighborhood
     cdef c_Triangulation *c_triangulation
     cdef int _num_cusps
     cdef original_indices
+    # Maps a cusp index to the full list of horoballs computed for it,
+    # see _cached_horoballs_start.
+    cdef _horoball_cache
 
     @staticmethod
     def _number_(n):
@@ -24,6 +37,7 @@ cdef class CCuspNeighborhood(object):
         self.manifold_name = manifold.name()
         self._num_cusps = get_num_cusp_neighborhoods(self.c_cusp_neighborhood)
         self._number_ = manifold._number_
+        self._horoball_cache = {}
 
     def __dealloc__(self):
         if self.c_triangulation != NULL:
@@ -103,6 +117,7 @@ cdef class CCuspNeighborhood(object):
         N = self.check_index(which_cusp)
         set_cusp_neighborhood_displacement(self.c_cusp_neighborhood,
                                            N, Object2Real(new_displacement))
+        self.clear_horoball_cache()
 
     def stopping_displacement(self, which_cusp=0):
         """
@@ -158,6 +173,7 @@ cdef class CCuspNeighborhood(object):
         """
         N = self.check_index(which_cusp)
         set_cusp_neighborhood_tie(self.c_cusp_neighborhood, N, new_tie)
+        self.clear_horoball_cache()
 
     def volume(self, which_cusp=0):
         """
@@ -195,10 +211,97 @@ cdef class CCuspNeighborhood(object):
         
         If the high_precision flag is set to the default value False, these
         are Python complexes and floats.  Otherwise they are SnapPy Numbers.
+
+        The full list of horoballs (with high_precision False) is cached
+        for each cusp until the displacements change.  Asking for a
+        larger cutoff than before does not invoke the kernel again.
+
+        >>> C = Manifold('m125').cusp_neighborhood()
+        >>> B = C.horoballs(0.05)
+        >>> len(C.horoballs(0.01)) > len(C.horoballs(0.05)) == len(B)
+        True
+        >>> C.set_displacement(0.1)
+        >>> C.horoballs(0.05)[-1]['radius'] > B[-1]['radius']
+        True
+        """
+        which_cusp = self.check_index(which_cusp)
+        if full_list and not high_precision:
+            balls = self._cached_horoballs(cutoff, which_cusp)
+        else:
+            balls = self._kernel_horoballs(
+                cutoff, which_cusp, full_list, high_precision)
+        return [ {'center' : center, 'radius' : radius, 'index' : index}
+                 for center, radius, index in balls ]
+
+    def horoball_array(self, cutoff=0.1, which_cusp=0):
+        """
+        Return the horoballs with height at least cutoff (the full list,
+        see horoballs) as a NumPy structured array with fields
+        'center_re', 'center_im', 'radius' and 'index' sorted by
+        increasing radius.  This avoids creating a Python object for every
+        horoball and requires NumPy.
+        """
+        import numpy
+
+        which_cusp = self.check_index(which_cusp)
+        start = self._cached_horoballs_start(cutoff, which_cusp)
+        entry = self._horoball_cache[which_cusp]
+        if entry['array'] is None:
+            balls = entry['balls']
+            array = numpy.zeros(len(balls), dtype=[('center_re', 'f8'),
+                                                   ('center_im', 'f8'),
+                                                   ('radius', 'f8'),
+                                                   ('index', 'i4')])
+            array['center_re'] = [ center.real for center, r, i in balls ]
+            array['center_im'] = [ center.imag for center, r, i in balls ]
+            array['radius'] = entry['radii']
+            array['index'] = [ i for center, r, i in balls ]
+            entry['array'] = array
+        return entry['array'][start:]
+
+    def clear_horoball_cache(self):
+        """
+        Forget the horoballs cached by horoballs and horoball_array.  This
+        happens automatically when set_displacement or set_tie is called.
+        """
+        self._horoball_cache = {}
+
+    def _cached_horoballs(self, cutoff, which_cusp):
+        start = self._cached_horoballs_start(cutoff, which_cusp)
+        return self._horoball_cache[which_cusp]['balls'][start:]
+
+    def _cached_horoballs_start(self, cutoff, which_cusp):
+        """
+        Makes sure the cache holds the horoballs with height at least
+        cutoff and returns the index of the first one of them (the kernel
+        sorts them by increasing radius).
+        """
+        cutoff = float(cutoff)
+        entry = self._horoball_cache.get(which_cusp)
+        if entry is None or cutoff < entry['cutoff']:
+            if entry is None:
+                new_cutoff = cutoff
+            else:
+                new_cutoff = min(cutoff,
+                                 _horoball_cutoff_factor * entry['cutoff'])
+            balls = self._kernel_horoballs(new_cutoff, which_cusp,
+                                           True, False)
+            entry = { 'cutoff' : new_cutoff,
+                      'balls' : balls,
+                      'radii' : [ radius for center, radius, index in balls ],
+                      'array' : None }
+            self._horoball_cache[which_cusp] = entry
+        return bisect.bisect_left(
+            entry['radii'], (cutoff - _horoball_cutoff_height_epsilon) / 2)
+
+    def _kernel_horoballs(self, cutoff, which_cusp, full_list,
+                          high_precision):
+        """
+        The horoballs as computed by the kernel as list of triples
+        (center, radius, index).
         """
         cdef CuspNbhdHoroballList* horoball_list
         cdef CuspNbhdHoroball ball
-        which_cusp = self.check_index(which_cusp)
         horoball_list = get_cusp_neighborhood_horoballs(
             self.c_cusp_neighborhood,
             which_cusp,
@@ -210,15 +313,14 @@ cdef class CCuspNeighborhood(object):
         for n from 0 <= n < horoball_list.num_horoballs:
             ball = horoball_list.horoball[n]
             if high_precision:
-                dict = {
-                    'center' : self._number_(Complex2Number(ball.center)),
-                    'radius' : self._number_(Real2Number(ball.radius)),
-                    'index'  : ball.cusp_index}
+                triple = (self._number_(Complex2Number(ball.center)),
+                          self._number_(Real2Number(ball.radius)),
+                          ball.cusp_index)
             else:
-                dict = {'center' : Complex2complex(ball.center),
-                        'radius' : Real2float(ball.radius),
-                        'index'  : ball.cusp_index}
-            result.append(dict)
+                triple = (Complex2complex(ball.center),
+                          Real2float(ball.radius),
+                          ball.cusp_index)
+            result.append(triple)
         free_cusp_neighborhood_horoball_list(horoball_list)
         return result
 
@@ -297,7 +399,9 @@ cdef class CCuspNeighborhood(object):
         >>> C.view(which_cusp = 1, cutoff=0.2)   #doctest: +CYOPENGL
         """
         which_cusp = self.check_index(which_cusp)
+        HoroballViewer = gui_object('HoroballViewer')
         if HoroballViewer:
+            ViewerWindow = gui_object('ViewerWindow')
             return ViewerWindow(HoroballViewer, self, which_cusp=which_cusp,
                 cutoff=cutoff, title='Cusp neighborhood%s of %s'%(
                     's' if self.num_cusps() > 1 else '', self.manifold_name))
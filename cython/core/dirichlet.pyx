@@ -497,7 +497,9 @@ cdef class CDirichletDomain(object):
         return edges
 
     def view(self):
+        PolyhedronViewer = gui_object('PolyhedronViewer')
         if PolyhedronViewer:
+            ViewerWindow = gui_object('ViewerWindow')
             return ViewerWindow(PolyhedronViewer, facedicts=self.face_list(),
                 title='Dirichlet Domain of %s'%self.manifold_name)
         else:
@@ -662,7 +664,7 @@ cdef class CDirichletDomain(object):
             output.write(self._to_string().encode('ascii'))
 
     def export_stl(self, filename, model='klein', cutout=False, num_subdivisions=3,
-                   shrink_factor=0.9, cutoff_radius=0.9, callback=None):
+                   shrink_factor=0.9, cutoff_radius=0.9, callback=None, file_format=None):
         """
         Export the Dirichlet domain as an stl file suitable for 3d printing.
 
@@ -678,8 +680,15 @@ cdef class CDirichletDomain(object):
           
         * num_subdivision=3 - number of times to subdivide for the Poincare model
 
+        * file_format=None - 'stl' (ascii), 'binary_stl', 'ply' or 'obj' (the latter
+          two sharing vertices between triangles). Defaults to 'ply' or 'obj' if the
+          filename has that extension and to 'stl' otherwise.
+
         For printing domains in the Poincare model, cutoff_radius is critical for avoiding
         infinitely thin cusps, which cannot be printed.
+
+        The binary formats are much smaller and faster to write. All formats but 'stl'
+        require NumPy.
         
         This can take a long time for finely subdivided domains. So we call UI_callback
         every so often if it is not None.
@@ -689,12 +698,11 @@ cdef class CDirichletDomain(object):
         >>> D.export_stl('fig-eight-poincare.stl', model='poincare')     #doctest: +SKIP
         >>> D.export_stl('fig-eight-klein-wireframe.stl', cutout=True)     #doctest: +SKIP
         >>> D.export_stl('fig-eight-poincare-wireframe.stl', model='poincare', cutout=True)     #doctest: +SKIP
+        >>> D.export_stl('fig-eight-poincare.stl', model='poincare', num_subdivisions=5, file_format='binary_stl')     #doctest: +SKIP
+        >>> D.export_stl('fig-eight-poincare.ply', model='poincare')     #doctest: +SKIP
         """
-        output = stl(self.face_list(), model, cutout, num_subdivisions, shrink_factor, cutoff_radius)
-        with open(filename, 'w') as output_file:
-            for line in output:
-                if UI_callback is not None: UI_callback()
-                output_file.write(line)
+        export_mesh(filename, self.face_list(), file_format, model, cutout, num_subdivisions,
+                    shrink_factor, cutoff_radius, callback=UI_callback)
 
 class DirichletDomain(CDirichletDomain):
     """
@@ -571,5 +571,35 @@ class HolonomyGroup(CHolonomyGroup):
     def _number_(n):
         return number.number_to_native_number(n)
 
+    def evaluate_words(self, words):
+        """
+        Return the images of the given words under the SL(2,C)
+        representation (see SL2C) as a list. The products of common
+        subwords are only computed once and are memoized for later calls
+        (using bounded memory), which is much faster than calling SL2C
+        for each word when evaluating many (short) words.
+
+        >>> M = Manifold('m125')
+        >>> G = M.fundamental_group()
+        >>> A, B = G.evaluate_words(['aaB', 'aaBA'])
+        >>> max(abs(x) for x in (A - G.SL2C('aaB')).list()) < 1e-9
+        True
+        >>> max(abs(x) for x in (B - G.SL2C('aaBA')).list()) < 1e-9
+        True
+        """
+        evaluator = getattr(self, '_word_evaluator', None)
+        if evaluator is None:
+            n = self.num_generators()
+            images = { }
+            for g, letter in enumerate(self.generators(), 1):
+                images[ g] = self.SL2C(letter)
+                images[-g] = self.SL2C(letter.swapcase())
+            evaluator = WordEvaluator(
+                images,
+                identity = self.SL2C(''),
+                word_to_list = lambda word: word_as_list(word, n))
+            self._word_evaluator = evaluator
+        return evaluator.evaluate_words(words)
+
 if _within_sage:
     HolonomyGroup.__bases__ += (sage.structure.sage_object.SageObject,)
@@ -382,6 +382,7 @@ cdef class Manifold(Triangulation):
         
         This does not work when using SnapPy in a Docker container. 
         """
+        Browser = gui_object('Browser')
         if Browser is None:
             raise RuntimeError("Browser not imported; Tk, CyOpenGL or pypng is probably missing.")
         return Browser(self)
@@ -107,6 +107,7 @@ cdef class Triangulation(object):
             remove_hyperbolic_structures(self.c_triangulation)
 
     cdef get_from_new_plink(self, file_name=None):
+        LinkEditor = gui_object('LinkEditor')
         if LinkEditor is None:
             raise RuntimeError('PLink was not imported.')
         self.LE = LinkEditor(no_arcs=True,
@@ -269,7 +270,7 @@ cdef class Triangulation(object):
                 first_line = file.readline()[:-1]
                 file.close()
                 if first_line.find('% Link Projection') > -1:
-                    LM = LinkManager()
+                    LM = gui_object('LinkManager')()
                     LM._from_string(open(pathname, 'r').read())
                     klp = LM.SnapPea_KLPProjection()
                     self._link_file_full_path = os.path.abspath(pathname)
@@ -609,6 +610,7 @@ cdef class Triangulation(object):
         Called by save when no file name is specified, so that in
         theory it can be overloaded by the UI.
         """
+        asksaveasfile = gui_object('asksaveasfile')
         if asksaveasfile:
             savefile = asksaveasfile(
                 mode='w', title='Save Triangulation', defaultextension='.tri',
@@ -2120,8 +2122,8 @@ cdef class Triangulation(object):
         """
         Returns an AbelianGroup representing the first integral
         homology group of the underlying (Dehn filled) manifold.
-        Preliminary simplification is done with arbitrary precision
-        integers.  Smith form is then computed with PARI.
+        The Smith form is computed with arbitrary precision integers
+        using sparse elimination, see sparse_smith_form.py.
 
         >>> M = Triangulation('m003')
         >>> M.homology()
@@ -2129,7 +2131,7 @@ cdef class Triangulation(object):
         """
 
         relation_matrix = self.c_presentation_matrix()
-        return AbelianGroup(relation_matrix.simplified_matrix())
+        return AbelianGroup(relation_matrix)
 
     cdef c_presentation_matrix(self):
         """
@@ -2208,7 +2210,7 @@ cdef class Triangulation(object):
         Returns an AbelianGroup representing the first integral
         homology group of the underlying (Dehn filled) manifold.
         Preliminary simplification is done with 64 bit integers.
-        Smith form is then computed with PARI.
+        Smith form is then computed using sparse elimination.
 
         >>> M = Triangulation('m003')
         >>> M.homology()
@@ -2221,22 +2223,20 @@ cdef class Triangulation(object):
         if self.c_triangulation is NULL:
             return AbelianGroup()
         homology_presentation(self.c_triangulation, &R)
-        relations = []
+        entries = {}
         if R.relations != NULL:
-            if R.num_rows == 0:
-                relations = [0,] * R.num_columns
-            else:
-                for m from 0 <= m < R.num_rows:
-                    row = []
-                    for n from 0 <= n < R.num_columns:
-                        row.append(R.relations[m][n])
-                    relations.append(row)
+            for m from 0 <= m < R.num_rows:
+                for n from 0 <= n < R.num_columns:
+                    if R.relations[m][n] != 0:
+                        entries[m, n] = R.relations[m][n]
+            num_rows, num_columns = R.num_rows, R.num_columns
+            if R.num_rows > 0:
                 free_relations(&R)
         else:
             raise RuntimeError("The SnapPea kernel couldn't compute "
                              "the homology presentation matrix")
-        result = AbelianGroup(relations)
-        return result
+        return AbelianGroup(elementary_divisors=sparse_elementary_divisors(
+            entries, num_rows, num_columns))
 
     def homology(self):
         """
@@ -0,0 +1,36 @@
+# Computes the distribution of cohomology fractal values (using the CPU
+# raytracer) for the manifolds of a census with non-trivial second
+# rational cohomology and prints the moments for each distance.
+#
+# Usage: python cohomology_fractal_statistics_census.py [number of manifolds] [number of rays]
+
+import snappy
+from snappy.raytracing.cohomology_fractal_statistics import (
+    cohomology_fractal_statistics_for_manifolds)
+
+import sys
+import time
+
+def run(num_manifolds, num_rays):
+    manifolds = list(snappy.OrientableCuspedCensus[:num_manifolds])
+    distances = [ 2.0, 4.0, 6.0 ]
+
+    start = time.perf_counter()
+
+    results = cohomology_fractal_statistics_for_manifolds(
+        manifolds, distances = distances, num_rays = num_rays)
+
+    for M, statistics in zip(manifolds, results):
+        if statistics is None:
+            continue
+        for s in statistics:
+            print("%-10s %4.1f  mean %8.4f  var %8.4f  skew %8.4f  "
+                  "kurt %8.4f  incomplete %d" % (
+                      M.name(), s['distance'], s['mean'], s['variance'],
+                      s['skewness'], s['kurtosis'], s['num_incomplete']))
+
+    print("Total: %.3fs" % (time.perf_counter() - start))
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 10000)
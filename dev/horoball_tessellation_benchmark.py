@@ -0,0 +1,46 @@
+# Times the tessellation of the horoballs (with all translates the
+# HoroballViewer draws) and of the Ford domain for the cusps of a few
+# manifolds without any OpenGL and optionally writes the horoballs to
+# ply files.
+#
+# Usage: python horoball_tessellation_benchmark.py [cutoff] [output directory]
+
+import snappy
+from snappy import tessellation
+
+import os
+import sys
+import time
+
+def run(cutoff, directory):
+    if directory:
+        os.makedirs(directory, exist_ok = True)
+
+    for name in [ 'm004', 'm125', 's000', 'v3227', 'L14n12345' ]:
+        C = snappy.Manifold(name).cusp_neighborhood()
+        for cusp in range(C.num_cusps()):
+            meridian, longitude = C.translations(cusp)
+
+            start = time.perf_counter()
+            horoballs = C.horoball_array(cutoff, cusp)
+            computed = time.perf_counter()
+            mesh = tessellation.horoball_mesh(
+                horoballs, meridian, longitude, right = 4.0, top = 4.0)
+            tessellated = time.perf_counter()
+            edges = tessellation.segment_mesh(
+                C.Ford_domain(cusp), meridian, longitude, [ (0, 0) ])
+            done = time.perf_counter()
+
+            print("%-10s cusp %d  %6d horoballs %8.3fs  %9d triangles %8.3fs"
+                  "  %4d Ford edges %8.3fs" % (
+                      name, cusp, len(horoballs), computed - start,
+                      len(mesh.indices), tessellated - computed,
+                      len(edges.indices), done - tessellated))
+
+            if directory:
+                mesh.export(os.path.join(
+                    directory, '%s_cusp%d.ply' % (name, cusp)))
+
+if __name__ == '__main__':
+    run(float(sys.argv[1]) if len(sys.argv) > 1 else 0.05,
+        sys.argv[2] if len(sys.argv) > 2 else None)
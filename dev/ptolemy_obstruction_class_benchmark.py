@@ -0,0 +1,37 @@
+# Timings of computing the (generalized) obstruction classes and
+# Ptolemy varieties for triangulations with many tetrahedra.
+#
+# Usage: python ptolemy_obstruction_class_benchmark.py [number of manifolds]
+
+import snappy
+from snappy.ptolemy.manifoldMethods import (
+    get_generalized_ptolemy_obstruction_classes)
+
+import sys
+import time
+
+def large_triangulations(num_manifolds):
+    for M in snappy.HTLinkExteriors(num_crossings = 15):
+        if M.num_tetrahedra() >= 30:
+            yield M
+            num_manifolds -= 1
+            if num_manifolds == 0:
+                return
+
+def run(num_manifolds):
+    for M in large_triangulations(num_manifolds):
+        timings = []
+        for N in [ 2, 3 ]:
+            start = time.perf_counter()
+            get_generalized_ptolemy_obstruction_classes(M, N)
+            timings.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        M.ptolemy_variety(3, obstruction_class = 0)
+        timings.append(time.perf_counter() - start)
+
+        print("%-12s %3d tets  N=2: %6.3fs  N=3: %6.3fs  variety N=3: %6.3fs" %
+              ((M.name(), M.num_tetrahedra()) + tuple(timings)))
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,55 @@
+# Timings of converting the Ptolemy coordinates and cross ratios given
+# as Rational Univariate Representation (see snappy.ptolemy.rur) to
+# Polynomial Univariate Representation, once RUR by RUR and once batched
+# using RURBatchEvaluator.
+#
+# Usage: python ptolemy_rur_benchmark.py [number of repetitions]
+
+from snappy.ptolemy import parse_solutions
+from snappy.ptolemy import __path__ as ptolemy_paths
+from snappy.ptolemy.rur import RUR, RURBatchEvaluator
+
+import bz2
+import os
+import sys
+import time
+
+def load_solutions():
+    path = os.path.join(ptolemy_paths[0], 'testing_files_rur',
+                        'm052__sl3_c0.rur.bz2')
+    return parse_solutions(bz2.BZ2File(path, 'r').read().decode('ascii'))
+
+def rur_values(solution):
+    return [ v for v in solution.values() if isinstance(v, RUR) ]
+
+def run(num_repetitions):
+    sols = load_solutions()
+    batches = [ rur_values(sol) for sol in sols if sol.dimension == 0 ]
+    batches += [ rur_values(sol) for sol in sols.cross_ratios()
+                 if sol.dimension == 0 ]
+
+    for name, method, batch_method in [
+        ('to_PUR',
+         RUR.to_PUR, RURBatchEvaluator.to_PURs),
+        ('multiply_and_simplify_terms',
+         RUR.multiply_and_simplify_terms,
+         RURBatchEvaluator.multiply_and_simplify_terms)]:
+
+        start = time.perf_counter()
+        for i in range(num_repetitions):
+            individual = [ [ method(r) for r in rurs ] for rurs in batches ]
+        individual_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for i in range(num_repetitions):
+            batched = [ batch_method(RURBatchEvaluator(), rurs)
+                        for rurs in batches ]
+        batched_time = time.perf_counter() - start
+
+        assert individual == batched
+
+        print("%-30s individual: %8.3fs batched: %8.3fs" % (
+            name, individual_time, batched_time))
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
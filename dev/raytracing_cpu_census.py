@@ -0,0 +1,46 @@
+# Renders inside view thumbnails (or cohomology fractals) for the
+# manifolds of a census using the CPU raytracer (no OpenGL needed) and
+# reports the time spent in the different stages.
+#
+# Usage: python raytracing_cpu_census.py [number of manifolds] [output directory] [--fractal]
+
+import snappy
+from snappy.raytracing.cpu_raytracer import render_manifold
+
+import os
+import sys
+import time
+
+def run(num_manifolds, directory, fractal):
+    os.makedirs(directory, exist_ok = True)
+
+    totals = {}
+    start = time.perf_counter()
+
+    for M in snappy.OrientableCuspedCensus[:num_manifolds]:
+        # Use the first basis vector of the second rational cohomology
+        cohomology_class = 0 if fractal else None
+
+        try:
+            image, timings = render_manifold(
+                M, os.path.join(directory, M.name() + '.png'),
+                width = 160, height = 120,
+                cohomology_class = cohomology_class,
+                num_processes = None)
+        except IndexError as e:
+            # Second rational cohomology is trivial
+            print(M.name(), e)
+            continue
+
+        for stage, t in timings.items():
+            totals[stage] = totals.get(stage, 0.0) + t
+
+    for stage, total in totals.items():
+        print("%-10s %8.3fs" % (stage, total))
+    print("%-10s %8.3fs" % ('total', time.perf_counter() - start))
+
+if __name__ == '__main__':
+    args = [ arg for arg in sys.argv[1:] if arg != '--fractal' ]
+    run(int(args[0]) if len(args) > 0 else 20,
+        args[1] if len(args) > 1 else 'cpu_raytracing_images',
+        '--fractal' in sys.argv)
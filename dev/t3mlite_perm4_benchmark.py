@@ -0,0 +1,56 @@
+# Timings of the t3mlite operations that are dominated by creating,
+# composing and inverting Perm4's.
+#
+# Usage: python t3mlite_perm4_benchmark.py [number of manifolds]
+
+import snappy
+import snappy.drilling
+import snappy.snap.t3mlite as t3m
+
+import sys
+import time
+
+class Timer:
+    def __init__(self):
+        self.totals = {}
+
+    def time(self, name, f, *args, **kwargs):
+        start = time.perf_counter()
+        result = f(*args, **kwargs)
+        self.totals[name] = (
+            self.totals.get(name, 0.0) + time.perf_counter() - start)
+        return result
+
+    def report(self):
+        for name, total in self.totals.items():
+            print("%-20s %8.3fs" % (name, total))
+
+def run(num_manifolds):
+    timer = Timer()
+
+    # Time the crush step performed when drilling by wrapping the function.
+    crush = snappy.drilling.crush_geodesic_pieces
+    snappy.drilling.crush_geodesic_pieces = (
+        lambda tetrahedra: timer.time('crush', crush, tetrahedra))
+
+    try:
+        for M in snappy.OrientableCuspedCensus[:num_manifolds]:
+            T = timer.time('Mcomplex.build', t3m.Mcomplex, M)
+            for i in range(10):
+                timer.time('copy()', T.copy)
+            for face in list(T.Faces):
+                S = T.copy()
+                timer.time('two_to_three', S.two_to_three,
+                           S.Faces[face.Index], unsafe_mode = True)
+
+            try:
+                timer.time('drill_word', M.drill_word, 'a')
+            except snappy.drilling.exceptions.DrillGeodesicError:
+                pass
+    finally:
+        snappy.drilling.crush_geodesic_pieces = crush
+
+    timer.report()
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100)
@@ -13,6 +13,13 @@ include "CySnapPyimages.pxi"
 from .infodialog import InfoDialog
 from . import togl
 
+# The horoballs, edges and faces are tessellated with NumPy if it is
+# available.
+try:
+    from . import tessellation
+except ImportError:
+    tessellation = None
+
 from cpython cimport array
 
 import os, sys, platform, png
@@ -517,6 +524,50 @@ cdef class MeshedSurface(GLobject):
         glDisableClientState(GL_NORMAL_ARRAY)
         glDisableClientState(GL_VERTEX_ARRAY)
 
+cdef class MeshBuffers(GLobject):
+    """
+    A tessellation.Mesh (triangles or line segments) drawn with a
+    single call of glDrawElements.  The normals and colors of the mesh
+    are used if it has them.  The arrays are copied when the object is
+    created, so the mesh can be discarded.
+    """
+
+    cdef bytes vertex_data, normal_data, color_data, index_data
+    cdef GLenum mode
+    cdef GLsizei count
+
+    def __init__(self, mesh, **kwargs):
+        (self.vertex_data, self.normal_data,
+         self.color_data, self.index_data) = mesh.buffers()
+        if mesh.primitive == 'triangles':
+            self.mode = GL_TRIANGLES
+        else:
+            self.mode = GL_LINES
+        self.count = mesh.indices.size
+
+    def draw(self, use_material=True):
+        cdef char* data
+        if self.count == 0:
+            return
+        if use_material:
+            self.set_material()
+        data = self.vertex_data
+        glVertexPointer(3, GL_FLOAT, 0, data)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        if self.normal_data is not None:
+            data = self.normal_data
+            glNormalPointer(GL_FLOAT, 0, data)
+            glEnableClientState(GL_NORMAL_ARRAY)
+        if self.color_data is not None:
+            data = self.color_data
+            glColorPointer(4, GL_FLOAT, 0, data)
+            glEnableClientState(GL_COLOR_ARRAY)
+        data = self.index_data
+        glDrawElements(self.mode, self.count, GL_UNSIGNED_INT, data)
+        glDisableClientState(GL_COLOR_ARRAY)
+        glDisableClientState(GL_NORMAL_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+
 cdef class PoincareTriangle(MeshedSurface):
     """
     A geodesic triangle in the Poincare model.  The geometric
@@ -627,6 +678,22 @@ class HyperbolicPolyhedron:
         self.S_infinity.build_display_list(1.0, 30, 30)
         self.Klein_faces = []
         self.Poincare_faces = []
+        if tessellation is not None:
+            # All faces of a model as a single mesh.
+            for faces, mesh in [
+                    (self.Klein_faces,
+                     tessellation.klein_face_mesh(facedicts)),
+                    (self.Poincare_faces,
+                     tessellation.poincare_face_mesh(facedicts))]:
+                faces.append(
+                    MeshBuffers(mesh,
+                                front_specular=self.face_specular,
+                                back_specular=self.face_specular,
+                                front_shininess=self.front_shininess,
+                                back_shininess=self.back_shininess,
+                                togl_widget=togl_widget))
+                faces[0].build_display_list()
+            return
         for dict in facedicts:
             vertices = [vector3(vertex) for vertex in dict['vertices']]
             closest = vector3(dict['closest'])
@@ -803,7 +870,7 @@ cdef class HoroballGroup(GLobject):
     """
 
     cdef horoballs, meridian, longitude,
-    cdef keys, centers, spheres
+    cdef keys, centers, spheres, sphere_buffers
     cdef double cutoff
     cdef original_indices
 
@@ -812,7 +879,12 @@ cdef class HoroballGroup(GLobject):
         self.meridian = complex(meridian)
         self.longitude = complex(longitude)
         self.original_indices = indices
-        self.build_spheres()
+        # MeshBuffers keyed by (radius, index)
+        self.sphere_buffers = {}
+        if tessellation is None:
+            self.build_spheres()
+        else:
+            self.build_sphere_buffers()
 
     cdef build_spheres(self):
         cdef GLfloat color[4]
@@ -836,7 +908,38 @@ cdef class HoroballGroup(GLobject):
         for key in keys:
             spheres[key].build_display_list()
 
+    cdef build_sphere_buffers(self):
+        # The display list of each sphere is compiled here since the
+        # display list of the group which calls them cannot contain
+        # another glNewList.  This way, the sphere's arrays are stored
+        # once instead of once for each translate.
+        for radius, index in tessellation.horoball_keys(self.horoballs):
+            sphere = MeshBuffers(
+                tessellation.horosphere_mesh(radius),
+                color=GetColor(self.original_indices[index]),
+                front_shininess=50.0,
+                togl_widget=self.togl_widget)
+            sphere.build_display_list()
+            self.sphere_buffers[(radius, index)] = sphere
+
+    def delete_resource(self):
+        for sphere in self.sphere_buffers.values():
+            sphere.delete_resource()
+        GLobject.delete_resource(self)
+
     def draw(self, R, T):
+        if tessellation is not None:
+            # The translates of the horoballs with the same radius and
+            # color call the display list of one sphere.
+            for radius, index, centers in tessellation.horoball_instances(
+                    self.horoballs, self.meridian, self.longitude, R, T):
+                sphere = self.sphere_buffers[(radius, index)]
+                for x, y, z in centers.tolist():
+                    glPushMatrix()
+                    glTranslatef(x, y, z)
+                    sphere.display()
+                    glPopMatrix()
+            return
         vx, vy = self.meridian.real, self.meridian.imag
         ux = self.longitude.real
         for key in self.keys:
@@ -915,16 +1018,21 @@ cdef class EdgeSet(GLobject):
             self.set_dark_color()
         else:
             self.set_light_color()
-        for M, L in shifts:
-            disp = M*self.meridian + L*self.longitude
-            glPushMatrix()
-            glTranslatef(disp.real, disp.imag, 0.0)
-            for P1, P2 in self.segments:
-                glBegin(GL_LINES)
-                glVertex3f(P1.real, P1.imag, 0.0)
-                glVertex3f(P2.real, P2.imag, 0.0)
-                glEnd()
-            glPopMatrix()
+        if tessellation is not None:
+            mesh = tessellation.segment_mesh(
+                self.segments, self.meridian, self.longitude, shifts)
+            MeshBuffers(mesh).draw(use_material=False)
+        else:
+            for M, L in shifts:
+                disp = M*self.meridian + L*self.longitude
+                glPushMatrix()
+                glTranslatef(disp.real, disp.imag, 0.0)
+                for P1, P2 in self.segments:
+                    glBegin(GL_LINES)
+                    glVertex3f(P1.real, P1.imag, 0.0)
+                    glVertex3f(P2.real, P2.imag, 0.0)
+                    glEnd()
+                glPopMatrix()
         if self.stipple:
             glDisable(GL_LINE_STIPPLE)
         glEnable(GL_LIGHTING)
@@ -1069,8 +1177,12 @@ cdef class HoroballScene:
             self.which_cusp = which_cusp
         self.meridian, self.longitude = (
             complex(z) for z in self.nbhd.translations(self.which_cusp))
+        if tessellation is not None and full_list:
+            horoballs = self.nbhd.horoball_array(self.cutoff, which_cusp)
+        else:
+            horoballs = self.nbhd.horoballs(self.cutoff, which_cusp, full_list)
         self.cusp_view = HoroballGroup(
-            self.nbhd.horoballs(self.cutoff, which_cusp, full_list),
+            horoballs,
             [self.nbhd.original_index(n) for n in range(self.nbhd.num_cusps())],
             self.meridian,
             self.longitude)
@@ -4,6 +4,7 @@
 #logging.basicConfig(filename='example.log',level=logging.DEBUG)
 #logging.debug('This message should go to the log file')
 import sys
+import importlib
 from .SnapPy import (AbelianGroup, HolonomyGroup, FundamentalGroup,
                      DirichletDomain, CuspNeighborhood, SymmetryGroup,
                      AlternatingKnotExteriors, NonalternatingKnotExteriors,
@@ -114,7 +115,10 @@ SnapPy._triangulation_class = Triangulation
 SnapPyHP._triangulation_class = TriangulationHP
 SnapPyHP._manifold_class = ManifoldHP
 
-__all__ = ['Triangulation', 'Manifold', 'ManifoldHP', 'AbelianGroup',
+# The names exported by "from snappy import *" are these and the
+# names of the manifold tables, see __getattr__ below.
+_exported_names = [
+           'Triangulation', 'Manifold', 'ManifoldHP', 'AbelianGroup',
            'FundamentalGroup', 'HolonomyGroup', 'HolonomyGroupHP',
            'DirichletDomain', 'DirichletDomainHP', 'CuspNeighborhood',
            'CuspNeighborhoodHP', 'SymmetryGroup', 'AlternatingKnotExteriors',
@@ -124,19 +128,40 @@ __all__ = ['Triangulation', 'Manifold', 'ManifoldHP', 'AbelianGroup',
 
 from .sage_helper import _within_sage
 
-from . import snap
-snap.add_methods(Manifold)
-snap.add_methods(ManifoldHP)
-snap.add_methods(Triangulation, hyperbolic=False)
-
-from . import verify
-Manifold.verify_hyperbolicity = verify.verify_hyperbolicity
-ManifoldHP.verify_hyperbolicity = verify.verify_hyperbolicity
+# To keep "import snappy" fast, the subpackages providing the following
+# methods are only imported when one of the methods is used.
+from .lazy_import import LazyMethod
+
+def _add_lazy_methods(mfld_classes, module_name, names):
+    for mfld_class in mfld_classes:
+        for name in names:
+            setattr(mfld_class, name, LazyMethod(module_name, name))
+
+# The methods implemented in snappy.snap (and its submodules)
+_add_lazy_methods([Triangulation, Manifold, ManifoldHP],
+                  'snappy.snap.nsagetools',
+                  ['alexander_polynomial', 'homological_longitude'])
+_add_lazy_methods([Triangulation, Manifold, ManifoldHP],
+                  'snappy.snap.slice_obs_HKL',
+                  ['slice_obstruction_HKL'])
+_add_lazy_methods([Manifold, ManifoldHP],
+                  'snappy.snap',
+                  ['polished_holonomy', 'tetrahedra_field_gens',
+                   'trace_field_gens', 'invariant_trace_field_gens',
+                   'holonomy_matrix_entries'])
+_add_lazy_methods([Manifold, ManifoldHP],
+                  'snappy.snap.nsagetools',
+                  ['hyperbolic_torsion', 'hyperbolic_adjoint_torsion',
+                   'hyperbolic_SLN_torsion'])
+
+_add_lazy_methods([Manifold, ManifoldHP],
+                  'snappy.verify',
+                  ['verify_hyperbolicity'])
 
 def canonical_retriangulation(
     manifold, verified = False,
-    interval_bits_precs = verify.default_interval_bits_precs,
-    exact_bits_prec_and_degrees = verify.default_exact_bits_prec_and_degrees,
+    interval_bits_precs = 'default',
+    exact_bits_prec_and_degrees = 'default',
     verbose = False):
 
     """
@@ -159,12 +184,18 @@ def canonical_retriangulation(
       8
    
     See :py:meth:`verify.verified_canonical_retriangulation` for the
-    additional options.
+    additional options (``'default'`` meaning the defaults used there).
     """
     if False in manifold.cusp_info('complete?'):
         raise ValueError('Canonical retriangulation needs all cusps to be complete')
 
     if verified:
+        from . import verify
+        if interval_bits_precs == 'default':
+            interval_bits_precs = verify.default_interval_bits_precs
+        if exact_bits_prec_and_degrees == 'default':
+            exact_bits_prec_and_degrees = (
+                verify.default_exact_bits_prec_and_degrees)
         return verify.verified_canonical_retriangulation(
             manifold,
             interval_bits_precs = interval_bits_precs,
@@ -178,8 +209,8 @@ ManifoldHP.canonical_retriangulation = canonical_retriangulation
 
 def isometry_signature(
     manifold, of_link = False, verified = False,
-    interval_bits_precs = verify.default_interval_bits_precs,
-    exact_bits_prec_and_degrees = verify.default_exact_bits_prec_and_degrees,
+    interval_bits_precs = 'default',
+    exact_bits_prec_and_degrees = 'default',
     verbose = False):
 
     """
@@ -319,6 +350,8 @@ def cusp_area_matrix(manifold, method='trigDependentTryCanonize',
 
     """
 
+    from . import verify
+
     if method == 'maximal':
         if not verified:
             raise NotImplementedError("Maximal cusp area matrix only "
@@ -341,8 +374,6 @@ def cusp_area_matrix(manifold, method='trigDependentTryCanonize',
 Manifold.cusp_area_matrix = cusp_area_matrix
 ManifoldHP.cusp_area_matrix = cusp_area_matrix
 
-from .verify import cusp_areas as verify_cusp_areas
-
 def cusp_areas(manifold, policy = 'unbiased',
                method = 'trigDependentTryCanonize',
                verified = False, bits_prec = None, first_cusps=[]):
@@ -412,6 +443,8 @@ def cusp_areas(manifold, policy = 'unbiased',
         raise ValueError("policy passed to cusp_areas must be 'unbiased' "
                            "or 'greedy'.")
 
+    from .verify import cusp_areas as verify_cusp_areas
+
     m = manifold.cusp_area_matrix(
         method=method, verified=verified, bits_prec=bits_prec)
 
@@ -423,8 +456,6 @@ def cusp_areas(manifold, policy = 'unbiased',
 Manifold.cusp_areas = cusp_areas
 ManifoldHP.cusp_areas = cusp_areas
 
-from .verify import short_slopes as verify_short_slopes
-
 def short_slopes(manifold,
                  length = 6,
                  policy = 'unbiased', method = 'trigDependentTryCanonize',
@@ -467,6 +498,8 @@ def short_slopes(manifold,
 
     """
 
+    from .verify import short_slopes as verify_short_slopes
+
     return [
         verify_short_slopes.short_slopes_from_cusp_shape_and_area(
             shape, area, length = length)
@@ -518,6 +551,8 @@ def cusp_translations(manifold, policy = 'unbiased',
     might not correspond to disjoint cusp neighborhoods.
     """
 
+    from .verify import short_slopes as verify_short_slopes
+
     return [
         verify_short_slopes.translations_from_cusp_shape_and_area(
             shape, area, kernel_convention = True)
@@ -566,6 +601,7 @@ def complex_volume(manifold, verified_modulo_2_torsion = False,
 
     """
     if verified_modulo_2_torsion:
+        from . import verify
         return verify.verified_complex_volume_torsion(
             manifold, bits_prec = bits_prec)
 
@@ -579,18 +615,16 @@ def complex_volume(manifold, verified_modulo_2_torsion = False,
 Manifold.complex_volume = complex_volume
 ManifoldHP.complex_volume = complex_volume
 
-from . import drilling
-drilling._add_methods(Manifold)
-drilling._add_methods(ManifoldHP, high_precision = True)
+# The methods implemented in snappy.drilling, the ManifoldHP versions
+# return a ManifoldHP.
+for _name in ['drill_word', 'drill_words']:
+    setattr(Manifold, _name, LazyMethod('snappy.drilling', _name))
+    setattr(ManifoldHP, _name, LazyMethod('snappy.drilling', _name + '_hp'))
 
-try:
-    from .gui import ViewerWindow
-    from .raytracing.inside_viewer import InsideViewer
-    from .raytracing.inside_viewer import NonorientableUnsupportedError
-    from .raytracing import cohomology_fractal
-except ImportError as e:
-    InsideViewer = None
-    _importErrorRaytracing = str(e)
+# Imported by manifold_inside_view when first used. The SnapPy app
+# replaces these by subclasses by setting the attributes of this module.
+ViewerWindow = None
+InsideViewer = None
 
 def manifold_inside_view(self, cohomology_class = None, geodesics = []):
     """
@@ -619,10 +653,18 @@ def manifold_inside_view(self, cohomology_class = None, geodesics = []):
 
     """
 
-    if InsideViewer is None:
+    global ViewerWindow, InsideViewer
+    try:
+        if ViewerWindow is None:
+            from .gui import ViewerWindow
+        if InsideViewer is None:
+            from .raytracing.inside_viewer import InsideViewer
+        from .raytracing.inside_viewer import NonorientableUnsupportedError
+        from .raytracing import cohomology_fractal
+    except ImportError as e:
         raise RuntimeError("Raytraced inside view not imported; "
         "Tk or CyOpenGL is probably missing "
-        "(original error : %s)" % _importErrorRaytracing)
+        "(original error : %s)" % e)
 
     if not self.is_orientable():
         raise NonorientableUnsupportedError(self)
@@ -702,6 +744,7 @@ def all_translations(self, verified = False, bits_prec = None):
     if verified or bits_prec:
         # Use the implementation in verify.cuspTranslations that uses
         # tetrahedra_shapes and ComplexCuspNeighborhood
+        from . import verify
         return verify.cusp_translations_for_neighborhood(
             self, verified = verified, bits_prec = bits_prec)
 
@@ -711,27 +754,60 @@ def all_translations(self, verified = False, bits_prec = None):
 CuspNeighborhood.all_translations = all_translations
 CuspNeighborhoodHP.all_translations = all_translations
 
-from . import twister
+# The manifold tables are loaded from the snappy_manifold package (and
+# others) when snappy.database or one of the tables is first used.
 
-# Pass our manifold class down to database and then import the
-# manifold tables themselves from the snappy_manifold package.
-
-from . import database
-database.Manifold = Manifold
 snappy_module = sys.modules[__name__]
-database_objects = []
+database_objects = None
 known_manifold_packages = [('snappy_manifolds', True),
                            ('snappy_15_knots', False),
                            ('nonexistent_manifolds', False)]
 
-for manifold_package, required in known_manifold_packages:
-    table_dict = database.add_tables_from_package(manifold_package, required)
-    for name, table in table_dict.items():
-        setattr(snappy_module, name, table)
-        if name not in database_objects:
-            database_objects.append(name)
-
-__all__ += database_objects
+def _database():
+    """
+    Imports snappy.database, passes our manifold class down to it and
+    loads the manifold tables (the first time only).
+    """
+    global database_objects
+    # Not "from . import database" which would call __getattr__ below.
+    database = importlib.import_module('.database', __name__)
+    if database_objects is None:
+        database.Manifold = Manifold
+        names = []
+        for manifold_package, required in known_manifold_packages:
+            table_dict = database.add_tables_from_package(
+                manifold_package, required)
+            for name, table in table_dict.items():
+                setattr(snappy_module, name, table)
+                if name not in names:
+                    names.append(name)
+        database_objects = names
+    return database
+
+# Subpackages imported on first use (as attributes of this module).
+_lazy_submodules = ['verify', 'snap', 'ptolemy', 'drilling', 'raytracing',
+                    'twister']
+
+def __getattr__(name):
+    """
+    Imports the subpackages listed in _lazy_submodules and loads the
+    manifold tables when first used.
+    """
+    if name in _lazy_submodules:
+        return importlib.import_module('.' + name, __name__)
+    if name == 'database':
+        return _database()
+    if name == '__all__':
+        _database()
+        return _exported_names + database_objects + link_objects
+    # The tables are classes and thus have capitalized names. We only
+    # load them when looking for such a name.
+    if name[:1].isupper() and database_objects is None:
+        _database()
+        if name in database_objects:
+            return globals()[name]
+    raise AttributeError(
+        "module %r has no attribute %r" % (__name__, name))
 
 # Monkey patch the link_exterior method into Spherogram.
 
@@ -784,15 +860,11 @@ link_objects += [
 DTcodec.exterior = _link_exterior
 link_objects += ['DTcodec']
 
-__all__ += link_objects
-
 # Add spun-normal surface features via FXrays
-import FXrays
-from .snap.t3mlite import spun as _spun
-for mfld_class in [Triangulation, Manifold, ManifoldHP]:
-    for method in ['_normal_surface_equations', 'normal_surfaces',
-                   'normal_boundary_slopes']:
-        setattr(mfld_class, method, getattr(_spun, method))
+_add_lazy_methods([Triangulation, Manifold, ManifoldHP],
+                  'snappy.snap.t3mlite.spun',
+                  ['_normal_surface_equations', 'normal_surfaces',
+                   'normal_boundary_slopes'])
 
 import textwrap
 
@@ -801,8 +873,11 @@ __doc__ = """
 SnapPy is a Cython wrapping of Jeff Weeks' SnapPea kernel.
 
 The module defines the following classes:
-%s""" % textwrap.fill(
-    ', '.join(__all__) + '.',
+%s
+
+The manifold tables such as OrientableCuspedCensus are loaded when first
+used.""" % textwrap.fill(
+    ', '.join(_exported_names + link_objects) + '.',
     width = 78,
     initial_indent = '    ',
     subsequent_indent = '    ')
@@ -53,9 +53,25 @@ def cover_type(mfld):
     return re.findall("~reg~|~irr~|~cyc~", mfld.name())[-1][1:-1]
 
 
+def sparse_homology(mfld):
+    """
+    Same as mfld.homology() but computing the Smith form of the
+    presentation matrix with sparse elimination (see sparse_smith_form.py)
+    which is faster for the large presentation matrices of covers.
+    """
+    # Imported here since SnapPy imports this module
+    from .SnapPy import AbelianGroup
+    try:
+        presentation = mfld._presentation_matrix()
+    except ValueError:
+        # Non-integral Dehn fillings
+        return mfld.homology()
+    return AbelianGroup(elementary_divisors=presentation.elementary_divisors())
+
+
 def cover_hash(mfld, degrees):
     return [ repr(sorted(
-        [(cover_type(C), C.homology())
+        [(cover_type(C), sparse_homology(C))
              for C in mfld.covers(degree, method='snappea')]
         )) for degree in degrees ]
 
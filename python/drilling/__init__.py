@@ -4,9 +4,11 @@ from . import debug
 from .tracing import trace_geodesic
 from .crush import crush_geodesic_pieces
 from .line import R13LineWithMatrix
-from .geometric_structure import add_r13_geometry, word_to_psl2c_matrix
+from .geometric_structure import (
+    add_r13_geometry, word_to_psl2c_matrix, words_to_psl2c_matrices)
 from .geodesic_info import GeodesicInfo, sample_line
 from .perturb import perturb_geodesics
+from .geodesic_enumeration import GeodesicEnumerator, enumerate_geodesics
 from .subdivide import traverse_geodesics_to_subdivide
 from .cusps import (
     CuspPostDrillInfo,
@@ -418,14 +420,6 @@ def drill_word_hp(*args, **kwargs):
 def drill_words_hp(*args, **kwargs):
     return drill_words(*args, **kwargs).high_precision()
 
-def _add_methods(mfld_class, high_precision = False):
-    if high_precision:
-        mfld_class.drill_word  = drill_word_hp
-        mfld_class.drill_words = drill_words_hp
-    else:
-        mfld_class.drill_word  = drill_word
-        mfld_class.drill_words = drill_words
-
 def dummy_function_for_additional_doctests():
     """
     Test with manifold without symmetry. Note that the code in drilling is
@@ -500,4 +494,47 @@ def dummy_function_for_additional_doctests():
         >>> Manifold("m004").drill_words(['CAC','CCbC']).canonical_retriangulation().triangulation_isosig(ignore_orientation=False)
         'qLvvLvAMQQQkcgimopkllmpkonnnpixcaelchapewetvrn_bcaaBbBBbaBaBbB'
 
+    Test that growing the tubes further improves the lower bound for the
+    injectivity radius used when perturbing and that the tubes are reused:
+
+        >>> from snappy.drilling.geometric_structure import add_r13_geometry
+        >>> from snappy.drilling.perturb import compute_lower_bound_injectivity_radius, grow_tubes_until_disjoint
+        >>> M = Manifold("m125")
+        >>> mcomplex = Mcomplex(M)
+        >>> mcomplex = add_r13_geometry(mcomplex, M)
+        >>> geodesics = [ compute_geodesic_info(mcomplex, word)
+        ...               for word in ['a', 'acAADa'] ]
+        >>> compute_lower_bound_injectivity_radius(mcomplex, geodesics) # doctest: +NUMERIC9
+        0.218278929739774
+        >>> tubes = [ g.tube for g in geodesics ]
+        >>> num_pieces = len(tubes[0].pieces)
+        >>> grow_tubes_until_disjoint(mcomplex, tubes, max_radius = 1) # doctest: +NUMERIC9
+        0.277744397294255
+        >>> [ g.tube for g in geodesics ] == tubes
+        True
+        >>> len(tubes[0].pieces) > num_pieces
+        True
+
+    Test that a tube restored from its saved state continues to grow the
+    same way. The numbers lose some precision when pickled, so pieces
+    at the same distance might be added in a different order:
+
+        >>> import pickle
+        >>> from snappy.drilling.geodesic_tube import GeodesicTube
+        >>> state = pickle.loads(pickle.dumps(tubes[0].save_state()))
+        >>> restored_tube = GeodesicTube.from_saved_state(mcomplex, state)
+        >>> restored_tube.covered_radius() # doctest: +NUMERIC9
+        0.580366299897178
+        >>> for tube in [ tubes[0], restored_tube ]:
+        ...     tube.add_pieces_for_radius(1.5)
+        >>> def pieces(tube):
+        ...     return sorted((piece.tet.Index, float(piece.lower_bound))
+        ...                   for piece in tube.pieces)
+        >>> all(i == j and abs(r - s) < 1e-12
+        ...     for (i, r), (j, s) in zip(pieces(restored_tube),
+        ...                               pieces(tubes[0])))
+        True
+        >>> len(restored_tube.pieces)
+        639
+
     """
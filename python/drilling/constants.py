@@ -6,3 +6,5 @@ piece_midpoint_bias = 1.818449629072142
 
 point_perturbation_direction = [ 0.8466, 0.3176, 0.4268 ]
 
+
+enumeration_start_point_bias = 0.6180339887
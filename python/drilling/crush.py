@@ -4,7 +4,7 @@ from .peripheral_curves import install_peripheral_curves
 
 from ..snap.t3mlite import Tetrahedron, Perm4, Mcomplex, simplex
 
-from typing import Dict, Tuple, List, Sequence
+from typing import List, Sequence
 
 def crush_geodesic_pieces(tetrahedra : Sequence[Tetrahedron]) -> Mcomplex:
     """
@@ -199,15 +199,12 @@ def crush_geodesic_pieces(tetrahedra : Sequence[Tetrahedron]) -> Mcomplex:
                       for subtet in subtetrahedra
                       if subtet and subtet.orientation == s ])
 
-_perm_tuple_to_index : Dict[Tuple[int, int, int, int], int] = {
-    perm.tuple() : i for i, perm in enumerate(Perm4.S4()) }
-
 _transpositions : List[Perm4] = [ Perm4((1,0,2,3)),
                                   Perm4((0,2,1,3)),
                                   Perm4((0,1,3,2)) ]
 
 def _perm_to_index(perm : Perm4) -> int:
-    return _perm_tuple_to_index[perm.tuple()]
+    return perm.index()
 
 def _find_perm_for_piece(piece : GeodesicPiece):
     """
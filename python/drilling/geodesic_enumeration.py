@@ -0,0 +1,531 @@
+from . import constants
+from . import epsilons
+from .geometric_structure import (add_r13_geometry,
+                                  _compute_inradius_and_incenter_from_planes)
+from .geodesic_info import GeodesicInfo
+from .geodesic_tube import (add_structures_necessary_for_tube,
+                            get_geodesic_tube,
+                            _face_to_edges)
+from .line import R13Line, R13LineWithMatrix
+from .spatial_dict import SpatialDict
+
+from ..hyperboloid import ( # type: ignore
+    r13_dot,
+    o13_inverse,
+    distance_unit_time_r13_points)
+from ..snap.t3mlite import simplex, Mcomplex, Tetrahedron # type: ignore
+from ..matrix import matrix # type: ignore
+from ..exceptions import InsufficientPrecisionError # type: ignore
+
+import heapq
+import time
+import tracemalloc
+
+from typing import Sequence, Tuple, List, Dict, Optional, Any
+
+__all__ = ['GeodesicEnumerator', 'enumerate_geodesics']
+
+def enumerate_geodesics(manifold,
+                        cutoff,
+                        bits_prec : Optional[int] = None,
+                        margin = None,
+                        band_width = 0.25,
+                        grouped : bool = True,
+                        verbose : bool = False):
+    """
+    Enumerates the closed geodesics of a (cusped or closed) hyperbolic
+    manifold whose real length is less than the given cutoff without
+    computing a Dirichlet domain.
+
+    Yields triples (word, complex length, multiplicity) in the order of
+    increasing real length where the word is in the unsimplified
+    fundamental group. If grouped is False, each closed geodesic is yielded
+    separately (with multiplicity 1). Like length_spectrum, each unoriented
+    primitive closed geodesic is reported once.
+
+        >>> from snappy import Manifold
+        >>> M = Manifold("m004")
+        >>> [ (L.real(), mult)
+        ...   for word, L, mult in enumerate_geodesics(M, 1.2) ] # doctest: +NUMERIC9
+        [(1.08707014499574, 1), (1.08707014499574, 1)]
+        >>> G = M.fundamental_group(simplify_presentation = False)
+        >>> all(abs(G.complex_length(word).real() - L.real()) < 1e-9
+        ...     for word, L, mult in enumerate_geodesics(M, 1.2))
+        True
+
+    It also works for closed manifolds:
+
+        >>> M = Manifold("m004(2,3)")
+        >>> [ (L.real(), mult)
+        ...   for word, L, mult in enumerate_geodesics(M, 0.5) ] # doctest: +NUMERIC9
+        [(0.178792491242577, 1)]
+
+    See GeodesicEnumerator for the meaning of margin and band_width and
+    for statistics about memory and time spent per length band.
+    """
+
+    enumerator = GeodesicEnumerator(manifold,
+                                    bits_prec = bits_prec,
+                                    margin = margin,
+                                    band_width = band_width,
+                                    verbose = verbose)
+    return enumerator.geodesics(cutoff, grouped = grouped)
+
+class _PendingTile:
+    """
+    A lifted tetrahedron that still needs to be processed by
+    GeodesicEnumerator together with the face through which it was reached
+    and the word (as tuple of non-zero integers) of the group element
+    mapping the tetrahedron in the fundamental domain to the lifted
+    tetrahedron.
+
+    Analogous to _PendingPiece in geodesic_tube.py, lower_bound is a lower
+    bound on the distance of the basepoint to the face through which the
+    lifted tetrahedron was reached and the < operator is overloaded so that
+    a priority queue will pick the piece with the lowest lower_bound next.
+    """
+
+    def __init__(self,
+                 tet : Tetrahedron,
+                 o13_matrix,
+                 word : Tuple[int, ...],
+                 lower_bound,
+                 entry_cell : int = simplex.T):
+        self.tet = tet
+        self.o13_matrix = o13_matrix
+        self.word = word
+        self.lower_bound = lower_bound
+        self.entry_cell = entry_cell
+
+    def __lt__(self, other):
+        return self.lower_bound < other.lower_bound
+
+class _Candidate:
+    """
+    A loxodromic group element found while tiling that still needs to be
+    classified, that is, we need to check whether it is primitive and
+    not conjugate to an element (or its inverse) found earlier.
+    """
+
+    def __init__(self, word : Tuple[int, ...], psl2c_matrix, complex_length):
+        self.word = word
+        self.psl2c_matrix = psl2c_matrix
+        self.complex_length = complex_length
+        self._key = complex_length.real()
+
+    def __lt__(self, other):
+        return self._key < other._key
+
+class _GeodesicClass:
+    """
+    A primitive closed geodesic found by GeodesicEnumerator.
+
+    Also stores the GeodesicInfo (and thus the GeodesicTube, see
+    get_geodesic_tube) for the closed geodesic so that it can be reused,
+    e.g., to compute tube radii later.
+    """
+
+    def __init__(self, word : Tuple[int, ...], complex_length,
+                 geodesic_info : GeodesicInfo):
+        self.word = word
+        self.complex_length = complex_length
+        self.geodesic_info = geodesic_info
+
+class GeodesicEnumerator:
+    """
+    Enumerates the closed geodesics of a hyperbolic manifold by tiling
+    the hyperboloid model with lifts of the tetrahedra in the order
+    of their distance from a basepoint (the incenter of the base
+    tetrahedron). This uses the same priority-queue tiling as GeodesicTube
+    but about a point instead of a line and does not need a Dirichlet
+    domain (and thus also works for closed manifolds with small injectivity
+    radius).
+
+    Each lifted tetrahedron that is the image of the base tetrahedron
+    corresponds to a group element g and g moves the basepoint p by at
+    most the distance of the lifted tetrahedron to p. If such an element g
+    is loxodromic, it is a candidate. Once the tiling has covered a ball of
+    radius L + margin about p, we have found a representative for each
+    conjugacy class of length less than L whose axis passes within
+    margin / 2 of p (after applying a Decktransformation). The default for
+    margin is twice the largest distance of the basepoint to the incenter
+    of a tetrahedron of the fundamental domain plus twice the largest
+    inradius of such a tetrahedron. A closed geodesic that stays far away
+    from the basepoint (for example, deep in a cusp) might be missed
+    and margin needs to be increased to find it. Like length_spectrum,
+    this computation is not verified.
+
+    To decide whether candidates are primitive and not conjugate to each
+    other (or each other's inverse), a candidate is moved into the
+    fundamental domain using GeodesicInfo and compared to the pieces of
+    the GeodesicTube of radius 0 about the closed geodesics already found
+    (or the core curves of filled cusps).
+
+    The candidates are classified in bands of the given band_width and
+    statistics about the time and memory spent for each band are recorded
+    in band_statistics. The memory is reported as the number of lifted
+    tetrahedra visited and pending and, if tracemalloc is tracing, the
+    current and peak memory traced by tracemalloc.
+
+    The enumerator keeps its state, so geodesics can be called again
+    with a larger cutoff to continue the enumeration.
+    """
+
+    def __init__(self,
+                 manifold,
+                 bits_prec : Optional[int] = None,
+                 margin = None,
+                 band_width = 0.25,
+                 verbose : bool = False):
+
+        if not manifold.is_orientable():
+            raise ValueError(
+                "Enumerating geodesics only supported for orientable "
+                "manifolds.")
+
+        self.mcomplex = Mcomplex(manifold)
+        add_r13_geometry(self.mcomplex, manifold, bits_prec = bits_prec)
+        add_structures_necessary_for_tube(self.mcomplex)
+
+        self.verbose = verbose
+        self.band_statistics : List[Dict[str, Any]] = []
+
+        RF = self.mcomplex.RF
+        self._epsilon = epsilons.compute_epsilon(RF)
+        self._basepoint = self.mcomplex.R13_baseTetInCenter
+        self._band_width = RF(band_width)
+        if margin is None:
+            self._margin = self._default_margin()
+        else:
+            self._margin = RF(margin)
+
+        # Lifted tetrahedra, priority queue accessed with heapq.
+        self._pending_tiles : List[_PendingTile] = [
+            _PendingTile(self.mcomplex.baseTet,
+                         matrix.identity(ring = RF, n = 4),
+                         (),
+                         RF(0)) ]
+        # For each group element (identified by the image of the basepoint)
+        # the set of tetrahedra we have already visited.
+        self._visited_tiles = _TranslatedBasepointDict(self.mcomplex)
+        self._num_tiles = 0
+
+        # Loxodromic elements not yet classified, as priority queue.
+        self._candidates : List[_Candidate] = []
+
+        # Primitive closed geodesics found so far.
+        self._classes : List[_GeodesicClass] = []
+        # For each tetrahedron (index) in the fundamental domain, the
+        # lifts of the closed geodesics in self._classes intersecting it.
+        self._tet_to_lines : List[List[R13Line]] = [
+            [] for tet in self.mcomplex.Tetrahedra ]
+        # Indices of the cusps whose core curves are in self._classes.
+        self._core_curve_cusps = set()
+
+        # All closed geodesics of length less than this have been
+        # reported.
+        self._emitted_length = RF(0)
+
+    def geodesics(self, cutoff, grouped : bool = True):
+        """
+        Yields (word, complex length, multiplicity) for the closed
+        geodesics of real length less than cutoff (see
+        enumerate_geodesics).
+        """
+
+        RF = self.mcomplex.RF
+        cutoff = RF(cutoff)
+
+        while self._emitted_length < cutoff:
+            start_time = time.perf_counter()
+            lower = self._emitted_length
+            upper = min(lower + self._band_width, cutoff)
+
+            self._tile_up_to(upper + self._margin)
+            classes = self._classify_candidates_up_to(upper)
+            self._record_statistics(
+                lower, upper, len(classes),
+                time.perf_counter() - start_time)
+
+            self._emitted_length = upper
+
+            for group in self._group_by_complex_length(classes):
+                if grouped:
+                    yield (self._word_as_string(group[0].word),
+                           group[0].complex_length,
+                           len(group))
+                else:
+                    for c in group:
+                        yield (self._word_as_string(c.word),
+                               c.complex_length,
+                               1)
+
+    def covered_radius(self):
+        """
+        All lifted tetrahedra intersecting the ball about the basepoint
+        of this radius have been visited.
+        """
+        return self._pending_tiles[0].lower_bound
+
+    def _default_margin(self):
+        RF = self.mcomplex.RF
+        r = RF(0)
+        for tet in self.mcomplex.Tetrahedra:
+            inradius, incenter = _inradius_and_incenter(tet)
+            r = max(r, inradius + distance_unit_time_r13_points(
+                self._basepoint, incenter))
+        return 2 * r
+
+    def _tile_up_to(self, radius):
+        while not self.covered_radius() > radius:
+            self._add_next_tile()
+
+    def _add_next_tile(self):
+        """
+        Processes the lifted tetrahedron closest to the basepoint
+        not yet visited, records a candidate if it is the first lifted
+        tetrahedron for a loxodromic group element and adds the neighboring
+        lifted tetrahedra to the queue.
+        """
+
+        while True:
+            tile = heapq.heappop(self._pending_tiles)
+            tets = self._visited_tiles.setdefault(
+                tile.o13_matrix * self._basepoint, set())
+            if not tile.tet in tets:
+                break
+
+        is_new_group_element = not tets
+        tets.add(tile.tet)
+        self._num_tiles += 1
+
+        if is_new_group_element and tile.word:
+            self._add_candidate(tile.word)
+
+        # Basepoint in the coordinates of the tetrahedron in the
+        # fundamental domain.
+        point = o13_inverse(tile.o13_matrix) * self._basepoint
+
+        for f, new_tet in tile.tet.Neighbor.items():
+            if f == tile.entry_cell:
+                continue
+            entry_face = tile.tet.Gluing[f].image(f)
+            # new_tet.O13_matrices[entry_face] corresponds to the generator
+            # with the opposite sign of new_tet.GeneratorsInfo[entry_face],
+            # see add_r13_geometry.
+            g = -new_tet.GeneratorsInfo[entry_face]
+            heapq.heappush(
+                self._pending_tiles,
+                _PendingTile(
+                    new_tet,
+                    tile.o13_matrix * new_tet.O13_matrices[entry_face],
+                    tile.word + (g,) if g != 0 else tile.word,
+                    lower_bound_for_distance_point_to_tet_face(
+                        point, tile.tet, f, self._epsilon),
+                    entry_cell = entry_face))
+
+    def _add_candidate(self, word):
+        m = self.mcomplex.word_evaluator.evaluate(word)
+        tr = m.trace()
+        # Skip parabolic elements (elliptic elements do not occur).
+        if not (abs(tr - 2) > self._epsilon and abs(tr + 2) > self._epsilon):
+            return
+        heapq.heappush(
+            self._candidates,
+            _Candidate(word, m, _complex_length_from_trace(tr)))
+
+    def _classify_candidates_up_to(self, length) -> List[_GeodesicClass]:
+        """
+        Classifies the candidates with real length less than the given
+        length. Returns the new primitive closed geodesics.
+
+        Since the candidates are processed in order of increasing length,
+        a primitive element is always classified before its powers.
+        """
+
+        result = []
+        while self._candidates and self._candidates[0]._key < length:
+            candidate = heapq.heappop(self._candidates)
+            c = self._classify_candidate(candidate)
+            if c:
+                result.append(c)
+        return result
+
+    def _classify_candidate(self, candidate : _Candidate
+                            ) -> Optional[_GeodesicClass]:
+        line = R13LineWithMatrix.from_psl2c_matrix(candidate.psl2c_matrix)
+        g = _geodesic_info_for_line(self.mcomplex, line)
+
+        if g.core_curve_cusp:
+            # Candidate is the core curve or a power of it.
+            if g.core_curve_cusp.Index in self._core_curve_cusps:
+                return None
+            self._core_curve_cusps.add(g.core_curve_cusp.Index)
+        else:
+            # Candidate is conjugate to an element (or its inverse)
+            # found earlier or a power thereof if its axis is a lift
+            # of one of the closed geodesics found earlier.
+            tet = g.lifted_tetrahedra[0].tet
+            for other_line in self._tet_to_lines[tet.Index]:
+                if _are_same_lines(g.line.r13_line, other_line,
+                                   self._epsilon):
+                    return None
+            tube = get_geodesic_tube(self.mcomplex, g)
+            tube.add_pieces_for_radius(0)
+            for piece in tube.pieces:
+                self._tet_to_lines[piece.tet.Index].append(
+                    piece.lifted_geodesic)
+
+        c = _GeodesicClass(candidate.word, candidate.complex_length, g)
+        self._classes.append(c)
+        return c
+
+    def _group_by_complex_length(self, classes : Sequence[_GeodesicClass]
+                                 ) -> List[List[_GeodesicClass]]:
+        RF = self.mcomplex.RF
+        two_pi = 2 * RF.pi()
+        groups : List[List[_GeodesicClass]] = []
+        for c in classes:
+            if groups:
+                d = c.complex_length - groups[-1][0].complex_length
+                d_imag = d.imag()
+                d_imag = d_imag - two_pi * (d_imag / two_pi).round()
+                if abs(d.real()) < self._epsilon and abs(d_imag) < self._epsilon:
+                    groups[-1].append(c)
+                    continue
+            groups.append([c])
+        return groups
+
+    def _record_statistics(self, lower, upper, num_geodesics, elapsed):
+        stats = { 'band' : (lower, upper),
+                  'num_geodesics' : num_geodesics,
+                  'time' : elapsed,
+                  'num_tiles' : self._num_tiles,
+                  'num_pending_tiles' : len(self._pending_tiles),
+                  'num_candidates' : len(self._candidates) }
+        if tracemalloc.is_tracing():
+            stats['memory'], stats['peak_memory'] = (
+                tracemalloc.get_traced_memory())
+        self.band_statistics.append(stats)
+
+        if self.verbose:
+            print("Length band [%s, %s): %d geodesics, %.3fs, "
+                  "%d lifted tetrahedra visited, %d pending, "
+                  "%d candidates." % (
+                      lower, upper, num_geodesics, elapsed,
+                      stats['num_tiles'], stats['num_pending_tiles'],
+                      stats['num_candidates']))
+
+    def _word_as_string(self, word):
+        if self.mcomplex.num_generators > 26:
+            return ''.join(('x%d' % g) if g > 0 else ('X%d' % -g)
+                           for g in word)
+        return ''.join(chr(ord('a') + g - 1) if g > 0 else
+                       chr(ord('A') - g - 1)
+                       for g in word)
+
+class _TranslatedBasepointDict(SpatialDict):
+    """
+    A SpatialDict for images of the basepoint under group elements.
+    """
+
+    def __init__(self, mcomplex : Mcomplex):
+        super().__init__(mcomplex.baseTetInRadius, mcomplex.verified)
+
+    def distance(self, point_0, point_1):
+        return distance_unit_time_r13_points(point_0, point_1)
+
+def lower_bound_for_distance_point_to_tet_face(point, tet, face, epsilon):
+    """
+    Computes (a lower bound for) the distance between a point (given as
+    unit time vector) and a face of the tetrahedron.
+
+    Needs add_structures_necessary_for_tube to have been called.
+    """
+
+    # If the point is beyond the bounding plane for one of the edges
+    # of the face, the point of the face closest to the given point is
+    # on the boundary of the face. The edges of the face are complete
+    # lines.
+    for e in _face_to_edges[face]:
+        if r13_dot(point, tet.triangle_bounding_planes[face][e]) > epsilon:
+            return min(distance_r13_point_line(point, tet.R13_edges[e])
+                       for e in _face_to_edges[face])
+
+    # Otherwise, it is the distance to the plane supporting the face.
+    return abs(r13_dot(point, tet.R13_planes[face])).arcsinh()
+
+def distance_r13_point_line(point, line : R13Line):
+    """
+    Computes the distance between a point (given as unit time vector)
+    and a line.
+    """
+
+    p = (-2 * r13_dot(point, line.points[0]) * r13_dot(point, line.points[1])
+         / line.inner_product)
+
+    if p < 1:
+        RF = p.parent()
+        p = RF(1)
+    return p.sqrt().arccosh()
+
+def _complex_length_from_trace(tr):
+    """
+    Complex length (with positive real part and imaginary part in (-pi, pi])
+    of a loxodromic PSL(2,C)-matrix given its trace.
+    """
+
+    l = 2 * (tr / 2).arccosh()
+    if l.real() < 0:
+        l = -l
+    RF = l.real().parent()
+    two_pi = 2 * RF.pi()
+    imag = l.imag()
+    k = (imag / two_pi).round()
+    if imag - k * two_pi <= -RF.pi():
+        k -= 1
+    return l - k * two_pi * l.parent()(1j)
+
+def _are_same_lines(line0 : R13Line, line1 : R13Line, epsilon) -> bool:
+    """
+    Checks whether the two lines have the same endpoints (ignoring
+    orientation).
+    """
+
+    p = [[ r13_dot(pt0, pt1) / (pt0[0] * pt1[0])
+           for pt1 in line1.points ]
+         for pt0 in line0.points ]
+
+    return ((abs(p[0][0]) < epsilon and abs(p[1][1]) < epsilon) or
+            (abs(p[0][1]) < epsilon and abs(p[1][0]) < epsilon))
+
+def _geodesic_info_for_line(mcomplex : Mcomplex,
+                            line : R13LineWithMatrix) -> GeodesicInfo:
+    """
+    Constructs GeodesicInfo for the given line and calls
+    find_tet_or_core_curve. Tries different start points on the line
+    in case the start point is too close to the 1-skeleton.
+    """
+
+    RF = mcomplex.RF
+    error = None
+    for bias in [ constants.start_point_bias,
+                  constants.piece_midpoint_bias,
+                  constants.enumeration_start_point_bias ]:
+        start_point = (line.r13_line.points[0] +
+                       RF(bias) * line.r13_line.points[1])
+        g = GeodesicInfo(
+            mcomplex = mcomplex,
+            unnormalised_start_point = start_point,
+            unnormalised_end_point = line.o13_matrix * start_point,
+            line = line)
+        try:
+            g.find_tet_or_core_curve()
+            return g
+        except InsufficientPrecisionError as e:
+            error = e
+    raise error
+
+def _inradius_and_incenter(tet : Tetrahedron):
+    return _compute_inradius_and_incenter_from_planes(
+        [ tet.R13_planes[f] for f in simplex.TwoSubsimplices ])
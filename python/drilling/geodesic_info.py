@@ -138,7 +138,12 @@ class GeodesicInfo:
 
                  # Field filled by client to indicate which index the cusp resulting
                  # from drilling this geodesic is supposed to have.
-                 index : Optional[int] = None):
+                 index : Optional[int] = None,
+
+                 # GeodesicTube about the line. Created on demand by
+                 # get_geodesic_tube so that it can be grown incrementally and
+                 # shared between queries. Dropped by perturb_geodesic.
+                 tube : Optional[Any] = None):
 
         self.mcomplex = mcomplex
         self.unnormalised_start_point = unnormalised_start_point
@@ -149,6 +154,7 @@ class GeodesicInfo:
         self.core_curve_cusp = core_curve_cusp
         self.core_curve_direction = core_curve_direction
         self.index = index
+        self.tube = tube
 
     def find_tet_or_core_curve(self) -> None:
         """
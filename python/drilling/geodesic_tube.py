@@ -12,7 +12,7 @@ from ..hyperboloid import ( # type: ignore
     space_r13_normalise,
     distance_unit_time_r13_points)
 from ..snap.t3mlite import simplex, Tetrahedron, Mcomplex # type: ignore
-from ..matrix import matrix # type: ignore
+from ..matrix import matrix, vector # type: ignore
 from ..math_basics import is_RealIntervalFieldElement # type: ignore
 from ..exceptions import InsufficientPrecisionError # type: ignore
 
@@ -41,6 +41,12 @@ def add_structures_necessary_for_tube(mcomplex : Mcomplex) -> None:
     closest to the line is on edge corresponding to the bounding plane.
     """
 
+    # Nothing to do if this was already called for the triangulation
+    # (e.g., when tubes are shared between perturb_geodesics and later
+    # queries).
+    if getattr(mcomplex, 'has_structures_necessary_for_tube', False):
+        return
+
     for tet in mcomplex.Tetrahedra:
         tet.R13_edges = {
             e: R13Line([tet.R13_vertices[simplex.Head[e]],
@@ -51,6 +57,8 @@ def add_structures_necessary_for_tube(mcomplex : Mcomplex) -> None:
                   for e in _face_to_edges[f] }
             for f in simplex.TwoSubsimplices }
 
+    mcomplex.has_structures_necessary_for_tube = True
+
 class _PendingPiece:
     """
     A lifted tetrahedron that still needs to be processed by GeodesicTube
@@ -136,6 +144,10 @@ class GeodesicTubePiece:
     When using verified computation, lower_bound is an interval for
     convenience, even though only the left value of the interval is
     relevant.
+
+    The piece also stores the O(1,3)-matrix of the lifted tetrahedron (in
+    the quotient space) it was produced from, so that the state of
+    a GeodesicTube can be saved and restored.
     """
 
     def __init__(self,
@@ -144,10 +156,12 @@ class GeodesicTubePiece:
                  # A number or interval (even though only left value is relevant)
                  # bounding the distance between tet and lifted_geodesic from
                  # below
-                 lower_bound):
+                 lower_bound,
+                 o13_matrix = None):
         self.tet = tet
         self.lifted_geodesic = lifted_geodesic
         self.lower_bound = lower_bound
+        self.o13_matrix = o13_matrix
 
 class GeodesicTube:
     """
@@ -167,11 +181,15 @@ class GeodesicTube:
     Calling GeodesicInfo.add_pieces_for_radius will then add the
     necessary pieces to GeodesicInfo.pieces to cover the tube of the
     given radius.
+
+    The tube can be grown incrementally by calling add_pieces_for_radius
+    with increasing radii (or add_next_piece). Use get_geodesic_tube to
+    share a tube between, e.g., compute_lower_bound_injectivity_radius and
+    later queries (until the geodesic is perturbed) and save_state and
+    from_saved_state to serialize it.
     """
 
     def __init__(self, mcomplex : Mcomplex, geodesic : GeodesicInfo):
-        self.mcomplex = mcomplex
-
         if geodesic.line is None:
             raise ValueError(
                 "GeodesicTube expected GeodesicInfo with line set to start "
@@ -182,11 +200,9 @@ class GeodesicTube:
                 "GeodesicTube expected GeodesicInfo with lifted_tetrahedra "
                 "set to start developing a tube about the geodesic.")
 
-        self._line : R13Line = geodesic.line.r13_line
-
-        # The pending pieces as priority queue - that is, a python list
-        # but we use heapq to access it.
-        self._pending_pieces : Sequence[_PendingPiece] = []
+        self._initialize(mcomplex,
+                         geodesic.line,
+                         geodesic.unnormalised_start_point)
 
         # Start tiling the tube about the geodesic with the lifted
         # tetrahedra computed with GeodesicInfo.find_tet_or_core_curve.
@@ -204,14 +220,30 @@ class GeodesicTube:
                 self._pending_pieces,
                 _PendingPiece(lifted_tetrahedron, mcomplex.RF(0)))
 
+    def _initialize(self,
+                    mcomplex : Mcomplex,
+                    line_with_matrix : R13LineWithMatrix,
+                    unnormalised_start_point):
+        self.mcomplex = mcomplex
+
+        # Kept so that we can save the state of the tube.
+        self._line_with_matrix = line_with_matrix
+        self._unnormalised_start_point = unnormalised_start_point
+
+        self._line : R13Line = line_with_matrix.r13_line
+
+        # The pending pieces as priority queue - that is, a python list
+        # but we use heapq to access it.
+        self._pending_pieces : Sequence[_PendingPiece] = []
+
         # Initialize data structure recording which lifted tetrahedra have
         # already been visited and been added to the result while tiling
         # the quotient space.
         self._visited_lifted_tetrahedra = ZQuotientLiftedTetrahedronSet(
             mcomplex,
             balance_end_points_of_line(
-                geodesic.line,
-                geodesic.unnormalised_start_point))
+                line_with_matrix,
+                unnormalised_start_point))
 
         # The resulting pieces needed to cover the tube.
         self.pieces : Sequence[GeodesicTubePiece] = [ ]
@@ -223,7 +255,7 @@ class GeodesicTube:
         """
         
         while not self.covered_radius() > r:
-            self._add_next_piece()
+            self.add_next_piece()
 
     def covered_radius(self):
         """
@@ -235,11 +267,85 @@ class GeodesicTube:
         """
         return self._pending_pieces[0].lower_bound
 
-    def _add_next_piece(self):
+    def covered_radius_key(self):
+        """
+        Like covered_radius but always returns a number (the left value
+        of the interval when using verified computation) that can be used
+        to sort tubes.
+        """
+        return self._pending_pieces[0]._key
+
+    def save_state(self) -> dict:
+        """
+        Returns the state of the tube (that is, the pieces computed so far
+        and the pending pieces) as a dictionary containing only lists,
+        numbers and indices of tetrahedra so that it can be, e.g., pickled.
+
+        Use from_saved_state to restore the tube for the same triangulation
+        (with the same geometric structure).
+        """
+
+        return {
+            'line_points' : [ list(pt) for pt in self._line.points ],
+            'line_inner_product' : self._line.inner_product,
+            'line_o13_matrix' : _matrix_to_rows(
+                self._line_with_matrix.o13_matrix),
+            'unnormalised_start_point' : list(
+                self._unnormalised_start_point),
+            'pieces' : [
+                (piece.tet.Index,
+                 _matrix_to_rows(piece.o13_matrix),
+                 piece.lower_bound)
+                for piece in self.pieces ],
+            'pending_pieces' : [
+                (pending_piece.lifted_tetrahedron.tet.Index,
+                 _matrix_to_rows(pending_piece.lifted_tetrahedron.o13_matrix),
+                 pending_piece.lower_bound,
+                 pending_piece.entry_cell)
+                for pending_piece in self._pending_pieces ] }
+
+    @staticmethod
+    def from_saved_state(mcomplex : Mcomplex, state : dict):
+        """
+        Restores a tube from the result of save_state. The given
+        triangulation needs to have the same geometric structure as the
+        one used when saving the state.
+        """
+
+        add_structures_necessary_for_tube(mcomplex)
+
+        tube = GeodesicTube.__new__(GeodesicTube)
+        tube._initialize(
+            mcomplex,
+            R13LineWithMatrix(
+                R13Line([ vector(pt) for pt in state['line_points'] ],
+                        state['line_inner_product']),
+                matrix(state['line_o13_matrix'])),
+            vector(state['unnormalised_start_point']))
+
+        for tet_index, rows, lower_bound in state['pieces']:
+            lifted_tetrahedron = LiftedTetrahedron(
+                mcomplex.Tetrahedra[tet_index], matrix(rows))
+            tube._visited_lifted_tetrahedra.add(lifted_tetrahedron)
+            tube._append_piece(lifted_tetrahedron, lower_bound)
+
+        # The saved list is a heap already.
+        tube._pending_pieces = [
+            _PendingPiece(
+                LiftedTetrahedron(mcomplex.Tetrahedra[tet_index],
+                                  matrix(rows)),
+                lower_bound,
+                entry_cell = entry_cell)
+            for tet_index, rows, lower_bound, entry_cell
+            in state['pending_pieces'] ]
+
+        return tube
+
+    def add_next_piece(self) -> GeodesicTubePiece:
         """
         Finds the pending piece "closest" to the lifted closed geodesic,
         adds it to the result and marks the neighboring lifted tetrahedra
-        to the pending queue.
+        to the pending queue. Returns the new piece.
 
         Here, "closest" is not quite precise because we pick the piece
         with the lowest lower bound for the distance. Also recall that the
@@ -262,14 +368,53 @@ class GeodesicTube:
                     pending_piece.lifted_tetrahedron):
                 break
 
+        piece = self._append_piece(pending_piece.lifted_tetrahedron,
+                                   pending_piece.lower_bound)
+
+        tet = piece.tet
+        m = piece.o13_matrix
+        lifted_geodesic = piece.lifted_geodesic
+
+        # For all faces ...
+        for f, new_tet in tet.Neighbor.items():
+            # ... except the one that was used to reach this lifted tetrahedron
+            if f == pending_piece.entry_cell:
+                continue
+            entry_face = tet.Gluing[f].image(f)
+            heapq.heappush(
+                self._pending_pieces,
+                _PendingPiece(
+                    LiftedTetrahedron(
+                        new_tet,
+                        # Inverse of tet.O13_matrices[f]
+                        m * new_tet.O13_matrices[entry_face]),
+                    # Distance of this face to lifted geodesic
+                    # (equal to distance of face entry_face of
+                    # new_tet)
+                    lower_bound_for_distance_line_to_tet_face(
+                        lifted_geodesic,
+                        tet,
+                        f,
+                        self.mcomplex.verified),
+                    entry_cell = entry_face))
+
+        return piece
+
+    def _append_piece(self,
+                      lifted_tetrahedron : LiftedTetrahedron,
+                      lower_bound) -> GeodesicTubePiece:
+        """
+        Adds the piece for the given lifted tetrahedron to the result.
+        """
+
         if self.mcomplex.verified:
             epsilon = 0
         else:
             epsilon = epsilons.compute_tube_injectivity_radius_epsilon(
                 self.mcomplex.RF)
 
-        tet = pending_piece.lifted_tetrahedron.tet
-        m = pending_piece.lifted_tetrahedron.o13_matrix
+        tet = lifted_tetrahedron.tet
+        m = lifted_tetrahedron.o13_matrix
 
         # Imagine the fixed lift of the given geodesic and how it
         # relates to the lifted tetrahedron which is the image of
@@ -292,34 +437,36 @@ class GeodesicTube:
                     raise exceptions.GeodesicCloseToCoreCurve()
 
         # Emit GeodesicTubePiece
-        self.pieces.append(
-            GeodesicTubePiece(
-                tet = tet,
-                lifted_geodesic = lifted_geodesic,
-                lower_bound = pending_piece.lower_bound))
+        piece = GeodesicTubePiece(
+            tet = tet,
+            lifted_geodesic = lifted_geodesic,
+            lower_bound = lower_bound,
+            o13_matrix = m)
+        self.pieces.append(piece)
 
-        # For all faces ...
-        for f, new_tet in tet.Neighbor.items():
-            # ... except the one that was used to reach this lifted tetrahedron
-            if f == pending_piece.entry_cell:
-                continue
-            entry_face = tet.Gluing[f].image(f)
-            heapq.heappush(
-                self._pending_pieces,
-                _PendingPiece(
-                    LiftedTetrahedron(
-                        new_tet,
-                        # Inverse of tet.O13_matrices[f]
-                        m * new_tet.O13_matrices[entry_face]),
-                    # Distance of this face to lifted geodesic
-                    # (equal to distance of face entry_face of
-                    # new_tet)
-                    lower_bound_for_distance_line_to_tet_face(
-                        lifted_geodesic,
-                        tet,
-                        f,
-                        self.mcomplex.verified),
-                    entry_cell = entry_face))
+        return piece
+
+def get_geodesic_tube(mcomplex : Mcomplex,
+                      geodesic : GeodesicInfo) -> GeodesicTube:
+    """
+    Returns the GeodesicTube stored with the given GeodesicInfo, creating
+    it if necessary. This way, tubes (and the pieces and pending pieces
+    computed so far) are shared between, e.g., perturb_geodesics and later
+    queries.
+
+    Note that the tube is about the line of the GeodesicInfo. When the
+    GeodesicInfo is perturbed (see perturb_geodesic), it no longer has a
+    line and the tube is dropped.
+    """
+
+    if geodesic.tube is None:
+        add_structures_necessary_for_tube(mcomplex)
+        geodesic.tube = GeodesicTube(mcomplex, geodesic)
+    return geodesic.tube
+
+def _matrix_to_rows(m):
+    n, k = m.dimensions()
+    return [ [ m[i, j] for j in range(k) ] for i in range(n) ]
 
 def make_r13_unit_tangent_vector(direction, point):
     s = r13_dot(direction, point)
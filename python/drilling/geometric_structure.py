@@ -13,7 +13,8 @@ from ..hyperboloid import (o13_inverse,  # type: ignore
 from ..upper_halfspace import sl2c_inverse, psl2c_to_o13 # type: ignore
 from ..upper_halfspace.ideal_point import ideal_point_to_r13 # type: ignore
 from ..matrix import vector, matrix, mat_solve # type: ignore
-from ..math_basics import prod, xgcd # type: ignore
+from ..math_basics import xgcd # type: ignore
+from ..word_evaluator import WordEvaluator # type: ignore
 
 from collections import deque
 
@@ -44,8 +45,7 @@ def word_to_psl2c_matrix(mcomplex : Mcomplex, word : str):
     the corresponding PSL(2,C)-matrix.
     """
 
-    return word_list_to_psl2c_matrix(
-        mcomplex, word_as_list(word, mcomplex.num_generators))
+    return mcomplex.word_evaluator.evaluate(word)
 
 def word_list_to_psl2c_matrix(mcomplex : Mcomplex, word_list : Sequence[int]):
     """
@@ -54,8 +54,19 @@ def word_list_to_psl2c_matrix(mcomplex : Mcomplex, word_list : Sequence[int]):
     negative integers corresponding to their inverses.
     """
     
-    return prod([mcomplex.GeneratorMatrices[g]
-                 for g in word_list])
+    return mcomplex.word_evaluator.evaluate(word_list)
+
+def words_to_psl2c_matrices(mcomplex : Mcomplex, words : Sequence[str]):
+    """
+    Like word_to_psl2c_matrix, but taking a list of words (each given
+    as string or sequence of non-zero integers) and returning the list of
+    corresponding PSL(2,C)-matrices.
+
+    The products of common subwords are only computed once and are
+    memoized (with bounded memory) for later calls with the same Mcomplex.
+    """
+
+    return mcomplex.word_evaluator.evaluate_words(words)
 
 
 def add_r13_geometry(
@@ -103,6 +114,13 @@ def add_r13_geometry(
         for g, m in poly.mcomplex.GeneratorMatrices.items() }
     # Number of generators of the fundamental group.
     mcomplex.num_generators = len(mcomplex.GeneratorMatrices) // 2
+    # Evaluates words in the generators memoizing products of subwords.
+    # Note that mcomplex (and thus the cache) is specific to the precision.
+    mcomplex.word_evaluator = WordEvaluator(
+        mcomplex.GeneratorMatrices,
+        identity = mcomplex.GeneratorMatrices[0],
+        word_to_list = lambda word: word_as_list(
+            word, mcomplex.num_generators))
 
     for tet, developed_tet in zip(mcomplex.Tetrahedra, poly.mcomplex):
         # Shape for each edge, keys are simplex.OneSubsimplices
@@ -118,6 +136,10 @@ def add_r13_geometry(
             for V, z in tet.ideal_vertices.items() }
         # Add plane equations for faces
         compute_r13_planes_for_tet(tet)
+        # For each face, the generator (as non-zero integer) corresponding
+        # to the face-pairing or 0 if the face is in the interior of the
+        # fundamental domain.
+        tet.GeneratorsInfo = developed_tet.GeneratorsInfo
         # Compute face-pairing matrices for hyperboloid model
         tet.O13_matrices = {
             F : psl2c_to_o13(mcomplex.GeneratorMatrices.get(-g))
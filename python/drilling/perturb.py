@@ -1,7 +1,7 @@
 from . import constants
 from . import epsilons
 from . import exceptions
-from .geodesic_tube import add_structures_necessary_for_tube, GeodesicTube
+from .geodesic_tube import get_geodesic_tube, GeodesicTube
 from .geodesic_info import GeodesicInfo
 from .line import R13Line, distance_r13_lines
 
@@ -73,41 +73,94 @@ def perturb_geodesics(
 
 def compute_lower_bound_injectivity_radius(
         mcomplex : Mcomplex,
-        geodesics : Sequence[GeodesicInfo]):
+        geodesics : Sequence[GeodesicInfo],
+        max_radius = 0):
+    """
+    Computes a lower bound r such that the tubes of radius r about the
+    given closed geodesics and the core curves of the filled cusps are
+    embedded and pairwise disjoint.
 
-    add_structures_necessary_for_tube(mcomplex)
+    The tubes are stored with the GeodesicInfo's (see get_geodesic_tube)
+    so that they can be reused and grown further by later queries.
 
-    tubes = [ GeodesicTube(mcomplex, g) for g in geodesics ]
-    for tube in tubes:
-        tube.add_pieces_for_radius(r = 0)
+    See grow_tubes_until_disjoint for max_radius.
+    """
 
-    return compute_lower_bound_injectivity_radius_from_tubes(
-        mcomplex, tubes)
+    tubes = [ get_geodesic_tube(mcomplex, g) for g in geodesics ]
 
-def compute_lower_bound_injectivity_radius_from_tubes(
+    return grow_tubes_until_disjoint(mcomplex, tubes, max_radius)
+
+def grow_tubes_until_disjoint(
         mcomplex : Mcomplex,
-        tubes : Sequence[GeodesicTube]):
+        tubes : Sequence[GeodesicTube],
+        max_radius = 0):
+    """
+    Grows the given tubes simultaneously (always growing the tube
+    covering the smallest radius next) and returns a lower bound r such
+    that the tubes of radius r about the closed geodesics and the core
+    curves of the filled cusps are embedded and pairwise disjoint.
+
+    Let d be the smallest distance between two lifts (of a closed geodesic
+    or core curve) found so far. Each tube is only grown until it covers
+    min(d, max_radius). At that point, growing it further would not
+    improve the bound. In particular, for max_radius = 0, the tubes are
+    only grown to cover radius 0.
+
+    Growing the tubes further (with larger max_radius) can only
+    increase the resulting bound.
+    """
+
     if len(tubes) == 0:
         raise Exception("No geodesic tubes given")
 
-    distances = []
+    # Convert to interval if verified
+    max_radius = mcomplex.RF(max_radius)
 
-    tet_to_lines : List[List[R13Line]] = [[] for tet in mcomplex.Tetrahedra]
     for tube in tubes:
-        distances.append(tube.covered_radius())
-        for p in tube.pieces:
-            tet_to_lines[p.tet.Index].append(p.lifted_geodesic)
+        tube.add_pieces_for_radius(r = 0)
 
-    for tet in mcomplex.Tetrahedra:
-        for curve in tet.core_curves.values():
-            tet_to_lines[tet.Index].append(curve.r13_line)
+    # Smallest distance between lifts found so far
+    min_distances = []
 
-    for r13_lines in tet_to_lines:
-        for i, r13_line0 in enumerate(r13_lines):
-            for r13_line1 in r13_lines[:i]:
-                distances.append(distance_r13_lines(r13_line0, r13_line1))
+    tet_to_lines : List[List[R13Line]] = [[] for tet in mcomplex.Tetrahedra]
+
+    def add_line(tet_index, r13_line):
+        r13_lines = tet_to_lines[tet_index]
+        distances = [ distance_r13_lines(r13_line, other_r13_line)
+                      for other_r13_line in r13_lines ]
+        if distances:
+            min_distances[:] = [ correct_min(min_distances + distances) ]
+        r13_lines.append(r13_line)
 
-    return correct_min(distances) / 2
+    for tet in mcomplex.Tetrahedra:
+        for curve in tet.core_curves.values():
+            add_line(tet.Index, curve.r13_line)
+
+    # For each tube, the number of pieces already added to tet_to_lines
+    num_pieces = [ 0 for tube in tubes ]
+
+    def add_new_pieces(i):
+        tube = tubes[i]
+        for p in tube.pieces[num_pieces[i]:]:
+            add_line(p.tet.Index, p.lifted_geodesic)
+        num_pieces[i] = len(tube.pieces)
+
+    for i in range(len(tubes)):
+        add_new_pieces(i)
+
+    while True:
+        target = correct_min(min_distances + [ max_radius ])
+        unfinished = [ i for i, tube in enumerate(tubes)
+                       if not tube.covered_radius() > target ]
+        if not unfinished:
+            break
+        # Grow the tube covering the smallest radius.
+        i = min(unfinished, key = lambda i: tubes[i].covered_radius_key())
+        tubes[i].add_next_piece()
+        add_new_pieces(i)
+
+    return correct_min(
+        min_distances + [ tube.covered_radius() for tube in tubes ]) / 2
 
 def perturb_geodesic(geodesic : GeodesicInfo,
                      injectivity_radius,
@@ -125,6 +178,8 @@ def perturb_geodesic(geodesic : GeodesicInfo,
     geodesic.unnormalised_start_point = perturbed_point
     geodesic.unnormalised_end_point = m * perturbed_point
     geodesic.line = None
+    # The tube was about the line.
+    geodesic.tube = None
 
     geodesic.find_tet_or_core_curve()
 
@@ -45,9 +45,6 @@ class _ZQuotientDict(SpatialDict):
 
         self._log_scale_factor = 2 * (b / a).log()
 
-        RF = a.parent()
-        self._weights = [ RF(1.2003), RF(0.94553), RF(1.431112)]
-
     def distance(self, point_0, point_1):
         return distance_unit_time_r13_points(point_0, point_1)
 
@@ -61,11 +58,6 @@ class _ZQuotientDict(SpatialDict):
         return [ self._power_cache.power(i) * point
                  for i in floor_as_integers(r) ]
 
-    def float_hash(self, pt):
-        return (pt[0] * self._weights[0] +
-                pt[1] * self._weights[1] +
-                pt[2] * self._weights[2])
-
 class _O13MatrixPowerCache:
     def __init__(self, m):
         self._positive_cache = _MatrixNonNegativePowerCache(m)
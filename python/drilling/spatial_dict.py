@@ -2,8 +2,9 @@ from ..math_basics import is_RealIntervalFieldElement # type: ignore
 from ..exceptions import InsufficientPrecisionError # type: ignore
 
 from typing import Sequence
+import itertools
 
-__all__ = ['floor_as_intergers', 'SpatialDict']
+__all__ = ['floor_as_intergers', 'SpatialDict', 'bucket_statistics']
 
 def floor_as_integers(x) -> Sequence[int]:
     """
@@ -46,6 +47,37 @@ def floor_as_integers(x) -> Sequence[int]:
             return [ int_f, int_f + 1 ]
         return [ int_f ]
 
+def bucket_statistics(buckets) -> dict:
+    """
+    Statistics about the load of the buckets of a hash table given as
+    dictionary mapping a key to a list of items.
+
+    Useful to tune the scale used to compute integral keys: a scale
+    that is too small results in buckets with many items (and thus many
+    comparisons for each look-up), a scale that is too large results
+    in many keys for each item.
+
+        >>> s = bucket_statistics({ 0 : ['a', 'b'], 1 : ['c'], 5 : ['d'] })
+        >>> s['num_buckets'], s['num_items'], s['max_load'], s['mean_load']
+        (3, 4, 2, 1.3333333333333333)
+        >>> s['histogram']
+        {1: 2, 2: 1}
+
+    """
+
+    loads = [ len(items) for items in buckets.values() ]
+    histogram = {}
+    for load in loads:
+        histogram[load] = histogram.get(load, 0) + 1
+
+    num_items = sum(loads)
+
+    return { 'num_buckets' : len(loads),
+             'num_items' : num_items,
+             'max_load' : max(loads, default = 0),
+             'mean_load' : num_items / len(loads) if loads else 0.0,
+             'histogram' : dict(sorted(histogram.items())) }
+
 class _Entry:
     """
     A helper for SpatialDict.
@@ -67,15 +99,28 @@ class SpatialDict:
     To achieve this, the points are asumed to be in some lattice
     and the minimal distance between any two points in the lattice
     must be given.
+
+    A subclass needs to implement distance. The entries are stored in a
+    grid: the key of a point is a tuple of integers obtained by rounding
+    each of the numbers returned by float_hashes (multiplied by the
+    scale). Since rounding is ambiguous near integers, a point can have
+    several keys. By default, float_hashes returns two numbers computed
+    from the coordinates of a point in the hyperboloid model.
+
+    bucket_statistics can be used to tune the scale.
     """
 
     _scale = 1024
 
-    def __init__(self, min_distance, verified):
+    def __init__(self, min_distance, verified, scale = None):
         RF = min_distance.parent()
 
+        if scale is not None:
+            self._scale = scale
+
         self._min_distance = min_distance
         self._RF_scale = RF(self._scale)
+        self._weights = [ RF(1.2003), RF(0.94553), RF(1.431112) ]
 
         if verified:
             self._right_distance_value = min_distance
@@ -86,14 +131,61 @@ class SpatialDict:
 
         self._data = { }
 
+        self._num_entries = 0
+        self._num_lookups = 0
+        self._num_comparisons = 0
+
     def setdefault(self, point, default):
         reps_and_ikeys = self._representatives_and_ikeys(point)
 
+        entry = self._find_entry(reps_and_ikeys)
+        if entry is not None:
+            return entry.value
+
+        entry = _Entry(default)
+        for rep, ikey in reps_and_ikeys:
+            self._data.setdefault(ikey, []).append((rep, entry))
+        self._num_entries += 1
+
+        return default
+
+    def get(self, point, default = None):
+        """
+        Returns the value for the given point if the point (or a point
+        close to it) was added before. Otherwise, returns default.
+        """
+
+        entry = self._find_entry(self._representatives_and_ikeys(point))
+        if entry is None:
+            return default
+        return entry.value
+
+    def __len__(self):
+        return self._num_entries
+
+    def bucket_statistics(self) -> dict:
+        """
+        Reports the load of the buckets (see bucket_statistics) as well
+        as the number of entries (i.e., distinct points), look-ups and
+        distance computations performed so far.
+        """
+
+        result = bucket_statistics(self._data)
+        result['scale'] = self._scale
+        result['num_entries'] = self._num_entries
+        result['num_lookups'] = self._num_lookups
+        result['num_comparisons'] = self._num_comparisons
+        return result
+
+    def _find_entry(self, reps_and_ikeys):
+        self._num_lookups += 1
+
         for rep, ikey in reps_and_ikeys:
             for other_rep, entry in self._data.get(ikey, []):
+                self._num_comparisons += 1
                 d = self.distance(rep, other_rep)
                 if d < self._right_distance_value:
-                    return entry.value
+                    return entry
                 if not (self._left_distance_value < d):
                     raise InsufficientPrecisionError(
                         "Could neither verify that the two given tiles are "
@@ -102,11 +194,7 @@ class SpatialDict:
                         "Injectivty diameter about basepoint is: %r." % (
                             d, self._min_distance))
 
-        entry = _Entry(default)
-        for rep, ikey in reps_and_ikeys:
-            self._data.setdefault(ikey, []).append((rep, entry))
-
-        return default
+        return None
 
     def distance(self, point_0, point_1):
         raise NotImplementedError()
@@ -115,11 +203,20 @@ class SpatialDict:
         # Applies, e.g., translation by geodesic matrix
         return [ point ]
     
-    def float_hash(self, point):
-        raise NotImplementedError()
+    def float_hash(self, pt):
+        return (pt[0] * self._weights[0] +
+                pt[1] * self._weights[1] +
+                pt[2] * self._weights[2])
+
+    def float_hashes(self, pt):
+        # The coordinates of a point in the grid. Using a two-dimensional
+        # grid keeps the buckets small.
+        return [ self.float_hash(pt), pt[3] ]
 
     def _representatives_and_ikeys(self, point):
         return [
             (rep, ikey)
             for rep in self.representatives(point)
-            for ikey in floor_as_integers(self._RF_scale * self.float_hash(rep)) ]
+            for ikey in itertools.product(
+                    *[ floor_as_integers(self._RF_scale * h)
+                       for h in self.float_hashes(rep) ]) ]
@@ -2,10 +2,13 @@
 ###
 ### 2012 - "Matthias Goerner" <enischte@gmail.com>
 
-from .coordinates import PtolemyCoordinates, Flattenings, CrossRatios
+from .coordinates import (PtolemyCoordinates, Flattenings, CrossRatios,
+                          NumericalSolutionSet)
 from .processMagmaFile import solutions_from_magma, solutions_from_magma_file
 from .processFileDispatch import parse_solutions, parse_solutions_from_file
 from .ptolemyGeneralizedObstructionClass import PtolemyGeneralizedObstructionClass
+from .solutionRepository import (DirectorySolutionRepository,
+                                 SqliteSolutionRepository)
 
 import os as _os
 
@@ -1,13 +1,14 @@
 from __future__ import print_function
 
 from .component import ZeroDimensionalComponent
-from .rur import RUR
+from .rur import RUR, RURBatchEvaluator
 from . import matrix
 from . import findLoops
 from . import utilities
 from ..sage_helper import _within_sage
 from ..pari import Gen, pari
 import re
+import functools
 
 class PtolemyCannotBeCheckedError(Exception):
     def __init__(self):
@@ -203,6 +204,9 @@ class PtolemyCoordinates(dict):
         self._matrix_cache = []
         self._inverse_matrix_cache = []
 
+        # Memoizes the images of words, see evaluate_words
+        self._word_evaluator = None
+
         super(PtolemyCoordinates, self).__init__(processed_dict)
 
     def __repr__(self):
@@ -308,7 +312,7 @@ class PtolemyCoordinates(dict):
         """
 
         return PtolemyCoordinates(
-            _apply_to_RURs(self, RUR.to_PUR),
+            RURBatchEvaluator().to_PUR_dict(self),
             is_numerical = self._is_numerical,
             manifold_thunk = self._manifold_thunk,
             non_trivial_generalized_obstruction_class = (
@@ -349,7 +353,7 @@ class PtolemyCoordinates(dict):
         """
 
         return PtolemyCoordinates(
-            _apply_to_RURs(self, RUR.multiply_and_simplify_terms),
+            RURBatchEvaluator().multiply_and_simplify_terms_dict(self),
             is_numerical = self._is_numerical,
             manifold_thunk = self._manifold_thunk,
             non_trivial_generalized_obstruction_class = (
@@ -509,6 +513,32 @@ class PtolemyCoordinates(dict):
                 return [cvol for cvol in cvols if cvol.real() > -1e-12]
             return cvols
 
+    def numerical_solution_set(self):
+        """
+        Turn into (Galois conjugate) numerical solutions and return them
+        as NumericalSolutionSet which computes cross ratios, volumes, ...
+        for all solutions sharing the look-up of the Ptolemy coordinates.
+
+        >>> from snappy.ptolemy.processMagmaFile import _magma_output_for_4_1__sl3, solutions_from_magma
+        >>> solutions = solutions_from_magma(_magma_output_for_4_1__sl3)
+        >>> solution_set = solutions[2].numerical_solution_set()
+        >>> len(solution_set)
+        2
+        >>> vols = solution_set.volumes()
+        >>> all(float((vol - other_vol).abs()) < 1e-20
+        ...     for vol, other_vol in zip(vols, solutions[2].volume_numerical()))
+        True
+        >>> cvols = solution_set.complex_volumes()
+        >>> all(float((cvol - other_cvol).abs()) < 1e-20
+        ...     for cvol, other_cvol in zip(
+        ...         cvols, solutions[2].complex_volume_numerical()))
+        True
+        """
+
+        if self._is_numerical:
+            return NumericalSolutionSet([ self ])
+        return NumericalSolutionSet(self.numerical())
+
     def _coordinate_at_tet_and_point(self, tet, pt):
         """
         Given the index of a tetrahedron and a quadruple (any iterable) of
@@ -796,6 +826,22 @@ class PtolemyCoordinates(dict):
             word,
             G)
 
+    def evaluate_words(self, words, G = None):
+        """
+        Like evaluate_word but for a list of words. The products of
+        common subwords are only computed once and are memoized for later
+        calls.
+        """
+
+        if self._word_evaluator is None:
+            self._init_matrix_and_inverse_cache()
+            self._word_evaluator = findLoops.word_evaluator(
+                self._get_identity_matrix(),
+                self._matrix_cache,
+                self._inverse_matrix_cache)
+
+        return findLoops.evaluate_words(self._word_evaluator, words, G)
+
     def _testing_assert_identity(self, m,
                                  allow_sign_if_obstruction_class = False):
 
@@ -1308,6 +1354,9 @@ class CrossRatios(dict):
         self._matrix_cache = []
         self._inverse_matrix_cache = []
 
+        # Memoizes the images of words, see evaluate_words
+        self._word_evaluator = None
+
         self.dimension = 0
 
     @staticmethod
@@ -1395,7 +1444,7 @@ class CrossRatios(dict):
         """
 
         return CrossRatios(
-            _apply_to_RURs(self, RUR.to_PUR),
+            RURBatchEvaluator().to_PUR_dict(self),
             is_numerical = self._is_numerical,
             manifold_thunk = self._manifold_thunk)
 
@@ -1432,7 +1481,7 @@ class CrossRatios(dict):
         """
 
         return CrossRatios(
-            _apply_to_RURs(self, RUR.multiply_and_simplify_terms),
+            RURBatchEvaluator().multiply_and_simplify_terms_dict(self),
             is_numerical = self._is_numerical,
             manifold_thunk = self._manifold_thunk)
 
@@ -1718,6 +1767,22 @@ class CrossRatios(dict):
             word,
             G)
 
+    def evaluate_words(self, words, G = None):
+        """
+        Like evaluate_word but for a list of words. The products of
+        common subwords are only computed once and are memoized for later
+        calls.
+        """
+
+        if self._word_evaluator is None:
+            self._init_matrix_and_inverse_cache()
+            self._word_evaluator = findLoops.word_evaluator(
+                self._get_identity_matrix(),
+                self._matrix_cache,
+                self._inverse_matrix_cache)
+
+        return findLoops.evaluate_words(self._word_evaluator, words, G)
+
     def check_against_manifold(self, M = None, epsilon = None):
         """
         Checks that the given solution really is a solution to the PGL(N,C) gluing
@@ -1988,6 +2053,154 @@ class CrossRatios(dict):
                     return True
             return False
 
+class NumericalSolutionSet():
+    """
+    A set of numerical solutions to the same Ptolemy variety, e.g., the
+    Galois conjugates of an exact solution, see
+    PtolemyCoordinates.numerical_solution_set.
+
+    The values of the Ptolemy coordinates of each solution are stored in a
+    list indexed by the position of the variable in variables. The
+    positions of the Ptolemy coordinates needed to compute the cross ratios
+    are computed only once and shared by all solutions. The cross ratios,
+    flattenings and (complex) volumes themselves are still computed one
+    solution at a time with pari since they need the full precision of
+    the solutions.
+    """
+
+    def __init__(self, solutions):
+        if not solutions:
+            raise ValueError("Need at least one solution")
+
+        first = solutions[0]
+
+        self._manifold_thunk = first._manifold_thunk
+        self._non_trivial_generalized_obstruction_class = (
+            first._non_trivial_generalized_obstruction_class)
+
+        self.variables = sorted(first.keys())
+        positions = { var : i for i, var in enumerate(self.variables) }
+
+        # One row for each solution
+        self._values = [ [ solution[var] for var in self.variables ]
+                         for solution in solutions ]
+
+        self._N, self._has_obstruction = (
+            _N_and_has_obstruction_for_ptolemys(first))
+
+        self._evenN = _evenN(
+            self._N, self._non_trivial_generalized_obstruction_class)
+
+        self._table = [
+            (variable_end,
+             tuple(positions[key] for key in ptolemy_keys),
+             tuple(positions[key] for key in obstruction_keys))
+            for variable_end, ptolemy_keys, obstruction_keys
+            in _cross_ratio_key_table(
+                self._N, _num_tetrahedra(first), self._has_obstruction) ]
+
+    def __len__(self):
+        return len(self._values)
+
+    def values(self, var):
+        """
+        The values of the given variable for all solutions.
+        """
+        i = self.variables.index(var)
+        return [ row[i] for row in self._values ]
+
+    def cross_ratios(self):
+        """
+        The cross ratios (as CrossRatios) for all solutions.
+        """
+        return ZeroDimensionalComponent(
+            [ CrossRatios(
+                    dict(_cross_ratios_from_table(
+                            row.__getitem__, self._table,
+                            self._has_obstruction)),
+                    is_numerical = True,
+                    manifold_thunk = self._manifold_thunk)
+              for row in self._values ])
+
+    def flattenings(self):
+        """
+        The flattenings (as Flattenings) for all solutions.
+        """
+        return ZeroDimensionalComponent(
+            [ self._flattenings_for_row(row) for row in self._values ])
+
+    def volumes(self):
+        """
+        The volumes for all solutions.
+        """
+        return ZeroDimensionalComponent(
+            [ sum(_volume(z)
+                  for key, z in _cross_ratios_from_table(
+                      row.__getitem__, self._table, self._has_obstruction)
+                  if key[:2] == 'z_')
+              for row in self._values ])
+
+    def complex_volumes(self, with_modulo = False):
+        """
+        The complex volumes for all solutions, see
+        Flattenings.complex_volume.
+        """
+        return ZeroDimensionalComponent(
+            [ self._flattenings_for_row(row).complex_volume(
+                    with_modulo = with_modulo)
+              for row in self._values ])
+
+    def _flattenings_for_row(self, row):
+        # See PtolemyCoordinates.flattenings_numerical
+        branch_factor = 1
+        for i in range(1000):
+            try:
+                d = dict(_cross_ratios_from_table(
+                        row.__getitem__, self._table, self._has_obstruction,
+                        branch_factor, self._evenN, as_flattenings = True))
+                return Flattenings(d,
+                                   manifold_thunk = self._manifold_thunk,
+                                   evenN = self._evenN)
+            except LogToCloseToBranchCutError:
+                branch_factor *= pari('exp(0.0001 * I)')
+
+        raise Exception("Could not find non-ambiguous branch cut for log")
+
+def _evenN(N, non_trivial_generalized_obstruction_class):
+    if not non_trivial_generalized_obstruction_class:
+        return 2
+    if N % 2:
+        return 2 * N
+    return N
+
+@functools.lru_cache(maxsize = 64)
+def _cross_ratio_key_table(N, num_tets, has_obstruction):
+    """
+    For each integral point of each tetrahedron, returns a triple
+    of the common end of the names of the cross ratios, the names of
+    the six Ptolemy coordinates needed to compute the cross ratios and
+    the names of the obstruction variables (empty if has_obstruction
+    is False).
+    """
+
+    def ptolemy_key(tet, index, addl_index):
+        total_index = matrix.vector_add(index, addl_index)
+        return "c_%d%d%d%d" % tuple(total_index) + "_%d" % tet
+
+    def obstruction_keys(tet):
+        if has_obstruction:
+            return tuple("s_%d_%d" % (face, tet) for face in range(4))
+        return ()
+
+    return tuple(
+        ('_%d%d%d%d' % tuple(index) + '_%d' % tet,
+         tuple(ptolemy_key(tet, index, addl_index)
+               for addl_index in [ (1,0,1,0), (1,0,0,1), (0,1,1,0),
+                                   (0,1,0,1), (1,1,0,0), (0,0,1,1) ]),
+         obstruction_keys(tet))
+        for tet in range(num_tets)
+        for index in utilities.quadruples_with_fixed_sum_iterator(N - 2))
+
 def _ptolemy_to_cross_ratio(solution_dict,
                             branch_factor = 1,
                             non_trivial_generalized_obstruction_class = False,
@@ -1996,54 +2209,49 @@ def _ptolemy_to_cross_ratio(solution_dict,
     N, has_obstruction = _N_and_has_obstruction_for_ptolemys(solution_dict)
     num_tets = _num_tetrahedra(solution_dict)
 
-    if N % 2:
-        evenN = 2 * N
-    else:
-        evenN = N
+    evenN = _evenN(N, non_trivial_generalized_obstruction_class)
 
-    if not non_trivial_generalized_obstruction_class:
-        evenN = 2
+    table = _cross_ratio_key_table(N, num_tets, has_obstruction)
+
+    return dict(_cross_ratios_from_table(
+            solution_dict.__getitem__, table, has_obstruction,
+            branch_factor, evenN, as_flattenings)), evenN
+
+def _cross_ratios_from_table(get_value, table, has_obstruction,
+                             branch_factor = 1, evenN = 2,
+                             as_flattenings = False):
+    """
+    Computes the cross ratios (or flattenings) as list of pairs
+    (name, value) given a table as returned by _cross_ratio_key_table
+    (or the same table with names replaced by indices) and a function
+    returning the value of a Ptolemy coordinate or obstruction variable
+    for an entry in the table.
+    """
 
     if as_flattenings:
         f = pari('2 * Pi * I') / evenN
 
-    def compute_cross_ratios_and_flattenings(tet, index):
-        def get_ptolemy_coordinate(addl_index):
-            total_index = matrix.vector_add(index, addl_index)
-            key = "c_%d%d%d%d" % tuple(total_index) + "_%d" % tet
-            return solution_dict[key]
+        def make_triple(w, z):
+            z = _convert_to_pari_float(z)
+            return (w, z, ((w - z .log()) / f).round())
 
-        def get_obstruction_variable(face):
-            key = "s_%d_%d" % (face, tet)
-            return solution_dict[key]
+    result = []
 
-        c1010 = get_ptolemy_coordinate((1,0,1,0))
-        c1001 = get_ptolemy_coordinate((1,0,0,1))
-        c0110 = get_ptolemy_coordinate((0,1,1,0))
-        c0101 = get_ptolemy_coordinate((0,1,0,1))
-        c1100 = get_ptolemy_coordinate((1,1,0,0))
-        c0011 = get_ptolemy_coordinate((0,0,1,1))
+    for variable_end, ptolemy_keys, obstruction_keys in table:
+        c1010, c1001, c0110, c0101, c1100, c0011 = [
+            get_value(key) for key in ptolemy_keys ]
 
         z   =   (c1010 * c0101) / (c1001 * c0110)
         zp  = - (c1001 * c0110) / (c1100 * c0011)
         zpp =   (c1100 * c0011) / (c1010 * c0101)
 
         if has_obstruction:
-            s0 = get_obstruction_variable(0)
-            s1 = get_obstruction_variable(1)
-            s2 = get_obstruction_variable(2)
-            s3 = get_obstruction_variable(3)
+            s0, s1, s2, s3 = [ get_value(key) for key in obstruction_keys ]
             z   = s0 * s1 * z
             zp  = s0 * s2 * zp
             zpp = s0 * s3 * zpp
 
-        variable_end = '_%d%d%d%d' % tuple(index) + '_%d' % tet
-
         if as_flattenings:
-            def make_triple(w, z):
-                z = _convert_to_pari_float(z)
-                return (w, z, ((w - z .log()) / f).round())
-
             w = _compute_flattening(c1010, c0101, c1001, c0110,
                                     branch_factor, evenN)
             wp = _compute_flattening(c1001, c0110, c1100, c0011,
@@ -2051,22 +2259,18 @@ def _ptolemy_to_cross_ratio(solution_dict,
             wpp = _compute_flattening(c1100, c0011, c1010, c0101,
                                     branch_factor, evenN)
 
-            return [
+            result += [
                 ('z'   + variable_end, make_triple(w  ,z  )),
                 ('zp'  + variable_end, make_triple(wp ,zp )),
                 ('zpp' + variable_end, make_triple(wpp,zpp)) ]
 
         else:
-            return [
+            result += [
                 ('z'   + variable_end, z),
                 ('zp'  + variable_end, zp),
                 ('zpp' + variable_end, zpp) ]
 
-    return dict(
-        sum([compute_cross_ratios_and_flattenings(tet,index)
-             for tet in range(num_tets)
-             for index in utilities.quadruples_with_fixed_sum_iterator(N - 2)],
-            [])), evenN
+    return result
 
 def _num_tetrahedra(solution_dict):
     return max( [ int(key.split('_')[-1])
@@ -1,4 +1,5 @@
 from . import matrix
+from ..word_evaluator import WordEvaluator
 
 # Given a SnapPy Manifold, find loops of short, middle, and long edges of the
 # doubly truncated simplices that represent the generators of the fundamental
@@ -24,6 +25,10 @@ from . import matrix
 # There are six such choices for each outbound_generator face. Pick the one
 # yielding the shortest loop (in terms of number of short and long edges).
 
+# The loops only depend on the triangulation and the penalties, so they are
+# cached. The matrices for a loop are computed by memoizing the products of
+# common prefixes of the paths using a WordEvaluator.
+
 
 class Vertex(tuple):
     """
@@ -334,6 +339,59 @@ def _compute_loops_for_generators_from_info(choose_generators_info,
     return loops_for_generators
 
 
+class _LoopData(object):
+    """
+    The loops for the generators together with the loops and their inverses
+    encoded as words for a WordEvaluator: the letters are indices into the
+    list of the distinct edges occuring in the loops.
+    """
+
+    def __init__(self, loops):
+        self.loops = loops
+        self.edges = [ ]
+
+        edge_to_index = { }
+
+        def to_word(path):
+            word = [ ]
+            for edge in path:
+                key = (type(edge), edge.start_point())
+                i = edge_to_index.get(key)
+                if i is None:
+                    i = len(self.edges)
+                    edge_to_index[key] = i
+                    self.edges.append(edge)
+                word.append(i)
+            return word
+
+        self.words = (
+            [ to_word(loop) for loop in loops ] +
+            [ to_word(loop ** -1) for loop in loops ])
+
+# Maps (triangulation, penalties) to _LoopData
+_loop_data_cache = { }
+
+# Oldest entries are dropped when there are more
+_max_loop_data_cache_size = 256
+
+def _get_loop_data(M, penalties):
+    # The loops are for the generators chosen this way, so M needs to be in
+    # the same state after a cache hit (choosing the generators only depends
+    # on the triangulation and is cheap compared to computing the loops).
+    M._choose_generators(False, False)
+
+    key = (M._to_string(), tuple(penalties))
+    loop_data = _loop_data_cache.get(key)
+    if loop_data is None:
+        loop_data = _LoopData(_compute_loops_for_generators(M, penalties))
+        _loop_data_cache[key] = loop_data
+        if len(_loop_data_cache) > _max_loop_data_cache_size:
+            del _loop_data_cache[next(iter(_loop_data_cache))]
+    return loop_data
+
+def clear_loop_cache():
+    _loop_data_cache.clear()
+
 def compute_loops_for_generators(M, penalties):
     """
     Given a SnapPy Manifold M, return a loop of short, middle, and long edges
@@ -343,10 +401,16 @@ def compute_loops_for_generators(M, penalties):
     Each short, middle, respectively, long edge has an associate penalty
     (encoded the triple penalties). For each generator, the method returns
     a loop with the smallest total penalty.
+
+    The result is cached for the triangulation of M and the penalties.
     """
 
+    return list(_get_loop_data(M, penalties).loops)
+
+def _compute_loops_for_generators(M, penalties):
+
     # Get the necessary information from SnapPea kernel
-    M._choose_generators(False, False)
+    # (the generators were chosen by _get_loop_data)
     choose_generators_info = M._choose_generators_info()
 
     # Compute which vertices of doubly truncated simplices are identified
@@ -407,11 +471,65 @@ def images_of_original_generators(coordinate_object, penalties):
     if M is None:
         raise Exception("Need to have a manifold")
 
-    loops = compute_loops_for_generators(M, penalties = penalties)
+    return _evaluate_loops(coordinate_object, _get_loop_data(M, penalties))
 
-    return (
-        [ _evaluate_path(coordinate_object, loop      ) for loop in loops ],
-        [ _evaluate_path(coordinate_object, loop ** -1) for loop in loops ])
+def images_of_original_generators_for_solutions(coordinate_objects,
+                                                penalties):
+    """
+    Like images_of_original_generators but for a list of Ptolemy coordinates
+    or cross ratios that all belong to the same triangulation, e.g., all
+    solutions of a Ptolemy variety. Returns a list of pairs of lists of
+    matrices.
+
+    The loops are only computed once and the results are stored in the
+    caches used by evaluate_word of the given objects.
+    """
+
+    results = [ ]
+    loop_data = None
+
+    for coordinate_object in coordinate_objects:
+        if loop_data is None:
+            M = coordinate_object.get_manifold()
+            if M is None:
+                raise Exception("Need to have a manifold")
+            loop_data = _get_loop_data(M, penalties)
+
+        images = _evaluate_loops(coordinate_object, loop_data)
+        (coordinate_object._matrix_cache,
+         coordinate_object._inverse_matrix_cache) = images
+        results.append(images)
+
+    return results
+
+def _evaluate_loops(coordinate_object, loop_data):
+    """
+    Evaluates the loops and their inverses, see _evaluate_path, sharing the
+    products of common prefixes.
+    """
+
+    def edge_matrix(edge):
+        if isinstance(edge, ShortEdge):
+            matrix_method = coordinate_object.short_edge
+        elif isinstance(edge, MiddleEdge):
+            matrix_method = coordinate_object.middle_edge
+        elif isinstance(edge, LongEdge):
+            matrix_method = coordinate_object.long_edge
+        else:
+            raise Exception("Edge of unknown type in path")
+
+        return matrix_method(*edge.start_point())
+
+    evaluator = WordEvaluator(
+        dict( (i, edge_matrix(edge))
+              for i, edge in enumerate(loop_data.edges) ),
+        identity = coordinate_object._get_identity_matrix(),
+        multiply = matrix.matrix_mult)
+
+    images = evaluator.evaluate_words(loop_data.words)
+    num_loops = len(loop_data.loops)
+
+    return images[:num_loops], images[num_loops:]
 
 def _apply_hom_to_word(word, G):
     # No G given means nothing is done to the word
@@ -459,3 +577,35 @@ def evaluate_word(identity_matrix, generator_matrices, inverse_matrices,
 
     return m
 
+
+def _letter_to_int(letter):
+    if letter.isupper():
+        return -(ord(letter) - ord('A') + 1)
+    return ord(letter) - ord('a') + 1
+
+def word_evaluator(identity_matrix, generator_matrices, inverse_matrices):
+    """
+    Returns a WordEvaluator for words (in the original generators) that
+    memoizes the products of common subwords.
+    """
+
+    images = { }
+    for i, (m, inv) in enumerate(zip(generator_matrices, inverse_matrices)):
+        images[ i + 1] = m
+        images[-i - 1] = inv
+
+    return WordEvaluator(
+        images,
+        identity = identity_matrix,
+        multiply = matrix.matrix_mult,
+        word_to_list = lambda word: [ _letter_to_int(letter)
+                                      for letter in word ])
+
+def evaluate_words(evaluator, words, G):
+    """
+    Like evaluate_word but for a list of words and using a WordEvaluator
+    as returned by word_evaluator.
+    """
+
+    return evaluator.evaluate_words(
+        [ _apply_hom_to_word(word, G) for word in words ])
@@ -1,4 +1,5 @@
 from . import matrix
+from ..sparse_smith_form import SparseIntegerMatrix
 
 def _gcd(s, t):
     if t == 0:
@@ -16,9 +17,12 @@ def homology_basis_representatives_with_orders(d1, d2, N):
     if it is finite otherwise 0.
     """
 
+    # The boundary maps are sparse, so keep them as SparseIntegerMatrix
+    d1 = SparseIntegerMatrix.from_dense(d1)
+    d2 = SparseIntegerMatrix.from_dense(d2)
+
     # two consecutive maps in a chain complex should give zero
-    assert matrix.is_matrix_zero(
-        matrix.matrix_mult(d1, d2))
+    assert (d1 * d2).is_zero()
 
     # Change the basis of the chain groups C_0, C_1, C_2 by the matrices
     # basechangeN
@@ -36,24 +40,23 @@ def homology_basis_representatives_with_orders(d1, d2, N):
         transformed_d1, transformed_d2)
 
     # Perform consistency check
-    assert matrix.is_matrix_zero(
-        matrix.matrix_mult(transformed_d1, transformed_d2))
+    assert (transformed_d1 * transformed_d2).is_zero()
 
     # Will hold the result
     homology_basis = []
 
     # A list of all the basis vectors
-    basis_vectors = matrix.matrix_transpose(basechange1)
+    basis_vectors = basechange1.transpose().to_dense()
 
     # Iterate through the basis vectors
     for i, basis_vector in enumerate(basis_vectors):
 
         # Get the absolute value of the one non-zero entry in
         # the i-th column of d1 with respect to the new basis
-        d1_entry = matrix.max_abs_of_col(transformed_d1, i)
+        d1_entry = transformed_d1.max_abs_of_col(i)
 
         # i-th row of d2
-        d2_entry = matrix.max_abs_of_row(transformed_d2, i)
+        d2_entry = transformed_d2.max_abs_of_row(i)
 
         # Note that d1 * d2 = 0, so at most one of d1_entry and d2_entry
         # can be non-zero.
@@ -1,6 +1,8 @@
 from __future__ import print_function
 
 from ..pari import pari
+from ..sparse_smith_form import SparseIntegerMatrix
+from .sparseMatrix import EchelonBasis
 import fractions
 
 def num_rows(m):
@@ -88,22 +90,22 @@ def matrix_transpose(m):
             for c in range(len(m[0]))]
 
 
+# The matrices given to and returned by simultaneous_smith_normal_form
+# and test_simultaneous_smith_normal_form are SparseIntegerMatrix's. Only
+# the Smith normal forms and inverses are computed by pari.
+
 def simultaneous_smith_normal_form(in1, in2):
     u1, v1, d1 = _smith_normal_form_with_inverse(in1)
-    u2, v2, d2 = _bottom_row_stable_smith_normal_form(
-        matrix_mult(
-            matrix_inverse(v1),
-            in2))
+    transformed_in2 = _sparse_matrix_inverse(v1) * in2
+    u2, v2, d2 = _bottom_row_stable_smith_normal_form(transformed_in2)
 
-    assert _change_coordinates(u2, v2,
-                                    matrix_mult(
-            matrix_inverse(v1), in2)) == d2
+    assert _change_coordinates(u2, v2, transformed_in2) == d2
 
 
     # d1 d2 are m and n in new system
     # next three are coordinate changes in groups
 
-    return (u1, matrix_mult(v1, u2), v2,
+    return (u1, v1 * u2, v2,
             d1, d2)
 
 def test_simultaneous_smith_normal_form(in1, in2, u0, u1, u2, d1, d2):
@@ -114,11 +116,11 @@ def test_simultaneous_smith_normal_form(in1, in2, u0, u1, u2, d1, d2):
     assert has_full_rank(u2)
     assert _change_coordinates(u0, u1, in1) == d1
     assert _change_coordinates(u1, u2, in2) == d2
-    assert is_matrix_zero(matrix_mult(in1, in2))
-    assert is_matrix_zero(matrix_mult(d1, d2))
+    assert (in1 * in2).is_zero()
+    assert (d1 * d2).is_zero()
 
 def has_full_rank(matrix):
-    return len(_internal_to_pari(matrix).mattranspose().matker(flag = 1)) == 0
+    return len(_sparse_to_pari(matrix).mattranspose().matker(flag = 1)) == 0
 
 def _debug_print_matrix(m):
     for row in m:
@@ -137,16 +139,16 @@ def _pari_to_internal(m):
         return []
     num_rows = len(m[0])
 
-    def convert(p):
-        d = int(p.denominator())
-        n = int(p.numerator())
-        if d == 1:
-            return n
-        return fractions.Fraction(n, d)
-
-    return [[convert(m[(r,c)]) for c in range(num_cols)]
+    return [[_pari_to_rational(m[(r,c)]) for c in range(num_cols)]
             for r in range(num_rows)]
 
+def _pari_to_rational(p):
+    d = int(p.denominator())
+    n = int(p.numerator())
+    if d == 1:
+        return n
+    return fractions.Fraction(n, d)
+
 def _internal_to_pari(m):
     num_rows = len(m)
     if num_rows == 0:
@@ -157,24 +159,37 @@ def _internal_to_pari(m):
         num_rows,num_cols,
         [i for row in m for i in row])
 
-def _expand_square_matrix(m, num_cols_rows):
+def _pari_to_sparse(m):
+    num_rows, num_cols = [ int(x) for x in m.matsize() ]
+    return SparseIntegerMatrix(
+        { (r, c) : _pari_to_rational(m[(r,c)])
+          for r in range(num_rows) for c in range(num_cols) },
+        num_rows, num_cols)
 
-    def upleft(row):
-        return m[row]
-    def upright(row):
-        return [0 for col in range(num_cols_rows)]
-    def downleft(row):
-        return [0 for col in range(len(m))]
-    def downright(row):
-        return [1 if row == col else 0 for col in range(num_cols_rows)]
+def _sparse_to_pari(m):
+    if m.num_rows() == 0:
+        return pari.matrix(0,0)
+
+    return pari.matrix(
+        m.num_rows(), m.num_cols(),
+        [i for row in m.to_dense() for i in row])
+
+def _expand_square_matrix(m, num_cols_rows):
+    """
+    The block matrix with m in the upper left and the identity matrix of
+    the given size in the lower right.
+    """
 
-    up   = [  upleft(row) +   upright(row) for row in range(len(m))]
-    down = [downleft(row) + downright(row) for row in range(num_cols_rows)]
+    entries = m.entries()
+    for i in range(num_cols_rows):
+        entries[(m.num_rows() + i, m.num_cols() + i)] = 1
 
-    return up + down
+    return SparseIntegerMatrix(entries,
+                               m.num_rows() + num_cols_rows,
+                               m.num_cols() + num_cols_rows)
 
 def _identity_matrix(s):
-    return _expand_square_matrix([],s)
+    return SparseIntegerMatrix({ (i, i) : 1 for i in range(s) }, s, s)
 
 def _get_only_non_zero_entry_in_col(m, col):
     entry = None
@@ -199,11 +214,16 @@ def _get_only_non_zero_entry_in_row(m, row):
     return 0
 
 def _split_matrix_bottom_zero_rows(m):
-    for number_top_rows in range(len(m), -1, -1):
-        if not row_is_zero(m, number_top_rows - 1):
-            break
+    """
+    Returns the rows up to the last non-zero row and the number of zero
+    rows after it.
+    """
 
-    return m[:number_top_rows], m[number_top_rows:]
+    number_top_rows = max([ i + 1 for i, row in m.rows.items() if row ] +
+                          [ 0 ])
+
+    return (SparseIntegerMatrix(m.entries(), number_top_rows, m.num_cols()),
+            m.num_rows() - number_top_rows)
 
 def matrix_inverse(m):
     return _pari_to_internal(_internal_to_pari(m)**(-1))
@@ -221,45 +241,40 @@ def smith_normal_form(m):
             _pari_to_internal(v),
             _pari_to_internal(d))
 
+def _sparse_matrix_inverse(m):
+    return _pari_to_sparse(_sparse_to_pari(m)**(-1))
+
 def _smith_normal_form_with_inverse(m):
-    u, v, d = _internal_to_pari(m).matsnf(flag = 1)
-    return (_pari_to_internal(u**(-1)),
-            _pari_to_internal(v),
-            _pari_to_internal(d))
+    u, v, d = _sparse_to_pari(m).matsnf(flag = 1)
+    return (_pari_to_sparse(u**(-1)),
+            _pari_to_sparse(v),
+            _pari_to_sparse(d))
 
 def _bottom_row_stable_smith_normal_form(m):
-    m_up, m_down = _split_matrix_bottom_zero_rows(m)
+    m_up, num_rows_down = _split_matrix_bottom_zero_rows(m)
 
-    if len(m_up) == 0:
-        return (_identity_matrix(len(m)),
-                _identity_matrix(len(m[0])),
+    if m_up.num_rows() == 0:
+        return (_identity_matrix(m.num_rows()),
+                _identity_matrix(m.num_cols()),
                 m)
 
     u_upleft, v, d_up = _smith_normal_form_with_inverse(m_up)
 
-    return (_expand_square_matrix(u_upleft, len(m_down)),
+    return (_expand_square_matrix(u_upleft, num_rows_down),
             v,
-            d_up + m_down)
+            SparseIntegerMatrix(d_up.entries(),
+                                d_up.num_rows() + num_rows_down,
+                                d_up.num_cols()))
 
 def _change_coordinates(u, v, m):
-    return matrix_mult(
-        matrix_mult(
-            matrix_inverse(u), m), v)
+    return _sparse_matrix_inverse(u) * m * v
 
 def _assert_at_most_one_zero_entry_per_row_or_column(m):
-    for i in range(len(m)):
-        num_non_zero_entries = 0
-        for j in range(len(m[0])):
-            if not m[i][j] == 0:
-                num_non_zero_entries += 1
-        assert num_non_zero_entries < 2
-
-    for j in range(len(m[0])):
-        num_non_zero_entries = 0
-        for i in range(len(m)):
-            if not m[i][j] == 0:
-                num_non_zero_entries += 1
-        assert num_non_zero_entries < 2
+    for row in m.rows.values():
+        assert len(row) < 2
+
+    for support in m.col_support.values():
+        assert len(support) < 2
 
 def get_independent_rows(rows, explain_rows,
                          desired_determinant = None,
@@ -272,8 +287,14 @@ def get_independent_rows(rows, explain_rows,
                 lambda row_explain_pair: sort_rows_key(
                     row_explain_pair[1])))
 
+    # Rows as sparse vectors
+    row_explain_pairs = [
+        (dict((j, e) for j, e in enumerate(row) if e != 0), explain)
+        for row, explain in row_explain_pairs ]
+
     result = _get_independent_rows_recursive(
-        row_explain_pairs, len(rows[0]), desired_determinant, [], [])
+        row_explain_pairs, len(rows[0]), desired_determinant,
+        EchelonBasis(), [])
 
     if not result:
         raise Exception("Could not find enough independent rows")
@@ -286,20 +307,25 @@ def _get_independent_rows_recursive(row_explain_pairs,
                                     selected_rows,
                                     selected_explains):
 
+    # selected_rows is an EchelonBasis spanned by the rows selected so far
+    # so that testing whether a row is independent is just reducing it.
+
     if len(selected_rows) == length:
         if desired_determinant is None:
             return selected_explains
-        determinant = _internal_to_pari(selected_rows).matdet().abs()
+        determinant = selected_rows.determinant_abs()
         if determinant == desired_determinant:
             return selected_explains
         else:
             return None
 
     for row, explain in row_explain_pairs:
-        new_selected_rows = selected_rows + [ row ]
-        new_selected_explains = selected_explains + [ explain ]
+        reduced_row = selected_rows.reduce(row)
+
+        if reduced_row:
+            new_selected_rows = selected_rows.with_reduced_row(reduced_row)
+            new_selected_explains = selected_explains + [ explain ]
 
-        if has_full_rank(new_selected_rows):
             result = _get_independent_rows_recursive(row_explain_pairs,
                                                      length,
                                                      desired_determinant,
@@ -3,9 +3,11 @@ from .polynomial import Polynomial
 from .component import NonZeroDimensionalComponent
 from ..pari import pari
 
-def numerical_solutions_with_one(polys):
+import concurrent.futures
 
-    solutions = numerical_solutions(polys)
+def numerical_solutions_with_one(polys, num_processes = 1):
+
+    solutions = numerical_solutions(polys, num_processes)
 
     for solution in solutions:
         if not isinstance(solution, NonZeroDimensionalComponent):
@@ -13,6 +15,17 @@ def numerical_solutions_with_one(polys):
 
     return solutions
 
+def iter_numerical_solutions_with_one(polys, num_processes = 1):
+    """
+    Like numerical_solutions_with_one but returns an iterator yielding
+    the solutions as they are found.
+    """
+
+    for solution in iter_numerical_solutions(polys, num_processes):
+        if not isinstance(solution, NonZeroDimensionalComponent):
+            solution['1'] = pari(1)
+        yield solution
+
 class PariPolynomialAndVariables:
     def __init__(self, polynomial, variables = None):
 
@@ -36,11 +49,51 @@ class PariPolynomialAndVariables:
             variables = [ v for v in self.variables if not v == var ])
 
 
-    def get_roots(self):
-        return self.pari_polynomial.polroots(
-            precision = 3.4 * pari.get_real_precision())
+    def get_roots(self, precision = None):
+        if precision is None:
+            precision = _root_finding_precision()
+        return self.pari_polynomial.polroots(precision = precision)
+
+def _root_finding_precision():
+    return 3.4 * pari.get_real_precision()
+
+def numerical_solutions(polys, num_processes = 1):
+
+    """
+    Numerical solutions of a Groebner basis in lexicographic order of a
+    zero-dimensional ideal.
+
+    The polynomials are solved by recursively finding the roots of a
+    univariate polynomial and substituting them into the other
+    polynomials. If num_processes > 1, the branches for the different
+    roots of the first univariate polynomial are explored in parallel in
+    a pool of processes.
+    """
+
+    polysFiltered = _reduce_and_filter_polys(polys)
+
+    # Check if there is a constant non-zero polynomial left
+    if polysFiltered is None:
+        return NonZeroDimensionalComponent()
+
+    return list(_iter_numerical_solutions(polys, polysFiltered, num_processes))
+
+def iter_numerical_solutions(polys, num_processes = 1):
+    """
+    Like numerical_solutions but returns an iterator yielding the
+    solutions as they are found.
+    """
+
+    polysFiltered = _reduce_and_filter_polys(polys)
+
+    # Like numerical_solutions, report a constant non-zero polynomial
+    # as a positive-dimensional component.
+    if polysFiltered is None:
+        return iter([NonZeroDimensionalComponent()])
+
+    return _iter_numerical_solutions(polys, polysFiltered, num_processes)
 
-def numerical_solutions(polys):
+def _reduce_and_filter_polys(polys):
 
     # Divide out lowest power variables
     polysReduced = [ poly.factor_out_variables() for poly in polys ]
@@ -50,60 +103,144 @@ def numerical_solutions(polys):
                       for poly in polysReduced
                       if (not poly.is_constant()) or poly.get_constant() == 0 ]
 
-    # Check if there is a constant non-zero polynomial left
-
+    # Return None if there is a constant non-zero polynomial left
     for poly in polysFiltered:
         if poly.is_constant():
-            return NonZeroDimensionalComponent()
+            return None
 
-    polysAndVars = [
-        PariPolynomialAndVariables(poly) for poly in polysFiltered ]
+    return polysFiltered
 
-    solutions = _numerical_solutions_recursion(polysAndVars, { })
+def _iter_numerical_solutions(polys, polysFiltered, num_processes):
 
     number_variables = (
         len(
             set(sum(
                 [poly.variables() for poly in polys],[ ]))))
 
-    return [
-        solution if len(solution) == number_variables
-        else NonZeroDimensionalComponent()
-        for solution in solutions]
+    if num_processes > 1:
+        solutions = _iter_numerical_solutions_parallel(
+            polysFiltered, num_processes)
+    else:
+        polysAndVars = [
+            PariPolynomialAndVariables(poly) for poly in polysFiltered ]
+        solutions = _numerical_solutions_recursion(
+            polysAndVars, { }, _root_finding_precision())
 
-def _get_first(l):
-    if l:
-        return l[0]
-    return None
+    for solution in solutions:
+        if len(solution) == number_variables:
+            yield solution
+        else:
+            yield NonZeroDimensionalComponent()
+
+def _iter_numerical_solutions_parallel(polysFiltered, num_processes):
+
+    # The roots of the first univariate polynomial are computed here
+    # once. Each process explores the branch for one of them.
+    polysAndVars = [
+        PariPolynomialAndVariables(poly) for poly in polysFiltered ]
+
+    univariatePoly = _find_univariate(polysAndVars)
+    if univariatePoly is None:
+        yield from _numerical_solutions_recursion(
+            polysAndVars, { }, _root_finding_precision())
+        return
+
+    real_precision = pari.get_real_precision()
+    roots = _to_strings(univariatePoly.get_roots(), real_precision)
+
+    executor = concurrent.futures.ProcessPoolExecutor(
+        max_workers = num_processes)
+    futures = [
+        executor.submit(_solutions_for_branch,
+                        polysFiltered, real_precision, root)
+        for root in roots ]
+
+    try:
+        # Yield the solutions as soon as the branches are done but keep
+        # the same order as the serial algorithm.
+        for future in futures:
+            for solution in future.result():
+                yield { var : pari(value) for var, value in solution.items() }
+    finally:
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait = False)
+
+def _solutions_for_branch(polys, real_precision, root):
+    """
+    Run in a separate process: computes the solutions for the given
+    root (as string, see _to_strings) of the first univariate polynomial.
+    The solutions are returned as strings since pari objects cannot
+    be passed between processes.
+    """
+
+    # Parse the root with the digits added by _to_strings.
+    pari.set_real_precision(real_precision + 10)
+    root = pari(root)
+    pari.set_real_precision(real_precision)
+    precision = _root_finding_precision()
+
+    polysAndVars = [ PariPolynomialAndVariables(poly) for poly in polys ]
+    univariatePoly = _find_univariate(polysAndVars)
+
+    solutions = list(_numerical_solutions_for_root(
+        polysAndVars, univariatePoly, root, { }, precision))
+
+    return [ dict(zip(solution.keys(),
+                      _to_strings(solution.values(), real_precision)))
+             for solution in solutions ]
+
+def _to_strings(values, real_precision):
+    """
+    Converts pari numbers to strings, printing more digits than the
+    precision so that no information is lost.
+    """
+
+    pari.set_real_precision(real_precision + 10)
+    try:
+        return [ str(value) for value in values ]
+    finally:
+        pari.set_real_precision(real_precision)
 
 def _remove(l, element):
     return [x for x in l if not x is element]
 
-def _numerical_solutions_recursion(polysAndVars, solutionDict):
+def _find_univariate(polysAndVars):
+    for poly in polysAndVars:
+        if poly.get_variable_if_univariate():
+            return poly
+    return None
+
+def _numerical_solutions_recursion(polysAndVars, solutionDict, precision):
+
+    # A generator so that solutions are available before all branches
+    # are explored.
 
     if polysAndVars == [ ]:
-        return [ solutionDict ]
+        yield solutionDict
+        return
 
-    univariatePoly = _get_first([ poly
-                                  for poly in polysAndVars
-                                  if poly.get_variable_if_univariate() ])
+    univariatePoly = _find_univariate(polysAndVars)
 
     if not univariatePoly is None:
-        variable = univariatePoly.get_variable_if_univariate()
-        variableDicts = [ ]
+        for root in univariatePoly.get_roots(precision):
+            yield from _numerical_solutions_for_root(
+                polysAndVars, univariatePoly, root, solutionDict, precision)
+        return
 
-        for solution in univariatePoly.get_roots():
+    # Non-zero dimensional component
+    yield solutionDict
 
-            newSolutionDict = solutionDict.copy()
-            newSolutionDict[variable] = solution
+def _numerical_solutions_for_root(polysAndVars, univariatePoly, root,
+                                  solutionDict, precision):
 
-            new_polys = [ poly.substitute(variable, solution)
-                          for poly in _remove(polysAndVars, univariatePoly) ]
+    variable = univariatePoly.get_variable_if_univariate()
 
-            variableDicts += _numerical_solutions_recursion(
-                new_polys, newSolutionDict)
+    newSolutionDict = solutionDict.copy()
+    newSolutionDict[variable] = root
 
-        return variableDicts
+    new_polys = [ poly.substitute(variable, root)
+                  for poly in _remove(polysAndVars, univariatePoly) ]
 
-    # Non-zero dimensional component
-    return [ solutionDict ]
+    return _numerical_solutions_recursion(
+        new_polys, newSolutionDict, precision)
@@ -11,6 +11,11 @@ def contains_ideal_components(text):
 
 def decomposition_from_components(text):
 
+    # The components are processed from their offsets in the text (so that
+    # only the text of one component is decoded at a time and the
+    # polynomials can be parsed from the file later).
+    if not isinstance(text, processFileBase.SectionIndex):
+        text = processFileBase.SectionIndex(text)
 
     py_eval = processFileBase.get_py_eval(text)
     manifold_thunk = processFileBase.get_manifold_thunk(text)
@@ -21,11 +26,12 @@ def decomposition_from_components(text):
     variables = [ remove_optional_quotes(v.strip())
                   for v in variables_section.split(',') if v.strip() ]
 
-    decomposition = processFileBase.find_unique_section(
+    # Only the parameters at the beginning
+    decomposition = processFileBase.find_unique_section_index(
         text, "IDEAL=COMPONENTS")
 
     params, body = processFileBase.extract_parameters_and_body_from_section(
-        decomposition)
+        decomposition.head())
 
     if "TYPE" not in params.keys():
         raise Exception("No TYPE given for IDEAL=COMPONENTS")
@@ -35,7 +41,7 @@ def decomposition_from_components(text):
     if not type == "PTOLEMY":
         raise Exception("TYPE '%s' not supported" % type)
 
-    components = processFileBase.find_section(text, "COMPONENT")
+    components = processFileBase.find_section_indices(text, "COMPONENT")
 
     return utilities.MethodMappingList(
         [ process_component(py_eval, manifold_thunk, variables,
@@ -51,9 +57,12 @@ def remove_optional_quotes(s):
 
 def process_component(py_eval, manifold_thunk, variables,
                       component):
+    """
+    Processes a component given as processFileBase.SectionIndex.
+    """
 
     params, body = processFileBase.extract_parameters_and_body_from_section(
-        component)
+        component.head())
 
     if "DIMENSION" not in params.keys():
         raise Exception("No DIMENSION for COMPONENT of IDEAL=COMPONENTS")
@@ -70,11 +79,12 @@ def process_component(py_eval, manifold_thunk, variables,
                            for v in free_vars_str.split() ]
 
     if dimension == 0:
-        return process_solutions_provider(py_eval, manifold_thunk, body, 0,
-                                          variables)
+        return process_solutions_provider(py_eval, manifold_thunk,
+                                          component, 0, variables)
     else:
         witnesses = []
-        witnesses_sections = processFileBase.find_section(body, "WITNESSES")
+        witnesses_sections = processFileBase.find_section_indices(
+            component, "WITNESSES")
         if witnesses_sections:
             assert len(witnesses_sections) == 1
             witnesses = process_witnesses(
@@ -94,10 +104,14 @@ def process_witnesses(py_eval, manifold_thunk, witnesses_section, for_dimension,
     return [ process_solutions_provider(
             py_eval, manifold_thunk, witness_section, for_dimension, variables)
              for witness_section
-             in processFileBase.find_section(witnesses_section, "WITNESS") ]
+             in processFileBase.find_section_indices(
+                 witnesses_section, "WITNESS") ]
 
 def process_solutions_provider(py_eval, manifold_thunk, text, for_dimension,
                                variables):
+    """
+    Processes the solutions in the given processFileBase.SectionIndex.
+    """
 
     rur_section = processFileBase.find_section(text, "MAPLE=LIKE=RUR")
     if rur_section:
@@ -110,20 +124,21 @@ def process_solutions_provider(py_eval, manifold_thunk, text, for_dimension,
                 py_eval_section = py_eval,
                 manifold_thunk = manifold_thunk))
 
-    gb_section = processFileBase.find_section(text, "GROEBNER=BASIS")
+    gb_section = processFileBase.find_section_indices(text, "GROEBNER=BASIS")
 
     if gb_section:
         assert len(gb_section) == 1
 
-        params, body = (
-            processFileBase.extract_parameters_and_body_from_section(
-                gb_section[0]))
+        # Parsed only when needed. Only the offsets of the section are
+        # kept until then, not its text.
+        gb_text_thunk = gb_section[0].text_thunk()
 
-        body = processFileBase.remove_optional_outer_square_brackets(
-            utilities.join_long_lines_deleting_whitespace(body))
+        def polys():
+            return _parse_groebner_basis(gb_text_thunk())
 
-        polys = [ Polynomial.parse_string(p)
-                  for p in body.replace('\n', ' ').split(',') ]
+        params, body = (
+            processFileBase.extract_parameters_and_body_from_section(
+                gb_text_thunk().strip()))
 
         if 'TERM=ORDER' not in params.keys():
             raise Exception("No term order given for Groebner basis")
@@ -152,7 +167,18 @@ def process_solutions_provider(py_eval, manifold_thunk, text, for_dimension,
                 py_eval_section = py_eval,
                 manifold_thunk = manifold_thunk))
 
-    raise Exception("No parsable solution type given: %s..." % text[:100])
+    raise Exception(
+        "No parsable solution type given: %s..." % text.head()[:100])
+
+def _parse_groebner_basis(text):
+    params, body = processFileBase.extract_parameters_and_body_from_section(
+        text.strip())
+
+    body = processFileBase.remove_optional_outer_square_brackets(
+        utilities.join_long_lines_deleting_whitespace(body))
+
+    return [ Polynomial.parse_string(p)
+             for p in body.replace('\n', ' ').split(',') ]
 
 class SolutionContainer():
     def __init__(self, solutions):
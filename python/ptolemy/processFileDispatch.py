@@ -7,9 +7,14 @@ representation and dispatching it to the corresponding module.
 from . import processMagmaFile
 from . import processRurFile
 from . import processComponents
+from . import processFileBase
 
 def parse_decomposition(text):
 
+    # Scan the text only once for the sections
+    if not isinstance(text, processFileBase.SectionIndex):
+        text = processFileBase.SectionIndex(text)
+
     if processMagmaFile.contains_magma_output(text):
         return processMagmaFile.decomposition_from_magma(text)
 
@@ -24,7 +29,8 @@ def parse_decomposition(text):
 
 def parse_decomposition_from_file(filename):
 
-    return parse_decomposition(open(filename, 'r').read())
+    with processFileBase.SectionIndex.from_file(filename) as text:
+        return parse_decomposition(text)
 
 def parse_solutions(text, numerical = False):
 
@@ -44,4 +50,5 @@ def parse_solutions_from_file(filename, numerical = False):
     As parse_solutions, but takes a filename instead.
     """
 
-    return parse_solutions(open(filename, 'r').read(), numerical)
+    with processFileBase.SectionIndex.from_file(filename) as text:
+        return parse_solutions(text, numerical)
@@ -6,6 +6,8 @@ import snappy
 
 import re
 import sys
+import itertools
+import functools
 import tempfile
 import subprocess
 import shutil
@@ -18,11 +20,12 @@ def decomposition_from_magma(text):
     py_eval = processFileBase.get_py_eval(text)
     manifold_thunk = processFileBase.get_manifold_thunk(text)
 
-    untyped_decomposition = processFileBase.find_section(
+    # The sections are only decoded one component at a time.
+    untyped_decomposition = processFileBase.find_section_indices(
         text, "IDEAL=DECOMPOSITION")
-    primary_decomposition = processFileBase.find_section(
+    primary_decomposition = processFileBase.find_section_indices(
         text, "PRIMARY=DECOMPOSITION")
-    radical_decomposition = processFileBase.find_section(
+    radical_decomposition = processFileBase.find_section_indices(
         text,  "RADICAL=DECOMPOSITION")
 
     if untyped_decomposition:
@@ -36,63 +39,64 @@ def decomposition_from_magma(text):
             "File not recognized as magma output "
             "(missing primary decomposition or radical decomposition)")
 
-    # Remove "\" at the wrapped lines
-    decomposition = utilities.join_long_lines_deleting_whitespace(
-        decomposition)
-
-    # Remove outer square brackets
-    decomposition = processFileBase.remove_outer_square_brackets(decomposition)
-
-    decomposition_comps = [ c.strip() for c in decomposition.split(']') ]
-    decomposition_components = [ c + ']' for c in decomposition_comps if c ]
+    decomposition_components = _iter_decomposition_components(decomposition)
 
     free_variables_section = processFileBase.find_section(
         text, "FREE=VARIABLES=IN=COMPONENTS")
     if free_variables_section:
         free_variables = eval(free_variables_section[0])
     else:
-        free_variables = len(decomposition_components) * [ None ]
+        free_variables = itertools.repeat(None)
 
-    witnesses_section = processFileBase.find_section(
+    witnesses_section = processFileBase.find_section_indices(
         text, "WITNESSES=FOR=COMPONENTS")
     if witnesses_section:
-        witnesses_sections = processFileBase.find_section(
+        witnesses_sections = processFileBase.find_section_indices(
             witnesses_section[0], "WITNESSES")
     else:
-        witnesses_sections = len(decomposition_components) * [ "" ]
+        witnesses_sections = itertools.repeat(None)
 
-    genuses_section = processFileBase.find_section(
+    genuses_section = processFileBase.find_section_indices(
         text, "GENUSES=FOR=COMPONENTS")
     if genuses_section:
-        genuses_sections = processFileBase.find_section(
+        genuses_sections = processFileBase.iter_section(
            genuses_section[0], "GENUS=FOR=COMPONENT")
     else:
-        genuses_sections = len(decomposition_components) * [ "" ]
+        genuses_sections = itertools.repeat("")
 
-    def process_match(i, comp, free_vars, witnesses_txt, genus_txt):
+    def process_match(i, comp_and_thunk, free_vars, witnesses_index,
+                      genus_txt):
+
+        comp, comp_thunk = comp_and_thunk
 
         if i != 0:
             if not comp[0] == ',':
                 raise ValueError("Parsing decomposition, expected "
                                  "separating comma.")
             comp = comp[1:].strip()
+            comp_thunk = _without_separating_comma(comp_thunk)
 
         if genus_txt.strip():
             genus = int(genus_txt)
         else:
             genus = None
 
-        witnesses_txts = processFileBase.find_section(
-            witnesses_txt, "WITNESS")
+        if witnesses_index is None:
+            witnesses_indices = []
+        else:
+            witnesses_indices = processFileBase.find_section_indices(
+                witnesses_index, "WITNESS")
 
         witnesses = [
             _parse_ideal_groebner_basis(
-                utilities.join_long_lines_deleting_whitespace(t).strip(),
-                py_eval, manifold_thunk, free_vars, [], genus)
-            for t in witnesses_txts ]
+                _witness_text(index.text_thunk()),
+                py_eval, manifold_thunk, free_vars, [], genus,
+                text_thunk = _witness_text_thunk(index.text_thunk()))
+            for index in witnesses_indices ]
 
         return _parse_ideal_groebner_basis(comp, py_eval, manifold_thunk,
-                                           free_vars, witnesses, genus)
+                                           free_vars, witnesses, genus,
+                                           text_thunk = comp_thunk)
 
     return utilities.MethodMappingList(
         [ process_match(i, comp, free_vars, witnesses, genus_txt)
@@ -102,17 +106,80 @@ def decomposition_from_magma(text):
                            witnesses_sections,
                            genuses_sections)) ])
 
+def _iter_decomposition_components(decomposition):
+    """
+    Given a SectionIndex for a decomposition of the form
+    "[ Ideal of ...[...], Ideal of ...[...] ]", yields pairs of the
+    components "Ideal of ...[...]" (with the separating comma for all but
+    the first component) and a function returning the same text again
+    (see SectionIndex.text_thunk), decoding only one component at a time.
+
+    >>> t = "==IDEAL=DECOMPOSITION=BEGINS==[ A[1], B\\\\\\n  [2] ]==IDEAL=DECOMPOSITION=ENDS=="
+    >>> comps = list(_iter_decomposition_components(
+    ...     processFileBase.find_unique_section_index(t, "IDEAL=DECOMPOSITION")))
+    >>> [ comp for comp, thunk in comps ]
+    ['A[1]', ', B[2]']
+    >>> all(thunk() == comp for comp, thunk in comps)
+    True
+    """
+
+    # The components end with the "]" of the Groebner basis and the
+    # pieces between these do not contain a backslash newline sequence
+    # spanning a "]", so we can split first and then remove "\" at the
+    # wrapped lines.
+    offsets = decomposition.iter_split_offsets(']')
+
+    # Remove outer square brackets: the first piece starts with "[" and
+    # the last piece (after the outer "]") is empty.
+    start, end = next(offsets)
+    piece = _decomposition_piece(decomposition.text_between(start, end),
+                                 is_first = True)
+    is_first = True
+
+    for next_start, next_end in offsets:
+        if piece:
+            yield piece + ']', functools.partial(
+                _decomposition_component,
+                decomposition.text_thunk(start, end), is_first)
+        start, end = next_start, next_end
+        piece = _decomposition_piece(decomposition.text_between(start, end))
+        is_first = False
+
+    if piece:
+        raise ValueError("Error while parsing: outer square brackets missing")
+
+def _decomposition_piece(text, is_first = False):
+    piece = utilities.join_long_lines_deleting_whitespace(text).strip()
+    if is_first:
+        if not piece.startswith('['):
+            raise ValueError(
+                "Error while parsing: outer square brackets missing")
+        piece = piece[1:].strip()
+    return piece
+
+def _decomposition_component(text_thunk, is_first):
+    return _decomposition_piece(text_thunk(), is_first) + ']'
+
+def _without_separating_comma(text_thunk):
+    return lambda : text_thunk()[1:].strip()
+
+def _witness_text(text_thunk):
+    return utilities.join_long_lines_deleting_whitespace(
+        text_thunk()).strip()
+
+def _witness_text_thunk(text_thunk):
+    return functools.partial(_witness_text, text_thunk)
+
 def _parse_ideal_groebner_basis(text, py_eval, manifold_thunk,
-                                free_vars, witnesses, genus):
-    match = re.match(
-        r"Ideal of Polynomial ring of rank.*?\n"
-        r"\s*?(Order:\s*?(.*?)|(.*?)\s*?Order)\n"
-        r"\s*?Variables:(.*?\n)+"
-        r".*?Dimension (\d+).*?\s*([^,]*[Pp]rime)?.*?\n"
-        r"(\s*?Size of variety over algebraically closed field: (\d+).*?\n)?"
-        r"\s*Groebner basis:\n"
-        r"\s*?\[([^\[\]]*)\]$",
-        text)
+                                free_vars, witnesses, genus,
+                                text_thunk = None):
+    """
+    If text_thunk (a function returning text again) is given, the
+    polynomials are parsed from it when needed instead of keeping the
+    text.
+    """
+
+    match = _match_ideal_groebner_basis(text)
 
     if not match:
         raise ValueError("Parsing error in component of "
@@ -129,8 +196,14 @@ def _parse_ideal_groebner_basis(text, py_eval, manifold_thunk,
     dimension = int(dimension_str)
 
     if dimension == 0:
-        polys = [ Polynomial.parse_string(p)
-                  for p in poly_strs.replace('\n',' ').split(',') ]
+        # Parsed only when needed
+        if text_thunk is None:
+            def polys():
+                return _parse_polys(poly_strs)
+        else:
+            def polys():
+                return _parse_polys(
+                    _match_ideal_groebner_basis(text_thunk()).group(9))
     else:
         polys = []
 
@@ -158,6 +231,21 @@ def _parse_ideal_groebner_basis(text, py_eval, manifold_thunk,
         genus = genus)
 
 
+def _match_ideal_groebner_basis(text):
+    return re.match(
+        r"Ideal of Polynomial ring of rank.*?\n"
+        r"\s*?(Order:\s*?(.*?)|(.*?)\s*?Order)\n"
+        r"\s*?Variables:(.*?\n)+"
+        r".*?Dimension (\d+).*?\s*([^,]*[Pp]rime)?.*?\n"
+        r"(\s*?Size of variety over algebraically closed field: (\d+).*?\n)?"
+        r"\s*Groebner basis:\n"
+        r"\s*?\[([^\[\]]*)\]$",
+        text)
+
+def _parse_polys(poly_strs):
+    return [ Polynomial.parse_string(p)
+             for p in poly_strs.replace('\n',' ').split(',') ]
+
 def triangulation_from_magma(text):
     """
     Reads the output from a magma computation and extracts the manifold for
@@ -191,7 +279,8 @@ def solutions_from_magma_file(filename, numerical = False):
     NonZeroDimensionalComponent.
     """
 
-    return solutions_from_magma(open(filename).read(), numerical)
+    with processFileBase.SectionIndex.from_file(filename) as text:
+        return solutions_from_magma(text, numerical)
 
 def solutions_from_magma(output, numerical = False):
     """
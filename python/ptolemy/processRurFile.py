@@ -15,9 +15,11 @@ def decomposition_from_rur(text):
     py_eval = processFileBase.get_py_eval(text)
     manifold_thunk = processFileBase.get_manifold_thunk(text)
 
-    rursection = processFileBase.find_unique_section(text, "RUR=DECOMPOSITION")
+    # Only decode the text of one component at a time
+    rursection = processFileBase.find_unique_section_index(
+        text, "RUR=DECOMPOSITION")
 
-    rurs = processFileBase.find_section(rursection, "COMPONENT")
+    rurs = processFileBase.iter_section(rursection, "COMPONENT")
 
     result = MethodMappingList(
         [ SolutionContainer(
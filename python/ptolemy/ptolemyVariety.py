@@ -1,6 +1,7 @@
 from . import matrix
 from . import homology
 from .polynomial import Polynomial
+from .sparsePolynomial import SparsePolynomial, VariableRegistry
 from .ptolemyObstructionClass import PtolemyObstructionClass
 from .ptolemyGeneralizedObstructionClass import PtolemyGeneralizedObstructionClass
 from .ptolemyVarietyPrimeIdealGroebnerBasis import PtolemyVarietyPrimeIdealGroebnerBasis
@@ -11,6 +12,8 @@ import signal
 import re
 import os
 import sys
+import pickle
+import copy
 
 try:
     from sage.rings.rational_field import RationalField
@@ -104,34 +107,43 @@ class PtolemyVariety(object):
         if isinstance(obstruction_class, PtolemyGeneralizedObstructionClass):
             H2_class = obstruction_class.H2_class
 
+        # The data not depending on the obstruction class is cached
+        template = get_ptolemy_variety_template(manifold, N)
+
         self._identified_coordinates = (
-            manifold._ptolemy_equations_identified_coordinates(N, H2_class))
+            template.identified_coordinates(manifold, H2_class))
 
-        self._action_by_decoration_change = (
-            manifold._ptolemy_equations_action_by_decoration_change(N))
+        self._action_by_decoration_change = copy.deepcopy(
+            template.action_by_decoration_change)
 
         # find enough Ptolemy variables to set to one so that the
         # decoration is fixed
         self._fixed_ptolemy_coordinates = (
-            _fix_decoration(N, self._action_by_decoration_change))
+            list(template.fixed_ptolemy_coordinates))
 
         self._identified_variables = (
             self._identified_coordinates +
             self._identified_variables_from_obstruction)
 
+        # The equations are kept as SparsePolynomial (using the variable
+        # ids of the template) until they are simplified and only
+        # converted to Polynomial once at the end.
+        registry = template.registry
+
         self._ptolemy_relations = (
-            _generate_ptolemy_relations(
-                N, manifold.num_tetrahedra(),
+            template.ptolemy_relations(
                 isinstance(obstruction_class, PtolemyObstructionClass)))
 
-        self.equations = [eqn for eqn in self._ptolemy_relations]
+        sparse_equations = [eqn for eqn in self._ptolemy_relations]
 
         order_of_u = 1
 
         if isinstance(obstruction_class, PtolemyGeneralizedObstructionClass):
             order_of_u, equations = (
                 obstruction_class._get_equation_for_u(N))
-            self.equations += equations
+            sparse_equations += [
+                SparsePolynomial.from_polynomial(eqn, registry)
+                for eqn in equations ]
 
         if eliminate_fixed_ptolemys:
 
@@ -142,30 +154,30 @@ class PtolemyVariety(object):
                   for ptolemy_coord in self._fixed_ptolemy_coordinates])
 
         else:
-            one = Polynomial.constant_polynomial(1)
+            one = SparsePolynomial.constant_polynomial(1, registry)
 
             # we add an equation c_XXXX_X - 1 for enough ptolemy's
             # to fix the decoration
-            self.equations += (
-                [ Polynomial.from_variable_name(ptolemy_coord) - one
+            sparse_equations += (
+                [ SparsePolynomial.from_variable_name(ptolemy_coord, registry)
+                  - one
                   for ptolemy_coord in self._fixed_ptolemy_coordinates])
 
-        variables = _union([eqn.variables() for eqn in self.equations])
-
         if simplify:
 
-            self.canonical_representative = _identified_variables_canonize(
-                self._identified_variables)
-
-            substitution = (
-                _canonical_representative_to_polynomial_substituition(
-                    self.canonical_representative, order_of_u))
+            self.canonical_representative, substitution = (
+                template.canonical_representative_and_substitution(
+                    self._identified_variables, order_of_u))
 
-            self.equations = [eqn.substitute(substitution)
-                              for eqn in self.equations]
+            self.equations = [
+                eqn.substitute(substitution).to_polynomial()
+                for eqn in sparse_equations ]
 
         else:
 
+            self.equations = [
+                eqn.to_polynomial() for eqn in sparse_equations ]
+
             self.canonical_representative = { }
 
             for sign, power, var1, var2 in self._identified_variables:
@@ -523,13 +535,25 @@ class PtolemyVariety(object):
             return _retrieve_url(url)
 
 
-    def retrieve_decomposition(self, data_url = None, verbose = True):
+    def retrieve_decomposition(self, data_url = None, verbose = True,
+                               repository = None):
+
+        if repository is not None:
+            # See solutionRepository.py
+            return repository.memoized(
+                self, ('decomposition',),
+                lambda : self._decomposition_from_text(
+                    repository.retrieve(self, rur = False), verbose))
 
         url = self._solution_file_url(data_url = data_url, rur = False)
         if verbose:
             print("Retrieving decomposition from %s ..." % url)
 
-        text = _retrieve_url(url)
+        return self._decomposition_from_text(_retrieve_url(url), verbose)
+
+    def _decomposition_from_text(self, text, verbose):
+
+        text = processFileBase.SectionIndex(text)
 
         if verbose:
             print("Parsing...")
@@ -543,11 +567,28 @@ class PtolemyVariety(object):
     def retrieve_solutions(self, numerical = False,
                            prefer_rur = False,
                            data_url = None,
-                           verbose = True):
+                           verbose = True,
+                           repository = None):
+
+        if repository is not None:
+            # See solutionRepository.py
+            return repository.memoized(
+                self, ('solutions', numerical, prefer_rur),
+                lambda : self._solutions_from_text(
+                    repository.retrieve_solution_file(
+                        self, prefer_rur = prefer_rur, verbose = verbose),
+                    numerical, verbose))
+
+        return self._solutions_from_text(
+            self._retrieve_solution_file(data_url = data_url,
+                                         prefer_rur = prefer_rur,
+                                         verbose = verbose),
+            numerical, verbose)
+
+    def _solutions_from_text(self, text, numerical, verbose):
+
+        text = processFileBase.SectionIndex(text)
 
-        text = self._retrieve_solution_file(data_url = data_url,
-                                            prefer_rur = prefer_rur,
-                                            verbose = verbose)
         if verbose:
             print("Parsing...")
 
@@ -744,6 +785,179 @@ class PtolemyVariety(object):
                            for m in f.get_monomials()})
         return result
 
+class PtolemyVarietyTemplate(object):
+    """
+    Holds the data needed to construct a PtolemyVariety for a given
+    triangulation and N that does not (or only through the few
+    identifications given by an obstruction class) depend on the
+    obstruction class: the Ptolemy relations, the identified Ptolemy
+    coordinates, the action by decoration change and the Ptolemy
+    coordinates fixing the decoration. This way, constructing the
+    Ptolemy varieties for all obstruction classes only applies
+    the substitutions for each obstruction class.
+
+    Obtain a template with get_ptolemy_variety_template. The templates
+    are cached and the cache can be saved to disk with
+    save_ptolemy_variety_templates and loaded with
+    load_ptolemy_variety_templates. A template does not keep the
+    manifold (only its labeled triangulation as key of the cache) and
+    hands out copies of its lists and dictionaries.
+
+    >>> from snappy import Manifold
+    >>> M = Manifold("4_1")
+    >>> template = get_ptolemy_variety_template(M, 2)
+    >>> template is get_ptolemy_variety_template(M, 2)
+    True
+    >>> template.fixed_ptolemy_coordinates[0]
+    'c_0011_0'
+    >>> p = M.ptolemy_variety(2, 1)
+    >>> p._action_by_decoration_change == template.action_by_decoration_change
+    True
+    >>> p._action_by_decoration_change[0] is template.action_by_decoration_change[0]
+    False
+    """
+
+    def __init__(self, manifold, N):
+        self.N = N
+        self.num_tetrahedra = manifold.num_tetrahedra()
+
+        self.action_by_decoration_change = (
+            manifold._ptolemy_equations_action_by_decoration_change(N))
+
+        self.fixed_ptolemy_coordinates = (
+            _fix_decoration(N, self.action_by_decoration_change))
+
+        # Keyed by H2_class (as tuple) or None
+        self._identified_coordinates = { }
+        # Keyed by has_obstruction_class
+        self._ptolemy_relations = { }
+        # Keyed by identified variables (as tuple) and order of u
+        self._canonical_representatives_and_substitutions = { }
+        # Interns the variable names of the SparsePolynomial's below
+        self.registry = VariableRegistry()
+
+    def identified_coordinates(self, manifold, H2_class = None):
+        """
+        The identified Ptolemy coordinates (computed using the given
+        manifold, which has to be the triangulation of the template,
+        for an obstruction class not seen before).
+        """
+        key = None if H2_class is None else tuple(H2_class)
+        result = self._identified_coordinates.get(key)
+        if result is None:
+            result = manifold._ptolemy_equations_identified_coordinates(
+                self.N, H2_class)
+            self._identified_coordinates[key] = result
+        return list(result)
+
+    def ptolemy_relations(self, has_obstruction_class):
+        """
+        The Ptolemy relations as SparsePolynomial's (using registry).
+        """
+        result = self._ptolemy_relations.get(has_obstruction_class)
+        if result is None:
+            result = _generate_ptolemy_relations(
+                self.N, self.num_tetrahedra, has_obstruction_class,
+                self.registry)
+            self._ptolemy_relations[has_obstruction_class] = result
+        return list(result)
+
+    def canonical_representative_and_substitution(self, identified_variables,
+                                                  order_of_u):
+        """
+        The canonical representatives of the identified variables and
+        the substitution (mapping a variable to a SparsePolynomial using
+        registry) replacing each variable by its representative.
+        """
+        key = (tuple(tuple(v) for v in identified_variables), order_of_u)
+        result = self._canonical_representatives_and_substitutions.get(key)
+        if result is None:
+            canonical_representative = _identified_variables_canonize(
+                identified_variables)
+            substitution = (
+                _canonical_representative_to_sparse_substitution(
+                    canonical_representative, order_of_u, self.registry))
+            result = (canonical_representative, substitution)
+            self._canonical_representatives_and_substitutions[key] = result
+
+        canonical_representative, substitution = result
+        # Copies so that changes by one PtolemyVariety (e.g., adding to
+        # the canonical representatives) do not affect the others.
+        return dict(canonical_representative), dict(substitution)
+
+# Maps (triangulation, N) to PtolemyVarietyTemplate
+_ptolemy_variety_templates = { }
+
+# Oldest templates are dropped when there are more
+_max_ptolemy_variety_templates = 256
+
+def _template_key(manifold, N):
+    # The Ptolemy coordinates refer to the labeling of the tetrahedra, so
+    # we cannot use the isosig which canonically relabels them.
+    if hasattr(manifold, '_to_bytes'):
+        return (manifold._to_bytes(), N)
+    # E.g., NTriangulationForPtolemy
+    return (manifold._to_string(), N)
+
+def get_ptolemy_variety_template(manifold, N):
+    """
+    Returns the (cached) PtolemyVarietyTemplate for the given
+    triangulation and N.
+    """
+
+    key = _template_key(manifold, N)
+    template = _ptolemy_variety_templates.get(key)
+    if template is None:
+        template = PtolemyVarietyTemplate(manifold, N)
+        _ptolemy_variety_templates[key] = template
+        if len(_ptolemy_variety_templates) > _max_ptolemy_variety_templates:
+            del _ptolemy_variety_templates[
+                next(iter(_ptolemy_variety_templates))]
+    return template
+
+def save_ptolemy_variety_templates(filename):
+    """
+    Saves all cached PtolemyVarietyTemplate's to the given file.
+
+    >>> import os, tempfile
+    >>> from snappy import Manifold
+    >>> M = Manifold("m004")
+    >>> equations = M.ptolemy_variety(3, 1).equations
+    >>> template = get_ptolemy_variety_template(M, 3)
+    >>> with tempfile.TemporaryDirectory() as d:
+    ...     filename = os.path.join(d, 'templates.pickle')
+    ...     save_ptolemy_variety_templates(filename)
+    ...     clear_ptolemy_variety_templates()
+    ...     load_ptolemy_variety_templates(filename)
+    >>> _template_key(M, 3) in _ptolemy_variety_templates
+    True
+    >>> loaded = get_ptolemy_variety_template(M, 3)
+    >>> loaded is template
+    False
+    >>> loaded.action_by_decoration_change == template.action_by_decoration_change
+    True
+    >>> loaded.fixed_ptolemy_coordinates == template.fixed_ptolemy_coordinates
+    True
+    >>> ( [ str(eqn) for eqn in M.ptolemy_variety(3, 1).equations ] ==
+    ...   [ str(eqn) for eqn in equations ] )
+    True
+    """
+
+    with open(filename, 'wb') as f:
+        pickle.dump(_ptolemy_variety_templates, f)
+
+def load_ptolemy_variety_templates(filename):
+    """
+    Adds the PtolemyVarietyTemplate's from the given file (see
+    save_ptolemy_variety_templates) to the cache.
+    """
+
+    with open(filename, 'rb') as f:
+        _ptolemy_variety_templates.update(pickle.load(f))
+
+def clear_ptolemy_variety_templates():
+    _ptolemy_variety_templates.clear()
+
 def _fix_decoration(N, action_by_decoration_change):
 
     action_matrix, ptolemy_coords, decorations_to_be_fixed = (
@@ -753,21 +967,21 @@ def _fix_decoration(N, action_by_decoration_change):
         action_matrix, ptolemy_coords, desired_determinant = N)
 
 def _generate_ptolemy_relations(N, num_tet,
-                                has_obstruction_class):
+                                has_obstruction_class, registry):
 
     def generate_ptolemy_relation(tet, index):
 
         def generate_Ptolemy_coordinate(addl_index):
             total_index = matrix.vector_add(index, addl_index)
-            return Polynomial.from_variable_name(
-                "c_%d%d%d%d" % tuple(total_index) + "_%d" % tet)
+            return SparsePolynomial.from_variable_name(
+                "c_%d%d%d%d" % tuple(total_index) + "_%d" % tet, registry)
 
         def generate_obstruction_variable(face):
             if has_obstruction_class:
-                return Polynomial.from_variable_name(
-                    "s_%d_%d" % (face, tet))
+                return SparsePolynomial.from_variable_name(
+                    "s_%d_%d" % (face, tet), registry)
             else:
-                return Polynomial.constant_polynomial(1)
+                return SparsePolynomial.constant_polynomial(1, registry)
 
         # implements equation 5.8 from paper
 
@@ -790,16 +1004,13 @@ def _generate_ptolemy_relations(N, num_tet,
             for index in utilities.quadruples_with_fixed_sum_iterator(N-2)]
 
 def _non_zero_condition(variables):
-    one = Polynomial.constant_polynomial(1)
-
-    polynomial = one
-
-    for var in variables:
-        polynomial = polynomial * Polynomial.from_variable_name(var)
+    registry = VariableRegistry()
 
-    polynomial = polynomial - one
+    polynomial = (
+        SparsePolynomial.monomial([ (var, 1) for var in variables ], registry)
+        - SparsePolynomial.constant_polynomial(1, registry))
 
-    return polynomial
+    return polynomial.to_polynomial()
 
 def _union(lists):
     all = sum(lists, [])
@@ -857,8 +1068,8 @@ def _identified_variables_canonize(identified_variables):
 
     return result
 
-def _canonical_representative_to_polynomial_substituition(
-        canonical_representative, order_of_u):
+def _canonical_representative_to_sparse_substitution(
+        canonical_representative, order_of_u, registry):
 
     result = { }
 
@@ -867,19 +1078,20 @@ def _canonical_representative_to_polynomial_substituition(
         if not var1 == var2:
 
             if order_of_u == 2:
-                u = Polynomial.constant_polynomial(-1)
+                u = SparsePolynomial.constant_polynomial(-1, registry)
             else:
-                u = Polynomial.from_variable_name('u')
+                u = SparsePolynomial.from_variable_name('u', registry)
 
             sign_and_power = (
-                Polynomial.constant_polynomial(sign) *
+                SparsePolynomial.constant_polynomial(sign, registry) *
                  u ** (power % order_of_u))
 
             if var2 == 1:
                 result[var1] =  sign_and_power
             else:
                 result[var1] = (sign_and_power *
-                                Polynomial.from_variable_name(var2))
+                                SparsePolynomial.from_variable_name(
+                                    var2, registry))
 
     return result
 
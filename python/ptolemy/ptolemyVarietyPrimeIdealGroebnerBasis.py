@@ -7,6 +7,9 @@ class PtolemyVarietyPrimeIdealGroebnerBasis():
 
     """
     A Groebner basis of a Ptolemy variety.
+
+    polys can also be a function returning the polynomials so that they
+    are only parsed when needed.
     """
 
     def __init__(self,
@@ -22,7 +25,12 @@ class PtolemyVarietyPrimeIdealGroebnerBasis():
                  genus = None):
 
         # Polynomials making up the groebner basis
-        self.polys = polys
+        if callable(polys):
+            self._polys = None
+            self._polys_thunk = polys
+        else:
+            self._polys = polys
+            self._polys_thunk = None
 
         # Term order "lex" for lexicographic
         self.term_order = term_order
@@ -49,6 +57,13 @@ class PtolemyVarietyPrimeIdealGroebnerBasis():
         # Intermediate computations for exact solution
         self._number_field_and_ext_assignments_cache = None
 
+    @property
+    def polys(self):
+        if self._polys is None:
+            self._polys = self._polys_thunk()
+            self._polys_thunk = None
+        return self._polys
+
     def _is_zero_dim_prime_and_lex(self):
         is_zero_dim = (self.dimension == 0)
         is_prime = self.is_prime
@@ -102,28 +117,47 @@ class PtolemyVarietyPrimeIdealGroebnerBasis():
             py_eval_section = self.py_eval,
             manifold_thunk = self.manifold_thunk)
 
-    def _numerical_solutions(self):
+    def _check_numerical_solutions_possible(self):
         if not self._is_zero_dim_prime_and_lex():
             raise Exception("Can find solutions only for Groebner basis in "
                             "lexicographic order of a zero-dimensional "
                             "ideal.")
 
-        sols = numericalSolutionsToGroebnerBasis.\
-            numerical_solutions_with_one(self.polys)
+    def _process_numerical_solution(self, solution):
+        assert isinstance(solution, dict)
+
+        return PtolemyCoordinates(
+            solution,
+            is_numerical = True,
+            py_eval_section = self.py_eval,
+            manifold_thunk = self.manifold_thunk)
 
-        def process_solution(solution):
-            assert isinstance(solution, dict)
+    def _numerical_solutions(self, num_processes = 1):
+        self._check_numerical_solutions_possible()
 
-            return PtolemyCoordinates(
-                solution,
-                is_numerical = True,
-                py_eval_section = self.py_eval,
-                manifold_thunk = self.manifold_thunk)
+        sols = numericalSolutionsToGroebnerBasis.\
+            numerical_solutions_with_one(self.polys, num_processes)
 
         return ZeroDimensionalComponent(
-            [ process_solution(sol) for sol in sols ])
+            [ self._process_numerical_solution(sol) for sol in sols ])
+
+    def iter_numerical_solutions(self, num_processes = 1):
+        """
+        Returns an iterator yielding the numerical solutions as
+        PtolemyCoordinates as soon as they are found. If num_processes > 1,
+        the solutions are computed in parallel using a pool of processes.
+        """
+
+        self._check_numerical_solutions_possible()
+
+        for sol in numericalSolutionsToGroebnerBasis.\
+                iter_numerical_solutions_with_one(self.polys, num_processes):
+            if isinstance(sol, NonZeroDimensionalComponent):
+                yield sol
+            else:
+                yield self._process_numerical_solution(sol)
 
-    def solutions(self, numerical = False):
+    def solutions(self, numerical = False, num_processes = 1):
 
         if self.dimension > 0:
             return NonZeroDimensionalComponent(
@@ -134,6 +168,6 @@ class PtolemyVarietyPrimeIdealGroebnerBasis():
                 genus = self.genus)
 
         if numerical:
-            return self._numerical_solutions()
+            return self._numerical_solutions(num_processes)
         else:
             return self._exact_solution()
@@ -4,6 +4,7 @@
 # * number_field
 # * to_PUR
 # * to_pari_fraction
+# * RURBatchEvaluator
 
 from ..sage_helper import _within_sage
 from ..pari import Gen, pari
@@ -545,3 +546,166 @@ class RUR(object):
             return self._is_zero()
 
         return (self / other)._is_one()
+
+
+class RURBatchEvaluator(object):
+
+    """
+    Performs the conversions to_PUR and multiply_and_simplify_terms for
+    many RURs at once, e.g., for all Ptolemy coordinates or cross ratios
+    of a solution.
+
+    The RURs of one solution typically share many of the factors in their
+    numerators and denominators. The evaluator therefore memoizes the
+    powers of the factors and the inverses in the number field so that
+    each is only computed once. Furthermore, the inverses of all distinct
+    denominator factors over the same number field are computed with a
+    single inversion in the number field (using Montgomery's trick of
+    inverting the product of all factors).
+
+    An evaluator can be reused for several batches over the same number
+    fields.
+
+    >>> nf = pari("x^9+x^3+x+32121")
+    >>> a = pari("43*x^3 + 1")
+    >>> b = pari("x^2 + 3")
+    >>> c = pari("x^3 + 3 * x + 7")
+
+    >>> r1 = RUR.from_pari_fraction_and_number_field(a / b, nf)
+    >>> r2 = RUR.from_pari_fraction_and_number_field(c / (a * b), nf)
+    >>> r3 = r1 ** 2 * r2 / 3
+    >>> rurs = [ r1, r2, r3, RUR.from_int(4) / RUR.from_int(6) ]
+
+    >>> e = RURBatchEvaluator()
+    >>> e.to_PURs(rurs) == [ r.to_PUR() for r in rurs ]
+    True
+    >>> e.to_PUR_dict({ 'a' : r1, 'b' : 5 }) == { 'a' : r1.to_PUR(), 'b' : 5 }
+    True
+    >>> simplified = e.multiply_and_simplify_terms(rurs)
+    >>> simplified == [ r.multiply_and_simplify_terms() for r in rurs ]
+    True
+    """
+
+    def __init__(self):
+        # Maps (str(factor), exponent) -> factor ** exponent
+        self._powers = { }
+        # Maps str(factor) -> 1 / factor
+        self._inverses = { }
+
+    def to_PURs(self, rurs):
+        """
+        Returns the list of to_PUR() of the given RURs.
+        """
+
+        keyed_terms = self._keyed_terms(rurs)
+
+        self._compute_inverses(
+            [ (key, p)
+              for terms in keyed_terms for key, p, e in terms if e < 0 ])
+
+        return [ self._to_PUR(rur, terms)
+                 for rur, terms in zip(rurs, keyed_terms) ]
+
+    def to_PUR_dict(self, d):
+        """
+        Given a dictionary, applies to_PUR to all values that are RURs.
+        """
+
+        return _apply_to_RUR_values(d, self.to_PURs)
+
+    def multiply_and_simplify_terms(self, rurs):
+        """
+        Returns the list of multiply_and_simplify_terms() of the given RURs.
+        """
+
+        def product(terms):
+            return prod([ self._power(key, p, abs(e))
+                          for key, p, e in terms ])
+
+        result = [ ]
+        for rur, terms in zip(rurs, self._keyed_terms(rurs)):
+            numerator = product([ t for t in terms if t[2] > 0 ])
+            denominator = product([ t for t in terms if t[2] < 0 ])
+            result.append(
+                RUR.from_pari_fraction_and_number_field(
+                    pari(numerator).lift() / pari(denominator).lift(),
+                    rur.number_field()))
+        return result
+
+    def multiply_and_simplify_terms_dict(self, d):
+        """
+        Given a dictionary, applies multiply_and_simplify_terms to all
+        values that are RURs.
+        """
+
+        return _apply_to_RUR_values(d, self.multiply_and_simplify_terms)
+
+    @staticmethod
+    def _keyed_terms(rurs):
+        # For each RUR, the triples (str(factor), factor, exponent).
+        # The string is computed only once for each factor (which is
+        # typically shared between the RURs of a solution).
+        keys = { }
+        result = [ ]
+        for rur in rurs:
+            terms = [ ]
+            for p, e in rur._polymod_exponent_pairs:
+                key = keys.get(id(p))
+                if key is None:
+                    key = keys[id(p)] = str(p)
+                terms.append((key, p, e))
+            result.append(terms)
+        return result
+
+    def _power(self, key, p, e):
+        if e == 1:
+            return p
+        result = self._powers.get((key, e))
+        if result is None:
+            result = p ** e
+            self._powers[(key, e)] = result
+        return result
+
+    def _compute_inverses(self, keyed_factors):
+        # Group the factors that have not been inverted yet by number field
+        factors_by_field = { }
+        for key, p in keyed_factors:
+            if key in self._inverses:
+                continue
+            p = pari(p)
+            field = str(p.mod()) if p.type() == 't_POLMOD' else None
+            factors_by_field.setdefault(field, { })[key] = p
+
+        for field_factors in factors_by_field.values():
+            keys = list(field_factors.keys())
+            values = [ field_factors[key] for key in keys ]
+
+            # partial_products[i] is the product of the first i factors
+            partial_products = [ pari(1) ]
+            for p in values:
+                partial_products.append(partial_products[-1] * p)
+
+            # Invert the product of all factors and recover the inverses of
+            # the individual factors
+            inverse = 1 / partial_products[-1]
+            for i in range(len(values) - 1, -1, -1):
+                self._inverses[keys[i]] = inverse * partial_products[i]
+                inverse = inverse * values[i]
+
+    def _to_PUR(self, rur, keyed_terms):
+        if rur._is_zero():
+            return pari(0)
+
+        result = pari(1)
+        for key, p, e in keyed_terms:
+            if e < 0:
+                p = self._inverses[key]
+                key = '1/' + key
+            result = result * self._power(key, p, abs(e))
+        return result
+
+def _apply_to_RUR_values(d, batch_method):
+    keys = [ k for k, v in d.items() if isinstance(v, RUR) ]
+    result = dict(d)
+    result.update(zip(keys, batch_method([ d[k] for k in keys ])))
+    return result
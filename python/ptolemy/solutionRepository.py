@@ -0,0 +1,396 @@
+"""
+Local repositories of the solution files of Ptolemy varieties.
+
+PtolemyVariety.retrieve_solutions and retrieve_decomposition download the
+solution files from DATA_URL. On machines without network access (or to
+avoid downloading and parsing the same file again and again), they can be
+given a repository instead:
+
+    DirectorySolutionRepository(path) --- a directory mirroring the layout
+                                          of DATA_URL (e.g., a copy of the
+                                          data directory of the server)
+    SqliteSolutionRepository(filename) --- a single sqlite file
+
+Both can be populated with fetch (which downloads from a data_url) or
+store, and optionally compress the stored files. The files are indexed by
+the triangulation (including the labeling of its tetrahedra which the
+solutions depend on), N and the index of the obstruction class.
+
+Several processes can use the same repository concurrently: files are
+written atomically and sqlite takes care of locking.
+
+>>> from snappy import Manifold
+>>> from snappy.ptolemy import __path__ as ptolemy_paths
+>>> import bz2, os, tempfile
+>>> p = Manifold("4_1").ptolemy_variety(2, obstruction_class = 1)
+>>> text = bz2.BZ2File(
+...     os.path.join(ptolemy_paths[0], 'testing_files',
+...                  '4_1__sl2_c1.magma_out.bz2')).read().decode('ascii')
+>>> tmp_dir = tempfile.mkdtemp()
+
+>>> for repository in [
+...     DirectorySolutionRepository(tmp_dir, compress = True),
+...     SqliteSolutionRepository(os.path.join(tmp_dir, 'db.sqlite'))]:
+...     repository.store(p, text)
+...     sols = p.retrieve_solutions(repository = repository, verbose = False)
+...     print(len(sols), p in repository, repository.num_files())
+...     p.retrieve_solutions(repository = repository, verbose = False) is sols
+1 True 1
+True
+1 True 1
+True
+
+>>> q = Manifold("4_1").ptolemy_variety(3)
+>>> q.retrieve_solutions(repository = repository) # doctest: +ELLIPSIS
+Traceback (most recent call last):
+...
+snappy.ptolemy.ptolemyVariety.PtolemyFileMissingError: No solution file for 4_1__sl3_c0.rur in ...
+"""
+
+from .ptolemyVariety import PtolemyFileMissingError, _retrieve_url
+
+from collections import OrderedDict
+import bz2
+import hashlib
+import os
+import sqlite3
+import tempfile
+
+__all__ = ['DirectorySolutionRepository', 'SqliteSolutionRepository']
+
+def _extension(rur):
+    if rur:
+        return '.rur'
+    return '.magma_out'
+
+def _obstruction_index(variety):
+    if variety._obstruction_class is None:
+        return '0'
+    if variety._obstruction_class._index is None:
+        return 'NoIndex'
+    return '%d' % variety._obstruction_class._index
+
+def _triangulation_key(manifold):
+    # Not the isosig: the solutions depend on the labeling of the
+    # tetrahedra and the isosig is the same for all labelings.
+    if hasattr(manifold, '_to_bytes'):
+        return manifold._to_bytes().hex()
+    # E.g., NTriangulationForPtolemy
+    return manifold._to_string()
+
+def _key(variety, rur):
+    """
+    The key (triangulation, N, obstruction class index, extension) under
+    which the solution file for the variety is stored.
+    """
+    return (_triangulation_key(variety._manifold),
+            variety._N,
+            _obstruction_index(variety),
+            _extension(rur))
+
+def _relative_path(variety, rur):
+    """
+    The path of the solution file relative to DATA_URL.
+    """
+    try:
+        path = variety.path_to_file()
+    except Exception:
+        # Not a census manifold
+        path = 'data/pgl%d/Other' % variety._N
+    return path + '/' + variety.filename_base() + _extension(rur)
+
+def _relative_path_for_key(key, relative_path):
+    """
+    The path under which a DirectorySolutionRepository stores a solution
+    file: the path relative to DATA_URL with a digest of the key added to
+    the file name so that the files for different labelings of the same
+    manifold do not overwrite each other.
+    """
+    directory, filename = relative_path.rsplit('/', 1)
+    base, extension = os.path.splitext(filename)
+    digest = hashlib.sha1(
+        '\t'.join([ key[0], '%d' % key[1], key[2], key[3] ]).encode(
+            'utf-8')).hexdigest()
+    return '%s/%s__%s%s' % (directory, base, digest[:16], extension)
+
+class SolutionRepository(object):
+    """
+    Base class for the local repositories of solution files. Subclasses
+    implement _load(key, relative_path) returning the text of the file
+    (or None if missing), _save(key, relative_path, text) and num_files().
+
+    A repository also memoizes the (at most max_parsed) results of parsing
+    recently retrieved files. Note that these are shared between calls.
+    """
+
+    def __init__(self, compress = False, max_parsed = 32):
+        self._compress = compress
+        self._max_parsed = max_parsed
+        self._parsed = OrderedDict()
+
+    def retrieve(self, variety, rur = False):
+        """
+        Returns the text of the solution file (in magma or rur format) for
+        the given Ptolemy variety.
+        """
+
+        text = self._load(_key(variety, rur), _relative_path(variety, rur))
+        if text is None:
+            raise PtolemyFileMissingError(
+                "No solution file for %s in %s" % (
+                    variety.filename_base() + _extension(rur), self))
+        return text
+
+    def retrieve_solution_file(self, variety, prefer_rur = False,
+                               verbose = False):
+        """
+        Like retrieve but falls back to the other format if the file in
+        the preferred format is missing.
+        """
+
+        if verbose:
+            print("Trying to retrieve solutions from %s ..." % self)
+
+        try:
+            return self.retrieve(variety, rur = prefer_rur)
+        except PtolemyFileMissingError:
+            try:
+                return self.retrieve(variety, rur = not prefer_rur)
+            except PtolemyFileMissingError as e:
+                # The first miss is not the cause of the second.
+                raise e from None
+
+    def store(self, variety, text, rur = False):
+        """
+        Adds the text of a solution file for the given Ptolemy variety.
+        """
+
+        key = _key(variety, rur)
+        self._save(key, _relative_path(variety, rur), text)
+        for parsed_key in list(self._parsed):
+            if parsed_key[0][:3] == key[:3]:
+                del self._parsed[parsed_key]
+
+    def fetch(self, variety, data_url = None, rur = False, verbose = False):
+        """
+        Downloads the solution file for the given Ptolemy variety from
+        data_url (see PtolemyVariety.retrieve_solutions) and stores it.
+        """
+
+        url = variety._solution_file_url(data_url = data_url, rur = rur)
+        if verbose:
+            print("Fetching %s ..." % url)
+        self.store(variety, _retrieve_url(url), rur = rur)
+
+    def __contains__(self, variety):
+        return any(
+            self._load(_key(variety, rur), _relative_path(variety, rur))
+            is not None
+            for rur in [ False, True ])
+
+    def memoized(self, variety, what, compute):
+        """
+        Returns compute() and memoizes it for the given variety and what
+        (a tuple describing what was computed).
+        """
+
+        key = (_key(variety, False), what)
+        result = self._parsed.get(key)
+        if result is None:
+            result = compute()
+            self._parsed[key] = result
+            if len(self._parsed) > self._max_parsed:
+                self._parsed.popitem(last = False)
+        else:
+            self._parsed.move_to_end(key)
+        return result
+
+    def _encode(self, text):
+        data = text.encode('ascii')
+        if self._compress:
+            return bz2.compress(data)
+        return data
+
+    @staticmethod
+    def _decode(data):
+        if data[:3] == b'BZh':
+            data = bz2.decompress(data)
+        return data.decode('ascii')
+
+class DirectorySolutionRepository(SolutionRepository):
+    """
+    A directory with the same layout as DATA_URL. The solution files can be
+    compressed with bzip2 (and then end in .bz2).
+
+    An additional file index.txt lists the files by triangulation, N and
+    obstruction class so that they can be found for manifolds which are not
+    in a census (or have a different name). The stored files have a digest
+    of the triangulation, N and obstruction class in their name, so
+    different labelings of the same manifold are kept apart. Files added
+    by copying the data directory of the server are found without the
+    index (unless the index lists a file with the same path).
+
+    >>> from snappy import Manifold
+    >>> import tempfile
+    >>> M = Manifold("m004")
+    >>> N = Manifold(M.triangulation_isosig(decorated = False))
+    >>> N.set_name("m004")
+    >>> M._to_bytes() == N._to_bytes()
+    False
+    >>> p, q = M.ptolemy_variety(2, 0), N.ptolemy_variety(2, 0)
+    >>> repository = DirectorySolutionRepository(tempfile.mkdtemp())
+    >>> repository.store(p, 'AAA')
+    >>> repository.store(q, 'BBB')
+    >>> repository.retrieve(p), repository.retrieve(q), repository.num_files()
+    ('AAA', 'BBB', 2)
+    >>> repository = DirectorySolutionRepository(repository._path)
+    >>> repository.retrieve(p), repository.retrieve(q)
+    ('AAA', 'BBB')
+    """
+
+    index_filename = 'index.txt'
+
+    def __init__(self, path, compress = False, max_parsed = 32):
+        SolutionRepository.__init__(self, compress = compress,
+                                    max_parsed = max_parsed)
+        self._path = path
+        # Maps key to relative path
+        self._index = { }
+        # The relative paths in the index
+        self._indexed_paths = set()
+        # Size of the index file when it was last read
+        self._index_size = 0
+
+    def __repr__(self):
+        return "DirectorySolutionRepository(%r)" % self._path
+
+    def num_files(self):
+        self._update_index()
+        return len(self._index)
+
+    def _update_index(self):
+        filename = os.path.join(self._path, self.index_filename)
+        try:
+            size = os.path.getsize(filename)
+        except OSError:
+            return
+        if size == self._index_size:
+            return
+        # Other processes only ever append to the index, so only read
+        # the new lines.
+        with open(filename, 'rb') as f:
+            f.seek(self._index_size)
+            data = f.read()
+        # Ignore an incomplete line that is currently being written
+        data = data[:data.rfind(b'\n') + 1]
+        self._index_size += len(data)
+        for line in data.decode('ascii').splitlines():
+            triangulation, N, obstruction_index, ext, relative_path = (
+                line.split('\t'))
+            self._index[(triangulation, int(N), obstruction_index, ext)] = (
+                relative_path)
+            self._indexed_paths.add(relative_path)
+
+    def _load(self, key, relative_path):
+        self._update_index()
+        paths = [ self._index.get(key) ]
+        # A file at the path relative to DATA_URL which is listed in the
+        # index belongs to a different key (e.g., a different labeling).
+        if relative_path not in self._indexed_paths:
+            paths.append(relative_path)
+        for path in paths:
+            if path is None:
+                continue
+            for suffix in [ '', '.bz2' ]:
+                filename = os.path.join(self._path, path + suffix)
+                if os.path.isfile(filename):
+                    with open(filename, 'rb') as f:
+                        return self._decode(f.read())
+        return None
+
+    def _save(self, key, relative_path, text):
+        relative_path = _relative_path_for_key(key, relative_path)
+        if self._compress:
+            relative_path += '.bz2'
+        filename = os.path.join(self._path, relative_path)
+        directory = os.path.dirname(filename)
+        os.makedirs(directory, exist_ok = True)
+
+        # Write to temporary file first and atomically move it so that
+        # other processes never see a partially written file.
+        fd, tmp_filename = tempfile.mkstemp(dir = directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(self._encode(text))
+            os.chmod(tmp_filename, 0o644)
+            os.replace(tmp_filename, filename)
+        except BaseException:
+            os.remove(tmp_filename)
+            raise
+
+        # Appending a single short line is atomic.
+        line = '\t'.join([ key[0], '%d' % key[1], key[2], key[3],
+                           relative_path[:-4] if self._compress
+                           else relative_path ]) + '\n'
+        fd = os.open(os.path.join(self._path, self.index_filename),
+                     os.O_WRONLY | os.O_APPEND | os.O_CREAT)
+        try:
+            os.write(fd, line.encode('ascii'))
+        finally:
+            os.close(fd)
+
+class SqliteSolutionRepository(SolutionRepository):
+    """
+    Stores the solution files in a sqlite database. The table is indexed by
+    triangulation, N, obstruction class index and format.
+    """
+
+    def __init__(self, filename, compress = False, max_parsed = 32):
+        SolutionRepository.__init__(self, compress = compress,
+                                    max_parsed = max_parsed)
+        self._filename = filename
+        self._connection = None
+        self._pid = None
+
+    def __repr__(self):
+        return "SqliteSolutionRepository(%r)" % self._filename
+
+    def _get_connection(self):
+        # sqlite connections cannot be shared with forked processes.
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = sqlite3.connect(self._filename, timeout = 60)
+            self._pid = os.getpid()
+            with self._connection:
+                self._connection.execute(
+                    'CREATE TABLE IF NOT EXISTS solution_files ('
+                    'triangulation TEXT, N INTEGER, obstruction_index TEXT, '
+                    'extension TEXT, path TEXT, data BLOB, '
+                    'PRIMARY KEY (triangulation, N, obstruction_index, '
+                    'extension))')
+        return self._connection
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state['_connection'] = None
+        state['_pid'] = None
+        return state
+
+    def num_files(self):
+        return self._get_connection().execute(
+            'SELECT COUNT(*) FROM solution_files').fetchone()[0]
+
+    def _load(self, key, relative_path):
+        row = self._get_connection().execute(
+            'SELECT data FROM solution_files WHERE triangulation = ? AND '
+            'N = ? AND '
+            'obstruction_index = ? AND extension = ?', key).fetchone()
+        if row is None:
+            return None
+        return self._decode(row[0])
+
+    def _save(self, key, relative_path, text):
+        connection = self._get_connection()
+        with connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO solution_files VALUES (?,?,?,?,?,?)',
+                key + (relative_path, sqlite3.Binary(self._encode(text))))
@@ -0,0 +1,308 @@
+"""
+A compact representation of polynomials used when generating and
+simplifying the equations of large Ptolemy varieties.
+
+Variables are interned to integer ids by a VariableRegistry. A monomial
+is a tuple of integers sorted by variable id, each integer packing the id
+of a variable and its exponent. A polynomial is a dictionary mapping such
+monomials to non-zero coefficients.
+
+Use SparsePolynomial.from_polynomial and to_polynomial to convert from and
+to the Polynomial class in polynomial.py which is used everywhere else.
+"""
+
+from .polynomial import Polynomial, Monomial
+
+__all__ = ['VariableRegistry', 'SparsePolynomial']
+
+# Number of bits used for the exponent when packing a variable id and an
+# exponent into one integer.
+_exponent_bits = 16
+_exponent_mask = (1 << _exponent_bits) - 1
+
+class VariableRegistry(object):
+    """
+    Interns variable names to integer ids.
+
+    >>> r = VariableRegistry()
+    >>> r.variable_id('c_1020_3')
+    0
+    >>> r.variable_id('u')
+    1
+    >>> r.variable_id('c_1020_3')
+    0
+    >>> r.variable_name(1)
+    'u'
+    """
+
+    def __init__(self):
+        self._ids = { }
+        self._names = [ ]
+
+    def variable_id(self, name):
+        i = self._ids.get(name)
+        if i is None:
+            i = len(self._names)
+            self._ids[name] = i
+            self._names.append(name)
+        return i
+
+    def variable_name(self, i):
+        return self._names[i]
+
+    def __len__(self):
+        return len(self._names)
+
+class SparsePolynomial(object):
+    """
+    A polynomial with variables interned to integers, see module
+    documentation. All polynomials that are combined need to use the
+    same VariableRegistry.
+
+    >>> r = VariableRegistry()
+    >>> x = SparsePolynomial.from_variable_name('x', r)
+    >>> t = SparsePolynomial.from_variable_name('t', r)
+    >>> one = SparsePolynomial.constant_polynomial(1, r)
+    >>> p = (x + one) ** 3
+    >>> p.to_polynomial()
+    1 + 3 * x + 3 * x^2 + x^3
+    >>> p.num_terms()
+    4
+    >>> (p * t - t).to_polynomial()
+    3 * t * x + 3 * t * x^2 + t * x^3
+    >>> p.substitute({'x' : t - one}).to_polynomial()
+    t^3
+    >>> (p - t ** 3).substitute({'x' : t - one}).num_terms()
+    0
+    >>> sorted(p.variables())
+    ['x']
+
+    Converting from and to Polynomial:
+
+    >>> q = Polynomial.parse_string('t * x * y + t^6 + 3 * t^2')
+    >>> SparsePolynomial.from_polynomial(q, r).to_polynomial() == q
+    True
+    >>> m = SparsePolynomial.monomial([('y', 1), ('x', 2)], r, coefficient = 5)
+    >>> m.to_polynomial()
+    5 * x^2 * y
+    """
+
+    def __init__(self, terms, registry):
+        # Maps monomials (see module documentation) to coefficients.
+        # Coefficients are assumed to be non-zero.
+        self._terms = terms
+        self._registry = registry
+
+    @classmethod
+    def constant_polynomial(cls, constant, registry):
+        """Construct a constant polynomial."""
+        if constant == 0:
+            return SparsePolynomial({ }, registry)
+        return SparsePolynomial({ () : constant }, registry)
+
+    @classmethod
+    def from_variable_name(cls, var, registry):
+        """Construct a polynomial consisting of a single variable."""
+        return cls.monomial([ (var, 1) ], registry)
+
+    @classmethod
+    def monomial(cls, vars_and_exponents, registry, coefficient = 1):
+        """
+        Construct a monomial from pairs (variable name, exponent) where
+        each variable occurs only once.
+        """
+
+        monomial = tuple(sorted(
+            (registry.variable_id(var) << _exponent_bits) | expo
+            for var, expo in vars_and_exponents
+            if expo > 0))
+
+        return SparsePolynomial({ monomial : coefficient }, registry)
+
+    @classmethod
+    def from_polynomial(cls, polynomial, registry):
+        """Convert an instance of Polynomial."""
+
+        terms = { }
+        for m in polynomial.get_monomials():
+            monomial = tuple(sorted(
+                (registry.variable_id(var) << _exponent_bits) | expo
+                for var, expo in m.get_vars()))
+            terms[monomial] = m.get_coefficient()
+
+        return SparsePolynomial(terms, registry)
+
+    def to_polynomial(self):
+        """Convert to an instance of Polynomial."""
+
+        name = self._registry.variable_name
+
+        return Polynomial(tuple(
+            Monomial(
+                coefficient,
+                tuple(sorted(
+                    (name(packed >> _exponent_bits), packed & _exponent_mask)
+                    for packed in monomial)))
+            for monomial, coefficient in self._terms.items()))
+
+    def num_terms(self):
+        return len(self._terms)
+
+    def variables(self):
+        """Return a set of all variable names in the polynomial."""
+
+        name = self._registry.variable_name
+        ids = set(packed >> _exponent_bits
+                  for monomial in self._terms
+                  for packed in monomial)
+        return set(name(i) for i in ids)
+
+    def is_constant(self):
+        return all(not monomial for monomial in self._terms)
+
+    def __eq__(self, other):
+        return self._terms == other._terms
+
+    def __add__(self, other):
+        terms = dict(self._terms)
+        _add_terms(terms, other._terms)
+        return SparsePolynomial(terms, self._registry)
+
+    def __neg__(self):
+        return SparsePolynomial(
+            { monomial : -coefficient
+              for monomial, coefficient in self._terms.items() },
+            self._registry)
+
+    def __sub__(self, other):
+        return self + (-other)
+
+    def __mul__(self, other):
+        terms = { }
+        for m, c in self._terms.items():
+            for n, d in other._terms.items():
+                monomial = _multiply_monomials(m, n)
+                coefficient = c * d
+                e = terms.get(monomial)
+                if e is not None:
+                    coefficient = e + coefficient
+                if coefficient == 0:
+                    terms.pop(monomial, None)
+                else:
+                    terms[monomial] = coefficient
+        return SparsePolynomial(terms, self._registry)
+
+    def __pow__(self, other):
+        assert isinstance(other, int)
+        assert other >= 0
+
+        if other == 0:
+            return SparsePolynomial.constant_polynomial(1, self._registry)
+        if other == 1:
+            return self
+        if other % 2 == 1:
+            return self * (self ** (other - 1))
+        return (self * self) ** (other // 2)
+
+    def substitute(self, d):
+        """
+        Take a dictionary mapping variable name -> SparsePolynomial and
+        replace each variable by the corresponding polynomial.
+        """
+
+        substitution = { self._registry.variable_id(var) : poly
+                         for var, poly in d.items() }
+
+        # Cache of the powers of the substituted polynomials
+        powers = { }
+
+        def power(i, expo):
+            key = (i, expo)
+            result = powers.get(key)
+            if result is None:
+                result = substitution[i] ** expo
+                powers[key] = result
+            return result
+
+        # The terms of the result, accumulated in place
+        terms = { }
+
+        for monomial, coefficient in self._terms.items():
+            kept = [ ]
+            substituted = [ ]
+            for packed in monomial:
+                i = packed >> _exponent_bits
+                if i in substitution:
+                    substituted.append((i, packed & _exponent_mask))
+                else:
+                    kept.append(packed)
+
+            if not substituted:
+                _add_terms(terms, { monomial : coefficient })
+                continue
+
+            term = SparsePolynomial({ tuple(kept) : coefficient },
+                                    self._registry)
+            for i, expo in substituted:
+                term = term * power(i, expo)
+            _add_terms(terms, term._terms)
+
+        return SparsePolynomial(terms, self._registry)
+
+    def __repr__(self):
+        return repr(self.to_polynomial())
+
+def _add_terms(terms, other_terms):
+    """
+    Adds the terms of a polynomial given as dictionary to the dictionary
+    terms in place, removing terms that cancel.
+    """
+
+    for monomial, coefficient in other_terms.items():
+        c = terms.get(monomial)
+        if c is None:
+            terms[monomial] = coefficient
+        else:
+            c = c + coefficient
+            if c == 0:
+                del terms[monomial]
+            else:
+                terms[monomial] = c
+
+def _multiply_monomials(m, n):
+    """
+    Multiplies two monomials given as sorted tuples of packed integers
+    by merging them.
+    """
+
+    if not m:
+        return n
+    if not n:
+        return m
+
+    result = [ ]
+    i = 0
+    j = 0
+    len_m = len(m)
+    len_n = len(n)
+    while i < len_m and j < len_n:
+        a = m[i]
+        b = n[j]
+        var_a = a >> _exponent_bits
+        var_b = b >> _exponent_bits
+        if var_a < var_b:
+            result.append(a)
+            i += 1
+        elif var_b < var_a:
+            result.append(b)
+            j += 1
+        else:
+            expo = (a & _exponent_mask) + (b & _exponent_mask)
+            if expo > _exponent_mask:
+                raise OverflowError("Exponent too large for SparsePolynomial")
+            result.append((var_a << _exponent_bits) | expo)
+            i += 1
+            j += 1
+    result.extend(m[i:])
+    result.extend(n[j:])
+    return tuple(result)
@@ -18,6 +18,10 @@ from snappy.ptolemy import solutions_from_magma, Flattenings, parse_solutions
 from snappy.ptolemy.processFileBase import get_manifold
 from snappy.ptolemy import __path__ as ptolemy_paths
 from snappy.ptolemy.coordinates import PtolemyCannotBeCheckedError
+from snappy.ptolemy.rur import RUR
+from snappy.ptolemy import findLoops
+# Only imported lazily by snappy itself.
+from snappy.ptolemy import manifoldMethods
 from snappy.sage_helper import _within_sage, doctest_modules
 from snappy.pari import pari
 import bz2
@@ -242,6 +246,25 @@ def testMatrixMethods(manifold, solutions):
     G = manifold.fundamental_group(simplify_presentation = True)
     Graw = manifold.fundamental_group(simplify_presentation = False)
 
+    zero_dimensional_solutions = [
+        solution for solution in solutions if solution.dimension == 0 ]
+    batched_images = findLoops.images_of_original_generators_for_solutions(
+        zero_dimensional_solutions, penalties = (0, 1, 1))
+    if zero_dimensional_solutions:
+        # Computed without the cache and without sharing products
+        M = zero_dimensional_solutions[0].get_manifold()
+        M._choose_generators(False, False)
+        loops = findLoops._compute_loops_for_generators(M, (0, 1, 1))
+        # Edges have no __eq__
+        assert repr(loops) == repr(findLoops.compute_loops_for_generators(
+            M, (0, 1, 1)))
+    for solution, images in zip(zero_dimensional_solutions, batched_images):
+        assert images == (
+            [ findLoops._evaluate_path(solution, loop)
+              for loop in loops ],
+            [ findLoops._evaluate_path(solution, loop ** -1)
+              for loop in loops ])
+
     for solution in solutions:
         if solution.dimension == 0:
 
@@ -281,6 +304,11 @@ def testMatrixMethods(manifold, solutions):
                 assert matrix_is_diagonal(
                     solution.evaluate_word(rel))
 
+            for m in solution.evaluate_words(G.relators(), G):
+                assert matrix_is_pm_identity(m)
+            for m in cross_ratios.evaluate_words(Graw.relators()):
+                assert matrix_is_diagonal(m)
+
 
 def test_flattenings_from_tetrahedra_shapes_of_manifold():
 
@@ -508,6 +536,11 @@ def testMapleLikeRur():
     sol_pur = sols[0].to_PUR()
     sol_pur.check_against_manifold()
 
+    # The batched conversion agrees with converting each RUR separately
+    for key, value in sols[0].items():
+        if isinstance(value, RUR):
+            assert sol_pur[key] == value.to_PUR()
+
     cross_ratios[0].multiply_terms_in_RUR().check_against_manifold()
     cross_ratios[0].multiply_and_simplify_terms_in_RUR().check_against_manifold()
     cross_ratio_pur = cross_ratios[0].to_PUR()
@@ -638,6 +671,22 @@ def testNumericalSolutions():
 
     check_volumes(allCVolumes, expected_cvolumes)
 
+    # Solving in parallel gives the same solutions in the same order
+    for variety in varieties:
+        decomposition = ptolemy.processMagmaFile.decomposition_from_magma(
+            get_precomputed_magma(variety,
+                                  dir = testing_files_generalized_directory))
+        for component in decomposition:
+            if component.dimension > 0:
+                continue
+            serial = component.solutions(numerical = True)
+            parallel = list(component.iter_numerical_solutions(
+                num_processes = 2))
+            assert len(serial) == len(parallel)
+            for s, p in zip(serial, parallel):
+                assert (s.complex_volume_numerical() -
+                        p.complex_volume_numerical()).abs() < 1e-80
+
 def testGeometricRep(compute_solutions):
 
     from snappy.ptolemy import geometricRep
@@ -799,7 +848,9 @@ modules = [ptolemy.component, ptolemy.coordinates, ptolemy.manifoldMethods,
            ptolemy.matrix, ptolemy.polynomial, ptolemy.processMagmaFile,
            ptolemy.ptolemyObstructionClass, ptolemy.ptolemyVariety,
            ptolemy.ptolemyVariety, ptolemy.processFileBase, ptolemy.processRurFile,
-           ptolemy.rur, ptolemy.utilities]
+           ptolemy.rur, ptolemy.solutionRepository,
+           ptolemy.sparseMatrix, ptolemy.sparsePolynomial,
+           ptolemy.utilities]
 if test_regina:
     modules.append(ptolemy.reginaWrapper)
 
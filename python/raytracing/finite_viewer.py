@@ -2,6 +2,7 @@ import tkinter, math, sys
 from tkinter import ttk
 from .gui_utilities import UniformDictController, FpsLabelUpdater
 from .raytracing_view import *
+from .filling_solver import FillingSolver
 from .hyperboloid_utilities import unit_3_vector_and_distance_to_O13_hyperbolic_translation
 from .zoom_slider import Slider, ZoomSlider
 
@@ -25,6 +26,9 @@ class FiniteViewer(ttk.Frame):
             self, manifold, weights, cohomology_basis, cohomology_class)
 
         self.filling_dict = { 'fillings' : self._fillings_from_manifold() }
+        self.filling_solver = FillingSolver(
+            self.widget, self.widget.manifold,
+            self.fillings_solved)
 
         row = 0
         self.notebook = ttk.Notebook(self)
@@ -444,24 +448,25 @@ class FiniteViewer(ttk.Frame):
                    in self.widget.manifold.cusp_info() ] ]
 
     def pull_fillings_from_manifold(self):
+        self.filling_solver.reset()
         self.filling_dict['fillings'] = self._fillings_from_manifold()
         self.update_filling_sliders()
         self.widget.recompute_raytracing_data_and_redraw()
         # self.update_volume_label()
 
     def push_fillings_to_manifold(self):
-        self.widget.manifold.dehn_fill(
+        # Solved in the background, see fillings_solved.
+        self.filling_solver.request(
             self.filling_dict['fillings'][1])
 
-        self.widget.recompute_raytracing_data_and_redraw()
-        # self.update_volume_label()
-
-        if self.fillings_changed_callback:
-            self.fillings_changed_callback()
-
     def recompute_hyperbolic_structure(self):
-        self.widget.manifold.init_hyperbolic_structure(
+        self.filling_solver.request(
+            self.filling_dict['fillings'][1],
             force_recompute = True)
+
+    def fillings_solved(self):
+        # Called by the filling_solver once the shapes for the
+        # latest fillings have been set on the manifold.
         self.widget.recompute_raytracing_data_and_redraw()
 
         # Should we reset the view state since it might
@@ -485,6 +490,10 @@ class FiniteViewer(ttk.Frame):
     def build_menus(self):
         pass
 
+    def delete_resource(self):
+        # Called when the window is closed, terminates the worker thread.
+        self.filling_solver.stop()
+
 ###############################################################################
 # Helpers
 
@@ -5,8 +5,14 @@ from ..upper_halfspace.ideal_point import ideal_point_to_r13
 
 from ..matrix import matrix
 
+import bisect
 import heapq
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 class GeodesicForParabolicElementError(ValueError):
     def __init__(self, trace):
         self.trace = trace
@@ -172,7 +178,18 @@ class GeodesicInfo:
         tet, face, matrix = self.initial_tet_face_and_matrix
         self.pending_pieces = [ PendingPiece(0, (tet, matrix)) ]
         self.visited = TetAndMatrixSet()
+        # Pairs (d, (tet, R13 endpoints)) sorted by the distance d of the
+        # translate of the tetrahedron to the geodesic, covering the tube
+        # of the largest radius requested so far.
         self.tube_pieces = [ ]
+        # The d's of self.tube_pieces, for bisecting.
+        self.tube_piece_distances = [ ]
+
+        if numpy:
+            # Same as self.tet_to_vertices for batched computations.
+            self.tet_to_vertices_array = numpy.array(
+                [ [ complex(v) for v in vertices ]
+                  for vertices in self.tet_to_vertices ])
 
         self.geodesic_pieces = None
 
@@ -301,36 +318,53 @@ class GeodesicInfo:
         In other words, we take a piece of the tube in H^3 covering the tube
         about the closed geodesic in the manifold once and return all translates
         of tetrahedra intersecting the tube.
+
+        The pieces are cached, so only pieces for the part of the tube
+        outside the largest radius requested so far are computed.
         """
 
         # PendingPiece's (essentially (tet, matrix) pairs) for which we
         # still need to check whether they intersect the geodesic
 
-        while self.pending_pieces[0].d < radius:
-            # Pick PendingPiece closest to geodesic.
-            pending_piece = heapq.heappop(self.pending_pieces)
-            tet_and_matrix = pending_piece.tet_and_matrix
-            # If not visited already
-            if self.visited.add(tet_and_matrix):
-                tet, m = tet_and_matrix
+        r = float(radius)
+
+        new_pieces = [ ]
+
+        while self.pending_pieces and self.pending_pieces[0].d < r:
+            # Pick all PendingPiece's within radius that were not visited
+            # already and process them as a batch.
+            candidates = [ ]
+            while self.pending_pieces and self.pending_pieces[0].d < r:
+                candidates.append(
+                    heapq.heappop(self.pending_pieces).tet_and_matrix)
+            tets_and_matrices = [
+                tet_and_matrix
+                for tet_and_matrix, is_new in zip(
+                        candidates, self.visited.add_many(candidates))
+                if is_new ]
+
+            for (tet, m), face_dists in zip(
+                    tets_and_matrices,
+                    self.distances_of_faces_to_geodesic(tets_and_matrices)):
 
                 tet_generators_info = self.generators_info[tet]
 
                 # Compute the vertices of the translate of the tetrahedron
                 vertices = self.images_of_vertices_of_tetrahedron(tet, m)
 
-                self.tube_pieces.append(
-                    (pending_piece.d,
+                # The distance of the translate of the tetrahedron to the
+                # geodesic (which is 0 if the geodesic intersects a face).
+                # Unlike the distance of the face through which we entered
+                # the tetrahedron, this does not depend on the order in
+                # which the pieces were found, so the pieces of a tube of
+                # smaller radius are exactly those with smaller d.
+                new_pieces.append(
+                    (min(face_dists),
                      (tet, self.transfer_endpoints(tet, vertices))))
 
                 # For each face
                 for f in range(4):
-                    # The three vertices of the face
-                    face_vertices = vertices[f+1:] + vertices[:f]
-
-                    d = dist_triangle_and_std_geodesic(face_vertices)
-
-                    # If yes, traverse the face
+                    # Traverse the face
                     new_tet = tet_generators_info['neighbors'][f]
                     g = tet_generators_info['generators'][f]
                     if g != 0:
@@ -345,7 +379,59 @@ class GeodesicInfo:
                     # Add as pending tet
                     heapq.heappush(
                         self.pending_pieces,
-                        PendingPiece(d, (new_tet, new_m)))
+                        PendingPiece(face_dists[f], (new_tet, new_m)))
+
+        if new_pieces:
+            self.tube_pieces = sorted(self.tube_pieces + new_pieces,
+                                      key = lambda piece: piece[0])
+            self.tube_piece_distances = [ d for d, piece in self.tube_pieces ]
+
+    def distances_of_faces_to_geodesic(self, tets_and_matrices):
+        """
+        Given a list of pairs (tet, matrix), returns for each of them the
+        distances of the four faces of the image of the tetrahedron under
+        the matrix to the geodesic (from 0 to infty) as floats.
+
+        The distances are only used to decide which tetrahedra intersect a
+        tube, so they are computed with doubles and, if NumPy is available,
+        for all faces at once.
+        """
+
+        if not tets_and_matrices:
+            return [ ]
+
+        if numpy is None:
+            result = [ ]
+            for tet, m in tets_and_matrices:
+                vertices = self.images_of_vertices_of_tetrahedron(tet, m)
+                result.append(
+                    [ float(dist_triangle_and_std_geodesic(
+                        vertices[f+1:] + vertices[:f]))
+                      for f in range(4) ])
+            return result
+
+        tets = numpy.array([ tet for tet, m in tets_and_matrices ])
+        # Matrices as n x 2 x 2 array
+        matrices = numpy.array(
+            [ [ [ complex(m[i,j]) for j in range(2) ] for i in range(2) ]
+              for tet, m in tets_and_matrices ])
+
+        # Images of the vertices of the tetrahedra as n x 4 array, see
+        # sl2c_action_on_boundary.
+        vertices = self.tet_to_vertices_array[tets]
+        num = matrices[:, 0, 0, None] * vertices + matrices[:, 0, 1, None]
+        denom = matrices[:, 1, 0, None] * vertices + matrices[:, 1, 1, None]
+        is_infinite = numpy.abs(denom) < 1e-30
+        vertices = numpy.where(
+            is_infinite,
+            1.0e64,
+            num / numpy.where(is_infinite, 1.0, denom))
+
+        # The vertices of face f are vertices[f+1:] + vertices[:f].
+        faces = vertices[:, _face_vertex_indices]
+
+        return _dists_triangles_and_std_geodesic(
+            faces.reshape(-1, 3)).reshape(-1, 4).tolist()
 
     def transfer_endpoints(self, tet, vertices):
 
@@ -397,13 +483,10 @@ class GeodesicInfo:
 
         self.cache_pieces_for_tube(radius)
 
-        result = []
-        for d, tets_and_R13_endpoints in self.tube_pieces:
-            if d > radius:
-                break
-            result.append(tets_and_R13_endpoints)
+        n = bisect.bisect_right(self.tube_piece_distances, float(radius))
 
-        return result
+        return [ tets_and_R13_endpoints
+                 for d, tets_and_R13_endpoints in self.tube_pieces[:n] ]
 
     def __eq__(self, other):
         if not self.has_same_complex_length(other):
@@ -435,37 +518,64 @@ class GeodesicInfo:
 def _are_points_equal(a, b, epsilon):
     return all(abs(x-y) < epsilon for x, y in zip(a,b))
 
-def pack_tets_and_R13_heads_and_tails_for_shader(
-                                geodesic_info, tets_and_heads_and_tails):
+def group_tets_and_R13_heads_and_tails_by_tet(
+                                num_tetrahedra, tets_and_heads_and_tails):
     """
-    Given an instance of GeodesicInfo and the output of
-    find_tets_and_R13_heads_and_tails_for_tube, packs the data into a format
-    that can be consumed by the glsl shader.
+    Given the output of compute_tets_and_R13_endpoints_for_tube, returns
+    a list containing for each tetrahedron the list of pairs (head, tail)
+    for that tetrahedron.
 
-    That is, the result is (heads, tails, indices) where heads and tails are
-    a list of 4-vectors. For tetrahedron i, we need to draw a geodesic from
-    each heads[j] to tails[j] for each j = indices[i], ..., indices[i+1]-1.
+    These lists (for several geodesics) can be packed with
+    pack_tets_and_R13_heads_and_tails_for_shader so that the lists only
+    have to be recomputed for the geodesics that changed.
+
+    >>> group_tets_and_R13_heads_and_tails_by_tet(
+    ...     3, [(2, ('h0', 't0')), (0, ('h1', 't1')), (2, ('h2', 't2'))])
+    [[('h1', 't1')], [], [('h0', 't0'), ('h2', 't2')]]
     """
 
     tet_to_heads_and_tails = [
-        [] for tet in range(geodesic_info.num_tetrahedra) ]
+        [] for tet in range(num_tetrahedra) ]
 
     for tet, head_and_tail in tets_and_heads_and_tails:
         tet_to_heads_and_tails[tet].append(head_and_tail)
 
+    return tet_to_heads_and_tails
+
+def pack_tets_and_R13_heads_and_tails_for_shader(
+                                num_tetrahedra, tet_to_heads_and_tails_list):
+    """
+    Given a list of outputs of group_tets_and_R13_heads_and_tails_by_tet,
+    packs the data into a format that can be consumed by the glsl shader.
+
+    That is, the result is (heads, tails, indices, entries) where heads and
+    tails are a list of 4-vectors. For tetrahedron i, we need to draw a
+    geodesic from each heads[j] to tails[j] for each
+    j = indices[i], ..., indices[i+1]-1. entries[j] is the index into
+    tet_to_heads_and_tails_list the pair heads[j], tails[j] came from.
+
+    >>> pack_tets_and_R13_heads_and_tails_for_shader(
+    ...     2, [ [[('h0', 't0')], [('h1', 't1')]], [[], [('h2', 't2')]] ])
+    (['h0', 'h1', 'h2'], ['t0', 't1', 't2'], [0, 1, 3], [0, 0, 1])
+    """
+
     heads = []
     tails = []
     indices = [ ]
+    entries = [ ]
 
-    for heads_and_tails in tet_to_heads_and_tails:
+    for tet in range(num_tetrahedra):
         indices.append(len(heads))
-        for head, tail in heads_and_tails:
-            heads.append(head)
-            tails.append(tail)
+        for entry, tet_to_heads_and_tails in enumerate(
+                                        tet_to_heads_and_tails_list):
+            for head, tail in tet_to_heads_and_tails[tet]:
+                heads.append(head)
+                tails.append(tail)
+                entries.append(entry)
 
     indices.append(len(heads))
 
-    return heads, tails, indices
+    return heads, tails, indices, entries
 
 def _shader_vertices(z):
     """
@@ -475,3 +585,78 @@ def _shader_vertices(z):
     return [ w, 1/w, -1/w, -w ]
 
 
+
+# For the faces f = 0, ..., 3 of a tetrahedron, the indices of
+# vertices[f+1:] + vertices[:f].
+_face_vertex_indices = [ [ (f + i) % 4 for i in range(1, 4) ]
+                         for f in range(4) ]
+
+def _dists_triangles_and_std_geodesic(verts):
+    """
+    Vectorized version of dist_triangle_and_std_geodesic taking an n x 3
+    NumPy array of complex numbers and returning an array of n floats.
+    """
+
+    with numpy.errstate(divide = 'ignore', invalid = 'ignore',
+                        over = 'ignore'):
+
+        v0, v1, v2 = verts[:, 0], verts[:, 1], verts[:, 2]
+
+        ##################
+        # Case 1, see _dist_triangle_and_std_geodesic_interior_hit
+
+        # Side lengths (opposite to vertex i) and weights for the
+        # circumcenter, see _weight_for_circumcenter
+        side_lengths = [ numpy.abs(v2 - v1),
+                         numpy.abs(v0 - v2),
+                         numpy.abs(v1 - v0) ]
+        weights = [ ]
+        for i in range(3):
+            c, a, b = [ side_lengths[(i + j) % 3] for j in range(3) ]
+            weights.append(c * (c ** 2 - a ** 2 - b ** 2) / (2 * a * b))
+        t = weights[0] + weights[1] + weights[2]
+        O = (weights[0] * v0 + weights[1] * v1 + weights[2] * v2) / t
+
+        R = numpy.abs(v0 - O)
+        D = numpy.abs(O)
+        c_sqr = D ** 2 - R ** 2
+        c = numpy.sqrt(c_sqr)
+        a = c_sqr / D
+        h = (a / D) * O
+        sidedness = [
+            ((h - verts[:, i]) / (verts[:, (i + 1) % 3] - verts[:, i])).imag > 0
+            for i in range(3) ]
+        b = c * R / D
+
+        is_interior_hit = (
+            (numpy.abs(t) >= 1.0e-8) &
+            (R <= D) &
+            (sidedness[0] == sidedness[1]) &
+            (sidedness[1] == sidedness[2]) &
+            (b > 0))
+        interior_dist = numpy.arccosh(1 + 2 * (a / b) ** 2) / 2
+
+        ##################
+        # Case 2, cross ratios of the tetrahedra spanned by the geodesic
+        # and an edge of the triangle, see cross_ratio
+
+        inf = 1.0e64
+        zs = numpy.stack(
+            [ (verts[:, (i + 1) % 3] * (inf - verts[:, i])) /
+              (inf * (verts[:, (i + 1) % 3] - verts[:, i]))
+              for i in range(3) ])
+        intersects = (
+            numpy.all(zs.imag >  1.0e-9, axis = 0) |
+            numpy.all(zs.imag < -1.0e-9, axis = 0))
+
+        ########
+        # Case 3, see dist_of_opposite_edges_from_cross_ratio
+
+        w = numpy.sqrt(zs) + numpy.sqrt(zs - 1)
+        edge_dist = numpy.min(2 * numpy.abs(numpy.log(numpy.abs(w))),
+                              axis = 0)
+
+    return numpy.where(
+        is_interior_hit,
+        interior_dist,
+        numpy.where(intersects, 0.0, edge_dist))
@@ -1,4 +1,6 @@
-from .geodesic import GeodesicInfo
+from .geodesic import (GeodesicInfo,
+                       group_tets_and_R13_heads_and_tails_by_tet,
+                       pack_tets_and_R13_heads_and_tails_for_shader)
 
 class Geodesics:
     def __init__(self, manifold, words):
@@ -13,6 +15,18 @@ class Geodesics:
         31
         >>> len(b['geodesics.geodesicOffsets'][1])
         10
+
+        Only the data for geodesics whose radius changed are recomputed:
+
+        >>> g.set_enables_and_radii_and_update([False, True], [0.3, 0.4])
+        >>> len(g.get_uniform_bindings()['geodesics.geodesicHeads'][1])
+        25
+        >>> g.set_enables_and_radii_and_update([True, True], [0.2, 0.4])
+        >>> b == g.get_uniform_bindings()
+        False
+        >>> g.set_enables_and_radii_and_update([True, True], [0.3, 0.4])
+        >>> b == g.get_uniform_bindings()
+        True
         """
 
         self.manifold = manifold
@@ -33,39 +47,54 @@ class Geodesics:
         self.data_radius_params = []
         self.data_offsets = (self.num_tetrahedra + 1) * [ 0 ]
 
+        # Maps index of a geodesic to a triple (radius, radius_param,
+        # output of group_tets_and_R13_heads_and_tails_by_tet) for the
+        # radius the data were last computed for.
+        self.geodesic_index_to_tube_data = {}
+        # Enables and radii of last call to set_enables_and_radii_and_update
+        self.enables_and_radii = None
+
     def set_enables_and_radii_and_update(self, enables, radii):
 
         if not self.geodesic_infos:
             return
 
-        self.data_heads = []
-        self.data_tails = []
-        self.data_indices = []
-        self.data_radius_params = []
-        self.data_offsets = []
+        enables_and_radii = (list(enables), list(radii))
+        if enables_and_radii == self.enables_and_radii:
+            return
+        self.enables_and_radii = enables_and_radii
 
-        tets_to_data = [ [] for i in range(self.num_tetrahedra) ]
+        indices = []
+        radius_params = []
+        tet_to_heads_and_tails_list = []
 
         for i, (enable, radius, geodesic_info) in enumerate(
                 zip(enables, radii, self.geodesic_infos)):
             if enable:
-                radius = self.RF(radius)
-                radius_param = radius.cosh() ** 2 / 2
-
-                tets_and_endpoints = (
-                    geodesic_info.compute_tets_and_R13_endpoints_for_tube(radius))
-                for tet, endpoints in tets_and_endpoints:
-                    tets_to_data[tet].append(
-                        (endpoints, i, radius_param))
-
-        for data in tets_to_data:
-            self.data_offsets.append(len(self.data_heads))
-            for (head, tail), i, radius_param in data:
-                self.data_heads.append(head)
-                self.data_tails.append(tail)
-                self.data_indices.append(i)
-                self.data_radius_params.append(radius_param)
-        self.data_offsets.append(len(self.data_heads))
+                tube_data = self.geodesic_index_to_tube_data.get(i)
+                if tube_data is None or tube_data[0] != radius:
+                    RF_radius = self.RF(radius)
+                    tube_data = (
+                        radius,
+                        RF_radius.cosh() ** 2 / 2,
+                        group_tets_and_R13_heads_and_tails_by_tet(
+                            self.num_tetrahedra,
+                            geodesic_info.compute_tets_and_R13_endpoints_for_tube(
+                                RF_radius)))
+                    self.geodesic_index_to_tube_data[i] = tube_data
+
+                indices.append(i)
+                radius_params.append(tube_data[1])
+                tet_to_heads_and_tails_list.append(tube_data[2])
+
+        (self.data_heads,
+         self.data_tails,
+         self.data_offsets,
+         entries) = pack_tets_and_R13_heads_and_tails_for_shader(
+            self.num_tetrahedra, tet_to_heads_and_tails_list)
+
+        self.data_indices = [ indices[entry] for entry in entries ]
+        self.data_radius_params = [ radius_params[entry] for entry in entries ]
 
     def get_uniform_bindings(self):
         return {
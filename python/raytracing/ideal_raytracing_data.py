@@ -6,6 +6,7 @@ from snappy.SnapPy import matrix, vector
 from snappy.snap.mcomplex_base import *
 
 from snappy.verify.cuspCrossSection import *
+from snappy.snap.kernel_structures import TransferKernelStructuresEngine
 
 from ..upper_halfspace import pgl2c_to_o13
 from ..upper_halfspace.ideal_point import ideal_point_to_r13
@@ -61,6 +62,20 @@ class IdealRaytracingData(RaytracingData):
         [    -0.43364676        1e-16  -1.08997684        1e-16 ]
         [          1e-16        1e-16        1e-16   1.00000000 ], 1, 0.0)
 
+    When only the cusp areas, insphere scale, weights or Dehn-fillings
+    change, the data can be updated without starting from scratch::
+
+        >>> M = Manifold("m004")
+        >>> data = IdealRaytracingData.from_manifold(M)
+        >>> data.update_areas([ 2.0 ])
+        >>> M.dehn_fill((5, 1))
+        >>> data.update_geometry()
+        >>> full = IdealRaytracingData.from_manifold(M, areas = [ 2.0 ])
+        >>> a = data.get_uniform_bindings()['margulisTubeRadiusParams'][1]
+        >>> b = full.get_uniform_bindings()['margulisTubeRadiusParams'][1]
+        >>> max(abs(x - y) for x, y in zip(a, b)) < 1e-9
+        True
+
     """
 
     @staticmethod
@@ -86,11 +101,7 @@ class IdealRaytracingData(RaytracingData):
             manifold,
             manifold.tetrahedra_shapes('rect'),
             one_cocycle = 'develop')
-        c.normalize_cusps()
-        c.compute_translations()
-        c.add_vertex_positions_to_horotriangles()
-        c.lift_vertex_positions_of_horotriangles()
-        c.move_lifted_vertex_positions_to_zero_first()
+        _develop_cusps(c)
 
         # c.mcomplex is the same triangulation encoded as
         # t3m.Mcomplex triangulation
@@ -105,17 +116,9 @@ class IdealRaytracingData(RaytracingData):
         r.peripheral_gluing_equations = snappy_trig.gluing_equations()[
             snappy_trig.num_tetrahedra():]
 
-        r._add_complex_vertices()
-        r._add_R13_vertices()
-        r._add_O13_matrices_to_faces()
-        r._add_R13_planes_to_faces()
-        r._add_R13_horosphere_scales_to_vertices()
-        r._add_cusp_to_tet_matrices()
-        r._add_margulis_tube_ends()
+        r._add_geometry()
+        r._add_area_dependent_data()
         r._add_inspheres()
-        r._add_log_holonomies()
-
-        r._add_cusp_triangle_vertex_positions()
 
         r.add_weights(weights)
         return r
@@ -124,6 +127,90 @@ class IdealRaytracingData(RaytracingData):
         super(IdealRaytracingData, self).__init__(mcomplex)
         self.snappy_manifold = snappy_manifold
 
+    # The data is computed in stages. The stages and the uniform
+    # bindings computed from them are:
+    #
+    #   combinatorics (from_manifold only): the Mcomplex, the peripheral
+    #           gluing equations, the face pairings and color indices
+    #   geometry (depends on the shapes): vertices, planes, O13 matrices,
+    #           cusp matrices, log holonomies, ...
+    #   areas (depends on geometry and cusp areas): horosphere scales
+    #           and radii of the Margulis tubes
+    #   insphere (depends on geometry and insphere scale)
+    #   weights
+    #
+    # The update_* methods only recompute the stages (and their uniform
+    # bindings) that need to be recomputed.
+
+    def update_areas(self, areas):
+        """
+        Changes the cusp areas, only recomputing the horosphere scales
+        and Margulis tube radii.
+        """
+        self.areas = [ self.RF(area) for area in areas ]
+        self._add_area_dependent_data()
+        self._invalidate_uniform_bindings('areas')
+
+    def update_insphere_scale(self, insphere_scale):
+        """
+        Changes the insphere scale, only recomputing the inspheres.
+        """
+        self.insphere_scale = self.RF(insphere_scale)
+        self._add_inspheres()
+        self._invalidate_uniform_bindings('insphere')
+
+    def update_geometry(self, areas = None, insphere_scale = None):
+        """
+        Recomputes all data depending on the shapes of the tetrahedra
+        after the Dehn-fillings (or the hyperbolic structure) of the
+        manifold given to from_manifold changed. The combinatorial data
+        (Mcomplex, peripheral gluing equations, ...) is reused.
+        The cusp areas and insphere scale can be changed at the same time.
+
+        Only works if the manifold still has all tetrahedra positively
+        oriented, otherwise from_manifold needs to be called again.
+        """
+
+        manifold = self.snappy_manifold
+
+        if areas is not None:
+            self.areas = [ self.RF(area) for area in areas ]
+        if insphere_scale is not None:
+            self.insphere_scale = self.RF(insphere_scale)
+
+        if manifold.solution_type() != 'all tetrahedra positively oriented':
+            raise ValueError(
+                "Cannot update geometry of non-geometric solution. "
+                "Use from_manifold instead.")
+
+        t = TransferKernelStructuresEngine(self.mcomplex, manifold)
+        t.add_shapes(manifold.tetrahedra_shapes('rect'))
+
+        c = ComplexCuspCrossSection(self.mcomplex)
+        c.add_structures(None)
+        c.manifold = manifold
+        _develop_cusps(c)
+
+        self._add_geometry()
+        self._add_area_dependent_data()
+        self._add_inspheres()
+
+        self._invalidate_uniform_bindings('geometry', 'areas', 'insphere')
+
+    def _add_geometry(self):
+        self._add_complex_vertices()
+        self._add_R13_vertices()
+        self._add_O13_matrices_to_faces()
+        self._add_R13_planes_to_faces()
+        self._add_cusp_to_tet_matrices()
+        self._add_margulis_tube_ends()
+        self._add_log_holonomies()
+        self._add_cusp_triangle_vertex_positions()
+
+    def _add_area_dependent_data(self):
+        self._add_R13_horosphere_scales_to_vertices()
+        self._add_margulis_tube_radius_params()
+
     def _add_O13_matrices_to_faces(self):
         for tet in self.mcomplex.Tetrahedra:
             tet.O13_matrices = {
@@ -216,18 +303,8 @@ class IdealRaytracingData(RaytracingData):
         a, c = m_param.real(), m_param.imag()
         b, d = l_param.real(), l_param.imag()
 
-        det = a*d - b * c
-        cusp.mat_log = matrix([[d,-b], [-c, a]]) / det
-
-        if cusp.is_complete:
-            cusp.margulisTubeRadiusParam = 0.0
-        else:
-            slope = 2 * self.areas[i] / abs(det)
-
-            x = (slope ** 2 / (slope ** 2 + 1)).sqrt()
-            y = (1 / (slope ** 2 + 1)).sqrt()
-            rSqr = 1 + (x ** 2 + (1 - y) ** 2) / (2 * y)
-            cusp.margulisTubeRadiusParam = 0.25 * (1.0 + rSqr)
+        cusp.log_holonomy_det = a*d - b * c
+        cusp.mat_log = matrix([[d,-b], [-c, a]]) / cusp.log_holonomy_det
 
     def _add_log_holonomies(self):
         shapes = [
@@ -239,20 +316,61 @@ class IdealRaytracingData(RaytracingData):
                                    self.snappy_manifold.cusp_info()):
             self._add_log_holonomies_to_cusp(cusp, shapes)
 
+    def _add_margulis_tube_radius_params(self):
+        for cusp in self.mcomplex.Vertices:
+            if cusp.is_complete:
+                cusp.margulisTubeRadiusParam = 0.0
+            else:
+                slope = (2 * self.areas[cusp.Index] /
+                         abs(cusp.log_holonomy_det))
+
+                x = (slope ** 2 / (slope ** 2 + 1)).sqrt()
+                y = (1 / (slope ** 2 + 1)).sqrt()
+                rSqr = 1 + (x ** 2 + (1 - y) ** 2) / (2 * y)
+                cusp.margulisTubeRadiusParam = 0.25 * (1.0 + rSqr)
+
     def get_uniform_bindings(self):
         # _check_consistency(self.mcomplex)
 
         d = super(IdealRaytracingData, self).get_uniform_bindings()
+        d.update(self._cached_uniform_bindings(
+            'areas', self._get_area_dependent_uniform_bindings))
+        d.update(self._cached_uniform_bindings(
+            'insphere', self._get_insphere_uniform_bindings))
+        d['nonGeometricTexture'] = ('int', 0)
 
-        orientations = [
-            +1 if tet.ShapeParameters[t3m.E01].imag() > 0 else -1
-            for tet in self.mcomplex.Tetrahedra ]
+        return d
 
+    def _get_area_dependent_uniform_bindings(self):
         horosphere_scales = [
             tet.R13_horosphere_scales[V]
             for tet in self.mcomplex.Tetrahedra
             for V in t3m.ZeroSubsimplices ]
 
+        margulisTubeRadiusParams = [
+            tet.Class[V].margulisTubeRadiusParam
+            for tet in self.mcomplex.Tetrahedra
+            for V in t3m.ZeroSubsimplices ]
+
+        return {
+            'horosphereScales' : ('float[]', horosphere_scales),
+            'margulisTubeRadiusParams' : ('float[]', margulisTubeRadiusParams) }
+
+    def _get_insphere_uniform_bindings(self):
+        insphereRadiusParams = [
+            tet.cosh_sqr_inradius
+            for tet in self.mcomplex.Tetrahedra ]
+
+        return {
+            'insphereRadiusParams' : ('float[]', insphereRadiusParams) }
+
+    def _get_geometric_uniform_bindings(self):
+        d = super(IdealRaytracingData, self)._get_geometric_uniform_bindings()
+
+        orientations = [
+            +1 if tet.ShapeParameters[t3m.E01].imag() > 0 else -1
+            for tet in self.mcomplex.Tetrahedra ]
+
         margulisTubeTails = [
             tet.margulisTubeEnds[V][0]
             for tet in self.mcomplex.Tetrahedra
@@ -263,11 +381,6 @@ class IdealRaytracingData(RaytracingData):
             for tet in self.mcomplex.Tetrahedra
             for V in t3m.ZeroSubsimplices ]
 
-        margulisTubeRadiusParams = [
-            tet.Class[V].margulisTubeRadiusParam
-            for tet in self.mcomplex.Tetrahedra
-            for V in t3m.ZeroSubsimplices ]
-
         cusp_to_tet_matrices = [
             tet.cusp_to_tet_matrices[V]
             for tet in self.mcomplex.Tetrahedra
@@ -300,27 +413,19 @@ class IdealRaytracingData(RaytracingData):
             for tet in self.mcomplex.Tetrahedra
             for V in t3m.ZeroSubsimplices ]
 
-        insphereRadiusParams = [
-            tet.cosh_sqr_inradius
-            for tet in self.mcomplex.Tetrahedra ]
-
         isNonGeometric = (
             self.snappy_manifold.solution_type() != 'all tetrahedra positively oriented')
 
         d['orientations'] = ('int[]', orientations)
-        d['horosphereScales'] = ('float[]', horosphere_scales)
         d['MargulisTubes.margulisTubeTails'] = ('vec4[]', margulisTubeTails)
         d['MargulisTubes.margulisTubeHeads'] = ('vec4[]', margulisTubeHeads)
-        d['margulisTubeRadiusParams'] = ('float[]', margulisTubeRadiusParams)
         d['TetCuspMatrices.cuspToTetMatrices'] = ('mat4[]', cusp_to_tet_matrices)
         d['TetCuspMatrices.tetToCuspMatrices'] = ('mat4[]', tet_to_cusp_matrices)
         d['cuspTranslations'] = ('mat2[]', cusp_translations)
         d['logAdjustments'] = ('vec2[]', logAdjustments)
         d['cuspTriangleVertexPositions'] = ('mat3x2[]', cuspTriangleVertexPositions)
         d['matLogs'] = ('mat2[]', mat_logs)
-        d['insphereRadiusParams'] = ('float[]', insphereRadiusParams)
         d['isNonGeometric'] = ('bool', isNonGeometric)
-        d['nonGeometricTexture'] = ('int', 0)
 
         return d
 
@@ -373,6 +478,17 @@ class NonGeometricRaytracingData(McomplexEngine):
         boost = boost * m
         return boost, tet_num, weight
 
+def _develop_cusps(c):
+    """
+    Given a ComplexCuspCrossSection, develops the cusps for
+    IdealRaytracingData.
+    """
+    c.normalize_cusps()
+    c.compute_translations()
+    c.add_vertex_positions_to_horotriangles()
+    c.lift_vertex_positions_of_horotriangles()
+    c.move_lifted_vertex_positions_to_zero_first()
+
 def _matrix_taking_0_1_inf_to_given_points(z0, z1, zinf):
     l = z1   - z0
     m = zinf - z1
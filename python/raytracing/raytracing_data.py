@@ -7,13 +7,58 @@ from .hyperboloid_utilities import *
 __all__ = ['RaytracingData']
 
 class RaytracingData(McomplexEngine):
+    """
+    Base class for the data needed by the shader.
+
+    The uniform bindings are grouped into stages (e.g., 'combinatorics',
+    'geometry' or 'weights') and cached so that only the uniforms of the
+    stages invalidated by an update have to be recomputed.
+    """
+
+    def __init__(self, mcomplex):
+        super(RaytracingData, self).__init__(mcomplex)
+        # Maps stage to the uniform bindings of that stage
+        self._uniform_bindings_cache = {}
+
     def add_weights(self, weights):
         for tet in self.mcomplex.Tetrahedra:
             tet.Weights = {
                 F : weights[4 * tet.Index + f] if weights else 0.0
                 for f, F in enumerate(t3m.TwoSubsimplices)}
 
+    def update_weights(self, weights):
+        """
+        Changes the weights for the faces. Only the uniform for the
+        weights is recomputed.
+        """
+        self.add_weights(weights)
+        self._invalidate_uniform_bindings('weights')
+
+    def _invalidate_uniform_bindings(self, *stages):
+        for stage in stages:
+            self._uniform_bindings_cache.pop(stage, None)
+
+    def _cached_uniform_bindings(self, stage, compute):
+        """
+        Returns the uniform bindings of the given stage, calling
+        compute() if they are not cached.
+        """
+        d = self._uniform_bindings_cache.get(stage)
+        if d is None:
+            d = compute()
+            self._uniform_bindings_cache[stage] = d
+        return d
+
     def get_uniform_bindings(self):
+        d = {}
+        for stage, compute in [
+                ('combinatorics', self._get_combinatorial_uniform_bindings),
+                ('geometry', self._get_geometric_uniform_bindings),
+                ('weights', self._get_weight_uniform_bindings) ]:
+            d.update(self._cached_uniform_bindings(stage, compute))
+        return d
+
+    def _get_combinatorial_uniform_bindings(self):
         d = {}
         d['TetrahedraCombinatorics.otherTetNums'] = (
             'int[]',
@@ -27,6 +72,28 @@ class RaytracingData(McomplexEngine):
               for tet in self.mcomplex.Tetrahedra
               for f, F in enumerate(t3m.TwoSubsimplices) ])
 
+        d['Colors.face_color_indices'] = (
+            'int[]',
+            [ tet.Class[F].Index
+              for tet in self.mcomplex.Tetrahedra
+              for F in t3m.TwoSubsimplices ])
+
+        d['Colors.edge_color_indices'] = (
+            'int[]',
+            [ tet.Class[E].Index
+              for tet in self.mcomplex.Tetrahedra
+              for E in t3m.OneSubsimplices ])
+
+        d['Colors.vertex_color_indices'] = (
+            'int[]',
+            [ tet.Class[V].Index
+              for tet in self.mcomplex.Tetrahedra
+              for V in t3m.ZeroSubsimplices ])
+
+        return d
+
+    def _get_geometric_uniform_bindings(self):
+        d = {}
         d['TetrahedraBasics.SO13tsfms'] = (
             'mat4[]',
             [ tet.O13_matrices[F]
@@ -45,24 +112,10 @@ class RaytracingData(McomplexEngine):
               for tet in self.mcomplex.Tetrahedra
               for V in t3m.ZeroSubsimplices ])
 
-        d['Colors.face_color_indices'] = (
-            'int[]',
-            [ tet.Class[F].Index
-              for tet in self.mcomplex.Tetrahedra
-              for F in t3m.TwoSubsimplices ])
-
-        d['Colors.edge_color_indices'] = (
-            'int[]',
-            [ tet.Class[E].Index
-              for tet in self.mcomplex.Tetrahedra
-              for E in t3m.OneSubsimplices ])
-
-        d['Colors.vertex_color_indices'] = (
-            'int[]',
-            [ tet.Class[V].Index
-              for tet in self.mcomplex.Tetrahedra
-              for V in t3m.ZeroSubsimplices ])
+        return d
 
+    def _get_weight_uniform_bindings(self):
+        d = {}
         d['weights'] = (
             'float[]',
             [ tet.Weights[F]
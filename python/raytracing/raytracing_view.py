@@ -137,6 +137,10 @@ class RaytracingView(SimpleImageShaderWidget, HyperboloidNavigation):
 
         self.manifold = manifold
 
+        # The inputs the current raytracing data was computed from,
+        # used to only recompute what has changed.
+        self._raytracing_data_inputs = None
+
         self._unguarded_initialize_raytracing_data()
 
         if self.trig_type == 'finite':
@@ -210,6 +214,52 @@ class RaytracingView(SimpleImageShaderWidget, HyperboloidNavigation):
                 for i, b in enumerate(basis):
                     weights[i] += f * b
 
+        inputs = {
+            'combinatorics' : self._combinatorial_key(),
+            'geometry' : self._geometric_key(),
+            'areas' : list(self.ui_parameter_dict['cuspAreas'][1]),
+            'insphere_scale' : self.ui_parameter_dict['insphere_scale'][1],
+            'weights' : list(weights) if weights else None }
+
+        old_inputs = self._raytracing_data_inputs
+        # Do a full recomputation next time if something fails below.
+        self._raytracing_data_inputs = None
+
+        if old_inputs is None or (
+                old_inputs['combinatorics'] != inputs['combinatorics']):
+            self._compute_raytracing_data(weights)
+        elif self.trig_type == 'finite':
+            if old_inputs['geometry'] != inputs['geometry']:
+                self._compute_raytracing_data(weights)
+            elif old_inputs['weights'] != inputs['weights']:
+                self.raytracing_data.update_weights(weights)
+        else:
+            if old_inputs['geometry'] != inputs['geometry']:
+                if (isinstance(self.raytracing_data, IdealRaytracingData) and
+                    self.manifold.solution_type() ==
+                                  'all tetrahedra positively oriented'):
+                    self.raytracing_data.update_geometry(
+                        areas = inputs['areas'],
+                        insphere_scale = inputs['insphere_scale'])
+                else:
+                    self._compute_raytracing_data(weights)
+                    old_inputs = inputs
+            elif isinstance(self.raytracing_data, IdealRaytracingData):
+                if old_inputs['areas'] != inputs['areas']:
+                    self.raytracing_data.update_areas(inputs['areas'])
+                if old_inputs['insphere_scale'] != inputs['insphere_scale']:
+                    self.raytracing_data.update_insphere_scale(
+                        inputs['insphere_scale'])
+            if old_inputs['weights'] != inputs['weights']:
+                if isinstance(self.raytracing_data, IdealRaytracingData):
+                    self.raytracing_data.update_weights(weights)
+
+        self.manifold_uniform_bindings = (
+            self.raytracing_data.get_uniform_bindings())
+
+        self._raytracing_data_inputs = inputs
+
+    def _compute_raytracing_data(self, weights):
         if self.trig_type == 'finite':
             self.raytracing_data = FiniteRaytracingData.from_triangulation(
                 self.manifold,
@@ -221,8 +271,24 @@ class RaytracingView(SimpleImageShaderWidget, HyperboloidNavigation):
                 insphere_scale = self.ui_parameter_dict['insphere_scale'][1],
                 weights = weights)
 
-        self.manifold_uniform_bindings = (
-            self.raytracing_data.get_uniform_bindings())
+    def _combinatorial_key(self):
+        """
+        Changes when the triangulation (or the peripheral curves) changes.
+        """
+        return (self.manifold._get_tetrahedra_gluing_data(),
+                self.manifold._get_cusp_indices_and_peripheral_curve_data())
+
+    def _geometric_key(self):
+        """
+        Changes when the Dehn-fillings or the shapes change.
+        """
+        if self.trig_type == 'finite':
+            # The hyperbolic structure is computed from the triangulation
+            # and the Dehn-fillings.
+            return self.manifold._to_string()
+        return ([ d['filling'] for d in self.manifold.cusp_info() ],
+                self.manifold.solution_type(),
+                [ complex(z) for z in self.manifold.tetrahedra_shapes('rect') ])
 
     def recompute_raytracing_data_and_redraw(self):
         self._initialize_raytracing_data()
@@ -1,8 +1,13 @@
 from .upper_halfspace_utilities import are_psl_matrices_close
+from ..drilling.spatial_dict import bucket_statistics
 
 class TetAndMatrixSet:
     epsilon = 1.0e-5
 
+    # The keys are the cells of a grid of this size (in each coordinate of
+    # the hyperboloid model), see _compute_keys.
+    scale = 8
+
     def __init__(self):
         """
         A set of pairs (tet, matrix) where tet is an index to a
@@ -11,63 +16,126 @@ class TetAndMatrixSet:
         Used to record which tetrahedra have already been visited when tiling
         H^3 by translates of the tetrahedra in a fundamental domain of a
         3-manifold.
+
+        >>> from snappy.SnapPy import matrix
+        >>> s = TetAndMatrixSet()
+        >>> m = matrix([[2.0, 1.0], [1.0, 1.0]])
+        >>> s.add((0, m)), s.add((1, m)), s.add((0, -m))
+        (True, True, False)
+        >>> n = matrix([[2.0 + 1e-9, 1.0], [1.0, 1.0]])
+        >>> s.add_many([(0, n), (2, m), (2, n)])
+        [False, True, False]
+        >>> s.add((0, matrix([[1.0, 1.0], [0.0, 1.0]])))
+        True
+        >>> s.bucket_statistics()['num_items']
+        2
         """
 
         # Maps key (see _compute_keys) of a PSL(2,C)-matrix to a list of Tile's.
         self.tiles = {}
 
+        self.num_comparisons = 0
+
     def _compute_keys(self, m):
         """
-        A list of one or two keys to look-up a matrix quickly.
+        A list of keys to look-up a matrix quickly, the first one being the
+        key the matrix is stored under.
+
+        The key is the cell of a grid containing the image of a basepoint
+        (namely j in the upper halfspace model) under the matrix, using
+        three coordinates of the hyperboloid model. Unlike, e.g., abs(m[0,0])
+        (which is 1 for all parabolic translations fixing infinity), this
+        separates all translates of the basepoint, so the buckets stay small.
 
         Note that two different words yield the same PSL(2,C)-matrix when
         using exact arithmetic but two slightly different matrices numerically.
-        Thus, we return more than one key to account for the fact that
-        rounding for those two matrices might be different.
+        Thus, we return the keys of the neighboring cells as well if the
+        point is close to the boundary of its cell to account for the fact
+        that rounding for those two matrices might be different.
         """
 
-        # Compute a real number - note that abs ensures that the result is
-        # the same when multiplying by -1 so that we work in PSL(2,C), not
-        # SL(2,C).
-        z = m[0,0]
-        RF = z.real().parent()
-        key_value = abs(m[0,0]) / RF(self.epsilon)
-
-        # Round to get an integer key
-        first_key = key_value.round()
-
-        # Compute how close the real number is to an integer
-        diff = key_value - first_key
-        if diff > 0.25:
-            # Another way of computing the same matrix could give a result
-            # rounding to the next higher integer, so add as potential
-            # key.
-            return [ first_key, first_key + 1 ]
-        if diff < -0.25:
-            # Analogoue.
-            return [ first_key, first_key - 1]
-
-        return [ first_key ]
+        a, b, c, d = [ complex(m[i, j]) for i in range(2) for j in range(2) ]
+
+        # The basepoint j corresponds to the identity when regarding points
+        # of H^3 as Hermitian matrices and its image is m * m^*. The
+        # coordinates are the same when multiplying m by -1 so that we work
+        # in PSL(2,C), not SL(2,C).
+        a_c_b_d = a * c.conjugate() + b * d.conjugate()
+        coordinates = [
+            (abs(a) ** 2 + abs(b) ** 2 - abs(c) ** 2 - abs(d) ** 2) / 2,
+            a_c_b_d.real,
+            a_c_b_d.imag ]
+
+        keys = [ () ]
+        for coordinate in coordinates:
+            value = coordinate * self.scale
+            # Round to get an integer key
+            first_key = round(value)
+            # Compute how close the real number is to an integer
+            diff = value - first_key
+            if diff > 0.25:
+                # Another way of computing the same matrix could give a
+                # result rounding to the next higher integer, so add as
+                # potential key.
+                candidates = [ first_key, first_key + 1 ]
+            elif diff < -0.25:
+                # Analogoue.
+                candidates = [ first_key, first_key - 1 ]
+            else:
+                candidates = [ first_key ]
+            keys = [ key + (candidate,)
+                     for key in keys
+                     for candidate in candidates ]
+
+        return keys
 
     def add(self, tet_and_matrix):
+        """
+        Adds the pair (tet, matrix). Returns True if the pair was not in
+        the set before.
+        """
+        return self._add(tet_and_matrix, self._compute_keys(tet_and_matrix[1]))
+
+    def add_many(self, tets_and_matrices):
+        """
+        Batched version of add, returning a list of booleans. Pairs in the
+        same batch are compared to each other as well, so the result is the
+        same as calling add for each pair in order.
+        """
+
+        keys_list = [ self._compute_keys(m) for tet, m in tets_and_matrices ]
+
+        return [ self._add(tet_and_matrix, keys)
+                 for tet_and_matrix, keys in zip(tets_and_matrices, keys_list) ]
+
+    def _add(self, tet_and_matrix, keys):
         tet, m = tet_and_matrix
 
-        # Compute potential keys
-        keys = self._compute_keys(m)
         for key in keys:
             # Look for tiles under that key
             for tile in self.tiles.get(key, []):
+                self.num_comparisons += 1
                 # Check that tiles are for the same matrix
                 if are_psl_matrices_close(tile.m, m, epsilon = self.epsilon):
                     # Add tetrahedron to that tile
                     return tile.add(tet)
 
         # No tile yet for this PSL(2,C)-matrix. Add one - using only
-        # one key, so that we don't have to update two tiles when adding
+        # one key, so that we don't have to update several tiles when adding
         # a new tetrahedron to an exisiting tile.
         self.tiles.setdefault(keys[0], []).append(_Tile(tet_and_matrix))
         return True
 
+    def bucket_statistics(self):
+        """
+        Reports the load of the buckets, see
+        snappy.drilling.spatial_dict.bucket_statistics, and the number of
+        matrix comparisons performed so far.
+        """
+        result = bucket_statistics(self.tiles)
+        result['num_comparisons'] = self.num_comparisons
+        return result
+
 class _Tile:
     def __init__(self, tet_and_matrix):
         """
@@ -58,27 +58,32 @@ def sage_methods(obj):
             pass
     return ans
 
-# Used for doctesting
+# Used for doctesting.  Filled in by _get_gui_status() when first needed
+# so that importing snappy does not import the GUI.
 _gui_status = {}
 
-try:
-    from snappy.gui import Tk_
-    _gui_status['tk'] = True
-except ImportError:
-    _gui_status['tk'] = False
-if _gui_status['tk']:
-    try:
-        import snappy.CyOpenGL
-        _gui_status['cyopengl'] = True
-    except:
-        _gui_status['cyopengl'] = False
-else:
-    _gui_status['cyopengl'] = False
-_gui_status['fake_root'] = False
+def _get_gui_status():
+    if not _gui_status:
+        try:
+            from snappy.gui import Tk_
+            _gui_status['tk'] = True
+        except ImportError:
+            _gui_status['tk'] = False
+        if _gui_status['tk']:
+            try:
+                import snappy.CyOpenGL
+                _gui_status['cyopengl'] = True
+            except:
+                _gui_status['cyopengl'] = False
+        else:
+            _gui_status['cyopengl'] = False
+        _gui_status['fake_root'] = False
+    return _gui_status
 
 def cyopengl_works():
-    if not _gui_status['cyopengl']:
+    if not _get_gui_status()['cyopengl']:
         return False
+    from snappy.gui import Tk_
     # if we are running the tests from the snappy app the default root will
     # already exist -- it will be the tkterminal window.  Otherwise, we open
     # a root window here to serve as the master of all of the GUI windows
@@ -94,13 +99,14 @@ def cyopengl_works():
     return _gui_status['cyopengl']
 
 def tk_root():
-    if _gui_status['tk']:
+    if _get_gui_status()['tk']:
+        from snappy.gui import Tk_
         return Tk_._default_root
     else:
         return None
 
 def root_is_fake():
-    return _gui_status['fake_root']
+    return _get_gui_status()['fake_root']
 
 class DocTestParser(doctest.DocTestParser):
     _use_cyopengl_initialized = False
@@ -125,7 +125,7 @@ class Mcomplex:
             for face in TwoSubsimplices:
                 new_tet.attach(face,
                                old_to_new[new_to_old[new_tet].Neighbor[face]],
-                               new_to_old[new_tet].Gluing[face].tuple())
+                               new_to_old[new_tet].Gluing[face])
         if base_arrow is None:
             return self.__class__(new_tets)
         else:
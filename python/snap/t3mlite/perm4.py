@@ -172,6 +172,15 @@ index_of_inverse_by_index = {i:perm_basic_to_index(inv(perm))
 index_mult_table_by_index = {(i, j):perm_basic_to_index(P*Q)
                        for i, P in enumerate(perm_basic_by_index)
                        for j, Q in enumerate(perm_basic_by_index)}
+
+# The same tables as flat lists indexed by integers, i.e., the entry for
+# (i, j) is at 24 * i + j, respectively, 16 * i + bitmap.
+
+_index_mult_table = [ index_mult_table_by_index[i, j]
+                      for i in range(24) for j in range(24) ]
+_bitmap_images = [ bitmap_images[i, bitmap]
+                   for i in range(24) for bitmap in range(16) ]
+
 class Perm4():
     """
     Class Perm4: A permutation of {0,1,2,3}.
@@ -181,21 +190,57 @@ class Perm4():
     the permutation can be specified by setting "sign=0" (even) or
     "sign=1" (odd).  The default sign is odd, since odd permutations
     describe orientation-preserving gluings.
+
+    There are only 24 instances of Perm4 (one for each permutation) so
+    that composing or inverting permutations does not allocate any new
+    objects:
+
+    >>> Perm4((1, 0, 2, 3)) is Perm4({0 : 1, 1 : 0, 2 : 2, 3 : 3})
+    True
+    >>> P = Perm4((2, 3, 1, 0))
+    >>> P * inv(P) is Perm4(0)
+    True
     """
 
-    def __init__(self, init, sign=1):
+    def __new__(cls, init, sign=1):
         if isinstance(init, int):
-            self._index = init
-            self._tuple = S4_tuples[init]
-        elif isinstance(init, Perm4):
-            self._index = init._index
-            self._tuple = init._tuple
-        elif len(init) == 4:
-            self._tuple = tuple(init[i] for i in range(4))
-            self._index = perm_tuple_to_index[self._tuple]
+            return _perms_by_index[init]
+        if isinstance(init, Perm4):
+            return init
+        if len(init) == 4:
+            t = tuple(init[i] for i in range(4))
         else:
-            self._tuple = Perm4Basic(init, sign).tuple()
-            self._index = perm_tuple_to_index[self._tuple]
+            t = Perm4Basic(init, sign).tuple()
+        return _perms_by_index[perm_tuple_to_index[t]]
+
+    @staticmethod
+    def _from_index(index):
+        # Only used to create the 24 instances in _perms_by_index.
+        perm = object.__new__(Perm4)
+        perm._index = index
+        perm._tuple = S4_tuples[index]
+        perm._bitmap_offset = 16 * index
+        perm._mult_offset = 24 * index
+        return perm
+
+    def __reduce__(self):
+        return (Perm4, (self._index,))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def index(self):
+        """
+        The index of the permutation in the list of all permutations
+        returned by Perm4.S4().
+
+        >>> Perm4((0, 1, 3, 2)).index()
+        1
+        """
+        return self._index
 
     def image(self, bitmap):
         """
@@ -205,7 +250,7 @@ class Perm4():
         >>> Perm4([2, 3, 1, 0]).image(10)
         9
         """
-        return bitmap_images[self._index, bitmap]
+        return _bitmap_images[self._bitmap_offset + bitmap]
 
     def __repr__(self):
         return str(self._tuple)
@@ -217,10 +262,8 @@ class Perm4():
         >>> Perm4([2, 3, 1, 0])(range(3))
         (2, 3, 1)
         """
-        image = []
-        for i in a_tuple:
-            image.append(self._tuple[i])
-        return tuple(image)
+        t = self._tuple
+        return tuple([ t[i] for i in a_tuple ])
 
     def __getitem__(self, index):
         """
@@ -242,7 +285,8 @@ class Perm4():
         >>> Q * P
         (2, 3, 0, 1)
         """
-        return mult_table_by_index[self._index, other._index]
+        return _perms_by_index[
+            _index_mult_table[self._mult_offset + other._index]]
 
     def __invert__(self):
         """
@@ -251,7 +295,7 @@ class Perm4():
         >>> inv(Perm4([2, 1, 3, 0]))
         (3, 1, 0, 2)
         """
-        return inverse_by_index[self._index]
+        return _inverse_perms_by_index[self._index]
 
     def sign(self):
         """
@@ -281,8 +325,7 @@ class Perm4():
         >>> len(list(Perm4.S4()))
         24
         """
-        for p in S4_tuples:
-            yield Perm4(p)
+        yield from _perms_by_index
 
     @staticmethod
     def A4():
@@ -293,7 +336,7 @@ class Perm4():
         12
         """
         for p in A4_tuples:
-            yield Perm4(p)
+            yield _perms_by_index[perm_tuple_to_index[p]]
 
     @staticmethod
     def KleinFour():
@@ -304,10 +347,16 @@ class Perm4():
         4
         """
         for p in KleinFour_tuples:
-            yield Perm4(p)
+            yield _perms_by_index[perm_tuple_to_index[p]]
+
+# The flyweight instances
+_perms_by_index = [ Perm4._from_index(i) for i in range(24) ]
+_inverse_perms_by_index = [ _perms_by_index[index_of_inverse_by_index[i]]
+                            for i in range(24) ]
 
-inverse_by_index = {k:Perm4(v) for k, v in index_of_inverse_by_index.items()}
-mult_table_by_index = {k:Perm4(v) for k, v in index_mult_table_by_index.items()}
+inverse_by_index = dict(enumerate(_inverse_perms_by_index))
+mult_table_by_index = {k:_perms_by_index[v]
+                       for k, v in index_mult_table_by_index.items()}
 
 __all__ = ["Perm4", "inv"]
 
@@ -32,10 +32,11 @@ class Tetrahedron:
             self.Gluing[two_subsimplex] = None
         else:
             perm = Perm4(perm_data)
+            other_two_subsimplex = perm.image(two_subsimplex)
             self.Neighbor[two_subsimplex] = tet
             self.Gluing[two_subsimplex] = perm
-            tet.Neighbor[perm.image(two_subsimplex)] = self
-            tet.Gluing[perm.image(two_subsimplex)] = inv(self.Gluing[two_subsimplex])
+            tet.Neighbor[other_two_subsimplex] = self
+            tet.Gluing[other_two_subsimplex] = inv(perm)
 # Reverse the orientation.  Vertices are relabelled by a transposition
 # and gluings are adjusted.
 #
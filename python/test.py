@@ -4,9 +4,13 @@ import snappy
 import snappy.snap.test
 import spherogram.test
 import snappy.matrix
+import snappy.word_evaluator
+import snappy.sparse_smith_form
+import snappy.lazy_import
 import snappy.verify.test
 import snappy.ptolemy.test
 import snappy.raytracing.cohomology_fractal
+import snappy.raytracing.filling_solver
 import snappy.raytracing.geodesic
 import snappy.raytracing.geodesics
 import snappy.raytracing.ideal_raytracing_data
@@ -89,7 +93,11 @@ modules += [snappy.SnapPy,
             snappy,
             snap_doctester,
             snappy.matrix,
+            snappy.word_evaluator,
+            snappy.sparse_smith_form,
+            snappy.lazy_import,
             snappy.raytracing.cohomology_fractal,
+            snappy.raytracing.filling_solver,
             snappy.raytracing.geodesic,
             snappy.raytracing.geodesics,
             snappy.raytracing.ideal_raytracing_data,
@@ -98,12 +106,96 @@ modules += [snappy.SnapPy,
             ptolemy_doctester,
             spherogram_doctester]
 
+# Modules requiring NumPy
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+if numpy:
+    import snappy.raytracing.cpu_raytracer
+    import snappy.raytracing.cohomology_fractal_statistics
+    import snappy.tessellation
+    import snappy.export_stl
+    modules += [snappy.raytracing.cpu_raytracer,
+                snappy.raytracing.cohomology_fractal_statistics,
+                snappy.tessellation,
+                snappy.export_stl]
+
 def snappy_verify_doctester(verbose):
     return snappy.verify.test.run_doctests(verbose, print_info=False)
 
 snappy_verify_doctester.__name__ = 'snappy.verify'
 modules.append(snappy_verify_doctester)
 
+# Subpackages that "import snappy" should not import (see __getattr__
+# in snappy/__init__.py).  plink is not listed since spherogram imports it.
+lazily_imported_modules = ['snappy.verify', 'snappy.snap', 'snappy.ptolemy',
+                           'snappy.drilling', 'snappy.raytracing',
+                           'snappy.twister', 'snappy.database',
+                           'snappy.gui', 'snappy.browser']
+
+def import_times(statement):
+    """
+    Runs the given statement with "python -X importtime" in a new process
+    and returns a list of triples (name, cumulative time in seconds,
+    nested) for each imported module, where nested means that it was
+    imported while importing another module.
+    """
+    import subprocess
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True)
+    if process.returncode:
+        raise RuntimeError(process.stderr)
+    # Lines look like "import time:  self [us] | cumulative | imported package"
+    # with the name of a nested module indented further.
+    times = []
+    for line in process.stderr.splitlines():
+        if line.startswith('import time:') and not line.endswith('package'):
+            self_time, cumulative, name = line[12:].split('|')
+            times.append((name.strip(), int(cumulative) / 1e6,
+                          name.startswith('  ')))
+    return times
+
+def import_time_tester(verbose):
+    """
+    Checks that "import snappy" imports none of the lazily_imported_modules.
+    If verbose, also compares the time it takes with the time of also
+    importing the subpackages snappy used to import eagerly (not a test
+    since separate timings of subprocesses vary too much).
+    """
+    failed = 0
+    lazy_times = import_times('import snappy')
+    lazy_names = set(name for name, seconds, nested in lazy_times)
+    for name in lazily_imported_modules:
+        if name in lazy_names:
+            print('"import snappy" imported %s' % name)
+            failed += 1
+
+    if verbose:
+        eager_modules = ['snappy'] + [
+            name for name in lazily_imported_modules
+            if name.startswith('snappy.') and
+            name not in ['snappy.gui', 'snappy.browser']]
+        eager_times = import_times('import ' + ', '.join(eager_modules))
+
+        lazy_time = sum(seconds for name, seconds, nested in lazy_times
+                        if name == 'snappy' and not nested)
+        eager_time = sum(seconds for name, seconds, nested in eager_times
+                         if name in eager_modules and not nested)
+
+        print('"import snappy" took %.3fs instead of %.3fs, slowest modules:'
+              % (lazy_time, eager_time))
+        slowest = sorted(lazy_times, key=lambda x: x[1], reverse=True)
+        for name, seconds, nested in slowest[:10]:
+            print('%10.3fs %s' % (seconds, name))
+    return doctest.TestResults(failed, len(lazily_imported_modules))
+
+import_time_tester.__name__ = 'import snappy'
+modules.append(import_time_tester)
+
 def graphics_failures(verbose, windows, use_modernopengl):
     if cyopengl_works():
         print("Testing graphics ...")
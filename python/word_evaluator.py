@@ -0,0 +1,161 @@
+"""
+Evaluation of many words in the generators of a group with memoization
+of the products of subwords.
+
+When enumerating many short words (for example, when searching for
+geodesics or computing traces), most words share long prefixes with
+other words. A WordEvaluator caches the products of such prefixes (and,
+for long words, of aligned blocks of the word) so that each product
+only needs to be computed once.
+"""
+
+from collections import OrderedDict
+import operator
+
+__all__ = ['WordEvaluator']
+
+class WordEvaluator:
+    """
+    Evaluates words in the generators of a group given the images of the
+    generators.
+
+    The images of the generators are given as a dictionary mapping a
+    positive integer i to the image of the i-th generator and -i to the
+    image of its inverse (as used by the SnapPea kernel, see also
+    word_as_list). Words are given as sequences of such non-zero integers
+    or, if word_to_list is given, as strings.
+
+    The products of subwords are memoized in a least-recently-used cache
+    holding at most max_cache_size entries so that memory is bounded.
+
+    To illustrate, we use strings as the images of generators and
+    concatenation as the group operation:
+
+    >>> E = WordEvaluator({1: 'a', -1: 'A', 2: 'b', -2: 'B'},
+    ...                   identity = '', multiply = operator.add)
+    >>> E.evaluate([1, 2, -1])
+    'abA'
+    >>> E.evaluate_words([[1, 2], [1, 2, 2], [], [-2]])
+    ['ab', 'abb', '', 'B']
+    >>> E.num_cached_products()
+    3
+
+    Long words are split into blocks whose lengths are powers of two:
+
+    >>> E.evaluate(40 * [1, -2]) == 40 * 'aB'
+    True
+
+    The cache is bounded:
+
+    >>> E = WordEvaluator({1: 'a', -1: 'A'}, identity = '',
+    ...                   multiply = operator.add, max_cache_size = 3)
+    >>> E.evaluate_words([[1, 1, 1, 1], [-1, -1, -1]])
+    ['aaaa', 'AAA']
+    >>> E.num_cached_products()
+    3
+    """
+
+    # Words up to this length are evaluated by extending the longest
+    # cached prefix. Longer words are split into blocks.
+    prefix_length_limit = 16
+
+    def __init__(self, generator_images,
+                 identity = None,
+                 multiply = operator.mul,
+                 word_to_list = None,
+                 max_cache_size = 65536):
+        self._generator_images = generator_images
+        self._identity = identity
+        self._multiply = multiply
+        self._word_to_list = word_to_list
+        self._max_cache_size = max_cache_size
+        self._cache = OrderedDict()
+
+    def evaluate(self, word):
+        """
+        Returns the image of the given word.
+        """
+        return self._evaluate(self._to_tuple(word))
+
+    def evaluate_words(self, words):
+        """
+        Returns the images of the given words (as list in the same order).
+
+        The words are evaluated in lexicographic order so that products
+        of common prefixes are still in the cache when needed.
+        """
+        tuples = [ self._to_tuple(word) for word in words ]
+        results = len(tuples) * [ None ]
+        for i in sorted(range(len(tuples)), key = lambda i: tuples[i]):
+            results[i] = self._evaluate(tuples[i])
+        return results
+
+    def num_cached_products(self):
+        """
+        Number of products of subwords currently memoized.
+        """
+        return len(self._cache)
+
+    def clear_cache(self):
+        self._cache.clear()
+
+    def _to_tuple(self, word):
+        if isinstance(word, str):
+            if self._word_to_list is None:
+                raise TypeError(
+                    "Words must be given as sequences of integers unless "
+                    "word_to_list was given.")
+            word = self._word_to_list(word)
+        return tuple(word)
+
+    def _lookup(self, word):
+        result = self._cache.get(word)
+        if result is not None:
+            self._cache.move_to_end(word)
+        return result
+
+    def _store(self, word, value):
+        self._cache[word] = value
+        if len(self._cache) > self._max_cache_size:
+            self._cache.popitem(last = False)
+
+    def _evaluate(self, word):
+        n = len(word)
+        if n == 0:
+            if self._identity is None:
+                raise ValueError(
+                    "Cannot evaluate empty word without identity.")
+            return self._identity
+        if n == 1:
+            return self._generator_images[word[0]]
+
+        result = self._lookup(word)
+        if result is not None:
+            return result
+
+        if n > self.prefix_length_limit:
+            # Split off the largest block whose length is a power of two
+            # so that words with a common prefix share the products of
+            # the aligned blocks.
+            h = 1 << ((n - 1).bit_length() - 1)
+            result = self._multiply(self._evaluate(word[:h]),
+                                    self._evaluate(word[h:]))
+            self._store(word, result)
+            return result
+
+        # Find longest prefix whose product is cached.
+        k = n - 1
+        while k > 1:
+            result = self._lookup(word[:k])
+            if result is not None:
+                break
+            k -= 1
+        else:
+            result = self._generator_images[word[0]]
+
+        # And extend it letter by letter.
+        for i in range(k, n):
+            result = self._multiply(result, self._generator_images[word[i]])
+            self._store(word[:i + 1], result)
+
+        return result